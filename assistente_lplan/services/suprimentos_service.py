@@ -402,14 +402,14 @@ class SuprimentosAssistantService:
         if not rows:
             svc = MapaControleService(obra, MapaControleFilters())
             all_items = svc._filtered_items()
-            for item in [i for i in all_items if i.is_atrasado][:30]:
+            for item in [i for i in all_items if i["atrasado"]][:30]:
                 rows.append(
                     {
-                        "insumo": (item.insumo.descricao if item.insumo else "-")[:50],
-                        "local": item.local_aplicacao.nome if item.local_aplicacao else "-",
-                        "etapa": (item.status_etapa or "-")[:30],
-                        "sc": (item.numero_sc or "-")[:20],
-                        "cobrar": (item.quem_cobrar or "-")[:30],
+                        "insumo": (item["insumo_descricao"] or "-")[:50],
+                        "local": item["local_nome"] or "-",
+                        "etapa": (item["status_etapa"] or "-")[:30],
+                        "sc": (item["numero_sc"] or "-")[:20],
+                        "cobrar": (item["quem_cobrar"] or "-")[:30],
                     }
                 )
 
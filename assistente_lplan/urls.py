@@ -11,5 +11,7 @@ urlpatterns = [
     path("perguntar/", views.perguntar, name="perguntar"),
     path("feedback/", views.feedback, name="feedback"),
     path("rdo-periodo-pdf/", views.download_rdo_period_pdf, name="rdo_period_pdf"),
+    path("rdo-periodo-pdf/<int:job_id>/status/", views.rdo_period_pdf_status, name="rdo_period_pdf_status"),
+    path("rdo-periodo-pdf/<int:job_id>/arquivo/", views.rdo_period_pdf_file, name="rdo_period_pdf_file"),
 ]
 
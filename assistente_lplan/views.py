@@ -11,6 +11,7 @@ from django.contrib.auth.decorators import login_required
 from django.core.cache import cache
 from django.http import FileResponse, Http404, HttpResponseForbidden, JsonResponse
 from django.shortcuts import redirect, render
+from django.urls import reverse
 from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 
@@ -21,8 +22,8 @@ from assistente_lplan.services.permissions import AssistantPermissionService
 from assistente_lplan.services.learning import GuidedLearningService
 from assistente_lplan.services.messages import MessageCatalog
 from assistente_lplan.services.suggested_questions import build_assistant_home_context
-from core.models import Project
-from core.utils.rdo_period_pdf import generate_rdo_period_pdf_bytes
+from core.models import Project, RdoPeriodReportJob
+from core.utils.rdo_period_pdf import request_rdo_period_report
 
 logger = logging.getLogger(__name__)
 
@@ -204,10 +205,45 @@ def perguntar(request):
         return JsonResponse(fallback_payload, status=500)
 
 
+def _rdo_period_scoped_project(user, project_id: int):
+    perm = AssistantPermissionService(user)
+    scope = perm.build_scope()
+    qs = Project.objects.filter(is_active=True, id=project_id)
+    if scope.role != "admin":
+        qs = qs.filter(id__in=scope.project_ids)
+    return qs.first()
+
+
+def _rdo_period_job_for_user(user, job_id: int) -> RdoPeriodReportJob:
+    job = RdoPeriodReportJob.objects.select_related("project").filter(pk=job_id).first()
+    if not job or not _rdo_period_scoped_project(user, job.project_id):
+        raise Http404()
+    return job
+
+
+def _rdo_period_job_payload(job: RdoPeriodReportJob) -> dict:
+    done = job.status == RdoPeriodReportJob.Status.DONE and bool(job.file)
+    return {
+        "job_id": job.pk,
+        "status": job.status,
+        "status_label": job.get_status_display(),
+        "sections_done": job.sections_done,
+        "sections_total": job.sections_total,
+        "progress": job.progress_percent,
+        "error": job.error[:300] if job.status == RdoPeriodReportJob.Status.FAILED else "",
+        "download_url": reverse("assistente_lplan:rdo_period_pdf_file", args=[job.pk]) if done else "",
+    }
+
+
 @login_required
 @require_http_methods(["GET"])
 def download_rdo_period_pdf(request):
-    """Download do PDF consolidado de RDO (token assinado gerado pelo assistente)."""
+    """
+    PDF consolidado de RDO (token assinado gerado pelo assistente).
+
+    A geração roda em background (RdoPeriodReportJob): se já existe artefato atualizado, baixa
+    direto; senão mostra a página de acompanhamento, que consulta o status até o arquivo ficar pronto.
+    """
     token = (request.GET.get("t") or "").strip()
     if not token:
         raise Http404()
@@ -227,22 +263,45 @@ def download_rdo_period_pdf(request):
     except (KeyError, TypeError, ValueError):
         raise Http404() from None
 
-    perm = AssistantPermissionService(request.user)
-    scope = perm.build_scope()
-    qs = Project.objects.filter(is_active=True, id=pid)
-    if scope.role != "admin":
-        qs = qs.filter(id__in=scope.project_ids)
-    project = qs.first()
+    project = _rdo_period_scoped_project(request.user, pid)
     if not project:
         raise Http404()
 
-    buf = generate_rdo_period_pdf_bytes(project, d0, d1)
-    if not buf:
+    job = request_rdo_period_report(project, d0, d1, user=request.user)
+    if not job:
         raise Http404()
+    if job.status == RdoPeriodReportJob.Status.DONE and job.file:
+        return redirect("assistente_lplan:rdo_period_pdf_file", job_id=job.pk)
+
+    return render(
+        request,
+        "assistente_lplan/rdo_period_pdf_status.html",
+        {"job": job, "job_payload": _rdo_period_job_payload(job)},
+    )
+
 
-    code = (project.code or "obra").replace(" ", "_")
-    fname = f"RDO_consolidado_{code}_{d0}_{d1}.pdf"
-    return FileResponse(buf, content_type="application/pdf", as_attachment=True, filename=fname)
+@login_required
+@require_http_methods(["GET"])
+def rdo_period_pdf_status(request, job_id: int):
+    """Polling do job do PDF consolidado."""
+    job = _rdo_period_job_for_user(request.user, job_id)
+    return JsonResponse(_rdo_period_job_payload(job))
+
+
+@login_required
+@require_http_methods(["GET"])
+def rdo_period_pdf_file(request, job_id: int):
+    """Download do artefato gerado pelo job."""
+    job = _rdo_period_job_for_user(request.user, job_id)
+    if job.status != RdoPeriodReportJob.Status.DONE or not job.file:
+        raise Http404()
+    try:
+        fh = job.file.open("rb")
+    except (FileNotFoundError, OSError):
+        raise Http404() from None
+    code = (job.project.code or "obra").replace(" ", "_")
+    fname = f"RDO_consolidado_{code}_{job.date_from}_{job.date_to}.pdf"
+    return FileResponse(fh, content_type="application/pdf", as_attachment=True, filename=fname)
 
 
 @login_required
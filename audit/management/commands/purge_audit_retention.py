@@ -1,12 +1,13 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
-from audit.retention import purge_audit_events_older_than, purge_user_login_logs_older_than
+from audit.retention import RETENTION_TARGETS, purge_target, target_available
 
 
 class Command(BaseCommand):
     help = (
-        'Remove AuditEvent e UserLoginLog mais antigos que a política (AuditRetentionPolicy) '
-        'ou que os dias indicados. Use --dry-run para apenas contar.'
+        'Remove registos mais antigos que a política (AuditRetentionPolicy) ou que os dias indicados, '
+        'em lotes por PK com pausa entre eles. Alvos: ' + ', '.join(RETENTION_TARGETS) + '. '
+        'Use --dry-run para apenas contar e --archive para gravar os registos em .jsonl.gz antes de apagar.'
     )
 
     def add_arguments(self, parser):
@@ -15,6 +16,18 @@ class Command(BaseCommand):
             action='store_true',
             help='Só mostra quantos registos seriam apagados.',
         )
+        parser.add_argument(
+            '--target',
+            action='append',
+            choices=sorted(RETENTION_TARGETS),
+            help='Alvo a expurgar (repetível). Padrão: todos os disponíveis.',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Ignora a política e usa N dias para os alvos escolhidos.',
+        )
         parser.add_argument(
             '--audit-days',
             type=int,
@@ -37,22 +50,50 @@ class Command(BaseCommand):
             action='store_true',
             help='Só expurga UserLoginLog.',
         )
+        parser.add_argument('--batch-size', type=int, default=None, help='Registos por lote (RETENTION_BATCH_SIZE).')
+        parser.add_argument('--pause', type=float, default=None, help='Segundos entre lotes (RETENTION_BATCH_PAUSE).')
+        parser.add_argument('--archive', action='store_true', help='Grava os registos em .jsonl.gz antes de apagar.')
+        parser.add_argument('--archive-dir', default=None, help='Pasta dos arquivos (RETENTION_ARCHIVE_DIR).')
 
     def handle(self, *args, **options):
         dry = options['dry_run']
         only_audit = options['only_audit']
         only_login = options['only_login']
         if only_audit and only_login:
-            self.stderr.write('Use apenas um de --only-audit / --only-login.')
-            return
+            raise CommandError('Use apenas um de --only-audit / --only-login.')
 
-        if not only_login:
-            n = purge_audit_events_older_than(days=options['audit_days'], dry_run=dry)
-            self.stdout.write(
-                self.style.WARNING(f"AuditEvent: {n} registo(s) {'(simulação)' if dry else 'apagado(s)'}."),
-            )
-        if not only_audit:
-            n2 = purge_user_login_logs_older_than(days=options['login_days'], dry_run=dry)
-            self.stdout.write(
-                self.style.WARNING(f"UserLoginLog: {n2} registo(s) {'(simulação)' if dry else 'apagado(s)'}."),
+        if options['target']:
+            keys = options['target']
+        elif only_audit:
+            keys = ['audit_events']
+        elif only_login:
+            keys = ['user_login_log']
+        else:
+            keys = list(RETENTION_TARGETS)
+        days_by_key = {'audit_events': options['audit_days'], 'user_login_log': options['login_days']}
+
+        def progress(key, deleted):
+            self.stdout.write(f'  {key}: {deleted} apagado(s)…')
+
+        for key in keys:
+            target = RETENTION_TARGETS[key]
+            if not target_available(target):
+                self.stdout.write(f'{key}: app não instalado, ignorado.')
+                continue
+            days = options['days'] if options['days'] is not None else days_by_key.get(key)
+            result = purge_target(
+                target,
+                days=days,
+                dry_run=dry,
+                batch_size=options['batch_size'],
+                pause=options['pause'],
+                archive=options['archive'],
+                archive_dir=options['archive_dir'],
+                progress=None if dry else progress,
             )
+            msg = f"{target.model}: {result['deleted']} registo(s) {'(simulação)' if dry else 'apagado(s)'}"
+            if result['batches']:
+                msg += f" em {result['batches']} lote(s)"
+            if result['archive']:
+                msg += f" — arquivo {result['archive']}"
+            self.stdout.write(self.style.WARNING(msg + '.'))
@@ -0,0 +1,14 @@
+"""
+Buffer de auditoria por request: os eventos registrados durante a view são gravados num único
+``bulk_create`` no fim do request (ver audit.recording).
+"""
+from audit.recording import buffered_audit_events
+
+
+class AuditBufferMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with buffered_audit_events():
+            return self.get_response(request)
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def seed_policies(apps, schema_editor):
+    Policy = apps.get_model('audit', 'AuditRetentionPolicy')
+    for key, description, days in (
+        ('integration_event_log', 'Retenção sugerida para logs de eventos de integração. Ajuste no Admin.', 180),
+        ('integration_command_log', 'Retenção sugerida para logs de comandos de integração. Ajuste no Admin.', 180),
+        (
+            'assistant_question_log',
+            'Retenção sugerida para perguntas/respostas do assistente (mantém as que têm feedback). Ajuste no Admin.',
+            365,
+        ),
+        (
+            'user_activity_events',
+            'Retenção sugerida para a linha do tempo de atividade por usuário (mesmo horizonte da auditoria). '
+            'Ajuste no Admin.',
+            730,
+        ),
+    ):
+        Policy.objects.get_or_create(key=key, defaults={'description': description, 'retention_days': days})
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('audit', '0002_seed_retention_policies'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_policies, migrations.RunPython.noop),
+    ]
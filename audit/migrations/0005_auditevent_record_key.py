@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0004_auditevent_created_at_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditevent',
+            name='record_key',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True, verbose_name='Chave de gravação'),
+        ),
+    ]
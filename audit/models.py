@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class AuditEvent(models.Model):
@@ -9,7 +10,8 @@ class AuditEvent(models.Model):
     e alterações de escopo que não teriam linha do tempo própria.
     """
 
-    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Preenchido no momento do registro (não no flush em lote de audit.recording).
+    created_at = models.DateTimeField(default=timezone.now, editable=False, db_index=True)
     actor = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -43,6 +45,15 @@ class AuditEvent(models.Model):
     payload = models.JSONField(default=dict, blank=True, verbose_name='Detalhes (JSON)')
     ip_address = models.GenericIPAddressField(null=True, blank=True, verbose_name='IP')
     user_agent = models.CharField(max_length=256, blank=True, verbose_name='User-Agent')
+    # Gerada no registro: após o ``bulk_create`` em lote recupera as PKs onde o INSERT múltiplo
+    # não as devolve (MySQL). Eventos anteriores ficam sem chave.
+    record_key = models.UUIDField(
+        null=True,
+        blank=True,
+        unique=True,
+        editable=False,
+        verbose_name='Chave de gravação',
+    )
 
     class Meta:
         ordering = ['-created_at']
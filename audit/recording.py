@@ -1,11 +1,43 @@
+"""
+Gravação de eventos de auditoria.
+
+Fora de um escopo de buffer, ``record_audit_event`` grava na hora (como sempre). Dentro de
+``buffered_audit_events()`` (middleware ``audit.middleware.AuditBufferMiddleware`` por request;
+decorador para tasks/comandos) os eventos registrados em autocommit ficam em memória e saem num
+``bulk_create`` ao fim do escopo:
+
+- evento registrado dentro de transação é gravado na hora, dentro dela: entra e sai junto com os
+  dados do negócio (rollback/savepoint desfeito leva o evento), sem depender de ``on_commit``;
+- a ordem de registro é preservada (ordem do INSERT = ordem de ``pk``) e ``created_at`` é o
+  instante do registro;
+- o lote é sempre um ``bulk_create``; onde o INSERT múltiplo não devolve as PKs (MySQL) elas são
+  lidas numa consulta pela ``record_key`` gerada no registro;
+- erro no lote cai para INSERT linha a linha; o que ainda falhar vai para o log com o conteúdo.
+
+``audit_events_recorded`` avisa quem projeta eventos (o ``bulk_create`` não dispara ``post_save``).
+"""
 from __future__ import annotations
 
+import logging
+import threading
+import uuid
+from contextlib import ContextDecorator
 from typing import Any
 
+from django.db import connection, transaction
+from django.dispatch import Signal
 from django.http import HttpRequest
+from django.utils import timezone
 
 from audit.models import AuditEvent
 
+logger = logging.getLogger(__name__)
+
+# Enviado após cada flush em lote com ``events`` = lista de AuditEvent já gravados.
+audit_events_recorded = Signal()
+
+_state = threading.local()
+
 
 def _request_meta(request: HttpRequest | None) -> tuple[str | None, str]:
     if not request:
@@ -38,9 +70,12 @@ def record_audit_event(
     """
     Persiste um evento de auditoria. Deve ser chamado após a operação ter sucesso
     (ou imediatamente antes de delete irreversível, com snapshot no payload).
+
+    Com buffer ativo o evento devolvido ainda não tem ``pk`` (é gravado no fim do escopo).
     """
     ip, ua = _request_meta(request)
-    return AuditEvent.objects.create(
+    event = AuditEvent(
+        created_at=timezone.now(),
         actor=actor if getattr(actor, 'pk', None) else None,
         subject_user=subject_user if subject_user and getattr(subject_user, 'pk', None) else None,
         action_code=action_code,
@@ -49,7 +84,76 @@ def record_audit_event(
         payload=payload or {},
         ip_address=ip,
         user_agent=ua,
+        record_key=uuid.uuid4(),
     )
+    buffer = getattr(_state, 'buffer', None)
+    if buffer is None or connection.in_atomic_block:
+        # Em transação o INSERT vai junto com ela; só o autocommit é adiado para o lote.
+        event.save()
+        return event
+    buffer['ready'].append(event)
+    return event
+
+
+def _write_events(events: list[AuditEvent]) -> None:
+    if not events:
+        return
+    try:
+        with transaction.atomic():
+            AuditEvent.objects.bulk_create(events)
+            if any(event.pk is None for event in events):
+                # Sem retorno de PK no INSERT múltiplo (MySQL): uma consulta pela chave do registro.
+                pks = dict(
+                    AuditEvent.objects.filter(record_key__in=[e.record_key for e in events])
+                    .values_list('record_key', 'pk')
+                )
+                for event in events:
+                    event.pk = pks.get(event.record_key)
+    except Exception:
+        logger.exception('Falha no flush em lote de %s evento(s) de auditoria; gravando um a um', len(events))
+        for event in events:
+            event.pk = None
+            event._state.adding = True
+            try:
+                event.save(force_insert=True)
+            except Exception:
+                logger.error(
+                    'Evento de auditoria não gravado: %s %s actor=%s subject=%s %s',
+                    event.created_at.isoformat(), event.action_code, event.actor_id,
+                    event.subject_user_id, event.summary,
+                )
+    written = [e for e in events if e.pk]
+    if written:
+        audit_events_recorded.send(sender=AuditEvent, events=written)
+
+
+def _flush(buffer: dict) -> None:
+    ready = buffer['ready']
+    buffer['ready'] = []
+    _write_events(ready)
+
+
+class buffered_audit_events(ContextDecorator):
+    """
+    Escopo de buffer (request, task, comando). Aninhável: só o escopo externo grava.
+    Sai com exceção também grava o que já foi registrado.
+    """
+
+    def __enter__(self):
+        depth = getattr(_state, 'depth', 0)
+        if depth == 0:
+            _state.buffer = {'ready': []}
+        _state.depth = depth + 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _state.depth -= 1
+        if _state.depth:
+            return False
+        buffer = _state.buffer
+        _state.buffer = None
+        _flush(buffer)
+        return False
 
 
 def summarize_user_admin_diff(before: dict, after: dict, password_changed: bool) -> str:
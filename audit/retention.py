@@ -1,18 +1,76 @@
 """
 Expurgo por idade com base em AuditRetentionPolicy (fallback em código se não houver linha).
+
+Cada alvo de ``RETENTION_TARGETS`` é apagado em lotes por PK (``RETENTION_BATCH_SIZE``), cada
+lote na sua transação e com pausa (``RETENTION_BATCH_PAUSE``) entre eles, para não segurar
+lock nem inflar a transação em tabelas grandes. Opcionalmente os registros vão antes para um
+arquivo JSON Lines comprimido (``RETENTION_ARCHIVE_DIR``).
 """
 from __future__ import annotations
 
+import gzip
+import json
+import logging
+import time
+from dataclasses import dataclass, field
 from datetime import timedelta
+from pathlib import Path
+from typing import Callable
 
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
-from audit.models import AuditEvent, AuditRetentionPolicy
+from audit.models import AuditRetentionPolicy
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_AUDIT_EVENT_RETENTION_DAYS = 730
 DEFAULT_USER_LOGIN_LOG_RETENTION_DAYS = 365
 
 
+@dataclass(frozen=True)
+class RetentionTarget:
+    """Tabela expurgável: modelo (``app_label.Model``), chave da política e dias padrão."""
+
+    key: str
+    model: str
+    default_days: int
+    date_field: str = 'created_at'
+    # Registros que nunca saem por idade (ex.: perguntas com feedback de aprendizado).
+    keep: Q | None = None
+    # Campos extras (inclusive de relações 1:1) gravados no arquivo junto com a linha.
+    archive_extra: tuple[str, ...] = field(default_factory=tuple)
+
+
+RETENTION_TARGETS: dict[str, RetentionTarget] = {
+    t.key: t
+    for t in (
+        RetentionTarget('audit_events', 'audit.AuditEvent', DEFAULT_AUDIT_EVENT_RETENTION_DAYS),
+        RetentionTarget('user_login_log', 'accounts.UserLoginLog', DEFAULT_USER_LOGIN_LOG_RETENTION_DAYS),
+        # Projeção de logins, auditoria, pedidos e diários: mesmo horizonte da auditoria.
+        RetentionTarget(
+            'user_activity_events',
+            'gestao_aprovacao.UserActivityEvent',
+            DEFAULT_AUDIT_EVENT_RETENTION_DAYS,
+            date_field='at',
+        ),
+        RetentionTarget('integration_event_log', 'integrations.IntegrationEventLog', 180),
+        RetentionTarget('integration_command_log', 'integrations.IntegrationCommandLog', 180),
+        RetentionTarget(
+            'assistant_question_log',
+            'assistente_lplan.AssistantQuestionLog',
+            365,
+            keep=Q(learning_feedbacks__isnull=False),
+            archive_extra=('response_log__summary', 'response_log__response_payload'),
+        ),
+    )
+}
+
+
 def _policy_days(key: str, default: int) -> int:
     try:
         p = AuditRetentionPolicy.objects.get(key=key)
@@ -23,23 +81,116 @@ def _policy_days(key: str, default: int) -> int:
     return default
 
 
-def purge_audit_events_older_than(*, days: int | None = None, dry_run: bool = False) -> int:
-    d = days if days is not None else _policy_days('audit_events', DEFAULT_AUDIT_EVENT_RETENTION_DAYS)
-    cutoff = timezone.now() - timedelta(days=max(d, 1))
-    qs = AuditEvent.objects.filter(created_at__lt=cutoff)
-    n = qs.count()
-    if not dry_run and n:
-        qs.delete()
-    return n
+def target_available(target: RetentionTarget) -> bool:
+    """False quando o app do alvo não está em INSTALLED_APPS (ex.: integrations pausado)."""
+    try:
+        apps.get_app_config(target.model.split('.')[0])
+    except LookupError:
+        return False
+    return True
+
 
+class _Archive:
+    """Arquivo ``<chave>-<timestamp>.jsonl.gz`` aberto só no primeiro lote com registros."""
 
-def purge_user_login_logs_older_than(*, days: int | None = None, dry_run: bool = False) -> int:
-    from accounts.models import UserLoginLog
+    def __init__(self, directory: str | Path, target: RetentionTarget):
+        self.path = Path(directory) / f"{target.key}-{timezone.now():%Y%m%d-%H%M%S}.jsonl.gz"
+        self._fh = None
 
-    d = days if days is not None else _policy_days('user_login_log', DEFAULT_USER_LOGIN_LOG_RETENTION_DAYS)
+    def write(self, rows: list[dict]) -> None:
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = gzip.open(self.path, 'at', encoding='utf-8')
+        for row in rows:
+            self._fh.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False))
+            self._fh.write('\n')
+        # Flush por lote: o que já foi apagado está no disco mesmo se o processo cair.
+        self._fh.flush()
+
+    def close(self) -> Path | None:
+        if self._fh is None:
+            return None
+        self._fh.close()
+        return self.path
+
+
+def purge_target(
+    target: RetentionTarget | str,
+    *,
+    days: int | None = None,
+    dry_run: bool = False,
+    batch_size: int | None = None,
+    pause: float | None = None,
+    archive: bool = False,
+    archive_dir: str | Path | None = None,
+    progress: Callable[[str, int], None] | None = None,
+) -> dict:
+    """
+    Expurga os registros do alvo mais antigos que a política (ou ``days``).
+
+    Retorna ``{'key', 'cutoff', 'deleted', 'batches', 'archive'}``; em ``dry_run`` só conta
+    (``deleted`` = quantos sairiam). ``progress(key, apagados_ate_agora)`` é chamado a cada lote.
+    """
+    if isinstance(target, str):
+        target = RETENTION_TARGETS[target]
+    model = apps.get_model(target.model)
+    d = days if days is not None else _policy_days(target.key, target.default_days)
     cutoff = timezone.now() - timedelta(days=max(d, 1))
-    qs = UserLoginLog.objects.filter(created_at__lt=cutoff)
-    n = qs.count()
-    if not dry_run and n:
-        qs.delete()
-    return n
+    qs = model.objects.filter(**{f'{target.date_field}__lt': cutoff})
+    if target.keep is not None:
+        qs = qs.exclude(target.keep)
+    result = {'key': target.key, 'cutoff': cutoff, 'deleted': 0, 'batches': 0, 'archive': None}
+    if dry_run:
+        result['deleted'] = qs.count()
+        return result
+
+    size = max(1, int(batch_size or getattr(settings, 'RETENTION_BATCH_SIZE', 2000)))
+    wait = float(pause if pause is not None else getattr(settings, 'RETENTION_BATCH_PAUSE', 0.2))
+    writer = None
+    if archive:
+        writer = _Archive(archive_dir or getattr(settings, 'RETENTION_ARCHIVE_DIR', 'retention_archive'), target)
+    last_pk = None
+    try:
+        while True:
+            batch_qs = qs.order_by('pk')
+            if last_pk is not None:
+                batch_qs = batch_qs.filter(pk__gt=last_pk)
+            pks = list(batch_qs.values_list('pk', flat=True)[:size])
+            if not pks:
+                break
+            last_pk = pks[-1]
+            with transaction.atomic():
+                if writer is not None:
+                    rows = list(
+                        model.objects.filter(pk__in=pks)
+                        .order_by('pk')
+                        .values(*[f.attname for f in model._meta.concrete_fields], *target.archive_extra)
+                    )
+                    writer.write(rows)
+                model.objects.filter(pk__in=pks).delete()
+            result['deleted'] += len(pks)
+            result['batches'] += 1
+            if progress is not None:
+                progress(target.key, result['deleted'])
+            if len(pks) < size:
+                break
+            if wait > 0:
+                time.sleep(wait)
+    finally:
+        if writer is not None:
+            path = writer.close()
+            result['archive'] = str(path) if path else None
+    if result['deleted']:
+        logger.info(
+            'Retenção %s: %s registro(s) apagado(s) em %s lote(s) (corte %s)',
+            target.key, result['deleted'], result['batches'], cutoff.isoformat(),
+        )
+    return result
+
+
+def purge_audit_events_older_than(*, days: int | None = None, dry_run: bool = False, **kwargs) -> int:
+    return purge_target('audit_events', days=days, dry_run=dry_run, **kwargs)['deleted']
+
+
+def purge_user_login_logs_older_than(*, days: int | None = None, dry_run: bool = False, **kwargs) -> int:
+    return purge_target('user_login_log', days=days, dry_run=dry_run, **kwargs)['deleted']
@@ -0,0 +1,97 @@
+"""
+Buffer de auditoria: lote só para eventos em autocommit; em transação o INSERT vai junto com ela.
+"""
+from __future__ import annotations
+
+from unittest.mock import PropertyMock, patch
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+
+from audit.models import AuditEvent
+from audit.recording import audit_events_recorded, buffered_audit_events, record_audit_event
+from gestao_aprovacao.models import UserActivityEvent
+
+
+class _Rollback(Exception):
+    pass
+
+
+class BufferedAuditEventsTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('auditor', password='x')
+        self.batches = []
+
+        def _receiver(sender, events, **kwargs):
+            self.batches.append([e.summary for e in events])
+
+        audit_events_recorded.connect(_receiver, weak=False, dispatch_uid='test_audit_batches')
+        self.addCleanup(audit_events_recorded.disconnect, dispatch_uid='test_audit_batches')
+
+    def _record(self, summary):
+        return record_audit_event(actor=self.user, action_code='teste', summary=summary)
+
+    def test_autocommit_events_are_written_in_one_batch_at_scope_exit(self):
+        with buffered_audit_events():
+            with buffered_audit_events():
+                first = self._record('a')
+            self._record('b')
+            self.assertIsNone(first.pk)
+            self.assertFalse(AuditEvent.objects.exists())
+
+        self.assertEqual(self.batches, [['a', 'b']])
+        self.assertEqual(list(AuditEvent.objects.order_by('pk').values_list('summary', flat=True)), ['a', 'b'])
+
+    def test_events_inside_atomic_are_inserted_in_the_business_transaction(self):
+        with buffered_audit_events():
+            self._record('antes')
+            with transaction.atomic():
+                inside = self._record('dentro')
+                self.assertIsNotNone(inside.pk)
+                self.assertTrue(AuditEvent.objects.filter(pk=inside.pk).exists())
+            self._record('depois')
+
+        self.assertEqual(self.batches, [['antes', 'depois']])
+        self.assertEqual(
+            sorted(AuditEvent.objects.values_list('summary', flat=True)), ['antes', 'dentro', 'depois']
+        )
+
+    def test_rolled_back_transaction_and_savepoint_drop_their_events(self):
+        with buffered_audit_events():
+            try:
+                with transaction.atomic():
+                    self._record('desfeito')
+                    raise _Rollback
+            except _Rollback:
+                pass
+            with transaction.atomic():
+                self._record('mantido')
+                try:
+                    with transaction.atomic():
+                        self._record('savepoint desfeito')
+                        raise _Rollback
+                except _Rollback:
+                    pass
+
+        self.assertEqual(list(AuditEvent.objects.values_list('summary', flat=True)), ['mantido'])
+        self.assertEqual(self.batches, [])
+
+    def test_batch_without_returned_pks_recovers_them_by_record_key(self):
+        pks = []
+        audit_events_recorded.connect(
+            lambda sender, events, **kw: pks.extend(e.pk for e in events),
+            weak=False, dispatch_uid='test_audit_pks',
+        )
+        self.addCleanup(audit_events_recorded.disconnect, dispatch_uid='test_audit_pks')
+
+        features = type(connection.features)
+        with patch.object(features, 'can_return_rows_from_bulk_insert', new_callable=PropertyMock, return_value=False):
+            with buffered_audit_events():
+                record_audit_event(actor=self.user, action_code='teste', summary='a', subject_user=self.user)
+                record_audit_event(actor=self.user, action_code='teste', summary='b', subject_user=self.user)
+
+        self.assertEqual(pks, list(AuditEvent.objects.order_by('pk').values_list('pk', flat=True)))
+        self.assertEqual(
+            sorted(UserActivityEvent.objects.filter(source='audit').values_list('source_pk', flat=True)), pks,
+        )
@@ -0,0 +1,96 @@
+"""
+Expurgo por idade em lotes, com arquivo JSON Lines comprimido.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from assistente_lplan.models import AssistantLearningFeedback, AssistantQuestionLog, AssistantResponseLog
+from audit.models import AuditEvent
+from audit.retention import purge_target
+
+
+def _read_archive(path) -> list[dict]:
+    with gzip.open(path, 'rt', encoding='utf-8') as fh:
+        return [json.loads(line) for line in fh]
+
+
+class PurgeTargetTests(TestCase):
+    def setUp(self):
+        self.archive_dir = Path(tempfile.mkdtemp(prefix='retention_test_'))
+        self.addCleanup(shutil.rmtree, self.archive_dir, ignore_errors=True)
+        self.old = timezone.now() - timedelta(days=40)
+
+    def _old_event(self, **kwargs):
+        event = AuditEvent.objects.create(action_code='teste', **kwargs)
+        AuditEvent.objects.filter(pk=event.pk).update(created_at=self.old)
+        return event
+
+    def test_purges_in_batches_and_archives_every_row(self):
+        old_ids = [
+            self._old_event(summary=f'antigo {i}', payload={'i': i}).pk
+            for i in range(5)
+        ]
+        recent = AuditEvent.objects.create(action_code='teste', summary='recente')
+        progress = []
+
+        result = purge_target(
+            'audit_events',
+            days=30,
+            batch_size=2,
+            pause=0,
+            archive=True,
+            archive_dir=self.archive_dir,
+            progress=lambda key, deleted: progress.append((key, deleted)),
+        )
+
+        self.assertEqual((result['deleted'], result['batches']), (5, 3))
+        self.assertEqual(progress, [('audit_events', 2), ('audit_events', 4), ('audit_events', 5)])
+        self.assertEqual(list(AuditEvent.objects.values_list('pk', flat=True)), [recent.pk])
+        archive = Path(result['archive'])
+        self.assertEqual(archive.parent, self.archive_dir)
+        self.assertTrue(archive.name.startswith('audit_events-') and archive.name.endswith('.jsonl.gz'))
+        rows = _read_archive(archive)
+        self.assertEqual([row['id'] for row in rows], old_ids)
+        self.assertEqual([row['summary'] for row in rows], [f'antigo {i}' for i in range(5)])
+        self.assertEqual(rows[3]['payload'], {'i': 3})
+
+    def test_dry_run_counts_without_deleting_or_archiving(self):
+        self._old_event(summary='antigo')
+        result = purge_target('audit_events', days=30, dry_run=True, archive=True, archive_dir=self.archive_dir)
+        self.assertEqual(result['deleted'], 1)
+        self.assertIsNone(result['archive'])
+        self.assertEqual(AuditEvent.objects.count(), 1)
+        self.assertEqual(list(self.archive_dir.iterdir()), [])
+
+    def test_keep_rows_stay_and_archive_extra_fields_are_written(self):
+        user = User.objects.create_user('retencao', password='x')
+        logs = []
+        for i in range(3):
+            log = AssistantQuestionLog.objects.create(user=user, question=f'pergunta {i}')
+            AssistantResponseLog.objects.create(
+                question_log=log, summary=f'resumo {i}', response_payload={'n': i}
+            )
+            logs.append(log)
+        AssistantQuestionLog.objects.filter(pk__in=[log.pk for log in logs]).update(created_at=self.old)
+        AssistantLearningFeedback.objects.create(question_log=logs[1], user=user, helpful=True)
+
+        result = purge_target(
+            'assistant_question_log', days=30, batch_size=1, pause=0, archive=True, archive_dir=self.archive_dir
+        )
+
+        self.assertEqual((result['deleted'], result['batches']), (2, 2))
+        self.assertEqual(list(AssistantQuestionLog.objects.values_list('pk', flat=True)), [logs[1].pk])
+        rows = _read_archive(result['archive'])
+        self.assertEqual([row['question'] for row in rows], ['pergunta 0', 'pergunta 2'])
+        self.assertEqual([row['response_log__summary'] for row in rows], ['resumo 0', 'resumo 2'])
+        self.assertEqual(rows[1]['response_log__response_payload'], {'n': 2})
@@ -41,6 +41,8 @@ from .models import (
     SupportTicketAttachment,
     OccurrenceTag,
     DiaryOccurrence,
+    RdoPeriodReportJob,
+    DiaryEmailDelivery,
 )
 
 
@@ -400,3 +402,21 @@ class DiaryApprovalHistoryAdmin(admin.ModelAdmin):
     search_fields = ['diary__project__code', 'diary__report_number', 'comment', 'decided_by__username']
     readonly_fields = ['created_at']
 
+
+@admin.register(RdoPeriodReportJob)
+class RdoPeriodReportJobAdmin(admin.ModelAdmin):
+    """PDFs consolidados de RDO gerados em background."""
+    list_display = ['project', 'date_from', 'date_to', 'status', 'sections_done', 'sections_total', 'requested_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'project']
+    search_fields = ['project__code', 'project__name', 'requested_by__username']
+    readonly_fields = ['created_at', 'updated_at', 'started_at', 'finished_at', 'source_fingerprint']
+
+
+@admin.register(DiaryEmailDelivery)
+class DiaryEmailDeliveryAdmin(admin.ModelAdmin):
+    """Entregas por destinatário dos e-mails de RDO aprovado."""
+    list_display = ['diary', 'kind', 'email', 'status', 'attempts', 'sent_at', 'updated_at']
+    list_filter = ['status', 'kind']
+    search_fields = ['email', 'diary__project__code']
+    raw_id_fields = ['diary', 'user']
+    readonly_fields = ['created_at', 'updated_at', 'sent_at']
@@ -6,4 +6,14 @@ class CoreConfig(AppConfig):
     name = 'core'
 
     def ready(self):
-        import core.signals  # noqa: F401
\ No newline at end of file
+        import core.signals  # noqa: F401
+
+        # Logo/fontes/estilos dos PDFs resolvidos uma vez por processo (ver core.utils.pdf_assets).
+        try:
+            from core.utils.pdf_assets import pdf_assets
+
+            pdf_assets.load()
+        except Exception:
+            import logging
+
+            logging.getLogger(__name__).warning('pdf_assets: pré-carga falhou', exc_info=True)
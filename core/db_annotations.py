@@ -19,6 +19,7 @@ def correlated_count_subquery(
     flt = {fk_field: OuterRef(outer_ref), **filters}
     return Subquery(
         model.objects.filter(**flt)
+        .order_by()  # sem isso o Meta.ordering do modelo entra no GROUP BY
         .values(fk_field)
         .annotate(_n=Count('id'))
         .values('_n')[:1],
@@ -43,3 +44,17 @@ def coalesced_correlated_count(
         ),
         0,
     )
+
+
+def annotate_activity_parent_id(queryset, *, name: str = 'parent_pk'):
+    """
+    Anota o id do pai de cada Activity (treebeard MP_Node) numa subconsulta pelo ``path``,
+    evitando ``get_parent()`` por linha. Raízes recebem None.
+    """
+    from django.db.models.functions import Length, Substr
+
+    model = queryset.model
+    parent = model.objects.filter(
+        path=Substr(OuterRef('path'), 1, Length(OuterRef('path')) - model.steplen),
+    ).values('pk')[:1]
+    return queryset.annotate(**{name: Subquery(parent)})
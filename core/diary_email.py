@@ -3,6 +3,9 @@ Envio de diários de obra por e-mail (envio diário para os e-mails cadastrados
 Envia o PDF do diário em anexo; se a geração do PDF falhar, envia apenas o link.
 Usado pelo comando enviar_diarios_por_email e opcionalmente por tarefa Celery.
 
+E-mails de RDO aprovado: ApprovedDiaryEmailDispatcher (PDFs em pool de threads, uma conexão
+SMTP por lote e estado de entrega por destinatário em DiaryEmailDelivery).
+
 Se EMAIL_RDO_FROM e EMAIL_RDO_HOST_USER estiverem configurados, os e-mails do RDO
 são enviados por essa conta (ex.: rdo@lplan.com.br); caso contrário usa DEFAULT_FROM_EMAIL.
 """
@@ -72,111 +75,31 @@ def get_client_diary_url(diary):
     return f"{getattr(settings, 'SITE_URL', 'http://localhost:8000').rstrip('/')}{path}"
 
 
-def send_diary_to_owners(diary):
-    """
-    Envia e-mail para cada dono da obra com link direto para a página do diário (portal cliente).
-    Chamado quando o diário é salvo como "Salvar diário" (status APROVADO).
-    """
-    from core.models import ProjectOwner
-
-    from core.comunicacao_constants import TIPO_RDO_CLIENTE
-
-    owners = ProjectOwner.objects.filter(project=diary.project).select_related('user')
-    if not owners:
-        return
-
-    link = get_client_diary_url(diary)
+def _owner_email_body(diary, user):
+    nome_destinatario = (user.get_full_name() or user.username or '').strip() if user else ''
+    saudacao = f"Prezado(a) {nome_destinatario}," if nome_destinatario else "Prezado(a),"
     project = diary.project
-    target_date = diary.date
-    subject = f"Diário de Obra - {project.name} - {target_date.strftime('%d/%m/%Y')}"
-    from gestao_aprovacao.email_utils import _criar_log_email, _enviar_email_com_retry
-
-    connection, from_email = _get_rdo_connection_and_from()
-    try:
-        for po in owners:
-            email_addr = po.user.email
-            if not email_addr:
-                continue
-            if not _pode_enviar_com_router(
-                email_addr,
-                TIPO_RDO_CLIENTE,
-                contexto={
-                    'modulo': 'rdo',
-                    'objeto_tipo': 'construction_diary',
-                    'objeto_id': diary.pk,
-                    'origem': 'rdo_envio_cliente',
-                },
-                usuario=po.user,
-            ):
-                continue
-            try:
-                nome_destinatario = (po.user.get_full_name() or po.user.username or '').strip()
-                saudacao = f"Prezado(a) {nome_destinatario}," if nome_destinatario else "Prezado(a),"
-                body = f"""{saudacao}
+    return f"""{saudacao}
 
-Informamos que o diário de obra referente ao dia {target_date.strftime('%d/%m/%Y')} da obra {project.name} ({project.code}) foi aprovado e está disponível para visualização.
+Informamos que o diário de obra referente ao dia {diary.date.strftime('%d/%m/%Y')} da obra {project.name} ({project.code}) foi aprovado e está disponível para visualização.
 
 Para acessar o documento e enviar comentários (prazo de até 24 horas úteis após o envio do diário; sábados e domingos não contam), utilize o link abaixo:
 
-{link}
+{get_client_diary_url(diary)}
 
 Atenciosamente,
 
 LPLAN - Diário de Obra
 Mensagem automática. Não responda a este e-mail.
 """
-                email_obj = EmailMessage(
-                    subject=subject,
-                    body=body,
-                    from_email=from_email,
-                    to=[email_addr],
-                    connection=connection,
-                )
-                email_log = _criar_log_email('diario_dono_obra', None, [email_addr], subject)
-                sucesso = _enviar_email_com_retry(email_obj, email_log)
-                if sucesso:
-                    logger.info("Enviado diário %s ao dono da obra %s.", diary.pk, po.user.username)
-                else:
-                    logger.warning("Falha no envio diário %s ao dono %s.", diary.pk, po.user.username)
-            except Exception as e:
-                logger.exception("Erro ao enviar diário ao dono %s: %s", po.user.username, e)
-    finally:
-        if connection:
-            connection.close()
-
 
-def send_diary_pdf_to_recipients(diary):
-    """
-    Envia o PDF detalhado do diário para os e-mails cadastrados na obra (diary_recipients).
-    Chamado quando o diário é aprovado; usa o mesmo SMTP do RDO se configurado.
-    """
-    recipients = list(diary.project.diary_recipients.values_list('email', flat=True))
-    if not recipients:
-        return
-    from core.comunicacao_constants import TIPO_RDO_LISTA_INTERNA
 
-    recipients = [
-        email for email in recipients
-        if _pode_enviar_com_router(
-            email,
-            TIPO_RDO_LISTA_INTERNA,
-            contexto={
-                'modulo': 'rdo',
-                'objeto_tipo': 'construction_diary',
-                'objeto_id': diary.pk,
-                'origem': 'rdo_envio_lista_interna',
-            },
-        )
-    ]
-    if not recipients:
-        return
+def _recipients_email_body(diary, with_pdf):
     project = diary.project
     target_date = diary.date
     link = get_diary_url(diary)
-    subject = f"Diário de Obra (detalhado) - {project.name} - {target_date.strftime('%d/%m/%Y')}"
-    pdf_bytes = _generate_diary_pdf(diary, pdf_type='detailed')
-    if pdf_bytes:
-        body = f"""Prezado(a) senhor(a),
+    if with_pdf:
+        return f"""Prezado(a) senhor(a),
 
 Segue em anexo o diário de obra detalhado referente ao dia {target_date.strftime('%d/%m/%Y')} da obra {project.name} ({project.code or ''}).
 
@@ -187,8 +110,7 @@ Atenciosamente,
 LPLAN - Diário de Obra
 Mensagem automática. Não responda a este e-mail.
 """
-    else:
-        body = f"""Prezado(a) senhor(a),
+    return f"""Prezado(a) senhor(a),
 
 O diário de obra referente ao dia {target_date.strftime('%d/%m/%Y')} da obra {project.name} ({project.code or ''}) está disponível.
 
@@ -199,38 +121,310 @@ Atenciosamente,
 LPLAN - Diário de Obra
 Mensagem automática. Não responda a este e-mail.
 """
-    from gestao_aprovacao.email_utils import _criar_log_email, _enviar_email_com_retry
 
-    connection, from_email = _get_rdo_connection_and_from()
-    try:
-        email = EmailMessage(
+
+class ApprovedDiaryEmailDispatcher:
+    """
+    Despacho em lote dos e-mails de RDO aprovado (clientes + lista da obra).
+
+    - os PDFs detalhados dos diários do lote são gerados num pool limitado de threads
+      (``RDO_EMAIL_PDF_WORKERS``);
+    - cada lote de até ``RDO_EMAIL_BATCH_SIZE`` diários abre **uma** conexão SMTP e envia
+      todas as mensagens por ela;
+    - o resultado de cada destinatário fica em ``DiaryEmailDelivery``: reexecutar o despacho
+      (retry do Celery, comando de reenvio) só manda o que está pendente ou falhou.
+
+    Uso::
+
+        stats = ApprovedDiaryEmailDispatcher().dispatch([diary.pk])
+        # {'sent': 3, 'failed': 0, 'skipped': 0}
+    """
+
+    def __init__(self, *, max_workers=None, batch_size=None, kinds=None):
+        from core.models import DiaryEmailDelivery
+
+        self.max_workers = max(1, int(
+            max_workers if max_workers is not None else getattr(settings, 'RDO_EMAIL_PDF_WORKERS', 3)
+        ))
+        self.batch_size = max(1, int(
+            batch_size if batch_size is not None else getattr(settings, 'RDO_EMAIL_BATCH_SIZE', 25)
+        ))
+        self.kinds = tuple(kinds) if kinds else (
+            DiaryEmailDelivery.Kind.OWNER,
+            DiaryEmailDelivery.Kind.RECIPIENT,
+        )
+
+    def dispatch(self, diary_ids):
+        """Envia os e-mails pendentes dos diários informados; retorna contagens."""
+        stats = {'sent': 0, 'failed': 0, 'skipped': 0}
+        ids = list(dict.fromkeys(int(pk) for pk in diary_ids))
+        for i in range(0, len(ids), self.batch_size):
+            self._dispatch_batch(ids[i:i + self.batch_size], stats)
+        return stats
+
+    # -- planejamento --------------------------------------------------------
+
+    def _resolve_targets(self, diary):
+        """Lista (kind, email, user) permitidos pelas preferências de comunicação."""
+        from core.comunicacao_constants import TIPO_RDO_CLIENTE, TIPO_RDO_LISTA_INTERNA
+        from core.models import DiaryEmailDelivery, ProjectOwner
+
+        targets = []
+        if DiaryEmailDelivery.Kind.OWNER in self.kinds:
+            owners = ProjectOwner.objects.filter(project_id=diary.project_id).select_related('user')
+            for po in owners:
+                email_addr = (po.user.email or '').strip()
+                if email_addr and _pode_enviar_com_router(
+                    email_addr,
+                    TIPO_RDO_CLIENTE,
+                    contexto={
+                        'modulo': 'rdo',
+                        'objeto_tipo': 'construction_diary',
+                        'objeto_id': diary.pk,
+                        'origem': 'rdo_envio_cliente',
+                    },
+                    usuario=po.user,
+                ):
+                    targets.append((DiaryEmailDelivery.Kind.OWNER, email_addr, po.user))
+        if DiaryEmailDelivery.Kind.RECIPIENT in self.kinds:
+            for email_addr in diary.project.diary_recipients.values_list('email', flat=True):
+                if _pode_enviar_com_router(
+                    email_addr,
+                    TIPO_RDO_LISTA_INTERNA,
+                    contexto={
+                        'modulo': 'rdo',
+                        'objeto_tipo': 'construction_diary',
+                        'objeto_id': diary.pk,
+                        'origem': 'rdo_envio_lista_interna',
+                    },
+                ):
+                    targets.append((DiaryEmailDelivery.Kind.RECIPIENT, email_addr, None))
+        return targets
+
+    def _pending_deliveries(self, diary, stats):
+        """Cria as linhas que faltam e devolve as que ainda precisam ser enviadas."""
+        from core.models import DiaryEmailDelivery
+
+        targets = self._resolve_targets(diary)
+        existing = {
+            (d.kind, d.email.lower()): d
+            for d in DiaryEmailDelivery.objects.filter(diary=diary, kind__in=self.kinds)
+        }
+        missing = [
+            DiaryEmailDelivery(diary=diary, kind=kind, email=email_addr, user=user)
+            for kind, email_addr, user in targets
+            if (kind, email_addr.lower()) not in existing
+        ]
+        if missing:
+            DiaryEmailDelivery.objects.bulk_create(missing, ignore_conflicts=True)
+            existing = {
+                (d.kind, d.email.lower()): d
+                for d in DiaryEmailDelivery.objects.filter(diary=diary, kind__in=self.kinds)
+            }
+        user_by_key = {(kind, email_addr.lower()): user for kind, email_addr, user in targets}
+        pending = []
+        for key, delivery in existing.items():
+            if key not in user_by_key:
+                continue
+            if delivery.status == DiaryEmailDelivery.Status.SENT:
+                stats['skipped'] += 1
+                continue
+            delivery.user = user_by_key[key] or delivery.user
+            pending.append(delivery)
+        pending.sort(key=lambda d: (d.kind, d.email))
+        return pending
+
+    # -- anexos -------------------------------------------------------------
+
+    @staticmethod
+    def _render_one(diary_id):
+        """Executado nas threads do pool: cada thread usa (e fecha) suas conexões de banco."""
+        from django.db import connections
+        from core.models import ConstructionDiary
+
+        try:
+            diary = ConstructionDiary.objects.select_related('project').get(pk=diary_id)
+            buf = _generate_diary_pdf(diary, pdf_type='detailed')
+            return diary_id, buf.getvalue() if buf else None
+        except Exception as exc:
+            logger.warning("PDF do diário %s não gerado para e-mail: %s", diary_id, exc)
+            return diary_id, None
+        finally:
+            connections.close_all()
+
+    def _render_attachments(self, diaries):
+        """{diary_id: bytes do PDF ou None}; gera em paralelo quando há mais de um diário."""
+        if not diaries:
+            return {}
+        workers = min(self.max_workers, len(diaries))
+        if workers <= 1:
+            result = {}
+            for diary in diaries:
+                buf = _generate_diary_pdf(diary, pdf_type='detailed')
+                result[diary.pk] = buf.getvalue() if buf else None
+            return result
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rdo-email-pdf') as pool:
+            return dict(pool.map(self._render_one, [d.pk for d in diaries]))
+
+    # -- envio --------------------------------------------------------------
+
+    def _build_message(self, diary, delivery, pdf_bytes, from_email, connection):
+        from core.models import DiaryEmailDelivery
+
+        project = diary.project
+        day = diary.date.strftime('%d/%m/%Y')
+        if delivery.kind == DiaryEmailDelivery.Kind.OWNER:
+            subject = f"Diário de Obra - {project.name} - {day}"
+            body = _owner_email_body(diary, delivery.user)
+        else:
+            subject = f"Diário de Obra (detalhado) - {project.name} - {day}"
+            body = _recipients_email_body(diary, with_pdf=bool(pdf_bytes))
+        msg = EmailMessage(
             subject=subject,
             body=body,
             from_email=from_email,
-            to=recipients,
+            to=[delivery.email],
             connection=connection,
         )
-        if pdf_bytes:
+        if delivery.kind == DiaryEmailDelivery.Kind.RECIPIENT and pdf_bytes:
             from core.utils.pdf_generator import get_rdo_pdf_filename
-            filename = get_rdo_pdf_filename(project, target_date)
-            email.attach(filename, pdf_bytes.getvalue(), 'application/pdf')
-        email_log = _criar_log_email('diario_obra', None, recipients, subject)
-        sucesso = _enviar_email_com_retry(email, email_log)
-        if sucesso:
-            logger.info(
-                "Enviado PDF detalhado diário %s (obra %s) para %d e-mail(s) cadastrado(s).",
-                diary.pk, project.code, len(recipients),
-            )
+
+            msg.attach(get_rdo_pdf_filename(project, diary.date), pdf_bytes, 'application/pdf')
+        return msg
+
+    def _dispatch_batch(self, diary_ids, stats):
+        from django.utils import timezone
+        from core.models import ConstructionDiary, DiaryEmailDelivery
+        from gestao_aprovacao.email_utils import _criar_log_email
+
+        diaries = list(
+            ConstructionDiary.objects.filter(pk__in=diary_ids).select_related('project').order_by('pk')
+        )
+        plan = [(diary, self._pending_deliveries(diary, stats)) for diary in diaries]
+        plan = [(diary, deliveries) for diary, deliveries in plan if deliveries]
+        if not plan:
+            return
+
+        pdfs = self._render_attachments([
+            diary for diary, deliveries in plan
+            if any(d.kind == DiaryEmailDelivery.Kind.RECIPIENT for d in deliveries)
+        ])
+
+        connection, from_email = _get_rdo_connection_and_from()
+        if connection is None:
+            connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as exc:
+            logger.exception("Conexão SMTP do RDO indisponível: %s", exc)
+            for _diary, deliveries in plan:
+                for delivery in deliveries:
+                    self._mark(delivery, ok=False, error=exc)
+                    stats['failed'] += 1
+            return
+
+        try:
+            for diary, deliveries in plan:
+                for delivery in deliveries:
+                    msg = self._build_message(diary, delivery, pdfs.get(diary.pk), from_email, connection)
+                    tipo = 'diario_dono_obra' if delivery.kind == DiaryEmailDelivery.Kind.OWNER else 'diario_obra'
+                    email_log = _criar_log_email(tipo, None, [delivery.email], msg.subject)
+                    try:
+                        if not connection.send_messages([msg]):
+                            raise RuntimeError('backend de e-mail não confirmou o envio')
+                    except Exception as exc:
+                        logger.warning(
+                            "Falha no envio do diário %s para %s: %s", diary.pk, delivery.email, exc,
+                        )
+                        self._mark(delivery, ok=False, error=exc)
+                        if email_log:
+                            email_log.marcar_como_falhou(exc)
+                        stats['failed'] += 1
+                        # Após erro SMTP a sessão pode ter caído; reabre para os próximos.
+                        try:
+                            connection.close()
+                            connection.open()
+                        except Exception:
+                            logger.debug("Reabertura da conexão SMTP falhou.", exc_info=True)
+                        continue
+                    self._mark(delivery, ok=True, now=timezone.now())
+                    if email_log:
+                        email_log.marcar_como_enviado()
+                    stats['sent'] += 1
+        finally:
+            try:
+                connection.close()
+            except Exception:
+                pass
+        logger.info(
+            "E-mails de RDO aprovado: %d diário(s), %d enviado(s), %d falha(s).",
+            len(plan), stats['sent'], stats['failed'],
+        )
+
+    @staticmethod
+    def _mark(delivery, *, ok, error=None, now=None):
+        from core.models import DiaryEmailDelivery
+
+        delivery.attempts += 1
+        if ok:
+            delivery.status = DiaryEmailDelivery.Status.SENT
+            delivery.sent_at = now
+            delivery.last_error = ''
         else:
-            logger.warning(
-                "Falha ao enviar PDF diário %s (obra %s) para %d destinatário(s).",
-                diary.pk, project.code, len(recipients),
-            )
-    except Exception as e:
-        logger.exception("Erro ao enviar PDF aos e-mails da obra %s: %s", project.code, e)
-    finally:
-        if connection:
-            connection.close()
+            delivery.status = DiaryEmailDelivery.Status.FAILED
+            delivery.last_error = str(error)[:2000]
+        delivery.save(update_fields=['status', 'attempts', 'last_error', 'sent_at', 'user', 'updated_at'])
+
+
+def send_approved_diary_emails(diary_ids, **kwargs):
+    """Atalho: despacha os e-mails pendentes dos diários aprovados informados."""
+    return ApprovedDiaryEmailDispatcher(**kwargs).dispatch(diary_ids)
+
+
+def resend_failed_diary_emails(*, max_attempts=5, days=7, idle_minutes=10):
+    """
+    Reenvia entregas pendentes/com falha recentes (até ``max_attempts`` tentativas).
+    Só pega linhas paradas há ``idle_minutes`` (não disputa com um despacho em andamento).
+    Retorna as contagens do despacho.
+    """
+    from datetime import timedelta
+    from django.utils import timezone
+    from core.models import DiaryEmailDelivery
+
+    diary_ids = (
+        DiaryEmailDelivery.objects
+        .filter(
+            status__in=[DiaryEmailDelivery.Status.PENDING, DiaryEmailDelivery.Status.FAILED],
+            attempts__lt=max_attempts,
+            created_at__gte=timezone.now() - timedelta(days=days),
+            updated_at__lt=timezone.now() - timedelta(minutes=idle_minutes),
+        )
+        .values_list('diary_id', flat=True)
+        .distinct()
+    )
+    return send_approved_diary_emails(list(diary_ids))
+
+
+def send_diary_to_owners(diary):
+    """
+    Envia e-mail para cada dono da obra com link direto para a página do diário (portal cliente).
+    Chamado quando o diário é salvo como "Salvar diário" (status APROVADO).
+    """
+    from core.models import DiaryEmailDelivery
+
+    return send_approved_diary_emails([diary.pk], kinds=[DiaryEmailDelivery.Kind.OWNER])
+
+
+def send_diary_pdf_to_recipients(diary):
+    """
+    Envia o PDF detalhado do diário para os e-mails cadastrados na obra (diary_recipients).
+    Chamado quando o diário é aprovado; usa o mesmo SMTP do RDO se configurado.
+    """
+    from core.models import DiaryEmailDelivery
+
+    return send_approved_diary_emails([diary.pk], kinds=[DiaryEmailDelivery.Kind.RECIPIENT])
 
 
 def _generate_diary_pdf(diary, pdf_type='detailed'):
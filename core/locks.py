@@ -0,0 +1,26 @@
+"""
+Trava de processamento no banco (``ProcessingLock``).
+
+``db_lock(nome)`` abre uma transação e tenta travar a linha do nome com
+``select_for_update(skip_locked=True)``: devolve True se conseguiu (a trava dura até o fim
+do bloco) e False se outro processo já a detém. Funciona entre workers Celery, threads de
+fallback e processos do servidor web, o que um ``cache.add`` em LocMemCache não garante.
+"""
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from core.models import ProcessingLock
+
+
+@contextmanager
+def db_lock(name: str):
+    ProcessingLock.objects.get_or_create(name=name)
+    with transaction.atomic():
+        locked = (
+            ProcessingLock.objects.select_for_update(skip_locked=True)
+            .filter(name=name)
+            .values_list('pk', flat=True)
+            .first()
+        )
+        yield locked is not None
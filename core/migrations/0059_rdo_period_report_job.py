@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0058_remove_conditional_unique_constraints'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RdoPeriodReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_from', models.DateField(verbose_name='Data inicial')),
+                ('date_to', models.DateField(verbose_name='Data final')),
+                ('status', models.CharField(choices=[('PE', 'Na fila'), ('RU', 'Gerando'), ('OK', 'Concluído'), ('FA', 'Falhou')], db_index=True, default='PE', max_length=2, verbose_name='Status')),
+                ('sections_total', models.PositiveIntegerField(default=0, verbose_name='Seções (total)')),
+                ('sections_done', models.PositiveIntegerField(default=0, verbose_name='Seções prontas')),
+                ('source_fingerprint', models.CharField(blank=True, db_index=True, help_text='Hash dos diários do período; job concluído com o mesmo hash é reaproveitado.', max_length=64, verbose_name='Impressão digital do conteúdo')),
+                ('file', models.FileField(blank=True, upload_to='pdfs/rdo_periodo/%Y/%m/', verbose_name='Arquivo gerado')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Data de Atualização')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Início')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fim')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rdo_period_report_jobs', to='core.project', verbose_name='Projeto')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rdo_period_report_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Relatório RDO por período',
+                'verbose_name_plural': 'Relatórios RDO por período',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['project', 'date_from', 'date_to', 'status'], name='core_rdoper_project_a511c6_idx')],
+            },
+        ),
+    ]
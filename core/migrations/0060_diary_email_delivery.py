@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0059_rdo_period_report_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiaryEmailDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('OW', 'Cliente (link)'), ('RC', 'Lista da obra (PDF)')], max_length=2, verbose_name='Tipo')),
+                ('email', models.EmailField(max_length=254, verbose_name='E-mail')),
+                ('status', models.CharField(choices=[('PE', 'Pendente'), ('OK', 'Enviado'), ('FA', 'Falhou')], default='PE', max_length=2, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último erro')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Enviado em')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Data de Atualização')),
+                ('diary', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='email_deliveries', to='core.constructiondiary', verbose_name='Diário')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='diary_email_deliveries', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Entrega de e-mail do diário',
+                'verbose_name_plural': 'Entregas de e-mail do diário',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='core_diarye_status_1e0ceb_idx')],
+                'unique_together': {('diary', 'kind', 'email')},
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:52
+# Progresso consolidado em Activity.progress (lido pela API) + preenchimento inicial.
+
+from decimal import Decimal
+from django.db import migrations, models
+
+STEPLEN = 4  # treebeard MP_Node
+
+
+def backfill_activity_progress(apps, schema_editor):
+    """Preenche progress de baixo para cima: folhas pelo último work log, pais pelos filhos."""
+    Activity = apps.get_model('core', 'Activity')
+    DailyWorkLog = apps.get_model('core', 'DailyWorkLog')
+
+    rows = list(Activity.objects.values_list('id', 'path', 'depth', 'numchild', 'weight'))
+    if not rows:
+        return
+    latest = {}
+    for activity_id, snapshot in (
+        DailyWorkLog.objects.order_by('activity_id', 'created_at', 'id')
+        .values_list('activity_id', 'accumulated_progress_snapshot')
+    ):
+        latest[activity_id] = snapshot or Decimal('0.00')
+
+    by_path = {path: (activity_id, weight) for activity_id, path, _d, _n, weight in rows}
+    children = {}
+    for _id, path, depth, _n, weight in rows:
+        if depth > 1:
+            children.setdefault(path[:-STEPLEN], []).append(path)
+
+    progress = {}
+    for activity_id, path, _depth, numchild, _w in sorted(rows, key=lambda r: -r[2]):
+        kids = children.get(path, [])
+        if not numchild:
+            value = latest.get(activity_id, Decimal('0.00'))
+        elif not kids:
+            value = Decimal('0.00')
+        else:
+            pairs = [(by_path[k][1], progress[k]) for k in kids]
+            total = sum((w for w, _ in pairs), Decimal('0.00'))
+            if total == Decimal('0.00'):
+                value = sum((p for _, p in pairs), Decimal('0.00')) / len(pairs)
+            else:
+                value = sum((w * p for w, p in pairs), Decimal('0.00')) / total
+        progress[path] = min(Decimal('100.00'), max(Decimal('0.00'), Decimal(value))).quantize(Decimal('0.01'))
+
+    to_update = []
+    for path, value in progress.items():
+        if value:
+            to_update.append(Activity(id=by_path[path][0], progress=value))
+    Activity.objects.bulk_update(to_update, ['progress'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0060_diary_email_delivery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='progress',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, help_text='Progresso consolidado, gravado pelo rollup (ProgressService.calculate_rollup_progress)', max_digits=5, verbose_name='Progresso (%)'),
+        ),
+        migrations.RunPython(backfill_activity_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0061_activity_progress_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessingLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Nome')),
+            ],
+            options={
+                'verbose_name': 'Trava de processamento',
+                'verbose_name_plural': 'Travas de processamento',
+            },
+        ),
+    ]
@@ -458,6 +458,14 @@ class Activity(MP_Node):
         verbose_name='Status',
         help_text='Status atual da atividade'
     )
+    progress = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        editable=False,
+        verbose_name='Progresso (%)',
+        help_text='Progresso consolidado, gravado pelo rollup (ProgressService.calculate_rollup_progress)'
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Data de Criação'
@@ -512,6 +520,20 @@ class Activity(MP_Node):
         """
         return self.numchild == 0
 
+    def move(self, target, pos=None):
+        """
+        Move a atividade (com a subárvore) e recalcula o progresso consolidado do pai antigo e
+        do novo: o ``move`` do treebeard só faz UPDATEs, sem ``post_save``.
+        """
+        from core.services import ProgressService
+
+        old_parent_path = self._get_basepath(self.path, self.depth - 1)
+        super().move(target, pos)
+        self.refresh_from_db(fields=['path', 'depth', 'numchild'])
+        ProgressService.rollup_parents(
+            [old_parent_path, self._get_basepath(self.path, self.depth - 1)]
+        )
+
 
 class Labor(models.Model):
     """
@@ -2435,6 +2457,140 @@ class DiaryOccurrence(models.Model):
         return f"Ocorrência em {self.diary.date} - {self.description[:50]}"
 
 
+class RdoPeriodReportJob(models.Model):
+    """
+    Geração em background do PDF consolidado de RDO (vários dias).
+
+    O worker monta uma seção PDF por diário (cacheada no storage e reaproveitada por
+    outros jobs) e depois concatena tudo em ``file``. Um job interrompido pode ser
+    reenfileirado: as seções já prontas não são renderizadas de novo.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'PE', 'Na fila'
+        RUNNING = 'RU', 'Gerando'
+        DONE = 'OK', 'Concluído'
+        FAILED = 'FA', 'Falhou'
+
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='rdo_period_report_jobs',
+        verbose_name='Projeto',
+    )
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='rdo_period_report_jobs',
+        verbose_name='Solicitado por',
+    )
+    date_from = models.DateField(verbose_name='Data inicial')
+    date_to = models.DateField(verbose_name='Data final')
+    status = models.CharField(
+        max_length=2,
+        choices=Status.choices,
+        default=Status.PENDING,
+        db_index=True,
+        verbose_name='Status',
+    )
+    sections_total = models.PositiveIntegerField(default=0, verbose_name='Seções (total)')
+    sections_done = models.PositiveIntegerField(default=0, verbose_name='Seções prontas')
+    source_fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        verbose_name='Impressão digital do conteúdo',
+        help_text='Hash dos diários do período; job concluído com o mesmo hash é reaproveitado.',
+    )
+    file = models.FileField(
+        upload_to='pdfs/rdo_periodo/%Y/%m/',
+        blank=True,
+        verbose_name='Arquivo gerado',
+    )
+    error = models.TextField(blank=True, verbose_name='Erro')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Data de Atualização')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='Início')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Fim')
+
+    class Meta:
+        verbose_name = 'Relatório RDO por período'
+        verbose_name_plural = 'Relatórios RDO por período'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['project', 'date_from', 'date_to', 'status']),
+        ]
+
+    def __str__(self) -> str:
+        return f"RDO {self.project.code} {self.date_from}→{self.date_to} ({self.get_status_display()})"
+
+    @property
+    def progress_percent(self) -> int:
+        if self.status == self.Status.DONE:
+            return 100
+        if not self.sections_total:
+            return 0
+        return min(99, int(self.sections_done * 100 / self.sections_total))
+
+
+class DiaryEmailDelivery(models.Model):
+    """
+    Estado de entrega, por destinatário, dos e-mails de RDO aprovado.
+
+    Uma linha por (diário, tipo, e-mail). O despacho em lote só reenvia linhas
+    pendentes ou com falha, então retentativas não duplicam e-mails já entregues.
+    """
+    class Kind(models.TextChoices):
+        OWNER = 'OW', 'Cliente (link)'
+        RECIPIENT = 'RC', 'Lista da obra (PDF)'
+
+    class Status(models.TextChoices):
+        PENDING = 'PE', 'Pendente'
+        SENT = 'OK', 'Enviado'
+        FAILED = 'FA', 'Falhou'
+
+    diary = models.ForeignKey(
+        ConstructionDiary,
+        on_delete=models.CASCADE,
+        related_name='email_deliveries',
+        verbose_name='Diário',
+    )
+    kind = models.CharField(max_length=2, choices=Kind.choices, verbose_name='Tipo')
+    email = models.EmailField(verbose_name='E-mail')
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='diary_email_deliveries',
+        verbose_name='Usuário',
+    )
+    status = models.CharField(
+        max_length=2,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name='Status',
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')
+    last_error = models.TextField(blank=True, verbose_name='Último erro')
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Enviado em')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Data de Atualização')
+
+    class Meta:
+        verbose_name = 'Entrega de e-mail do diário'
+        verbose_name_plural = 'Entregas de e-mail do diário'
+        ordering = ['-created_at']
+        unique_together = [['diary', 'kind', 'email']]
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.email} — diário {self.diary_id} ({self.get_status_display()})"
+
+
 # Comunicação transversal (e-mail / notificações)
 from core.comunicacao_models import (  # noqa: E402, F401
     TipoComunicacao,
@@ -2442,3 +2598,20 @@ from core.comunicacao_models import (  # noqa: E402, F401
     PadraoComunicacaoGrupo,
     LogDecisaoComunicacao,
 )
+
+
+class ProcessingLock(models.Model):
+    """
+    Linha de trava para rotinas que só podem rodar uma por vez entre processos/workers.
+
+    Usada via ``core.locks.db_lock``: ``SELECT ... FOR UPDATE SKIP LOCKED`` na linha do nome,
+    mantida até o fim da transação (vale entre processos, ao contrário do cache local).
+    """
+    name = models.CharField(max_length=100, unique=True, verbose_name='Nome')
+
+    class Meta:
+        verbose_name = 'Trava de processamento'
+        verbose_name_plural = 'Travas de processamento'
+
+    def __str__(self) -> str:
+        return self.name
@@ -0,0 +1,16 @@
+"""
+Paginação da API REST do Diário de Obra.
+
+Cursor (``?cursor=...``) em vez de offset: páginas estáveis mesmo com inserções
+concorrentes e custo constante em tabelas grandes (sem ``COUNT(*)`` nem ``OFFSET`` alto).
+O tamanho da página vem de ``REST_FRAMEWORK['PAGE_SIZE']`` e pode ser reduzido/ampliado
+pelo cliente com ``?page_size=`` até ``max_page_size``.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class ApiCursorPagination(CursorPagination):
+    """Cursor padrão da API; a ordenação vem do ``ordering`` da view (OrderingFilter)."""
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-pk'
@@ -5,6 +5,7 @@ Serializers para todos os modelos com validações e relacionamentos.
 """
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from .db_annotations import annotate_activity_parent_id
 from .models import (
     Project,
     Activity,
@@ -18,6 +19,42 @@ from .models import (
 )
 
 
+def requested_fields(request):
+    """
+    Campos pedidos em ``?fields=a,b`` (None = todos).
+
+    Usado pelas views para pular anotações/prefetch de campos não solicitados.
+    """
+    if request is None:
+        return None
+    raw = request.query_params.get('fields') if hasattr(request, 'query_params') else request.GET.get('fields')
+    if not raw:
+        return None
+    return {f.strip() for f in raw.split(',') if f.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Sparse fieldsets em leituras: ``?fields=id,name`` mantém só esses campos e
+    ``?omit=description`` remove campos. Escritas (POST/PUT/PATCH) usam o serializer completo.
+    Serializers aninhados não são afetados.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            return
+        wanted = requested_fields(request)
+        if wanted:
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
+        omit = request.query_params.get('omit')
+        if omit:
+            for name in {f.strip() for f in omit.split(',')}:
+                self.fields.pop(name, None)
+
+
 class UserSerializer(serializers.ModelSerializer):
     """Serializer para User (apenas campos essenciais)."""
     full_name = serializers.SerializerMethodField()
@@ -32,7 +69,7 @@ class UserSerializer(serializers.ModelSerializer):
         return obj.get_full_name() or obj.username
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer para Project."""
     activities_count = serializers.SerializerMethodField()
     diaries_count = serializers.SerializerMethodField()
@@ -60,14 +97,14 @@ class ProjectSerializer(serializers.ModelSerializer):
         return obj.diaries.count()
 
 
-class ActivityTreeSerializer(serializers.ModelSerializer):
+class ActivityTreeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer para Activity com suporte a hierarquia.
     
     Usado para visualização de árvore EAP com carregamento preguiçoso.
     """
     children_count = serializers.SerializerMethodField()
-    progress = serializers.SerializerMethodField()
+    progress = serializers.FloatField(read_only=True)
     parent_id = serializers.SerializerMethodField()
     name = serializers.SerializerMethodField()
     
@@ -84,18 +121,12 @@ class ActivityTreeSerializer(serializers.ModelSerializer):
         """Retorna número de filhos diretos."""
         return obj.numchild
     
-    def get_progress(self, obj):
-        """Retorna progresso calculado da atividade."""
-        from .services import ProgressService
-        try:
-            return float(ProgressService.get_activity_progress(obj))
-        except Exception:
-            return 0.0
-    
     def get_parent_id(self, obj):
-        """Retorna ID do pai ou None se for raiz."""
-        if obj.is_root():
+        """ID do pai (anotado por ``annotate_activity_parent_id``) ou None se for raiz."""
+        if obj.depth <= 1:
             return None
+        if hasattr(obj, 'parent_pk'):
+            return obj.parent_pk
         return obj.get_parent().id
 
     def get_name(self, obj):
@@ -120,12 +151,12 @@ class ActivityDetailSerializer(ActivityTreeSerializer):
     
     def get_children(self, obj):
         """Retorna filhos diretos (limitado para performance)."""
-        children = obj.get_children()[:50]  # Limite para evitar sobrecarga
+        children = annotate_activity_parent_id(obj.get_children())[:50]  # Limite para evitar sobrecarga
         return ActivityTreeSerializer(children, many=True).data
     
     def get_ancestors(self, obj):
         """Retorna ancestrais."""
-        ancestors = obj.get_ancestors()
+        ancestors = annotate_activity_parent_id(obj.get_ancestors())
         return ActivityTreeSerializer(ancestors, many=True).data
     
     def get_work_logs_count(self, obj):
@@ -133,7 +164,7 @@ class ActivityDetailSerializer(ActivityTreeSerializer):
         return obj.work_logs.count()
 
 
-class LaborSerializer(serializers.ModelSerializer):
+class LaborSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer para Labor."""
     class Meta:
         model = Labor
@@ -141,7 +172,7 @@ class LaborSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class EquipmentSerializer(serializers.ModelSerializer):
+class EquipmentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer para Equipment."""
     class Meta:
         model = Equipment
@@ -149,7 +180,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class DiaryImageSerializer(serializers.ModelSerializer):
+class DiaryImageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer para DiaryImage."""
     image_url = serializers.SerializerMethodField()
     pdf_optimized_url = serializers.SerializerMethodField()
@@ -181,7 +212,7 @@ class DiaryImageSerializer(serializers.ModelSerializer):
         return None
 
 
-class DailyWorkLogSerializer(serializers.ModelSerializer):
+class DailyWorkLogSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer para DailyWorkLog."""
     activity_name = serializers.CharField(source='activity.display_name', read_only=True)
     resources_labor_names = serializers.SerializerMethodField()
@@ -207,7 +238,7 @@ class DailyWorkLogSerializer(serializers.ModelSerializer):
         return [str(equipment) for equipment in obj.resources_equipment.all()]
 
 
-class ConstructionDiarySerializer(serializers.ModelSerializer):
+class ConstructionDiarySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer para ConstructionDiary."""
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
     reviewed_by_name = serializers.CharField(source='reviewed_by.get_full_name', read_only=True, allow_null=True)
@@ -230,10 +261,16 @@ class ConstructionDiarySerializer(serializers.ModelSerializer):
     
     def get_images_count(self, obj):
         """Retorna número de imagens aprovadas para relatório."""
+        annotated = getattr(obj, 'images_count', None)
+        if annotated is not None:
+            return annotated
         return obj.images.filter(is_approved_for_report=True).count()
     
     def get_work_logs_count(self, obj):
         """Retorna número de registros de trabalho."""
+        annotated = getattr(obj, 'work_logs_count', None)
+        if annotated is not None:
+            return annotated
         return obj.work_logs.count()
     
     def get_can_edit(self, obj):
@@ -96,6 +96,30 @@ class ProgressService:
         # Progresso ponderado
         return weighted_sum / total_weight
     
+    @staticmethod
+    def _progress_from_cached_children(activity: Activity) -> Decimal:
+        """Média ponderada (ou simples, sem pesos) do ``progress`` gravado nos filhos."""
+        rows = list(activity.get_children().values_list('weight', 'progress'))
+        if not rows:
+            return Decimal('0.00')
+        total_weight = sum((w for w, _ in rows), Decimal('0.00'))
+        if total_weight == Decimal('0.00'):
+            return sum((p for _, p in rows), Decimal('0.00')) / len(rows)
+        return sum((w * p for w, p in rows), Decimal('0.00')) / total_weight
+
+    @staticmethod
+    def _store_progress(activity: Activity, progress: Decimal) -> None:
+        """Grava progresso consolidado e status derivado."""
+        if progress == Decimal('0.00'):
+            activity.status = ActivityStatus.NOT_STARTED
+        elif progress == Decimal('100.00'):
+            activity.status = ActivityStatus.COMPLETED
+        else:
+            activity.status = ActivityStatus.IN_PROGRESS
+        clamped = min(Decimal('100.00'), max(Decimal('0.00'), Decimal(progress)))
+        activity.progress = clamped.quantize(Decimal('0.01'))
+        activity.save(update_fields=['status', 'progress', 'updated_at'])
+
     @staticmethod
     @transaction.atomic
     def calculate_rollup_progress(activity_id: int) -> Decimal:
@@ -104,7 +128,7 @@ class ProgressService:
         
         Este método:
         1. Calcula o progresso da atividade (folha ou com filhos)
-        2. Atualiza o status da atividade baseado no progresso
+        2. Atualiza status e o campo ``progress`` (cache lido pela API)
         3. Propaga o recálculo para todos os ancestrais
         
         Usa transações atômicas para garantir integridade durante o rollup.
@@ -123,36 +147,34 @@ class ProgressService:
         except Activity.DoesNotExist:
             raise ValidationError(f"Atividade com ID {activity_id} não encontrada.")
         
-        # Calcula progresso atual
-        new_progress = ProgressService.get_activity_progress(activity)
-        
-        # Atualiza status baseado no progresso
-        if new_progress == Decimal('0.00'):
-            activity.status = ActivityStatus.NOT_STARTED
-        elif new_progress == Decimal('100.00'):
-            activity.status = ActivityStatus.COMPLETED
+        # Calcula progresso atual (folha: último work log; pai: filhos já consolidados)
+        if activity.is_leaf():
+            new_progress = ProgressService.get_activity_progress(activity)
         else:
-            activity.status = ActivityStatus.IN_PROGRESS
+            new_progress = ProgressService._progress_from_cached_children(activity)
+        ProgressService._store_progress(activity, new_progress)
         
-        activity.save(update_fields=['status', 'updated_at'])
-        
-        # Propaga para os ancestrais
-        ancestors = activity.get_ancestors()
-        for ancestor in ancestors:
-            ancestor_progress = ProgressService.get_activity_progress(ancestor)
-            
-            # Atualiza status do ancestral
-            if ancestor_progress == Decimal('0.00'):
-                ancestor.status = ActivityStatus.NOT_STARTED
-            elif ancestor_progress == Decimal('100.00'):
-                ancestor.status = ActivityStatus.COMPLETED
-            else:
-                ancestor.status = ActivityStatus.IN_PROGRESS
-            
-            ancestor.save(update_fields=['status', 'updated_at'])
+        # Propaga para os ancestrais, do pai até a raiz: cada nível usa o progresso
+        # gravado nos filhos (uma consulta por nível, sem recursão na subárvore).
+        ancestors = list(activity.get_ancestors())
+        for ancestor in reversed(ancestors):
+            ancestor_progress = ProgressService._progress_from_cached_children(ancestor)
+            ProgressService._store_progress(ancestor, ancestor_progress)
         
         return new_progress
     
+    @staticmethod
+    def rollup_parents(parent_paths) -> None:
+        """
+        Recalcula os pais indicados pelo ``path`` (e os ancestrais deles) após mudança
+        estrutural nos filhos: filho criado, excluído, movido ou com peso alterado.
+        """
+        paths = {path for path in parent_paths if path}
+        if not paths:
+            return
+        for parent_id in Activity.objects.filter(path__in=paths).values_list('pk', flat=True):
+            ProgressService.calculate_rollup_progress(parent_id)
+
     @staticmethod
     @transaction.atomic
     def update_activity_progress_from_worklog(work_log: DailyWorkLog) -> Decimal:
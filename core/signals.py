@@ -3,11 +3,12 @@ Sinais Django para Diário de Obra V2.0.
 
 Dispara ações automáticas quando modelos são criados/atualizados:
 - Rollup de progresso quando DailyWorkLog é salvo
+- Rollup do pai quando uma Activity é criada, excluída ou muda de peso (mover: Activity.move)
 """
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 import logging
-from .models import DailyWorkLog, ConstructionDiary, DiaryNoReportDay
+from .models import Activity, DailyWorkLog, ConstructionDiary, DiaryNoReportDay
 from .services import ProgressService
 
 logger = logging.getLogger(__name__)
@@ -49,6 +50,43 @@ def update_progress_on_worklog_delete(sender, instance, **kwargs):
         logger.error(f"Erro ao atualizar progresso após deleção de worklog {instance.id}: {e}", exc_info=True)
 
 
+def _parent_path(activity):
+    return activity._get_basepath(activity.path, activity.depth - 1) if activity.path else ''
+
+
+@receiver(pre_save, sender=Activity)
+def remember_activity_weight(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Guarda o peso anterior: mudança de peso altera a média ponderada do pai."""
+    if raw or not instance.pk or (update_fields is not None and 'weight' not in update_fields):
+        return
+    instance._previous_weight = (
+        Activity.objects.filter(pk=instance.pk).values_list('weight', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Activity)
+def rollup_parent_on_activity_save(sender, instance, created, raw=False, **kwargs):
+    """Filho novo ou com peso alterado: recalcula o pai e os ancestrais."""
+    if raw:
+        return
+    previous = instance.__dict__.pop('_previous_weight', None)
+    if not created and (previous is None or previous == instance.weight):
+        return
+    try:
+        ProgressService.rollup_parents([_parent_path(instance)])
+    except Exception as e:
+        logger.error(f"Erro ao atualizar progresso após salvar atividade {instance.id}: {e}", exc_info=True)
+
+
+@receiver(post_delete, sender=Activity)
+def rollup_parent_on_activity_delete(sender, instance, **kwargs):
+    """Filho excluído: recalcula o pai (se ainda existir) e os ancestrais."""
+    try:
+        ProgressService.rollup_parents([_parent_path(instance)])
+    except Exception as e:
+        logger.error(f"Erro ao atualizar progresso após deleção de atividade {instance.id}: {e}", exc_info=True)
+
+
 @receiver(post_save, sender=ConstructionDiary)
 def remove_no_report_day_when_diary_saved(sender, instance, **kwargs):
     """Se existir justificativa de dia sem RDO para a mesma obra/data, remove ao criar/editar o diário."""
@@ -4,6 +4,7 @@ Tarefas Celery para Diário de Obra V2.0.
 Tarefas assíncronas para processamento pesado:
 - Geração de PDFs de diários de obra
 - Envio de e-mails pós-aprovação (PDF + SMTP), para não causar timeout no gateway
+- PDF consolidado de RDO por período (RdoPeriodReportJob)
 - Otimização em lote de imagens
 """
 import os
@@ -33,19 +34,21 @@ def run_send_approved_diary_emails(diary_id: int) -> None:
     """
     Gera/envia e-mails aos donos da obra e PDF detalhado aos recipients cadastrados.
     Destinado a worker Celery ou thread em background (fecha conexões Django corretamente).
+
+    A entrega é registrada por destinatário (DiaryEmailDelivery): se algum envio falhar a
+    exceção dispara o retry da task, que reenvia apenas os destinatários pendentes.
     """
     from django.db import close_old_connections
 
     close_old_connections()
     try:
-        from core.models import ConstructionDiary
-        from core.diary_email import send_diary_pdf_to_recipients, send_diary_to_owners
+        from core.diary_email import send_approved_diary_emails
 
-        diary = ConstructionDiary.objects.select_related("project").get(pk=diary_id)
-        send_diary_to_owners(diary)
-        send_diary_pdf_to_recipients(diary)
-    except ConstructionDiary.DoesNotExist:
-        logger.warning("run_send_approved_diary_emails: diário id=%s não encontrado.", diary_id)
+        stats = send_approved_diary_emails([diary_id])
+        if stats['failed']:
+            raise RuntimeError(
+                f"{stats['failed']} e-mail(s) do diário {diary_id} não enviados; serão reenviados no retry."
+            )
     except Exception:
         logger.exception("run_send_approved_diary_emails: erro diary_id=%s", diary_id)
         raise
@@ -94,40 +97,121 @@ def _celery_broker_reachable(timeout: float = 0.5) -> bool:
         return False
 
 
-def enqueue_send_approved_diary_emails(diary_id: int) -> None:
+def _enqueue_or_thread(task, runner, object_id: int, label: str, kwargs: dict | None = None) -> None:
     """
-    Agenda envio assíncrono. Com Celery ativo usa a fila; senão usa thread daemon
-    para não segurar nginx/gunicorn após o commit do formulário.
+    Com Celery + broker acessível usa a fila; senão roda ``runner(object_id, **kwargs)`` numa
+    thread daemon para não segurar nginx/gunicorn após o commit do formulário. ``kwargs`` vai
+    serializado para a fila (valores JSON).
     """
     import threading
 
+    kwargs = kwargs or {}
     if CELERY_AVAILABLE and _celery_broker_reachable():
         try:
-            send_approved_diary_emails_task.apply_async(
-                args=[diary_id],
+            task.apply_async(
+                args=[object_id],
+                kwargs=kwargs,
                 ignore_result=True,
             )
             return
         except Exception:
             logger.exception(
-                "enqueue_send_approved_diary_emails: apply_async() falhou, usando thread diary_id=%s",
-                diary_id,
+                "%s: apply_async() falhou, usando thread id=%s", label, object_id,
             )
     elif CELERY_AVAILABLE:
-        logger.info(
-            "enqueue_send_approved_diary_emails: broker indisponível, thread diary_id=%s",
-            diary_id,
-        )
+        logger.info("%s: broker indisponível, thread id=%s", label, object_id)
 
     def _runner() -> None:
         try:
-            run_send_approved_diary_emails(diary_id)
+            runner(object_id, **kwargs)
         except Exception:
-            logger.exception(
-                "enqueue_send_approved_diary_emails: thread falhou diary_id=%s", diary_id
+            logger.exception("%s: thread falhou id=%s", label, object_id)
+
+    threading.Thread(target=_runner, name=f"{label}-{object_id}", daemon=True).start()
+
+
+def enqueue_send_approved_diary_emails(diary_id: int) -> None:
+    """Agenda envio assíncrono dos e-mails de RDO aprovado (fila Celery ou thread)."""
+    _enqueue_or_thread(
+        send_approved_diary_emails_task,
+        run_send_approved_diary_emails,
+        diary_id,
+        "diary-email",
+    )
+
+
+@shared_task(ignore_result=True)
+def resend_failed_diary_emails_task():
+    """Beat (``RDO_EMAIL_RESEND_BEAT_SECONDS``): reenvia e-mails de RDO aprovado pendentes ou com falha."""
+    from django.db import close_old_connections
+
+    close_old_connections()
+    try:
+        from core.diary_email import resend_failed_diary_emails
+
+        return resend_failed_diary_emails()
+    finally:
+        close_old_connections()
+
+
+def run_rdo_period_report_job(job_id: int) -> None:
+    """
+    Executa um RdoPeriodReportJob (PDF consolidado por período).
+
+    Idempotente: jobs concluídos são ignorados e seções já renderizadas vêm do cache,
+    então reexecutar após queda do worker só completa o que faltou.
+    """
+    from django.db import close_old_connections
+    from django.utils import timezone
+
+    close_old_connections()
+    try:
+        from core.models import RdoPeriodReportJob
+        from core.utils.rdo_period_pdf import build_rdo_period_report
+
+        job = RdoPeriodReportJob.objects.select_related("project").get(pk=job_id)
+        if job.status == RdoPeriodReportJob.Status.DONE:
+            return
+        try:
+            build_rdo_period_report(job)
+        except Exception as exc:
+            logger.exception("run_rdo_period_report_job: erro job_id=%s", job_id)
+            RdoPeriodReportJob.objects.filter(pk=job_id).update(
+                status=RdoPeriodReportJob.Status.FAILED,
+                error=str(exc)[:4000],
+                finished_at=timezone.now(),
+                updated_at=timezone.now(),
             )
+            raise
+    except RdoPeriodReportJob.DoesNotExist:
+        logger.warning("run_rdo_period_report_job: job id=%s não encontrado.", job_id)
+    finally:
+        close_old_connections()
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=60, ignore_result=True)
+def generate_rdo_period_report_task(self, job_id: int):
+    """Fila Celery: PDF consolidado de RDO por período (ver core.models.RdoPeriodReportJob)."""
+    if not CELERY_AVAILABLE:
+        logger.warning(
+            "generate_rdo_period_report_task: Celery não disponível; use enqueue_rdo_period_report_job."
+        )
+        return None
+    try:
+        run_rdo_period_report_job(job_id)
+        return job_id
+    except Exception as exc:
+        raise self.retry(exc=exc)
+
 
-    threading.Thread(target=_runner, name=f"diary-email-{diary_id}", daemon=True).start()
+def enqueue_rdo_period_report_job(job_id: int) -> None:
+    """Agenda a geração do consolidado (fila Celery ou thread)."""
+    _enqueue_or_thread(
+        generate_rdo_period_report_task,
+        run_rdo_period_report_job,
+        job_id,
+        "rdo-period-pdf",
+    )
 
 
 @shared_task(bind=True, max_retries=3)
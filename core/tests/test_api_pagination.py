@@ -0,0 +1,110 @@
+"""
+API REST: paginação por cursor, sparse fieldsets e progresso consolidado em Activity.progress.
+"""
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Activity, ConstructionDiary, DailyWorkLog, DiaryStatus, Project
+
+
+class CoreApiPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='api_user', password='x', is_staff=True)
+        cls.project = Project.objects.create(
+            name='Obra API',
+            code='API-001',
+            start_date=date(2026, 1, 1),
+            end_date=date(2026, 12, 31),
+            is_active=True,
+        )
+        cls.root = Activity.add_root(project=cls.project, name='Estrutura', code='1', weight=Decimal('0'))
+        cls.children = [
+            cls.root.add_child(project=cls.project, name=f'Etapa {i}', code=f'1.{i}', weight=Decimal('1'))
+            for i in range(1, 6)
+        ]
+        diary = ConstructionDiary.objects.create(
+            project=cls.project,
+            date=date(2026, 5, 4),
+            status=DiaryStatus.PREENCHENDO,
+            created_by=cls.user,
+        )
+        DailyWorkLog.objects.create(
+            activity=cls.children[0],
+            diary=diary,
+            percentage_executed_today=Decimal('50'),
+            accumulated_progress_snapshot=Decimal('50'),
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _get(self, url, **params):
+        return self.client.get(url, params, HTTP_ACCEPT='application/json')
+
+    def test_rollup_stores_progress_on_activity_and_parent(self):
+        self.children[0].refresh_from_db()
+        self.root.refresh_from_db()
+        self.assertEqual(self.children[0].progress, Decimal('50.00'))
+        self.assertEqual(self.root.progress, Decimal('10.00'))
+
+    def _progress(self, activity):
+        return Activity.objects.get(pk=activity.pk).progress
+
+    def test_weight_change_rolls_up_parent(self):
+        child = Activity.objects.get(pk=self.children[0].pk)
+        child.weight = Decimal('6')
+        child.save()
+        # 50 * 6 / (6 + 4)
+        self.assertEqual(self._progress(self.root), Decimal('30.00'))
+
+    def test_child_added_and_deleted_rolls_up_parent(self):
+        root = Activity.objects.get(pk=self.root.pk)
+        extra = root.add_child(project=self.project, name='Etapa 6', code='1.6', weight=Decimal('5'))
+        # 50 * 1 / (5 + 5)
+        self.assertEqual(self._progress(self.root), Decimal('5.00'))
+        Activity.objects.get(pk=extra.pk).delete()
+        self.assertEqual(self._progress(self.root), Decimal('10.00'))
+
+    def test_move_rolls_up_old_and_new_parent(self):
+        other = Activity.add_root(project=self.project, name='Acabamento', code='2', weight=Decimal('0'))
+        Activity.objects.get(pk=self.children[0].pk).move(other, 'last-child')
+        self.assertEqual(self._progress(self.root), Decimal('0.00'))
+        self.assertEqual(self._progress(other), Decimal('50.00'))
+
+    def test_activities_are_cursor_paginated_with_constant_queries(self):
+        url = '/api/diario/activities/'
+        with CaptureQueriesContext(connection) as small:
+            first = self._get(url, project=self.project.pk, page_size=2).json()
+        self.assertEqual(len(first['results']), 2)
+        self.assertIn('cursor=', first['next'])
+
+        with CaptureQueriesContext(connection) as large:
+            full = self._get(url, project=self.project.pk, page_size=6).json()
+        self.assertEqual(len(small), len(large))
+
+        by_id = {row['id']: row for row in full['results']}
+        self.assertEqual(by_id[self.children[0].pk]['progress'], 50.0)
+        self.assertEqual(by_id[self.children[0].pk]['parent_id'], self.root.pk)
+        self.assertIsNone(by_id[self.root.pk]['parent_id'])
+
+        second = self.client.get(first['next'], HTTP_ACCEPT='application/json').json()
+        self.assertEqual(len(second['results']), 2)
+        self.assertFalse({r['id'] for r in first['results']} & {r['id'] for r in second['results']})
+
+    def test_sparse_fieldsets(self):
+        data = self._get('/api/diario/activities/', fields='id,progress').json()
+        self.assertEqual(set(data['results'][0]), {'id', 'progress'})
+
+        data = self._get('/api/diario/projects/', omit='description,diaries_count').json()
+        row = data['results'][0]
+        self.assertNotIn('description', row)
+        self.assertNotIn('diaries_count', row)
+        self.assertEqual(row['activities_count'], 6)
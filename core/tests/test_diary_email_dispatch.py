@@ -0,0 +1,151 @@
+"""
+Despacho em lote dos e-mails de RDO aprovado: uma conexão por lote e reenvio só do que falhou.
+"""
+from __future__ import annotations
+
+import threading
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core import diary_email
+from core.diary_email import ApprovedDiaryEmailDispatcher, resend_failed_diary_emails
+from core.models import (
+    ConstructionDiary,
+    DiaryEmailDelivery,
+    DiaryStatus,
+    Project,
+    ProjectDiaryRecipient,
+    ProjectOwner,
+)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_RDO_FROM='',
+)
+class ApprovedDiaryEmailDispatcherTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='rdo_autor', password='x')
+        cls.client_user = User.objects.create_user(
+            username='cliente_rdo', password='x', email='cliente@example.com', first_name='Ana',
+        )
+        cls.project = Project.objects.create(
+            name='Obra E-mail',
+            code='EML-001',
+            start_date=date(2026, 1, 1),
+            end_date=date(2026, 12, 31),
+            is_active=True,
+        )
+        ProjectOwner.objects.create(project=cls.project, user=cls.client_user)
+        ProjectDiaryRecipient.objects.create(project=cls.project, email='gerente@example.com')
+        ProjectDiaryRecipient.objects.create(project=cls.project, email='fiscal@example.com')
+        cls.diaries = [
+            ConstructionDiary.objects.create(
+                project=cls.project,
+                date=date(2026, 4, day),
+                status=DiaryStatus.APROVADO,
+                created_by=cls.author,
+            )
+            for day in (1, 2)
+        ]
+
+    def _dispatch(self, **kwargs):
+        kwargs.setdefault('max_workers', 1)
+        return ApprovedDiaryEmailDispatcher(**kwargs).dispatch([d.pk for d in self.diaries])
+
+    def test_batch_uses_one_connection_and_records_each_recipient(self):
+        with mock.patch.object(EmailBackend, 'open', autospec=True, return_value=True) as opened:
+            stats = self._dispatch()
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual(stats, {'sent': 6, 'failed': 0, 'skipped': 0})
+        self.assertEqual(len(mail.outbox), 6)
+        self.assertEqual(
+            DiaryEmailDelivery.objects.filter(status=DiaryEmailDelivery.Status.SENT).count(), 6,
+        )
+        with_pdf = [m for m in mail.outbox if m.attachments]
+        self.assertEqual(len(with_pdf), 4)
+        self.assertTrue(all(m.to != ['cliente@example.com'] for m in with_pdf))
+
+    def test_retry_resends_only_failed_recipients(self):
+        real_send = EmailBackend.send_messages
+
+        def flaky(backend, messages):
+            if messages[0].to == ['fiscal@example.com']:
+                raise OSError('caixa indisponível')
+            return real_send(backend, messages)
+
+        with mock.patch.object(EmailBackend, 'send_messages', autospec=True, side_effect=flaky):
+            first = self._dispatch()
+        self.assertEqual((first['sent'], first['failed']), (4, 2))
+        failed = DiaryEmailDelivery.objects.get(diary=self.diaries[0], email='fiscal@example.com')
+        self.assertEqual(failed.status, DiaryEmailDelivery.Status.FAILED)
+        self.assertIn('caixa indisponível', failed.last_error)
+
+        mail.outbox.clear()
+        second = self._dispatch()
+        self.assertEqual(second, {'sent': 2, 'failed': 0, 'skipped': 4})
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['fiscal@example.com'] * 2)
+        failed.refresh_from_db()
+        self.assertEqual((failed.status, failed.attempts), (DiaryEmailDelivery.Status.SENT, 2))
+
+    @override_settings(RDO_EMAIL_PDF_WORKERS=1)
+    def test_resend_skips_recent_rows_and_retries_idle_failures(self):
+        with mock.patch.object(EmailBackend, 'send_messages', autospec=True, side_effect=OSError('fora')):
+            self._dispatch()
+        mail.outbox.clear()
+        self.assertEqual(resend_failed_diary_emails(), {'sent': 0, 'failed': 0, 'skipped': 0})
+
+        DiaryEmailDelivery.objects.update(updated_at=timezone.now() - timedelta(minutes=30))
+        self.assertEqual(resend_failed_diary_emails(), {'sent': 6, 'failed': 0, 'skipped': 0})
+        self.assertEqual(len(mail.outbox), 6)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_RDO_FROM='',
+)
+class ApprovedDiaryEmailThreadedRenderTests(TransactionTestCase):
+    """Caminho com pool de threads (vários diários, ``max_workers`` > 1): dados commitados."""
+
+    def setUp(self):
+        author = User.objects.create_user(username='rdo_autor_thr', password='x')
+        project = Project.objects.create(
+            name='Obra Threads',
+            code='THR-001',
+            start_date=date(2026, 1, 1),
+            end_date=date(2026, 12, 31),
+            is_active=True,
+        )
+        ProjectDiaryRecipient.objects.create(project=project, email='lista@example.com')
+        self.diaries = [
+            ConstructionDiary.objects.create(
+                project=project,
+                date=date(2026, 5, day),
+                status=DiaryStatus.APROVADO,
+                created_by=author,
+            )
+            for day in (1, 2, 3)
+        ]
+
+    def test_pdfs_rendered_in_pool_threads_and_attached(self):
+        threads = set()
+        real = diary_email._generate_diary_pdf
+
+        def tracked(diary, pdf_type='detailed'):
+            threads.add(threading.current_thread().name)
+            return real(diary, pdf_type=pdf_type)
+
+        with mock.patch.object(diary_email, '_generate_diary_pdf', side_effect=tracked):
+            stats = ApprovedDiaryEmailDispatcher(max_workers=3).dispatch([d.pk for d in self.diaries])
+
+        self.assertEqual(stats, {'sent': 3, 'failed': 0, 'skipped': 0})
+        self.assertTrue(threads)
+        self.assertTrue(all(name.startswith('rdo-email-pdf') for name in threads))
+        self.assertEqual(len([m for m in mail.outbox if m.attachments]), 3)
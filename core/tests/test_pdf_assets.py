@@ -0,0 +1,46 @@
+"""
+Registro de assets de PDF (logo, estilos) compartilhado pelos geradores.
+"""
+from __future__ import annotations
+
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.utils.pdf_assets import PdfAssetRegistry, pdf_assets
+from core.utils.pdf_generator import _get_logo_absolute_path
+
+
+class PdfAssetRegistryTests(SimpleTestCase):
+    def test_logo_resolved_once_and_shared_with_pdf_generator(self):
+        self.assertIsNotNone(pdf_assets.logo_path)
+        self.assertEqual(_get_logo_absolute_path(), pdf_assets.logo_path)
+        self.assertTrue(pdf_assets.logo_bytes)
+        w, h = pdf_assets.logo_size
+        sw, sh = pdf_assets.scaled_logo_size(100.0, 20.0)
+        self.assertLessEqual(sw, 100.0)
+        self.assertLessEqual(sh, 20.0)
+        self.assertAlmostEqual(sw / sh, w / h, places=2)
+
+    def test_refresh_reloads_logo_from_disk(self):
+        registry = PdfAssetRegistry().load()
+        with mock.patch('core.utils.pdf_assets.LOGO_CANDIDATES', ('nao-existe.png',)):
+            registry.refresh()
+            self.assertIsNone(registry.logo_path)
+            self.assertEqual(registry.scaled_logo_size(10.0, 5.0), (10.0, 5.0))
+        registry.refresh()
+        self.assertIsNotNone(registry.logo_path)
+
+    def test_styles_are_memoized(self):
+        registry = PdfAssetRegistry()
+        a = registry.paragraph_style('X', parent='Normal', fontSize=9)
+        b = registry.paragraph_style('X', parent='Normal', fontSize=9)
+        c = registry.paragraph_style('X', parent='Normal', fontSize=10)
+        self.assertIs(a, b)
+        self.assertIsNot(a, c)
+        self.assertIs(registry.sample_styles(), registry.sample_styles())
+
+        factory = mock.Mock(return_value={'body': a})
+        registry.style_set('teste', factory)
+        registry.style_set('teste', factory)
+        factory.assert_called_once_with()
@@ -0,0 +1,112 @@
+"""
+PDF consolidado de RDO por período: job em background, cache de seções por diário e reaproveitamento.
+"""
+from __future__ import annotations
+
+import shutil
+import tempfile
+from datetime import date, timedelta
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from core.models import ConstructionDiary, DiaryStatus, Project, RdoPeriodReportJob
+from core.tasks import run_rdo_period_report_job
+from core.utils import rdo_period_pdf
+from core.utils.rdo_period_pdf import generate_rdo_period_pdf_bytes, request_rdo_period_report
+
+_MEDIA = tempfile.mkdtemp(prefix='rdo_periodo_test_')
+
+
+@override_settings(MEDIA_ROOT=_MEDIA)
+class RdoPeriodReportJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='rdo_periodo', password='x')
+        cls.project = Project.objects.create(
+            name='Obra Período',
+            code='PER-001',
+            start_date=date(2026, 1, 1),
+            end_date=date(2026, 12, 31),
+            is_active=True,
+        )
+        cls.d0 = date(2026, 3, 1)
+        for i in range(3):
+            ConstructionDiary.objects.create(
+                project=cls.project,
+                date=cls.d0 + timedelta(days=i),
+                status=DiaryStatus.APROVADO,
+                general_notes=f'Notas do dia {i}',
+                created_by=cls.user,
+            )
+        cls.d1 = cls.d0 + timedelta(days=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(_MEDIA, ignore_errors=True)
+
+    def _request(self):
+        with mock.patch('core.tasks.enqueue_rdo_period_report_job', side_effect=run_rdo_period_report_job):
+            return request_rdo_period_report(self.project, self.d0, self.d1, user=self.user)
+
+    def test_job_builds_artifact_with_cover_and_one_section_per_diary(self):
+        from PyPDF2 import PdfReader
+
+        job = self._request()
+        job.refresh_from_db()
+        self.assertEqual(job.status, RdoPeriodReportJob.Status.DONE)
+        self.assertEqual((job.sections_done, job.sections_total), (3, 3))
+        with job.file.open('rb') as fh:
+            reader = PdfReader(BytesIO(fh.read()))
+        self.assertEqual(len(reader.pages), 4)
+        self.assertIn('Notas do dia 2', reader.pages[3].extract_text())
+
+    def test_unchanged_period_reuses_done_job(self):
+        first = self._request()
+        second = self._request()
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(RdoPeriodReportJob.objects.count(), 1)
+
+    def test_changed_diary_rerenders_only_its_section(self):
+        first = self._request()
+        diary = ConstructionDiary.objects.get(project=self.project, date=self.d0)
+        diary.general_notes = 'Texto corrigido'
+        diary.save()
+
+        with mock.patch.object(
+            rdo_period_pdf, 'render_diary_section_pdf', wraps=rdo_period_pdf.render_diary_section_pdf,
+        ) as render:
+            second = self._request()
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertEqual(render.call_count, 1)
+
+    def test_sync_generation_uses_same_sections(self):
+        buf = generate_rdo_period_pdf_bytes(self.project, self.d0, self.d1)
+        self.assertIsNotNone(buf)
+        self.assertIsNone(generate_rdo_period_pdf_bytes(self.project, date(2025, 1, 1), date(2025, 1, 2)))
+
+    def test_stale_active_job_is_reenqueued(self):
+        job = RdoPeriodReportJob.objects.create(
+            project=self.project,
+            date_from=self.d0,
+            date_to=self.d1,
+            status=RdoPeriodReportJob.Status.RUNNING,
+            source_fingerprint=rdo_period_pdf.period_source_fingerprint(
+                list(rdo_period_pdf.period_diaries_queryset(self.project, self.d0, self.d1))
+            ),
+        )
+        with mock.patch('core.tasks.enqueue_rdo_period_report_job') as enqueue:
+            self.assertEqual(request_rdo_period_report(self.project, self.d0, self.d1).pk, job.pk)
+        enqueue.assert_not_called()
+
+        RdoPeriodReportJob.objects.filter(pk=job.pk).update(
+            updated_at=job.updated_at - rdo_period_pdf.JOB_STALE_AFTER - timedelta(minutes=1)
+        )
+        with mock.patch('core.tasks.enqueue_rdo_period_report_job', side_effect=run_rdo_period_report_job) as enqueue:
+            self.assertEqual(request_rdo_period_report(self.project, self.d0, self.d1).pk, job.pk)
+        enqueue.assert_called_once_with(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, RdoPeriodReportJob.Status.DONE)
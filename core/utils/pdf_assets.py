@@ -0,0 +1,263 @@
+"""
+Registro de assets de PDF por processo (logo, fontes, estilos ReportLab).
+
+Antes cada gerador (RDO, GestControll, Central de Aprovações, RH) procurava a logo em
+vários caminhos, decodificava a imagem para medir a proporção e recriava o
+``getSampleStyleSheet()`` a cada PDF. Em lotes (e-mails de RDO, ZIP de pedidos) isso
+somava muito I/O repetido.
+
+Uso::
+
+    from core.utils.pdf_assets import pdf_assets
+
+    path = pdf_assets.logo_path                 # caminho absoluto ou None
+    w, h = pdf_assets.scaled_logo_size(4.8 * cm, 1.15 * cm, min_w=1.0 * cm, min_h=0.4 * cm)
+    img = pdf_assets.logo_flowable(w, h)        # platypus.Image (bytes já em memória)
+    styles = pdf_assets.sample_styles()
+    body = pdf_assets.paragraph_style('PeriodBody', parent='Normal', fontSize=9)
+    rdo = pdf_assets.style_set('rdo', _build_rdo_styles)   # dict montado uma única vez
+
+Carregado em ``CoreConfig.ready()``; ``pdf_assets.refresh()`` relê tudo (ex.: após trocar
+a logo em ``core/static/core/images`` sem reiniciar o processo).
+
+Os objetos devolvidos são compartilhados entre threads: **não** altere atributos de
+estilos obtidos aqui — derive com ``ParagraphStyle(parent=...)`` ou ``paragraph_style``.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Ordem de preferência da logo institucional (mesma usada historicamente pelos PDFs).
+LOGO_CANDIDATES = (
+    'lpla-logo-pdf-transparent.png',
+    'lpla-logo-pdf.png',
+    'lplan-logo2.png',
+    'lplan_logo.png',
+    'lplan_logo.jpg',
+    'lplan_logo.jpeg',
+)
+
+# Fontes TTF opcionais: qualquer ``<nome>.ttf`` nesta pasta é registrado com o nome do arquivo.
+FONTS_DIR_PARTS = ('core', 'static', 'core', 'fonts')
+
+
+def _logo_dir() -> Path:
+    return Path(settings.BASE_DIR) / 'core' / 'static' / 'core' / 'images'
+
+
+class PdfAssetRegistry:
+    """Assets resolvidos uma vez por processo; thread-safe para leitura."""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._logo_path: Optional[str] = None
+        self._logo_bytes: Optional[bytes] = None
+        self._logo_size: Optional[tuple[int, int]] = None
+        self._logo_reader = None
+        self._fonts: tuple[str, ...] = ()
+        self._sample_styles = None
+        self._styles: dict[tuple, Any] = {}
+
+    # -- ciclo de vida ---------------------------------------------------
+
+    def load(self) -> 'PdfAssetRegistry':
+        """Resolve os assets se ainda não foram carregados (idempotente)."""
+        if self._loaded:
+            return self
+        with self._lock:
+            if not self._loaded:
+                self._load_locked()
+        return self
+
+    def refresh(self) -> 'PdfAssetRegistry':
+        """Descarta e recarrega tudo (logo, fontes, estilos)."""
+        with self._lock:
+            self._loaded = False
+            self._load_locked()
+        return self
+
+    def _load_locked(self) -> None:
+        self._logo_path = None
+        self._logo_bytes = None
+        self._logo_size = None
+        self._logo_reader = None
+        self._sample_styles = None
+        self._styles = {}
+
+        logo_dir = _logo_dir()
+        for name in LOGO_CANDIDATES:
+            p = logo_dir / name
+            if p.is_file():
+                self._logo_path = str(p)
+                break
+
+        if self._logo_path:
+            try:
+                self._logo_bytes = Path(self._logo_path).read_bytes()
+            except OSError as exc:
+                logger.warning('pdf_assets: logo ilegível %s: %s', self._logo_path, exc)
+                self._logo_path = None
+        if self._logo_bytes:
+            self._logo_size = self._measure_logo(self._logo_bytes)
+
+        self._fonts = self._register_fonts()
+        self._loaded = True
+
+    @staticmethod
+    def _measure_logo(data: bytes) -> Optional[tuple[int, int]]:
+        try:
+            from PIL import Image
+
+            with Image.open(BytesIO(data)) as img:
+                return int(img.size[0]), int(img.size[1])
+        except Exception:
+            pass
+        try:
+            from reportlab.lib.utils import ImageReader
+
+            w, h = ImageReader(BytesIO(data)).getSize()
+            return int(w), int(h)
+        except Exception as exc:
+            logger.debug('pdf_assets: não foi possível medir a logo: %s', exc)
+            return None
+
+    @staticmethod
+    def _register_fonts() -> tuple[str, ...]:
+        fonts_dir = Path(settings.BASE_DIR).joinpath(*FONTS_DIR_PARTS)
+        if not fonts_dir.is_dir():
+            return ()
+        try:
+            from reportlab.pdfbase import pdfmetrics
+            from reportlab.pdfbase.ttfonts import TTFont
+        except ImportError:
+            return ()
+        registered = []
+        for ttf in sorted(fonts_dir.glob('*.ttf')):
+            name = ttf.stem
+            try:
+                if name not in pdfmetrics.getRegisteredFontNames():
+                    pdfmetrics.registerFont(TTFont(name, str(ttf)))
+                registered.append(name)
+            except Exception as exc:
+                logger.warning('pdf_assets: fonte %s não registrada: %s', ttf.name, exc)
+        return tuple(registered)
+
+    # -- logo ------------------------------------------------------------
+
+    @property
+    def logo_path(self) -> Optional[str]:
+        return self.load()._logo_path
+
+    @property
+    def logo_bytes(self) -> Optional[bytes]:
+        return self.load()._logo_bytes
+
+    @property
+    def logo_size(self) -> Optional[tuple[int, int]]:
+        """Dimensões da logo em pixels (largura, altura)."""
+        return self.load()._logo_size
+
+    def logo_reader(self):
+        """``ImageReader`` compartilhado (para ``canvas.drawImage``); None sem logo/ReportLab."""
+        self.load()
+        if self._logo_reader is None and self._logo_bytes:
+            with self._lock:
+                if self._logo_reader is None:
+                    try:
+                        from reportlab.lib.utils import ImageReader
+
+                        self._logo_reader = ImageReader(BytesIO(self._logo_bytes))
+                    except Exception as exc:
+                        logger.debug('pdf_assets: ImageReader da logo falhou: %s', exc)
+        return self._logo_reader
+
+    def scaled_logo_size(
+        self,
+        max_w: float,
+        max_h: float,
+        *,
+        min_w: float = 0.0,
+        min_h: float = 0.0,
+    ) -> tuple[float, float]:
+        """Cabe a logo em max_w × max_h mantendo a proporção; sem medida devolve a caixa máxima."""
+        size = self.logo_size
+        if not size or not size[0] or not size[1]:
+            return max_w, max_h
+        src_w, src_h = size
+        scale = min(max_w / float(src_w), max_h / float(src_h))
+        return max(min_w, float(src_w) * scale), max(min_h, float(src_h) * scale)
+
+    def logo_flowable(self, width: float, height: float, **kwargs):
+        """``platypus.Image`` a partir dos bytes em memória (sem reabrir o arquivo)."""
+        data = self.logo_bytes
+        if not data:
+            return None
+        from reportlab.platypus import Image as RLImage
+
+        return RLImage(BytesIO(data), width=width, height=height, **kwargs)
+
+    # -- fontes e estilos --------------------------------------------------
+
+    @property
+    def fonts(self) -> tuple[str, ...]:
+        """Nomes das fontes TTF extras registradas no ReportLab (além das base-14)."""
+        return self.load()._fonts
+
+    def sample_styles(self):
+        """``getSampleStyleSheet()`` compartilhado (somente leitura)."""
+        self.load()
+        if self._sample_styles is None:
+            with self._lock:
+                if self._sample_styles is None:
+                    from reportlab.lib.styles import getSampleStyleSheet
+
+                    self._sample_styles = getSampleStyleSheet()
+        return self._sample_styles
+
+    def paragraph_style(self, name: str, parent: str | None = 'Normal', **attrs):
+        """
+        ``ParagraphStyle`` memorizado por (nome, parent, atributos).
+
+        ``parent`` é o nome de um estilo do sample stylesheet (ou None).
+        """
+        key = (name, parent, tuple(sorted((k, repr(v)) for k, v in attrs.items())))
+        style = self._styles.get(key)
+        if style is not None:
+            return style
+        from reportlab.lib.styles import ParagraphStyle
+
+        parent_style = self.sample_styles()[parent] if parent else None
+        style = ParagraphStyle(name=name, parent=parent_style, **attrs)
+        with self._lock:
+            return self._styles.setdefault(key, style)
+
+    def style_set(self, key: str, factory):
+        """
+        Conjunto de estilos montado uma vez por ``factory()`` e reaproveitado (ex.: estilos do RDO).
+
+        ``factory`` não recebe argumentos e costuma devolver um dict nome → ParagraphStyle.
+        """
+        cache_key = ('__set__', key)
+        found = self.load()._styles.get(cache_key)
+        if found is not None:
+            return found
+        built = factory()
+        with self._lock:
+            return self._styles.setdefault(cache_key, built)
+
+
+pdf_assets = PdfAssetRegistry()
+
+
+def refresh_pdf_assets() -> PdfAssetRegistry:
+    """Atalho para ``pdf_assets.refresh()``."""
+    return pdf_assets.refresh()
@@ -21,15 +21,15 @@ import tempfile
 import base64
 import binascii
 import re
-from pathlib import Path
 from typing import Optional, List, Dict, Any
 from io import BytesIO
 from xml.sax.saxutils import escape as xml_escape
-from django.conf import settings
 from django.core.files.base import ContentFile
 from django.utils import timezone
 import logging
 
+from core.utils.pdf_assets import pdf_assets
+
 try:
     from PIL import Image
     PIL_AVAILABLE = True
@@ -307,20 +307,101 @@ class ImageOptimizer:
 
 def _get_logo_absolute_path() -> Optional[str]:
     """Retorna o caminho absoluto da logo LPLAN (static/core/images; prioriza lpla-logo-pdf)."""
-    base = Path(settings.BASE_DIR)
-    logo_dir = base / 'core' / 'static' / 'core' / 'images'
-    for name in (
-        'lpla-logo-pdf-transparent.png',
-        'lpla-logo-pdf.png',
-        'lplan-logo2.png',
-        'lplan_logo.png',
-        'lplan_logo.jpg',
-        'lplan_logo.jpeg',
-    ):
-        p = logo_dir / name
-        if p.exists():
-            return str(p)
-    return None
+    return pdf_assets.logo_path
+
+
+def _build_rdo_styles() -> Dict[str, Any]:
+    """Estilos base do PDF do RDO (montados uma vez por processo via ``pdf_assets.style_set``)."""
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_LEFT, TA_CENTER
+
+    styles = pdf_assets.sample_styles()
+    # Hierarquia tipográfica (Inter → Helvetica como fallback)
+    title_style = ParagraphStyle(
+        name='RDOTitle',
+        parent=styles['Normal'],
+        fontSize=18,
+        alignment=TA_LEFT,
+        spaceAfter=2,
+        textColor=COLOR_PRIMARY,
+        fontName='Helvetica-Bold',
+    )
+    heading_style = ParagraphStyle(
+        name='Section',
+        parent=styles['Normal'],
+        fontSize=10,
+        spaceBefore=6,
+        spaceAfter=3,
+        alignment=TA_LEFT,
+        textColor=COLOR_PRIMARY,
+        fontName='Helvetica-Bold',
+    )
+    normal_style = ParagraphStyle(
+        name='NormalRDO',
+        parent=styles['Normal'],
+        fontSize=9,
+        alignment=TA_LEFT,
+        textColor=COLOR_TEXT,
+        spaceAfter=2,
+        leading=11,
+    )
+    # Lista de atividades: mais compacta que o corpo geral (muitas linhas sem dominar a página)
+    activity_item_style = ParagraphStyle(
+        name='ActivityItem',
+        parent=styles['Normal'],
+        fontSize=8,
+        alignment=TA_LEFT,
+        textColor=COLOR_TEXT,
+        spaceAfter=0,
+        leading=10,
+    )
+    label_style = ParagraphStyle(
+        name='Label',
+        parent=normal_style,
+        fontSize=8.5,
+        textColor=COLOR_TEXT_SECONDARY,
+        fontName='Helvetica',
+    )
+    table_header_style = ParagraphStyle(
+        name='TableHeader',
+        parent=normal_style,
+        textColor=colors.white,
+        fontName='Helvetica-Bold',
+        fontSize=8,
+    )
+    total_col_style = ParagraphStyle(
+        name='TotalCol',
+        parent=normal_style,
+        fontName='Helvetica-Bold',
+        alignment=TA_CENTER,
+    )
+    terceirizada_company_style = ParagraphStyle(
+        name='TerceirizadaCompany',
+        parent=normal_style,
+        fontName='Helvetica-Bold',
+        fontSize=8,
+        textColor=COLOR_PRIMARY,
+        spaceBefore=2,
+    )
+    terceirizada_subtotal_style = ParagraphStyle(
+        name='TerceirizadaSubtotal',
+        parent=normal_style,
+        fontName='Helvetica-Bold',
+        fontSize=8,
+        textColor=COLOR_TEXT,
+    )
+    return {
+        'title_style': title_style,
+        'heading_style': heading_style,
+        'normal_style': normal_style,
+        'activity_item_style': activity_item_style,
+        'label_style': label_style,
+        'table_header_style': table_header_style,
+        'total_col_style': total_col_style,
+        'terceirizada_company_style': terceirizada_company_style,
+        'terceirizada_subtotal_style': terceirizada_subtotal_style,
+    }
 
 
 def get_rdo_pdf_filename(project, date_obj, suffix='', front_name='') -> str:
@@ -547,7 +628,7 @@ class PDFGenerator:
     ) -> None:
         """Monta o documento PDF com ReportLab (redesign RDO: design system, header azul, cards, seções com borda)."""
         from reportlab.lib.pagesizes import A4
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.styles import ParagraphStyle
         from reportlab.lib.units import cm, mm
         from reportlab.platypus import (
             SimpleDocTemplate,
@@ -572,81 +653,16 @@ class PDFGenerator:
             bottomMargin=18 * mm,
         )
         content_width = doc.width
-        styles = getSampleStyleSheet()
-        # Hierarquia tipográfica (Inter → Helvetica como fallback)
-        title_style = ParagraphStyle(
-            name='RDOTitle',
-            parent=styles['Normal'],
-            fontSize=18,
-            alignment=TA_LEFT,
-            spaceAfter=2,
-            textColor=COLOR_PRIMARY,
-            fontName='Helvetica-Bold',
-        )
-        heading_style = ParagraphStyle(
-            name='Section',
-            parent=styles['Normal'],
-            fontSize=10,
-            spaceBefore=6,
-            spaceAfter=3,
-            alignment=TA_LEFT,
-            textColor=COLOR_PRIMARY,
-            fontName='Helvetica-Bold',
-        )
-        normal_style = ParagraphStyle(
-            name='NormalRDO',
-            parent=styles['Normal'],
-            fontSize=9,
-            alignment=TA_LEFT,
-            textColor=COLOR_TEXT,
-            spaceAfter=2,
-            leading=11,
-        )
-        # Lista de atividades: mais compacta que o corpo geral (muitas linhas sem dominar a página)
-        activity_item_style = ParagraphStyle(
-            name='ActivityItem',
-            parent=styles['Normal'],
-            fontSize=8,
-            alignment=TA_LEFT,
-            textColor=COLOR_TEXT,
-            spaceAfter=0,
-            leading=10,
-        )
-        label_style = ParagraphStyle(
-            name='Label',
-            parent=normal_style,
-            fontSize=8.5,
-            textColor=COLOR_TEXT_SECONDARY,
-            fontName='Helvetica',
-        )
-        table_header_style = ParagraphStyle(
-            name='TableHeader',
-            parent=normal_style,
-            textColor=colors.white,
-            fontName='Helvetica-Bold',
-            fontSize=8,
-        )
-        total_col_style = ParagraphStyle(
-            name='TotalCol',
-            parent=normal_style,
-            fontName='Helvetica-Bold',
-            alignment=TA_CENTER,
-        )
-        terceirizada_company_style = ParagraphStyle(
-            name='TerceirizadaCompany',
-            parent=normal_style,
-            fontName='Helvetica-Bold',
-            fontSize=8,
-            textColor=COLOR_PRIMARY,
-            spaceBefore=2,
-        )
-        terceirizada_subtotal_style = ParagraphStyle(
-            name='TerceirizadaSubtotal',
-            parent=normal_style,
-            fontName='Helvetica-Bold',
-            fontSize=8,
-            textColor=COLOR_TEXT,
-        )
+        _rdo_styles = pdf_assets.style_set('rdo', _build_rdo_styles)
+        title_style = _rdo_styles['title_style']
+        heading_style = _rdo_styles['heading_style']
+        normal_style = _rdo_styles['normal_style']
+        activity_item_style = _rdo_styles['activity_item_style']
+        label_style = _rdo_styles['label_style']
+        table_header_style = _rdo_styles['table_header_style']
+        total_col_style = _rdo_styles['total_col_style']
+        terceirizada_company_style = _rdo_styles['terceirizada_company_style']
+        terceirizada_subtotal_style = _rdo_styles['terceirizada_subtotal_style']
         story = []
 
         # —— HEADER AZUL INSTITUCIONAL ——
@@ -698,24 +714,33 @@ class PDFGenerator:
                 max_logo_h = 1.15 * cm
                 logo_w = max_logo_w
                 logo_h = max_logo_h
+                logo_img = None
 
                 # Mantém proporção real da logo para evitar deformação no PDF.
-                try:
-                    if PIL_AVAILABLE and Image:
-                        with Image.open(logo_absolute_path) as pil_logo:
-                            src_w, src_h = pil_logo.size
-                    else:
-                        from reportlab.lib.utils import ImageReader
-                        src_w, src_h = ImageReader(logo_absolute_path).getSize()
-
-                    if src_w and src_h:
-                        scale = min(max_logo_w / float(src_w), max_logo_h / float(src_h))
-                        logo_w = max(1.0 * cm, float(src_w) * scale)
-                        logo_h = max(0.4 * cm, float(src_h) * scale)
-                except Exception as logo_size_err:
-                    logger.debug("Não foi possível medir logo para escala proporcional: %s", logo_size_err)
-
-                logo_img = RLImage(logo_absolute_path, width=logo_w, height=logo_h)
+                if logo_absolute_path == pdf_assets.logo_path:
+                    # Logo institucional: medida e bytes já resolvidos no registro do processo.
+                    logo_w, logo_h = pdf_assets.scaled_logo_size(
+                        max_logo_w, max_logo_h, min_w=1.0 * cm, min_h=0.4 * cm,
+                    )
+                    logo_img = pdf_assets.logo_flowable(logo_w, logo_h)
+                else:
+                    try:
+                        if PIL_AVAILABLE and Image:
+                            with Image.open(logo_absolute_path) as pil_logo:
+                                src_w, src_h = pil_logo.size
+                        else:
+                            from reportlab.lib.utils import ImageReader
+                            src_w, src_h = ImageReader(logo_absolute_path).getSize()
+
+                        if src_w and src_h:
+                            scale = min(max_logo_w / float(src_w), max_logo_h / float(src_h))
+                            logo_w = max(1.0 * cm, float(src_w) * scale)
+                            logo_h = max(0.4 * cm, float(src_h) * scale)
+                    except Exception as logo_size_err:
+                        logger.debug("Não foi possível medir logo para escala proporcional: %s", logo_size_err)
+
+                if logo_img is None:
+                    logo_img = RLImage(logo_absolute_path, width=logo_w, height=logo_h)
                 logo_col_w = 5.2 * cm
                 text_col_w = max(content_width - (2 * logo_col_w), 1.0 * cm)
                 right_spacer = Paragraph(" ", ParagraphStyle(name='HeaderSpacer', fontSize=1))
@@ -2,21 +2,37 @@
 PDF consolidado de vários RDOs (Diário de Obra) em um intervalo de datas.
 
 Texto-only (sem fotos/anexos) para manter o arquivo leve; fotos seguem nos PDFs individuais de cada dia.
+
+Cada diário é renderizado como uma seção PDF independente e guardada no storage, identificada
+por uma impressão digital do conteúdo textual (``diary_section_fingerprint``). O documento final
+é só a capa + concatenação das seções — períodos longos (trimestre) são montados em background
+por ``core.tasks.run_rdo_period_report_job`` e reaproveitam as seções já prontas.
 """
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
-from datetime import date
+from datetime import date, timedelta
 from io import BytesIO
-from typing import Any
+from typing import Any, Iterable
 
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.utils import timezone
 
+from core.utils.pdf_assets import pdf_assets
 from core.utils.pdf_generator import REPORTLAB_AVAILABLE, _safe_pdf_multiline_text, _safe_pdf_text
 
 logger = logging.getLogger(__name__)
 
 _MAX_FIELD = 6000
+_MAX_OCCURRENCES = 50
+
+# Seções por diário (cache reaproveitado entre jobs e entre períodos sobrepostos).
+SECTION_STORAGE_DIR = "pdfs/rdo_periodo/secoes"
+# Job na fila/gerando sem progresso (``updated_at``) há mais que isso: worker caiu, reenfileira.
+JOB_STALE_AFTER = timedelta(minutes=15)
 
 
 def _clip(text: str, max_len: int = _MAX_FIELD) -> str:
@@ -26,24 +42,11 @@ def _clip(text: str, max_len: int = _MAX_FIELD) -> str:
     return t
 
 
-def generate_rdo_period_pdf_bytes(project, date_from: date, date_to: date) -> BytesIO | None:
-    """
-    Gera PDF com um capítulo por dia que possua ConstructionDiary no intervalo [date_from, date_to].
-    Retorna BytesIO ou None se ReportLab indisponível ou sem diários.
-    """
-    if not REPORTLAB_AVAILABLE:
-        logger.warning("ReportLab indisponível — PDF consolidado não gerado.")
-        return None
-
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-    from reportlab.lib.units import mm
-    from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer
-
+def period_diaries_queryset(project, date_from: date, date_to: date):
+    """Diários do intervalo, com o prefetch necessário para montar as seções."""
     from core.models import ConstructionDiary
 
-    qs = (
+    return (
         ConstructionDiary.objects.filter(project=project, date__gte=date_from, date__lte=date_to)
         .select_related("project", "created_by", "reviewed_by")
         .prefetch_related(
@@ -52,40 +55,114 @@ def generate_rdo_period_pdf_bytes(project, date_from: date, date_to: date) -> By
         )
         .order_by("date", "id")
     )
-    diaries = list(qs)
-    if not diaries:
-        return None
 
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        name="PeriodTitle",
-        parent=styles["Heading1"],
-        fontSize=16,
-        textColor=colors.HexColor("#1e293b"),
-        spaceAfter=8,
-    )
-    day_title = ParagraphStyle(
-        name="DayTitle",
-        parent=styles["Heading2"],
-        fontSize=12,
-        textColor=colors.HexColor("#0f172a"),
-        spaceBefore=10,
-        spaceAfter=6,
-    )
-    body = ParagraphStyle(
-        name="PeriodBody",
-        parent=styles["Normal"],
-        fontSize=9,
-        leading=12,
-        textColor=colors.HexColor("#334155"),
-    )
-    label_style = ParagraphStyle(
-        name="Lbl",
-        parent=styles["Normal"],
-        fontSize=9,
-        leading=11,
-        textColor=colors.HexColor("#64748b"),
-    )
+
+def _diary_section_payload(diary) -> dict[str, Any]:
+    """Dados textuais que entram na seção do diário (base da renderização e do fingerprint)."""
+    criador = ""
+    if diary.created_by:
+        criador = diary.created_by.get_full_name() or diary.created_by.username
+    # Ocorrências: mesma ordem do related manager (Meta.ordering), recortada em memória
+    # para aproveitar o prefetch.
+    ocs = list(diary.occurrences.all())[:_MAX_OCCURRENCES]
+    logs = []
+    for wl in diary.work_logs.all():
+        act = wl.activity
+        logs.append(
+            {
+                "activity": act.display_code_name if act else "-",
+                "pct": str(wl.percentage_executed_today),
+                "location": (wl.location or "").strip(),
+                "notes": _clip(wl.notes or "", 1500),
+            }
+        )
+    return {
+        "id": diary.pk,
+        "date": diary.date.strftime("%d/%m/%Y") if diary.date else "-",
+        "report_number": diary.report_number or "-",
+        "status": diary.get_status_display() if hasattr(diary, "get_status_display") else str(diary.status),
+        "blocks": [
+            ["Responsável inspeção", _clip(diary.inspection_responsible or "")],
+            ["Responsável produção", _clip(diary.production_responsible or "")],
+            ["Condições climáticas", _clip(diary.weather_conditions or "")],
+            ["__work_hours__", "" if diary.work_hours is None else str(diary.work_hours)],
+            ["Deliberações", _clip(diary.deliberations or "")],
+            ["Observações gerais", _clip(diary.general_notes or "")],
+            ["Acidentes", _clip(diary.accidents or "")],
+            ["Paralisações", _clip(diary.stoppages or "")],
+            ["Riscos eminentes", _clip(diary.imminent_risks or "")],
+            ["Outros incidentes", _clip(diary.incidents or "")],
+            ["Fiscalizações", _clip(diary.inspections or "")],
+            ["DDS", _clip(diary.dds or "")],
+        ],
+        "occurrences": [_clip(oc.description or "", 2000) for oc in ocs],
+        "work_logs": logs,
+        "created_by": criador,
+    }
+
+
+def diary_section_fingerprint(diary) -> str:
+    """Hash do conteúdo da seção: muda quando qualquer texto/atividade/ocorrência do dia muda."""
+    raw = json.dumps(_diary_section_payload(diary), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def period_source_fingerprint(diaries: list, fingerprints: list[str] | None = None) -> str:
+    """Hash do período inteiro (ordem + fingerprint de cada seção); identifica um artefato reutilizável."""
+    if fingerprints is None:
+        fingerprints = [diary_section_fingerprint(d) for d in diaries]
+    h = hashlib.sha256()
+    for diary, fp in zip(diaries, fingerprints):
+        h.update(f"{diary.pk}:{fp};".encode("ascii"))
+    return h.hexdigest()
+
+
+def _period_styles() -> dict[str, Any]:
+    return pdf_assets.style_set("rdo_periodo", _build_period_styles)
+
+
+def _build_period_styles() -> dict[str, Any]:
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle
+
+    styles = pdf_assets.sample_styles()
+    return {
+        "title": ParagraphStyle(
+            name="PeriodTitle",
+            parent=styles["Heading1"],
+            fontSize=16,
+            textColor=colors.HexColor("#1e293b"),
+            spaceAfter=8,
+        ),
+        "day_title": ParagraphStyle(
+            name="DayTitle",
+            parent=styles["Heading2"],
+            fontSize=12,
+            textColor=colors.HexColor("#0f172a"),
+            spaceBefore=10,
+            spaceAfter=6,
+        ),
+        "body": ParagraphStyle(
+            name="PeriodBody",
+            parent=styles["Normal"],
+            fontSize=9,
+            leading=12,
+            textColor=colors.HexColor("#334155"),
+        ),
+        "label": ParagraphStyle(
+            name="Lbl",
+            parent=styles["Normal"],
+            fontSize=9,
+            leading=11,
+            textColor=colors.HexColor("#64748b"),
+        ),
+    }
+
+
+def _build_pdf(story: list[Any], title: str) -> BytesIO:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.platypus import SimpleDocTemplate
 
     buf = BytesIO()
     doc = SimpleDocTemplate(
@@ -95,88 +172,262 @@ def generate_rdo_period_pdf_bytes(project, date_from: date, date_to: date) -> By
         leftMargin=18 * mm,
         topMargin=16 * mm,
         bottomMargin=18 * mm,
-        title=f"RDO consolidado {project.code}",
+        title=title,
     )
-    story: list[Any] = []
+    doc.build(story)
+    buf.seek(0)
+    return buf
+
 
-    gen_em = timezone.now().strftime("%d/%m/%Y %H:%M")
-    story.append(Paragraph(_safe_pdf_text(f"Relatório consolidado — RDO / Diário de Obra"), title_style))
-    story.append(Paragraph(_safe_pdf_text(f"Obra: {project.code} — {project.name}"), body))
-    story.append(
+def _diary_section_story(payload: dict[str, Any], st: dict[str, Any]) -> list[Any]:
+    from reportlab.platypus import Paragraph, Spacer
+
+    body, label_style = st["body"], st["label"]
+    story: list[Any] = [
+        Paragraph(
+            _safe_pdf_text(f"{payload['date']} · RDO nº {payload['report_number']} · {payload['status']}"),
+            st["day_title"],
+        )
+    ]
+
+    for label, value in payload["blocks"]:
+        if not value:
+            continue
+        if label == "__work_hours__":
+            story.append(Paragraph(_safe_pdf_text(f"<b>Horas trabalhadas:</b> {value}"), body))
+            story.append(Spacer(1, 4))
+            continue
+        story.append(Paragraph(f"<b>{_safe_pdf_text(label)}</b>", label_style))
+        story.append(Paragraph(_safe_pdf_multiline_text(value), body))
+        story.append(Spacer(1, 4))
+
+    if payload["occurrences"]:
+        story.append(Paragraph(_safe_pdf_text("<b>Ocorrências</b>"), label_style))
+        for desc in payload["occurrences"]:
+            if desc:
+                story.append(Paragraph(_safe_pdf_multiline_text(f"• {desc}"), body))
+        story.append(Spacer(1, 4))
+
+    if payload["work_logs"]:
+        story.append(Paragraph(_safe_pdf_text("<b>Atividades / EAP (registro do dia)</b>"), label_style))
+        for wl in payload["work_logs"]:
+            line = f"• {wl['activity']} — {wl['pct']}% executado no dia"
+            if wl["location"]:
+                line += f" — Local: {wl['location']}"
+            story.append(Paragraph(_safe_pdf_multiline_text(line), body))
+            if wl["notes"]:
+                story.append(Paragraph(_safe_pdf_multiline_text(wl["notes"]), body))
+        story.append(Spacer(1, 4))
+
+    if payload["created_by"]:
+        story.append(Paragraph(_safe_pdf_text(f"Preenchido por: {payload['created_by']}"), label_style))
+    return story
+
+
+def render_diary_section_pdf(diary) -> BytesIO:
+    """Renderiza a seção de um único diário (uma ou mais páginas) como PDF independente."""
+    payload = _diary_section_payload(diary)
+    return _build_pdf(_diary_section_story(payload, _period_styles()), title=f"RDO {payload['date']}")
+
+
+def render_period_cover_pdf(project, date_from: date, date_to: date, diaries_count: int) -> BytesIO:
+    """Página de abertura do consolidado (obra, período, data de geração)."""
+    from reportlab.platypus import Paragraph, Spacer
+
+    st = _period_styles()
+    gen_em = timezone.localtime(timezone.now()).strftime("%d/%m/%Y %H:%M")
+    story: list[Any] = [
+        Paragraph(_safe_pdf_text("Relatório consolidado — RDO / Diário de Obra"), st["title"]),
+        Paragraph(_safe_pdf_text(f"Obra: {project.code} — {project.name}"), st["body"]),
         Paragraph(
             _safe_pdf_multiline_text(
                 f"Período: {date_from.strftime('%d/%m/%Y')} a {date_to.strftime('%d/%m/%Y')} "
-                f"({len(diaries)} dia(s) com registro). Gerado em {gen_em}. "
+                f"({diaries_count} dia(s) com registro). Gerado em {gen_em}. "
                 "Fotos, vídeos e anexos não são incluídos — consulte o PDF de cada dia no sistema."
             ),
-            body,
-        )
+            st["body"],
+        ),
+        Spacer(1, 8),
+    ]
+    return _build_pdf(story, title=f"RDO consolidado {project.code}")
+
+
+def _section_storage_prefix(diary) -> str:
+    return f"{SECTION_STORAGE_DIR}/{diary.project_id}/{diary.pk}_"
+
+
+def get_or_build_diary_section(diary, fingerprint: str | None = None) -> str:
+    """
+    Devolve o caminho (no storage) da seção PDF do diário, renderizando só se o conteúdo mudou.
+
+    Versões antigas da mesma seção são removidas ao gravar uma nova.
+    """
+    fp = fingerprint or diary_section_fingerprint(diary)
+    prefix = _section_storage_prefix(diary)
+    name = f"{prefix}{fp[:32]}.pdf"
+    if default_storage.exists(name):
+        return name
+
+    buf = render_diary_section_pdf(diary)
+    saved = default_storage.save(name, ContentFile(buf.getvalue()))
+
+    folder, _, base_prefix = prefix.rpartition("/")
+    try:
+        _dirs, files = default_storage.listdir(folder)
+    except (FileNotFoundError, NotImplementedError, OSError):
+        files = []
+    for fname in files:
+        old = f"{folder}/{fname}"
+        if fname.startswith(base_prefix) and old != saved:
+            try:
+                default_storage.delete(old)
+            except OSError:
+                logger.warning("Seção RDO antiga não removida: %s", old)
+    return saved
+
+
+def assemble_period_pdf(cover: BytesIO, section_names: Iterable[str], output) -> None:
+    """
+    Concatena capa + seções (lidas do storage, uma de cada vez) em ``output`` (arquivo binário).
+    """
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except ImportError:  # pragma: no cover — PyPDF2 3.x
+        from PyPDF2 import PdfReader, PdfWriter  # type: ignore
+
+    writer = PdfWriter()
+    for page in PdfReader(cover).pages:
+        writer.add_page(page)
+    handles = []
+    try:
+        for name in section_names:
+            fh = default_storage.open(name, "rb")
+            handles.append(fh)
+            for page in PdfReader(fh).pages:
+                writer.add_page(page)
+        writer.write(output)
+    finally:
+        for fh in handles:
+            fh.close()
+
+
+def generate_rdo_period_pdf_bytes(project, date_from: date, date_to: date) -> BytesIO | None:
+    """
+    Gera PDF com um capítulo por dia que possua ConstructionDiary no intervalo [date_from, date_to].
+    Retorna BytesIO ou None se ReportLab indisponível ou sem diários.
+
+    Síncrono (usa o cache de seções); para períodos longos prefira ``RdoPeriodReportJob``.
+    """
+    if not REPORTLAB_AVAILABLE:
+        logger.warning("ReportLab indisponível — PDF consolidado não gerado.")
+        return None
+
+    diaries = list(period_diaries_queryset(project, date_from, date_to))
+    if not diaries:
+        return None
+
+    sections = [get_or_build_diary_section(d) for d in diaries]
+    out = BytesIO()
+    assemble_period_pdf(render_period_cover_pdf(project, date_from, date_to, len(diaries)), sections, out)
+    out.seek(0)
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Job em background (RdoPeriodReportJob)
+# ---------------------------------------------------------------------------
+
+
+def request_rdo_period_report(project, date_from: date, date_to: date, user=None):
+    """
+    Devolve o job do consolidado para o período, criando e enfileirando um novo se preciso.
+
+    Reaproveita: (1) job concluído cujo conteúdo não mudou desde a geração; (2) job ainda
+    na fila/em execução para o mesmo período — reenfileirado se está parado há mais de
+    ``JOB_STALE_AFTER`` (as seções prontas vêm do cache). Retorna None quando não há diários.
+    """
+    from core.models import RdoPeriodReportJob
+    from core.tasks import enqueue_rdo_period_report_job
+
+    diaries = list(period_diaries_queryset(project, date_from, date_to))
+    if not diaries:
+        return None
+    fingerprint = period_source_fingerprint(diaries)
+
+    base = RdoPeriodReportJob.objects.filter(project=project, date_from=date_from, date_to=date_to)
+    done = (
+        base.filter(status=RdoPeriodReportJob.Status.DONE, source_fingerprint=fingerprint)
+        .exclude(file="")
+        .first()
     )
-    story.append(Spacer(1, 8))
-
-    for idx, diary in enumerate(diaries):
-        if idx:
-            story.append(PageBreak())
-        dlabel = diary.date.strftime("%d/%m/%Y") if diary.date else "-"
-        rno = diary.report_number or "-"
-        st = diary.get_status_display() if hasattr(diary, "get_status_display") else str(diary.status)
-        story.append(Paragraph(_safe_pdf_text(f"{dlabel} · RDO nº {rno} · {st}"), day_title))
-
-        def add_block(label: str, value: str):
-            v = _clip(value)
-            if not v:
-                return
-            story.append(Paragraph(f"<b>{_safe_pdf_text(label)}</b>", label_style))
-            story.append(Paragraph(_safe_pdf_multiline_text(v), body))
-            story.append(Spacer(1, 4))
+    if done and default_storage.exists(done.file.name):
+        return done
+    active = base.filter(
+        status__in=[RdoPeriodReportJob.Status.PENDING, RdoPeriodReportJob.Status.RUNNING],
+        source_fingerprint=fingerprint,
+    ).first()
+    if active:
+        # Marca o reenfileiramento em ``updated_at`` (condicional): pedidos simultâneos não duplicam.
+        stale = timezone.now() - JOB_STALE_AFTER
+        if base.filter(pk=active.pk, updated_at__lt=stale).update(updated_at=timezone.now()):
+            logger.warning("RDO período: job %s parado desde %s, reenfileirando.", active.pk, active.updated_at)
+            enqueue_rdo_period_report_job(active.pk)
+        return active
 
-        add_block("Responsável inspeção", diary.inspection_responsible or "")
-        add_block("Responsável produção", diary.production_responsible or "")
-        add_block("Condições climáticas", diary.weather_conditions or "")
-        if diary.work_hours is not None:
-            story.append(Paragraph(_safe_pdf_text(f"<b>Horas trabalhadas:</b> {diary.work_hours}"), body))
-            story.append(Spacer(1, 4))
-        add_block("Deliberações", diary.deliberations or "")
-        add_block("Observações gerais", diary.general_notes or "")
-        add_block("Acidentes", diary.accidents or "")
-        add_block("Paralisações", diary.stoppages or "")
-        add_block("Riscos eminentes", diary.imminent_risks or "")
-        add_block("Outros incidentes", diary.incidents or "")
-        add_block("Fiscalizações", diary.inspections or "")
-        add_block("DDS", diary.dds or "")
-
-        ocs = list(diary.occurrences.all()[:50])
-        if ocs:
-            story.append(Paragraph(_safe_pdf_text("<b>Ocorrências</b>"), label_style))
-            for oc in ocs:
-                desc = _clip(oc.description or "", 2000)
-                if desc:
-                    story.append(Paragraph(_safe_pdf_multiline_text(f"• {desc}"), body))
-            story.append(Spacer(1, 4))
+    job = RdoPeriodReportJob.objects.create(
+        project=project,
+        requested_by=user if getattr(user, "is_authenticated", False) else None,
+        date_from=date_from,
+        date_to=date_to,
+        sections_total=len(diaries),
+        source_fingerprint=fingerprint,
+    )
+    enqueue_rdo_period_report_job(job.pk)
+    return job
 
-        logs = list(diary.work_logs.select_related("activity").all())
-        if logs:
-            story.append(Paragraph(_safe_pdf_text("<b>Atividades / EAP (registro do dia)</b>"), label_style))
-            for wl in logs:
-                act = wl.activity
-                an = act.display_code_name if act else "-"
-                pct = wl.percentage_executed_today
-                loc = (wl.location or "").strip()
-                nt = _clip(wl.notes or "", 1500)
-                line = f"• {an} — {pct}% executado no dia"
-                if loc:
-                    line += f" — Local: {loc}"
-                story.append(Paragraph(_safe_pdf_multiline_text(line), body))
-                if nt:
-                    story.append(Paragraph(_safe_pdf_multiline_text(nt), body))
-            story.append(Spacer(1, 4))
 
-        criador = ""
-        if diary.created_by:
-            criador = diary.created_by.get_full_name() or diary.created_by.username
-        if criador:
-            story.append(Paragraph(_safe_pdf_text(f"Preenchido por: {criador}"), label_style))
+def build_rdo_period_report(job) -> None:
+    """
+    Executa o job: garante a seção de cada diário (com progresso salvo a cada seção) e monta o PDF final.
+
+    Levanta exceção em caso de falha; quem chama marca o job como FAILED.
+    """
+    from core.models import RdoPeriodReportJob
 
-    doc.build(story)
-    buf.seek(0)
-    return buf
+    if not REPORTLAB_AVAILABLE:
+        raise RuntimeError("ReportLab indisponível — PDF consolidado não gerado.")
+
+    diaries = list(period_diaries_queryset(job.project, job.date_from, job.date_to))
+    if not diaries:
+        raise RuntimeError("Sem diários no período.")
+
+    fingerprints = [diary_section_fingerprint(d) for d in diaries]
+    job.status = RdoPeriodReportJob.Status.RUNNING
+    job.started_at = job.started_at or timezone.now()
+    job.sections_total = len(diaries)
+    job.sections_done = 0
+    job.error = ""
+    job.save(update_fields=["status", "started_at", "sections_total", "sections_done", "error", "updated_at"])
+
+    sections = []
+    for idx, (diary, fp) in enumerate(zip(diaries, fingerprints), start=1):
+        sections.append(get_or_build_diary_section(diary, fp))
+        RdoPeriodReportJob.objects.filter(pk=job.pk).update(sections_done=idx, updated_at=timezone.now())
+
+    out = BytesIO()
+    assemble_period_pdf(
+        render_period_cover_pdf(job.project, job.date_from, job.date_to, len(diaries)), sections, out
+    )
+    code = (job.project.code or "obra").replace(" ", "_")
+    old_name = job.file.name if job.file else ""
+    job.file.save(f"RDO_consolidado_{code}_{job.date_from}_{job.date_to}.pdf", ContentFile(out.getvalue()), save=False)
+    if old_name and old_name != job.file.name:
+        default_storage.delete(old_name)
+
+    job.source_fingerprint = period_source_fingerprint(diaries, fingerprints)
+    job.sections_done = len(diaries)
+    job.status = RdoPeriodReportJob.Status.DONE
+    job.finished_at = timezone.now()
+    job.save(
+        update_fields=["file", "source_fingerprint", "sections_done", "status", "finished_at", "updated_at"]
+    )
@@ -2,6 +2,8 @@
 ViewSets DRF para Diário de Obra V2.0 - LPLAN
 
 ViewSets com permissões customizadas e ações específicas para workflow.
+Listagens paginadas por cursor (core.pagination) e com sparse fieldsets
+(``?fields=`` / ``?omit=``, ver core.serializers.SparseFieldsetMixin).
 """
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
@@ -33,7 +35,9 @@ from .serializers import (
     DailyWorkLogSerializer,
     LaborSerializer,
     EquipmentSerializer,
+    requested_fields,
 )
+from .db_annotations import annotate_activity_parent_id
 from .permissions import CanApproveDiary, CanEditDiary
 from .services import ProgressService
 
@@ -56,10 +60,13 @@ class ProjectViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         from core.db_annotations import coalesced_correlated_count
 
-        return Project.objects.annotate(
-            activities_count=coalesced_correlated_count(Activity, fk_field='project_id'),
-            diaries_count=coalesced_correlated_count(ConstructionDiary, fk_field='project_id'),
-        )
+        wanted = requested_fields(self.request)
+        annotations = {}
+        if wanted is None or 'activities_count' in wanted:
+            annotations['activities_count'] = coalesced_correlated_count(Activity, fk_field='project_id')
+        if wanted is None or 'diaries_count' in wanted:
+            annotations['diaries_count'] = coalesced_correlated_count(ConstructionDiary, fk_field='project_id')
+        return Project.objects.annotate(**annotations)
     
     @action(detail=True, methods=['get'])
     def activities_tree(self, request, pk=None):
@@ -111,6 +118,9 @@ class ActivityViewSet(viewsets.ModelViewSet):
         project_id = self.request.query_params.get('project')
         if project_id:
             queryset = queryset.filter(project_id=project_id)
+        wanted = requested_fields(self.request)
+        if wanted is None or 'parent_id' in wanted:
+            queryset = annotate_activity_parent_id(queryset)
         return queryset
     
     @action(detail=True, methods=['get'])
@@ -121,7 +131,7 @@ class ActivityViewSet(viewsets.ModelViewSet):
         Usado para carregamento preguiçoso da árvore EAP.
         """
         activity = self.get_object()
-        children = activity.get_children().order_by('code')
+        children = annotate_activity_parent_id(activity.get_children().order_by('code'))
         serializer = ActivityTreeSerializer(children, many=True)
         return Response(serializer.data)
     
@@ -165,7 +175,7 @@ class ConstructionDiaryViewSet(viewsets.ModelViewSet):
     """
     queryset = ConstructionDiary.objects.select_related(
         'project', 'created_by', 'reviewed_by'
-    ).prefetch_related('images', 'work_logs').all()
+    ).all()
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['project', 'status', 'date']
@@ -210,6 +220,17 @@ class ConstructionDiaryViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filtra diários baseado em permissões do usuário."""
         queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related('images', 'work_logs')
+        else:
+            from core.db_annotations import coalesced_correlated_count
+
+            queryset = queryset.annotate(
+                images_count=coalesced_correlated_count(
+                    DiaryImage, fk_field='diary_id', is_approved_for_report=True,
+                ),
+                work_logs_count=coalesced_correlated_count(DailyWorkLog, fk_field='diary_id'),
+            )
         user = self.request.user
         
         # Usuários normais veem apenas seus próprios diários ou aprovados
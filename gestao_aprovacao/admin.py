@@ -3,6 +3,7 @@ from django.utils.safestring import mark_safe
 from .models import (
     Empresa, Obra, WorkOrder, Approval, Attachment, StatusHistory, WorkOrderPermission,
     UserEmpresa, UserProfile, Notificacao, Comment, Lembrete, TagErro, EmailLog,
+    EmailOutbox, PdfConsolidadoJob,
     AprovacaoEmailDestinatario, GestaoCentralDispatch,
 )
 
@@ -916,3 +917,26 @@ class GestaoCentralDispatchAdmin(admin.ModelAdmin):
     raw_id_fields = ['work_order', 'approval_process', 'sent_by']
     readonly_fields = ['sent_at', 'snapshot_payload']
 
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    """Fila persistente de e-mails (enviada pelo worker da outbox)."""
+
+    list_display = ['chave', 'tipo_email', 'status', 'tentativas', 'proxima_tentativa_em', 'enviado_em', 'criado_em']
+    list_filter = ['status', 'tipo_email']
+    search_fields = ['chave', 'assunto']
+    raw_id_fields = ['work_order', 'email_log']
+    readonly_fields = ['criado_em', 'atualizado_em', 'enviado_em']
+    # Corpos fora do admin: podem conter dados pessoais até o envio.
+    exclude = ['corpo_texto', 'corpo_html']
+
+
+@admin.register(PdfConsolidadoJob)
+class PdfConsolidadoJobAdmin(admin.ModelAdmin):
+    """PDFs consolidados com assinatura gerados em background."""
+
+    list_display = ['work_order', 'status', 'anexos_prontos', 'anexos_total', 'solicitado_por', 'criado_em', 'concluido_em']
+    list_filter = ['status']
+    search_fields = ['work_order__codigo', 'solicitado_por__username']
+    raw_id_fields = ['work_order', 'aprovacao', 'solicitado_por']
+    readonly_fields = ['criado_em', 'atualizado_em', 'iniciado_em', 'concluido_em', 'impressao_digital']
@@ -6,3 +6,5 @@ class GestaoAprovacaoConfig(AppConfig):
     name = 'gestao_aprovacao'
     verbose_name = 'GestControll'
 
+    def ready(self):
+        import gestao_aprovacao.signals  # noqa: F401 - stream de atividade por usuário
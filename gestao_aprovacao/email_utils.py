@@ -1,8 +1,11 @@
 """
 Utilitários para envio de e-mails de notificação.
+
+Os e-mails do GestControll são enfileirados na outbox persistente (EmailOutbox) e
+enviados pelo worker de ``gestao_aprovacao.services.email_outbox``. Exceção: o e-mail de
+credenciais de novo usuário é enviado na hora, para a senha nunca ser gravada no banco.
 """
 import logging
-import threading
 import os
 import time
 import smtplib
@@ -12,6 +15,8 @@ from django.utils.html import strip_tags
 from django.utils import timezone
 from django.urls import reverse
 
+from gestao_aprovacao.services.email_outbox import enfileirar_email
+
 logger = logging.getLogger(__name__)
 
 # Fallback quando o banco ainda não tem registros (ex.: antes da migração) ou tabela vazia.
@@ -137,9 +142,44 @@ def _criar_log_email(tipo_email, workorder, destinatarios, assunto):
         return None
 
 
+def _remetente_padrao():
+    return settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else settings.EMAIL_HOST_USER
+
+
+def _chave_email_pedido(tipo_email, workorder):
+    """
+    Chave de deduplicação da outbox: tipo + pedido + evento que originou o e-mail
+    (última decisão registrada ou última mudança de status).
+    """
+    from .models import Approval, StatusHistory
+
+    if tipo_email in ('aprovacao', 'reprovacao'):
+        decisao = 'aprovado' if tipo_email == 'aprovacao' else 'reprovado'
+        evento = (
+            Approval.objects.filter(work_order=workorder, decisao=decisao)
+            .order_by('-created_at', '-pk')
+            .values_list('pk', flat=True)
+            .first()
+        )
+    else:
+        evento = (
+            StatusHistory.objects.filter(work_order=workorder)
+            .order_by('-pk')
+            .values_list('pk', flat=True)
+            .first()
+        )
+    if evento is None:
+        ts = workorder.data_aprovacao or workorder.data_envio or workorder.updated_at
+        evento = ts.isoformat() if ts else 'sem-evento'
+    return f"{tipo_email}:{workorder.pk}:{evento}"
+
+
 def _enviar_email_com_retry(email_obj, email_log, max_tentativas=3, delay=2):
     """
-    Envia email com retry automático em caso de falha.
+    Envia email com retry automático em caso de falha (bloqueia com ``time.sleep``).
+
+    Uso restrito a comandos/rotinas fora do ciclo web; views e serviços usam a outbox
+    (``gestao_aprovacao.services.email_outbox.enfileirar_email``).
     
     Args:
         email_obj: Objeto EmailMessage ou EmailMultiAlternatives
@@ -599,33 +639,32 @@ def enviar_email_credenciais_novo_usuario(email_destino, username, senha_plana,
         site_url=site_url,
     )
     from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None) or settings.EMAIL_HOST_USER
-    destinatarios = payload['destinatarios']
-    assunto = payload['assunto']
-    mensagem_texto = payload['mensagem_texto']
-    html_content = payload['html_content']
-    email_log = _criar_log_email('credenciais_usuario', None, destinatarios, assunto)
+    # Envio direto, uma tentativa: a senha não passa pela outbox (ficaria no banco até o envio).
+    email_log = _criar_log_email('credenciais_usuario', None, payload['destinatarios'], payload['assunto'])
+    email = EmailMultiAlternatives(
+        subject=payload['assunto'],
+        body=payload['mensagem_texto'],
+        from_email=from_email,
+        to=payload['destinatarios'],
+    )
+    email.attach_alternative(payload['html_content'], "text/html")
     try:
-        email = EmailMultiAlternatives(
-            subject=assunto,
-            body=mensagem_texto,
-            from_email=from_email,
-            to=destinatarios,
-        )
-        email.attach_alternative(html_content, "text/html")
-        sucesso = _enviar_email_com_retry(email, email_log)
-        if sucesso:
-            logger.info(f"E-mail com credenciais enviado para {email_destino} (usuário: {username}).")
-        else:
-            logger.warning(f"Falha ao enviar e-mail de credenciais para {email_destino} (usuário: {username}).")
-        return sucesso
+        email.send(fail_silently=False)
     except Exception as e:
+        logger.warning(f"Falha ao enviar e-mail de credenciais para {email_destino}: {e}")
         if email_log:
             try:
                 email_log.marcar_como_falhou(str(e))
             except Exception:
                 pass
-        logger.warning(f"Falha ao enviar e-mail de credenciais para {email_destino}: {e}")
         return False
+    if email_log:
+        try:
+            email_log.marcar_como_enviado()
+        except Exception:
+            pass
+    logger.info(f"E-mail com credenciais enviado para {email_destino} (usuário: {username}).")
+    return True
 
 
 def enviar_email_novo_pedido(workorder):
@@ -648,40 +687,20 @@ def enviar_email_novo_pedido(workorder):
             workorder.codigo,
         )
         return False
-    assunto = payload['assunto']
-    mensagem_texto = payload['mensagem_texto']
-    html_content = payload['html_content']
-    
-    # Criar log de email ANTES de tentar enviar
-    email_log = _criar_log_email('novo_pedido', workorder, destinatarios, assunto)
-    
     try:
-        # Usar EmailMultiAlternatives para enviar HTML + texto
-        email = EmailMultiAlternatives(
-            subject=assunto,
-            body=mensagem_texto,
-            from_email=settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else settings.EMAIL_HOST_USER,
-            to=destinatarios,
+        enfileirar_email(
+            chave=_chave_email_pedido('novo_pedido', workorder),
+            tipo_email='novo_pedido',
+            destinatarios=destinatarios,
+            assunto=payload['assunto'],
+            corpo_texto=payload['mensagem_texto'],
+            corpo_html=payload['html_content'],
+            remetente=_remetente_padrao(),
+            work_order=workorder,
         )
-        email.attach_alternative(html_content, "text/html")
-        
-        # Enviar com retry
-        sucesso = _enviar_email_com_retry(email, email_log)
-        
-        if sucesso:
-            logger.info(f"Email de novo pedido enviado com sucesso para {destinatarios} - Pedido: {workorder.codigo}")
-        else:
-            logger.error(f"Falha ao enviar email de novo pedido {workorder.codigo} após múltiplas tentativas")
-        
-        return sucesso
+        return True
     except Exception as e:
-        # Registrar erro no log (se existir)
-        if email_log:
-            try:
-                email_log.marcar_como_falhou(str(e))
-            except Exception as log_error:
-                logger.warning(f"Erro ao atualizar log de falha: {log_error}")
-        logger.error(f"Erro ao enviar e-mail de novo pedido {workorder.codigo}: {e}", exc_info=True)
+        logger.error(f"Erro ao enfileirar e-mail de novo pedido {workorder.codigo}: {e}", exc_info=True)
         return False
 
 
@@ -1049,127 +1068,59 @@ Mensagem automática. Não responda a este e-mail.
     }
 
 
-def _enviar_email_aprovacao_thread(workorder_id, aprovado_por_id, comentario):
+def anexar_pdfs_email_aprovacao(email, args):
     """
-    Função interna que roda em thread para enviar email de aprovação com anexos.
-    Não deve ser chamada diretamente - use enviar_email_aprovacao().
+    Provedor de anexos da outbox para o e-mail de aprovação (executado pelo worker).
+    Anexa o PDF consolidado; se não puder ser gerado, os PDFs individuais.
     """
     from .models import WorkOrder
+    from gestao_aprovacao.services.consolidated_signature_pdf import (
+        try_build_consolidated_approval_email_pdf,
+    )
 
-    try:
-        # Recarregar objetos do banco (necessário em threads)
-        from django.contrib.auth.models import User
-        workorder = WorkOrder.objects.get(pk=workorder_id)
-        aprovado_por = User.objects.get(pk=aprovado_por_id)
-        
-        # Verificar se email está configurado
-        if not settings.EMAIL_HOST_USER or not settings.EMAIL_HOST_PASSWORD:
+    workorder = WorkOrder.objects.get(pk=args['workorder_id'])
+    anexos_falhados = 0
+    consolidated = try_build_consolidated_approval_email_pdf(workorder)
+    if consolidated:
+        pdf_bytes, nome_arquivo = consolidated
+        tamanho = len(pdf_bytes)
+        if tamanho > 25 * 1024 * 1024:
             logger.warning(
-                f"Email não configurado. Não foi possível enviar email de aprovação para pedido {workorder.codigo}. "
-                f"Configure EMAIL_HOST_USER e EMAIL_HOST_PASSWORD nas variáveis de ambiente."
+                'PDF consolidado do pedido %s muito grande (%.2f MB); '
+                'e-mail pode falhar no envio.',
+                workorder.codigo,
+                tamanho / 1024 / 1024,
             )
-            return False
-        
-        payload = build_email_aprovacao_payload(workorder, aprovado_por, comentario)
-        destinatarios = payload['destinatarios']
-        
-        if not destinatarios:
-            logger.warning(f"Nenhum destinatário encontrado para email de aprovação do pedido {workorder.codigo}.")
-            return False
-        assunto = payload['assunto']
-        mensagem_texto = payload['mensagem_texto']
-        html_content = payload['html_content']
-        
-        # Criar log de email ANTES de tentar enviar
-        email_log = _criar_log_email('aprovacao', workorder, destinatarios, assunto)
-        
-        # Criar EmailMultiAlternatives para poder anexar arquivos e enviar HTML
-        email = EmailMultiAlternatives(
-            subject=assunto,
-            body=mensagem_texto,
-            from_email=settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else settings.EMAIL_HOST_USER,
-            to=destinatarios,
+        email.attach(nome_arquivo, pdf_bytes, 'application/pdf')
+        anexos_anexados = 1
+        logger.info(
+            'E-mail de aprovação do pedido %s: anexo PDF consolidado %s (%d bytes).',
+            workorder.codigo,
+            nome_arquivo,
+            tamanho,
         )
-        email.attach_alternative(html_content, "text/html")
-
-        from gestao_aprovacao.services.consolidated_signature_pdf import (
-            try_build_consolidated_approval_email_pdf,
+    else:
+        logger.warning(
+            'PDF consolidado indisponível para pedido %s; usando fallback de PDFs individuais.',
+            workorder.codigo,
+        )
+        anexos_anexados, anexos_falhados = _anexar_pdfs_individuais_email_aprovacao(
+            email, workorder
         )
 
-        anexos_anexados = 0
-        anexos_falhados = 0
-        consolidated = try_build_consolidated_approval_email_pdf(workorder)
-
-        if consolidated:
-            pdf_bytes, nome_arquivo = consolidated
-            tamanho = len(pdf_bytes)
-            if tamanho > 25 * 1024 * 1024:
-                logger.warning(
-                    'PDF consolidado do pedido %s muito grande (%.2f MB); '
-                    'e-mail pode falhar no envio.',
-                    workorder.codigo,
-                    tamanho / 1024 / 1024,
-                )
-            email.attach(nome_arquivo, pdf_bytes, 'application/pdf')
-            anexos_anexados = 1
-            logger.info(
-                'E-mail de aprovação do pedido %s: anexo PDF consolidado %s (%d bytes).',
-                workorder.codigo,
-                nome_arquivo,
-                tamanho,
-            )
-        else:
-            logger.warning(
-                'PDF consolidado indisponível para pedido %s; usando fallback de PDFs individuais.',
-                workorder.codigo,
-            )
-            anexos_anexados, anexos_falhados = _anexar_pdfs_individuais_email_aprovacao(
-                email, workorder
-            )
-
-        if anexos_anexados == 0:
-            logger.info(
-                'Nenhum anexo no e-mail de aprovação do pedido %s (consolidado e fallback vazios).',
-                workorder.codigo,
-            )
-        
-        # Enviar email com retry
-        try:
-            sucesso = _enviar_email_com_retry(email, email_log)
-            
-            if sucesso:
-                logger.info(
-                    f"Email de aprovação enviado com sucesso para {destinatarios} - Pedido: {workorder.codigo}. "
-                    f"Anexos: {anexos_anexados} anexados, {anexos_falhados} falhados."
-                )
-            else:
-                logger.error(
-                    f"Falha ao enviar email de aprovação {workorder.codigo} após múltiplas tentativas. "
-                    f"Anexos: {anexos_anexados} anexados, {anexos_falhados} falhados."
-                )
-            
-            return sucesso
-        except Exception as e:
-            # Registrar erro no log (se existir)
-            if email_log:
-                try:
-                    email_log.marcar_como_falhou(str(e))
-                except Exception as log_error:
-                    logger.warning(f"Erro ao atualizar log de falha: {log_error}")
-            logger.error(f"Erro ao enviar email de aprovação {workorder.codigo}: {e}", exc_info=True)
-            return False
-        
-    except Exception as e:
-        logger.error(f"Erro ao enviar e-mail de aprovação {workorder_id}: {e}", exc_info=True)
-        return False
+    if anexos_anexados == 0:
+        logger.info(
+            'Nenhum anexo no e-mail de aprovação do pedido %s (consolidado e fallback vazios).',
+            workorder.codigo,
+        )
+    return anexos_anexados, anexos_falhados
 
 
 def enviar_email_aprovacao(workorder, aprovado_por, comentario=None):
     """
-    Envia e-mail para o solicitante e departamentos quando o pedido é aprovado.
-    Anexa o PDF consolidado (todos os anexos + assinatura do aprovador), com fallback
-    para PDFs individuais apenas se a consolidação não for possível.
-    Roda em thread separada para não travar a interface.
+    Enfileira e-mail para o solicitante e departamentos quando o pedido é aprovado.
+    O PDF consolidado (todos os anexos + assinatura do aprovador), com fallback para PDFs
+    individuais, é gerado pelo worker da outbox no momento do envio.
     
     Args:
         workorder: Instância do WorkOrder aprovado
@@ -1177,40 +1128,37 @@ def enviar_email_aprovacao(workorder, aprovado_por, comentario=None):
         comentario: Comentário opcional da aprovação
     
     Returns:
-        None (executa em background)
+        bool: True se o e-mail foi enfileirado
     """
-    # Verificar se email está configurado antes de criar thread
     if not settings.EMAIL_HOST_USER or not settings.EMAIL_HOST_PASSWORD:
         logger.warning(
             f"Email não configurado. Não foi possível enviar email de aprovação para pedido {workorder.codigo}. "
             f"Configure EMAIL_HOST_USER e EMAIL_HOST_PASSWORD nas variáveis de ambiente."
         )
         return False
-    
-    # Salvar IDs para passar para a thread (evita problemas com objetos do Django em threads)
-    workorder_id = workorder.pk
-    aprovado_por_id = aprovado_por.pk
-    
-    # Criar e iniciar thread em background.
-    # Em alguns hosts compartilhados pode haver limite de threads por processo.
-    # Se isso acontecer, fazemos fallback síncrono para evitar erro 500 na aprovação.
-    thread = threading.Thread(
-        target=_enviar_email_aprovacao_thread,
-        args=(workorder_id, aprovado_por_id, comentario),
-        daemon=True  # Thread daemon não impede o programa de encerrar
-    )
+
     try:
-        thread.start()
-        logger.info(f"Thread de envio de email de aprovação iniciada para pedido {workorder.codigo}")
-        return True
-    except RuntimeError as exc:
-        logger.warning(
-            "Não foi possível iniciar thread de e-mail para pedido %s (%s). "
-            "Executando envio síncrono como fallback.",
-            workorder.codigo,
-            exc,
+        payload = build_email_aprovacao_payload(workorder, aprovado_por, comentario)
+        destinatarios = payload['destinatarios']
+        if not destinatarios:
+            logger.warning(f"Nenhum destinatário encontrado para email de aprovação do pedido {workorder.codigo}.")
+            return False
+        enfileirar_email(
+            chave=_chave_email_pedido('aprovacao', workorder),
+            tipo_email='aprovacao',
+            destinatarios=destinatarios,
+            assunto=payload['assunto'],
+            corpo_texto=payload['mensagem_texto'],
+            corpo_html=payload['html_content'],
+            remetente=_remetente_padrao(),
+            work_order=workorder,
+            anexos='aprovacao_pdf',
+            anexos_args={'workorder_id': workorder.pk},
         )
-        return _enviar_email_aprovacao_thread(workorder_id, aprovado_por_id, comentario)
+        return True
+    except Exception as e:
+        logger.error(f"Erro ao enfileirar e-mail de aprovação {workorder.codigo}: {e}", exc_info=True)
+        return False
 
 
 def enviar_email_reprovacao(workorder, aprovado_por, comentario):
@@ -1238,39 +1186,18 @@ def enviar_email_reprovacao(workorder, aprovado_por, comentario):
             workorder.codigo,
         )
         return False
-    assunto = payload['assunto']
-    mensagem_texto = payload['mensagem_texto']
-    html_content = payload['html_content']
-    
-    # Criar log de email ANTES de tentar enviar
-    email_log = _criar_log_email('reprovacao', workorder, dest_reprov, assunto)
-    
     try:
-        # Usar EmailMultiAlternatives para enviar HTML + texto
-        email = EmailMultiAlternatives(
-            subject=assunto,
-            body=mensagem_texto,
-            from_email=settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else settings.EMAIL_HOST_USER,
-            to=dest_reprov,
+        enfileirar_email(
+            chave=_chave_email_pedido('reprovacao', workorder),
+            tipo_email='reprovacao',
+            destinatarios=dest_reprov,
+            assunto=payload['assunto'],
+            corpo_texto=payload['mensagem_texto'],
+            corpo_html=payload['html_content'],
+            remetente=_remetente_padrao(),
+            work_order=workorder,
         )
-        email.attach_alternative(html_content, "text/html")
-        
-        # Enviar com retry
-        sucesso = _enviar_email_com_retry(email, email_log)
-        
-        if sucesso:
-            logger.info(f"Email de reprovação enviado com sucesso para {solicitante.email} - Pedido: {workorder.codigo}")
-        else:
-            logger.error(f"Falha ao enviar email de reprovação {workorder.codigo} após múltiplas tentativas")
-        
-        return sucesso
+        return True
     except Exception as e:
-        # Registrar erro no log (se existir)
-        if email_log:
-            try:
-                email_log.marcar_como_falhou(str(e))
-            except Exception as log_error:
-                logger.warning(f"Erro ao atualizar log de falha: {log_error}")
-        logger.error(f"Erro ao enviar e-mail de reprovação {workorder.codigo}: {e}", exc_info=True)
+        logger.error(f"Erro ao enfileirar e-mail de reprovação {workorder.codigo}: {e}", exc_info=True)
         return False
-
@@ -0,0 +1,25 @@
+"""
+Envia os e-mails pendentes da outbox (EmailOutbox) do GestControll.
+
+Para ambientes sem Celery beat, agende no cron (ex.: a cada minuto):
+
+    python manage.py processar_outbox_email
+    python manage.py processar_outbox_email --lote 100 --max-lotes 5
+"""
+from django.core.management.base import BaseCommand
+
+from gestao_aprovacao.services.email_outbox import processar_outbox
+
+
+class Command(BaseCommand):
+    help = 'Envia os e-mails vencidos da outbox em lotes (uma conexão SMTP por lote).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=None, help='Mensagens por lote/conexão.')
+        parser.add_argument('--max-lotes', type=int, default=None, help='Para após N lotes.')
+
+    def handle(self, *args, **options):
+        stats = processar_outbox(tamanho_lote=options['lote'], max_lotes=options['max_lotes'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Enviados: {stats['enviados']} | Reagendados: {stats['reagendados']} | Falhos: {stats['falhos']}"
+        ))
@@ -0,0 +1,25 @@
+"""
+Carrega (ou recarrega) o stream de atividade por usuário a partir das fontes: logins,
+auditoria, pedidos, aprovações, status, comentários, anexos e diários.
+
+A carga inicial é feita pela migração 0037 e os sinais mantêm o stream; este comando
+recarrega tudo (ex.: após mudar um extrator). Idempotente:
+
+    python manage.py reconstruir_atividade_usuarios
+"""
+from django.core.management.base import BaseCommand
+
+from gestao_aprovacao.services.user_activity import reconstruir_atividades
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói UserActivityEvent (linha do tempo de governança) a partir das fontes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help='Registros por gravação em lote.')
+
+    def handle(self, *args, **options):
+        stats = reconstruir_atividades(lote=options['lote'])
+        for fonte, total in stats.items():
+            self.stdout.write(f'{fonte}: {total}')
+        self.stdout.write(self.style.SUCCESS(f'Eventos gravados: {sum(stats.values())}'))
@@ -0,0 +1,22 @@
+"""
+Recalcula os resumos materializados da home do GestControll (ResumoPedidosStatus/Mes).
+
+Os sinais mantêm os resumos em dia; use após importação em massa ou update direto no banco:
+
+    python manage.py reconstruir_resumo_home
+    python manage.py reconstruir_resumo_home --obra 12 --obra 15
+"""
+from django.core.management.base import BaseCommand
+
+from gestao_aprovacao.services.resumo_home import reconstruir_resumos
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os resumos da home (status e totais mensais) por obra.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--obra', type=int, action='append', help='Só esta obra (repetível).')
+
+    def handle(self, *args, **options):
+        total = reconstruir_resumos(options['obra'])
+        self.stdout.write(self.style.SUCCESS(f'Obras recalculadas: {total}'))
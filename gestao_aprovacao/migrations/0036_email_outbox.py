@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestao_aprovacao', '0035_alter_workorder_front'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(help_text='Identifica o evento (ex.: aprovacao:<pedido>:<aprovação>); evita envio duplicado.', max_length=255, unique=True, verbose_name='Chave da mensagem')),
+                ('tipo_email', models.CharField(choices=[('novo_pedido', 'Novo Pedido'), ('aprovacao', 'Aprovação'), ('reprovacao', 'Reprovação'), ('credenciais_usuario', 'Credenciais de Usuário'), ('diario_dono_obra', 'Diário para Dono da Obra'), ('diario_obra', 'Diário de Obra')], db_index=True, max_length=20, verbose_name='Tipo de Email')),
+                ('remetente', models.CharField(blank=True, max_length=254, verbose_name='Remetente')),
+                ('destinatarios', models.JSONField(default=list, verbose_name='Destinatários')),
+                ('assunto', models.CharField(max_length=500, verbose_name='Assunto')),
+                ('corpo_texto', models.TextField(blank=True, verbose_name='Corpo (texto)')),
+                ('corpo_html', models.TextField(blank=True, verbose_name='Corpo (HTML)')),
+                ('anexos', models.CharField(blank=True, help_text='Anexos gerados pelo worker no momento do envio (ex.: aprovacao_pdf).', max_length=40, verbose_name='Provedor de anexos')),
+                ('anexos_args', models.JSONField(blank=True, default=dict, verbose_name='Parâmetros dos anexos')),
+                ('conteudo_sensivel', models.BooleanField(default=False, help_text='O corpo é apagado depois do envio (ex.: credenciais).', verbose_name='Conteúdo sensível')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('enviado', 'Enviado'), ('falhou', 'Falhou')], db_index=True, default='pendente', max_length=20, verbose_name='Status')),
+                ('tentativas', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('max_tentativas', models.PositiveSmallIntegerField(default=6, verbose_name='Máximo de tentativas')),
+                ('proxima_tentativa_em', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próxima tentativa em')),
+                ('ultimo_erro', models.TextField(blank=True, verbose_name='Último erro')),
+                ('enviado_em', models.DateTimeField(blank=True, null=True, verbose_name='Enviado em')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('email_log', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='outbox', to='gestao_aprovacao.emaillog', verbose_name='Log de Email')),
+                ('work_order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='email_outbox', to='gestao_aprovacao.workorder', verbose_name='Pedido')),
+            ],
+            options={
+                'verbose_name': 'E-mail na fila',
+                'verbose_name_plural': 'Fila de e-mails',
+                'ordering': ['-criado_em'],
+                'indexes': [models.Index(fields=['status', 'proxima_tentativa_em'], name='gestao_apro_status_73d206_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,158 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:27
+# Stream de atividade por usuário (services.user_activity) + carga inicial.
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+LOTE = 1000
+
+
+def _severidade_auditoria(action_code):
+    if action_code == 'user_deleted':
+        return 'danger'
+    if action_code in ('obra_workorder_perm_remove', 'user_signup_request_internal', 'user_signup_rejected'):
+        return 'warning'
+    if action_code == 'user_signup_approved':
+        return 'success'
+    return 'info'
+
+
+def backfill_atividades(apps, schema_editor):
+    """Mesmos extratores de services.user_activity, sobre os modelos históricos."""
+    UserActivityEvent = apps.get_model('gestao_aprovacao', 'UserActivityEvent')
+    UserLoginLog = apps.get_model('accounts', 'UserLoginLog')
+    AuditEvent = apps.get_model('audit', 'AuditEvent')
+    WorkOrder = apps.get_model('gestao_aprovacao', 'WorkOrder')
+    Approval = apps.get_model('gestao_aprovacao', 'Approval')
+    StatusHistory = apps.get_model('gestao_aprovacao', 'StatusHistory')
+    Comment = apps.get_model('gestao_aprovacao', 'Comment')
+    Attachment = apps.get_model('gestao_aprovacao', 'Attachment')
+    ConstructionDiary = apps.get_model('core', 'ConstructionDiary')
+
+    def evento(source, pk, *, user_id, at, module, kind, label, detail='', severity='info',
+               success=True, obra_id=None, project_id=None, url=None):
+        url_name, url_kwargs = url or ('', {})
+        return UserActivityEvent(
+            source=source, source_pk=pk, user_id=user_id, at=at, module=module, kind=kind,
+            label=label[:500], detail=(detail or '')[:500], severity=severity, success=success,
+            obra_id=obra_id, project_id=project_id, url_name=url_name, url_kwargs=url_kwargs,
+        )
+
+    def eventos():
+        for row in UserLoginLog.objects.iterator(chunk_size=LOTE):
+            yield evento('login', row.pk, user_id=row.user_id, at=row.created_at, module='contas',
+                         kind='login', label='Sessão iniciada')
+        for row in AuditEvent.objects.filter(subject_user__isnull=False).select_related('actor').iterator(chunk_size=LOTE):
+            yield evento(
+                'audit', row.pk, user_id=row.subject_user_id, at=row.created_at, module='admin',
+                kind=row.action_code, label=row.summary,
+                detail=f"Executor: {row.actor.username if row.actor_id else '—'}",
+                severity=_severidade_auditoria(row.action_code),
+                url=('central_audit_event_detail', {'pk': row.pk}),
+            )
+        for wo in WorkOrder.objects.select_related('obra').iterator(chunk_size=LOTE):
+            url = ('gestao:detail_workorder', {'pk': wo.pk})
+            yield evento('workorder', wo.pk, user_id=wo.criado_por_id, at=wo.created_at, module='gestao',
+                         kind='pedido_criado', label=f'Pedido {wo.codigo} criado',
+                         detail=wo.obra.nome if wo.obra_id else '', obra_id=wo.obra_id, url=url)
+            if wo.solicitado_exclusao and wo.solicitado_exclusao_por_id and wo.solicitado_exclusao_em:
+                yield evento(
+                    'workorder', wo.pk, user_id=wo.solicitado_exclusao_por_id, at=wo.solicitado_exclusao_em,
+                    module='gestao', kind='exclusao_solicitada', label=f'Solicitou exclusão — {wo.codigo}',
+                    detail=wo.motivo_exclusao or '', severity='warning', obra_id=wo.obra_id, url=url,
+                )
+        for ap in Approval.objects.select_related('work_order').iterator(chunk_size=LOTE):
+            reprovado = ap.decisao == 'reprovado'
+            yield evento(
+                'approval', ap.pk, user_id=ap.aprovado_por_id, at=ap.created_at, module='gestao',
+                kind=f'aprovacao_{ap.decisao}',
+                label=f"{'Reprovou' if reprovado else 'Aprovou'} pedido {ap.work_order.codigo}",
+                detail=ap.comentario or '', severity='danger' if reprovado else 'success',
+                success=ap.decisao == 'aprovado', obra_id=ap.work_order.obra_id,
+                url=('gestao:detail_workorder', {'pk': ap.work_order_id}),
+            )
+        for sh in StatusHistory.objects.select_related('work_order').iterator(chunk_size=LOTE):
+            yield evento(
+                'statushistory', sh.pk, user_id=sh.alterado_por_id, at=sh.created_at, module='gestao',
+                kind='mudanca_status',
+                label=f"Status {sh.work_order.codigo}: {sh.status_anterior or '—'} → {sh.status_novo}",
+                detail=sh.observacao or '', severity='warning', obra_id=sh.work_order.obra_id,
+                url=('gestao:detail_workorder', {'pk': sh.work_order_id}),
+            )
+        for c in Comment.objects.select_related('work_order').iterator(chunk_size=LOTE):
+            yield evento(
+                'comment', c.pk, user_id=c.autor_id, at=c.created_at, module='gestao', kind='comentario',
+                label=f'Comentário no pedido {c.work_order.codigo}', detail=c.texto or '',
+                obra_id=c.work_order.obra_id, url=('gestao:detail_workorder', {'pk': c.work_order_id}),
+            )
+        for a in Attachment.objects.select_related('work_order').iterator(chunk_size=LOTE):
+            nome = a.nome or (a.arquivo.name.split('/')[-1] if a.arquivo else 'Sem nome')
+            yield evento(
+                'attachment', a.pk, user_id=a.enviado_por_id, at=a.created_at, module='gestao', kind='anexo',
+                label=f'Anexo no pedido {a.work_order.codigo}', detail=nome, obra_id=a.work_order.obra_id,
+                url=('gestao:detail_workorder', {'pk': a.work_order_id}),
+            )
+        for d in ConstructionDiary.objects.select_related('project').iterator(chunk_size=LOTE):
+            url = ('diary-detail', {'pk': d.pk})
+            yield evento('diary', d.pk, user_id=d.created_by_id, at=d.created_at, module='diario',
+                         kind='diario_criado', label=f'Diário de obra ({d.project.code}) — {d.date}',
+                         project_id=d.project_id, url=url)
+            if d.reviewed_by_id and d.approved_at:
+                yield evento(
+                    'diary', d.pk, user_id=d.reviewed_by_id, at=d.approved_at, module='diario',
+                    kind='diario_revisado', label=f'Revisão/aprovação de diário ({d.project.code}) — {d.date}',
+                    severity='success', project_id=d.project_id, url=url,
+                )
+
+    buffer = []
+    for ev in eventos():
+        if not (ev.user_id and ev.at):
+            continue
+        buffer.append(ev)
+        if len(buffer) >= LOTE:
+            UserActivityEvent.objects.bulk_create(buffer, ignore_conflicts=True)
+            buffer = []
+    UserActivityEvent.objects.bulk_create(buffer, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_mapa_geografico_group'),
+        ('audit', '0002_seed_retention_policies'),
+        ('core', '0061_activity_progress_cache'),
+        ('gestao_aprovacao', '0036_email_outbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('at', models.DateTimeField(verbose_name='Quando')),
+                ('module', models.CharField(max_length=16, verbose_name='Módulo')),
+                ('kind', models.CharField(max_length=80, verbose_name='Tipo')),
+                ('label', models.CharField(max_length=500, verbose_name='Descrição')),
+                ('detail', models.CharField(blank=True, max_length=500, verbose_name='Detalhe')),
+                ('severity', models.CharField(default='info', max_length=16, verbose_name='Severidade')),
+                ('success', models.BooleanField(default=True, verbose_name='Sucesso')),
+                ('url_name', models.CharField(blank=True, max_length=80, verbose_name='Rota do detalhe')),
+                ('url_kwargs', models.JSONField(blank=True, default=dict, verbose_name='Parâmetros da rota')),
+                ('source', models.CharField(max_length=32, verbose_name='Origem')),
+                ('source_pk', models.PositiveBigIntegerField(verbose_name='ID na origem')),
+                ('obra', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='gestao_aprovacao.obra', verbose_name='Obra (GestControll)')),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.project', verbose_name='Projeto (Diário de Obra)')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_events', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Atividade do usuário',
+                'verbose_name_plural': 'Atividades dos usuários',
+                'ordering': ['-at', '-id'],
+                'indexes': [models.Index(fields=['user', '-at', '-id'], name='user_activity_user_at'), models.Index(fields=['user', 'module', '-at', '-id'], name='user_activity_module_at'), models.Index(fields=['at'], name='user_activity_at')],
+                'constraints': [models.UniqueConstraint(fields=('source', 'source_pk', 'kind'), name='uniq_user_activity_source')],
+            },
+        ),
+        migrations.RunPython(backfill_atividades, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,124 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:48
+# Resumos materializados da home (services.resumo_home) + carga inicial.
+
+from datetime import datetime
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, DateTimeField, F, Min, Q
+from django.db.models.functions import Coalesce, TruncMonth
+
+AGUARDANDO = ('pendente', 'reaprovacao')
+ACAO_SOLICITANTE = ('rascunho', 'reprovado', 'reaprovacao')
+
+
+def backfill_resumos(apps, schema_editor):
+    """Mesmo cálculo de recalcular_resumos_obra, agrupado também por obra."""
+    WorkOrder = apps.get_model('gestao_aprovacao', 'WorkOrder')
+    Approval = apps.get_model('gestao_aprovacao', 'Approval')
+    ResumoPedidosStatus = apps.get_model('gestao_aprovacao', 'ResumoPedidosStatus')
+    ResumoPedidosMes = apps.get_model('gestao_aprovacao', 'ResumoPedidosMes')
+
+    aguardando = Q(status__in=AGUARDANDO)
+    status_rows = (
+        WorkOrder.objects.filter(aguardando | Q(status__in=ACAO_SOLICITANTE))
+        .values('obra_id', 'front_id', 'criado_por_id')
+        .annotate(
+            aguardando_aprovacao=Count('id', filter=aguardando),
+            acao_solicitante=Count('id', filter=Q(status__in=ACAO_SOLICITANTE)),
+            fila_desde=Min(Coalesce('data_envio', 'created_at', output_field=DateTimeField()), filter=aguardando),
+        )
+        .order_by()
+    )
+    ResumoPedidosStatus.objects.bulk_create((ResumoPedidosStatus(**r) for r in status_rows), batch_size=500)
+
+    keys = ('obra_id', 'front_id', 'criado_por_id', 'mes')
+    totals = {}
+
+    def add(qs, field):
+        for r in qs:
+            mes = r['mes'].date() if isinstance(r['mes'], datetime) else r['mes']
+            key = (r['obra_id'], r['front_id'], r['criado_por_id'], mes)
+            totals.setdefault(key, {'criados': 0, 'aprovados': 0, 'reprovados': 0})[field] = r['n']
+
+    add(
+        WorkOrder.objects.annotate(mes=TruncMonth('created_at')).values(*keys).annotate(n=Count('id')).order_by(),
+        'criados',
+    )
+    add(
+        WorkOrder.objects.filter(status='aprovado', data_aprovacao__isnull=False)
+        .annotate(mes=TruncMonth('data_aprovacao'))
+        .values(*keys)
+        .annotate(n=Count('id'))
+        .order_by(),
+        'aprovados',
+    )
+    add(
+        Approval.objects.filter(decisao='reprovado')
+        .annotate(
+            mes=TruncMonth('created_at'),
+            obra_id=F('work_order__obra_id'),
+            front_id=F('work_order__front_id'),
+            criado_por_id=F('work_order__criado_por_id'),
+        )
+        .values(*keys)
+        .annotate(n=Count('work_order_id', distinct=True))
+        .order_by(),
+        'reprovados',
+    )
+    ResumoPedidosMes.objects.bulk_create(
+        (
+            ResumoPedidosMes(obra_id=o, front_id=f, criado_por_id=u, mes=m, **v)
+            for (o, f, u, m), v in totals.items()
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0061_activity_progress_cache'),
+        ('gestao_aprovacao', '0037_user_activity_event'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoPedidosMes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primeiro dia do mês (horário local).', verbose_name='Mês')),
+                ('criados', models.PositiveIntegerField(default=0, verbose_name='Criados')),
+                ('aprovados', models.PositiveIntegerField(default=0, verbose_name='Aprovados')),
+                ('reprovados', models.PositiveIntegerField(default=0, verbose_name='Pedidos reprovados')),
+                ('criado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Solicitante')),
+                ('front', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.projectfront', verbose_name='Frente')),
+                ('obra', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='gestao_aprovacao.obra', verbose_name='Obra')),
+            ],
+            options={
+                'verbose_name': 'Resumo de pedidos (mês)',
+                'verbose_name_plural': 'Resumos de pedidos (mês)',
+                'indexes': [models.Index(fields=['mes', 'obra'], name='resumo_mes_obra'), models.Index(fields=['criado_por', 'mes'], name='resumo_mes_user')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumoPedidosStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('aguardando_aprovacao', models.PositiveIntegerField(default=0, verbose_name='Pendentes/reaprovação')),
+                ('acao_solicitante', models.PositiveIntegerField(default=0, verbose_name='Rascunho/reprovado/reaprovação')),
+                ('fila_desde', models.DateTimeField(blank=True, help_text='Menor data de envio (ou criação) entre os pedidos pendentes/em reaprovação.', null=True, verbose_name='Mais antigo na fila desde')),
+                ('criado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Solicitante')),
+                ('front', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.projectfront', verbose_name='Frente')),
+                ('obra', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='gestao_aprovacao.obra', verbose_name='Obra')),
+            ],
+            options={
+                'verbose_name': 'Resumo de pedidos (status)',
+                'verbose_name_plural': 'Resumos de pedidos (status)',
+                'indexes': [models.Index(fields=['obra', 'criado_por'], name='resumo_status_obra_user'), models.Index(fields=['criado_por', 'obra'], name='resumo_status_user_obra')],
+            },
+        ),
+        migrations.RunPython(backfill_resumos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestao_aprovacao', '0038_resumo_pedidos_home'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PdfConsolidadoJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ordem_anexos', models.JSONField(blank=True, default=list, verbose_name='Ordem dos anexos')),
+                ('status', models.CharField(choices=[('pendente', 'Na fila'), ('gerando', 'Gerando'), ('concluido', 'Concluído'), ('falhou', 'Falhou')], db_index=True, default='pendente', max_length=20, verbose_name='Status')),
+                ('anexos_total', models.PositiveIntegerField(default=0, verbose_name='Anexos (total)')),
+                ('anexos_prontos', models.PositiveIntegerField(default=0, verbose_name='Anexos prontos')),
+                ('impressao_digital', models.CharField(blank=True, db_index=True, help_text='Hash de anexos, ordem e assinatura; job concluído com o mesmo hash é reaproveitado.', max_length=64, verbose_name='Impressão digital do conteúdo')),
+                ('arquivo', models.FileField(blank=True, upload_to='pdfs/gestao_consolidado/%Y/%m/', verbose_name='Arquivo gerado')),
+                ('erro', models.TextField(blank=True, verbose_name='Erro')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('iniciado_em', models.DateTimeField(blank=True, null=True, verbose_name='Início')),
+                ('concluido_em', models.DateTimeField(blank=True, null=True, verbose_name='Fim')),
+                ('aprovacao', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='gestao_aprovacao.approval', verbose_name='Aprovação (assinatura)')),
+                ('solicitado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+                ('work_order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pdf_consolidado_jobs', to='gestao_aprovacao.workorder', verbose_name='Pedido')),
+            ],
+            options={
+                'verbose_name': 'PDF consolidado (geração)',
+                'verbose_name_plural': 'PDFs consolidados (geração)',
+                'ordering': ['-criado_em'],
+                'indexes': [models.Index(fields=['work_order', 'impressao_digital', 'status'], name='pdf_consolidado_wo_fp')],
+            },
+        ),
+    ]
@@ -1373,6 +1373,94 @@ class EmailLog(models.Model):
         self.save(update_fields=['status', 'mensagem_erro', 'tentativas', 'atualizado_em'])
 
 
+class EmailOutbox(models.Model):
+    """
+    Fila persistente de e-mails (outbox).
+
+    Views e serviços apenas enfileiram; o worker (``processar_outbox``) envia em lotes
+    reaproveitando a conexão SMTP e reagenda falhas com backoff exponencial. A ``chave``
+    deduplica: o mesmo evento não gera dois e-mails.
+    """
+
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('processando', 'Processando'),
+        ('enviado', 'Enviado'),
+        ('falhou', 'Falhou'),
+    ]
+
+    chave = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='Chave da mensagem',
+        help_text='Identifica o evento (ex.: aprovacao:<pedido>:<aprovação>); evita envio duplicado.'
+    )
+    tipo_email = models.CharField(
+        max_length=20,
+        choices=EmailLog.TIPO_EMAIL_CHOICES,
+        verbose_name='Tipo de Email',
+        db_index=True
+    )
+    work_order = models.ForeignKey(
+        WorkOrder,
+        on_delete=models.CASCADE,
+        related_name='email_outbox',
+        verbose_name='Pedido',
+        null=True,
+        blank=True
+    )
+    email_log = models.ForeignKey(
+        EmailLog,
+        on_delete=models.SET_NULL,
+        related_name='outbox',
+        verbose_name='Log de Email',
+        null=True,
+        blank=True
+    )
+    remetente = models.CharField(max_length=254, blank=True, verbose_name='Remetente')
+    destinatarios = models.JSONField(default=list, verbose_name='Destinatários')
+    assunto = models.CharField(max_length=500, verbose_name='Assunto')
+    corpo_texto = models.TextField(blank=True, verbose_name='Corpo (texto)')
+    corpo_html = models.TextField(blank=True, verbose_name='Corpo (HTML)')
+    anexos = models.CharField(
+        max_length=40,
+        blank=True,
+        verbose_name='Provedor de anexos',
+        help_text='Anexos gerados pelo worker no momento do envio (ex.: aprovacao_pdf).'
+    )
+    anexos_args = models.JSONField(default=dict, blank=True, verbose_name='Parâmetros dos anexos')
+    conteudo_sensivel = models.BooleanField(
+        default=False,
+        verbose_name='Conteúdo sensível',
+        help_text='O corpo é apagado depois do envio (ex.: credenciais).'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pendente',
+        verbose_name='Status',
+        db_index=True
+    )
+    tentativas = models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')
+    max_tentativas = models.PositiveSmallIntegerField(default=6, verbose_name='Máximo de tentativas')
+    proxima_tentativa_em = models.DateTimeField(default=timezone.now, verbose_name='Próxima tentativa em')
+    ultimo_erro = models.TextField(blank=True, verbose_name='Último erro')
+    enviado_em = models.DateTimeField(null=True, blank=True, verbose_name='Enviado em')
+    criado_em = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    atualizado_em = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+
+    class Meta:
+        verbose_name = 'E-mail na fila'
+        verbose_name_plural = 'Fila de e-mails'
+        ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['status', 'proxima_tentativa_em']),
+        ]
+
+    def __str__(self):
+        return f"[{self.get_status_display()}] {self.chave}"
+
+
 class AprovacaoEmailDestinatario(models.Model):
     """
     E-mails que sempre recebem o PDF/notificação quando um pedido é aprovado no GestControll.
@@ -1466,3 +1554,237 @@ class GestaoCentralDispatch(models.Model):
     def __str__(self):
         return f'{self.work_order.codigo} para Central #{self.approval_process_id}'
 
+
+
+class UserActivityEvent(models.Model):
+    """
+    Linha do tempo de atividade por usuário (painel de governança).
+
+    Projeção append-only, alimentada por sinais a partir de logins, auditoria, pedidos,
+    aprovações, mudanças de status, comentários, anexos e diários
+    (``gestao_aprovacao.services.user_activity``). ``(source, source_pk, kind)`` identifica o
+    fato de origem, então regravar é idempotente. Filtros por módulo, obra e período e a
+    paginação por cursor (``-at, -id``) rodam no banco.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='activity_events',
+        verbose_name='Usuário',
+    )
+    at = models.DateTimeField(verbose_name='Quando')
+    module = models.CharField(max_length=16, verbose_name='Módulo')
+    kind = models.CharField(max_length=80, verbose_name='Tipo')
+    label = models.CharField(max_length=500, verbose_name='Descrição')
+    detail = models.CharField(max_length=500, blank=True, verbose_name='Detalhe')
+    severity = models.CharField(max_length=16, default='info', verbose_name='Severidade')
+    success = models.BooleanField(default=True, verbose_name='Sucesso')
+    obra = models.ForeignKey(
+        Obra,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Obra (GestControll)',
+    )
+    project = models.ForeignKey(
+        'core.Project',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Projeto (Diário de Obra)',
+    )
+    url_name = models.CharField(max_length=80, blank=True, verbose_name='Rota do detalhe')
+    url_kwargs = models.JSONField(default=dict, blank=True, verbose_name='Parâmetros da rota')
+    source = models.CharField(max_length=32, verbose_name='Origem')
+    source_pk = models.PositiveBigIntegerField(verbose_name='ID na origem')
+
+    class Meta:
+        verbose_name = 'Atividade do usuário'
+        verbose_name_plural = 'Atividades dos usuários'
+        ordering = ['-at', '-id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source', 'source_pk', 'kind'],
+                name='uniq_user_activity_source',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-at', '-id'], name='user_activity_user_at'),
+            models.Index(fields=['user', 'module', '-at', '-id'], name='user_activity_module_at'),
+            # Expurgo por idade (audit.retention).
+            models.Index(fields=['at'], name='user_activity_at'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} {self.kind} @ {self.at:%Y-%m-%d %H:%M}'
+
+
+class ResumoPedidosStatus(models.Model):
+    """
+    Situação atual dos pedidos por (obra, frente, solicitante), lida pela home do GestControll.
+
+    Recalculada por obra após cada transição de ``WorkOrder``/``Approval``
+    (``gestao_aprovacao.services.resumo_home``); só existem linhas com algum pedido em aberto.
+    """
+
+    obra = models.ForeignKey(Obra, on_delete=models.CASCADE, related_name='+', verbose_name='Obra')
+    front = models.ForeignKey(
+        'core.ProjectFront',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Frente',
+    )
+    criado_por = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Solicitante',
+    )
+    aguardando_aprovacao = models.PositiveIntegerField(default=0, verbose_name='Pendentes/reaprovação')
+    acao_solicitante = models.PositiveIntegerField(default=0, verbose_name='Rascunho/reprovado/reaprovação')
+    fila_desde = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Mais antigo na fila desde',
+        help_text='Menor data de envio (ou criação) entre os pedidos pendentes/em reaprovação.',
+    )
+
+    class Meta:
+        verbose_name = 'Resumo de pedidos (status)'
+        verbose_name_plural = 'Resumos de pedidos (status)'
+        indexes = [
+            models.Index(fields=['obra', 'criado_por'], name='resumo_status_obra_user'),
+            models.Index(fields=['criado_por', 'obra'], name='resumo_status_user_obra'),
+        ]
+
+
+class ResumoPedidosMes(models.Model):
+    """
+    Totais mensais por (obra, frente, solicitante): criados, aprovados (status atual aprovado
+    com ``data_aprovacao`` no mês) e pedidos distintos com reprovação no mês. Mesmo ciclo de
+    recálculo de ``ResumoPedidosStatus``.
+    """
+
+    obra = models.ForeignKey(Obra, on_delete=models.CASCADE, related_name='+', verbose_name='Obra')
+    front = models.ForeignKey(
+        'core.ProjectFront',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Frente',
+    )
+    criado_por = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Solicitante',
+    )
+    mes = models.DateField(verbose_name='Mês', help_text='Primeiro dia do mês (horário local).')
+    criados = models.PositiveIntegerField(default=0, verbose_name='Criados')
+    aprovados = models.PositiveIntegerField(default=0, verbose_name='Aprovados')
+    reprovados = models.PositiveIntegerField(default=0, verbose_name='Pedidos reprovados')
+
+    class Meta:
+        verbose_name = 'Resumo de pedidos (mês)'
+        verbose_name_plural = 'Resumos de pedidos (mês)'
+        indexes = [
+            models.Index(fields=['mes', 'obra'], name='resumo_mes_obra'),
+            models.Index(fields=['criado_por', 'mes'], name='resumo_mes_user'),
+        ]
+
+
+class PdfConsolidadoJob(models.Model):
+    """
+    Geração em background do PDF consolidado (anexos vigentes + página de assinatura).
+
+    O worker lê os anexos do storage um por vez: PDFs entram como estão e imagens viram uma
+    página PDF guardada em cache por anexo, reaproveitada nas próximas gerações. O resultado
+    fica em ``arquivo``; pedido sem mudança (mesma ``impressao_digital``) reaproveita o job
+    concluído.
+    """
+
+    STATUS_CHOICES = [
+        ('pendente', 'Na fila'),
+        ('gerando', 'Gerando'),
+        ('concluido', 'Concluído'),
+        ('falhou', 'Falhou'),
+    ]
+
+    work_order = models.ForeignKey(
+        WorkOrder,
+        on_delete=models.CASCADE,
+        related_name='pdf_consolidado_jobs',
+        verbose_name='Pedido',
+    )
+    aprovacao = models.ForeignKey(
+        Approval,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Aprovação (assinatura)',
+    )
+    solicitado_por = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Solicitado por',
+    )
+    ordem_anexos = models.JSONField(default=list, blank=True, verbose_name='Ordem dos anexos')
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pendente',
+        db_index=True,
+        verbose_name='Status',
+    )
+    anexos_total = models.PositiveIntegerField(default=0, verbose_name='Anexos (total)')
+    anexos_prontos = models.PositiveIntegerField(default=0, verbose_name='Anexos prontos')
+    impressao_digital = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        verbose_name='Impressão digital do conteúdo',
+        help_text='Hash de anexos, ordem e assinatura; job concluído com o mesmo hash é reaproveitado.',
+    )
+    arquivo = models.FileField(
+        upload_to='pdfs/gestao_consolidado/%Y/%m/',
+        blank=True,
+        verbose_name='Arquivo gerado',
+    )
+    erro = models.TextField(blank=True, verbose_name='Erro')
+    criado_em = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    atualizado_em = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+    iniciado_em = models.DateTimeField(null=True, blank=True, verbose_name='Início')
+    concluido_em = models.DateTimeField(null=True, blank=True, verbose_name='Fim')
+
+    class Meta:
+        verbose_name = 'PDF consolidado (geração)'
+        verbose_name_plural = 'PDFs consolidados (geração)'
+        ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['work_order', 'impressao_digital', 'status'], name='pdf_consolidado_wo_fp'),
+        ]
+
+    def __str__(self):
+        return f"PDF {self.work_order_id} ({self.get_status_display()})"
+
+    @property
+    def percentual(self) -> int:
+        if self.status == 'concluido':
+            return 100
+        if not self.anexos_total:
+            return 0
+        return min(99, int(self.anexos_prontos * 100 / self.anexos_total))
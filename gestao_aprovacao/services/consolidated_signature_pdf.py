@@ -1,28 +1,45 @@
-"""Consolida anexos do pedido em um único PDF com página de assinatura ao final."""
+"""
+Consolida anexos do pedido em um único PDF com página de assinatura ao final.
+
+PDFs entram como estão e imagens viram uma página PDF guardada em cache por anexo
+(``PARTES_STORAGE_DIR``); o resultado vai para um arquivo temporário e depois para o storage.
+Na UI a geração roda em background (``PdfConsolidadoJob``,
+``gestao_aprovacao.tasks.executar_pdf_consolidado_job``) e o arquivo fica para download: o
+ganho é tirar a montagem da requisição. O uso de memória não muda: o ``PdfWriter`` (pypdf)
+mantém todas as páginas até gravar, então o pico acompanha o tamanho total dos anexos.
+"""
 
 from __future__ import annotations
 
 import base64
+import hashlib
 import io
+import json
 import logging
 import os
+import tempfile
+from datetime import timedelta
 from typing import Iterable
 
 logger = logging.getLogger(__name__)
 
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
 from django.utils import timezone
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas
 
-from gestao_aprovacao.models import Approval, Attachment, WorkOrder
+from gestao_aprovacao.models import Approval, Attachment, PdfConsolidadoJob, WorkOrder
 from gestao_aprovacao.services.attachment_versions import ordered_attachments_for_consolidation
 from gestao_aprovacao.signature_utils import validate_signature_data
 
 try:
-    from pypdf import PdfMerger, PdfReader
+    from pypdf import PdfReader, PdfWriter
 except ImportError:  # pragma: no cover — PyPDF2 3.x
-    from PyPDF2 import PdfMerger, PdfReader  # type: ignore
+    from PyPDF2 import PdfReader, PdfWriter  # type: ignore
 
 try:
     from PIL import Image
@@ -33,6 +50,9 @@ PDF_EXT = '.pdf'
 IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.gif'}
 BLOCKED_EXTS = {'.doc', '.docx', '.xls', '.xlsx', '.zip', '.rar', '.7z'}
 
+# Páginas PDF geradas a partir de imagens (cache por anexo, reaproveitado entre gerações).
+PARTES_STORAGE_DIR = 'pdfs/gestao_consolidado/anexos'
+
 
 class ConsolidationError(Exception):
     """Erro de negócio ao montar o PDF consolidado."""
@@ -107,25 +127,44 @@ def _reorder_attachments(
     return reordered
 
 
-def _read_attachment_bytes(attachment: Attachment) -> bytes:
+def _cached_part_name(attachment: Attachment) -> str:
+    digest = hashlib.sha1(attachment.arquivo.name.encode('utf-8')).hexdigest()[:16]
+    return f'{PARTES_STORAGE_DIR}/{attachment.work_order_id}/{attachment.pk}_{digest}.pdf'
+
+
+def _attachment_part_name(attachment: Attachment) -> str:
+    """
+    Caminho (no storage) do anexo já em PDF. PDFs são usados direto; imagens são convertidas
+    só na primeira vez (o nome do cache muda se o arquivo do anexo mudar).
+    """
+    ext = _attachment_ext(attachment)
+    if ext == PDF_EXT:
+        return attachment.arquivo.name
+    if ext not in IMAGE_EXTS:
+        raise UnsupportedAttachmentsError([attachment.get_nome_display()])
+    name = _cached_part_name(attachment)
+    if default_storage.exists(name):
+        return name
     attachment.arquivo.open('rb')
     try:
-        return attachment.arquivo.read()
+        pdf_bytes = _image_to_pdf(attachment.arquivo)
     finally:
         attachment.arquivo.close()
+    return default_storage.save(name, ContentFile(pdf_bytes))
 
 
-def _pdf_bytes_from_attachment(attachment: Attachment) -> bytes:
-    ext = _attachment_ext(attachment)
-    raw = _read_attachment_bytes(attachment)
-    if ext == PDF_EXT:
-        return raw
-    if ext in IMAGE_EXTS:
-        return _image_bytes_to_pdf(raw)
-    raise UnsupportedAttachmentsError([attachment.get_nome_display()])
+def discard_cached_parts(attachment: Attachment) -> None:
+    """Remove a página em cache de um anexo excluído."""
+    name = _cached_part_name(attachment)
+    try:
+        if default_storage.exists(name):
+            default_storage.delete(name)
+    except OSError:
+        logger.warning('Página em cache do anexo %s não removida: %s', attachment.pk, name)
 
 
-def _image_bytes_to_pdf(image_bytes: bytes) -> bytes:
+def _image_to_pdf(source) -> bytes:
+    """Página A4 com a imagem centralizada; ``source`` é um arquivo aberto (lido pelo Pillow)."""
     if Image is None:
         raise ConsolidationError(
             'Conversão de imagem indisponível (Pillow não instalado).'
@@ -133,7 +172,7 @@ def _image_bytes_to_pdf(image_bytes: bytes) -> bytes:
     buf = io.BytesIO()
     c = canvas.Canvas(buf, pagesize=A4)
     page_w, page_h = A4
-    img = Image.open(io.BytesIO(image_bytes))
+    img = Image.open(source)
     if img.mode in ('RGBA', 'P'):
         img = img.convert('RGB')
     iw, ih = img.size
@@ -153,16 +192,27 @@ def _image_bytes_to_pdf(image_bytes: bytes) -> bytes:
     return buf.getvalue()
 
 
-def _merge_pdf_parts(parts: list[bytes]) -> bytes:
-    merger = PdfMerger()
+def _write_merged_pdf(part_names: Iterable[str], signature_page: bytes, output) -> None:
+    """
+    Concatena as partes e a página de assinatura em ``output`` (arquivo binário). Os arquivos
+    ficam abertos até a escrita final porque o leitor carrega o conteúdo das páginas sob
+    demanda; o ``PdfWriter`` só grava no fim, então todas as páginas passam pela memória
+    durante ``write``.
+    """
+    writer = PdfWriter()
+    handles = []
     try:
-        for part in parts:
-            merger.append(PdfReader(io.BytesIO(part)))
-        out = io.BytesIO()
-        merger.write(out)
-        return out.getvalue()
+        for name in part_names:
+            fh = default_storage.open(name, 'rb')
+            handles.append(fh)
+            for page in PdfReader(fh).pages:
+                writer.add_page(page)
+        for page in PdfReader(io.BytesIO(signature_page)).pages:
+            writer.add_page(page)
+        writer.write(output)
     finally:
-        merger.close()
+        for fh in handles:
+            fh.close()
 
 
 def _signature_image_size(signature_data: str, *, max_w: float = 200, max_h: float = 38) -> tuple[float, float]:
@@ -327,6 +377,11 @@ def latest_approval_signature(work_order: WorkOrder):
     )
 
 
+def approval_signer_name(approval: Approval) -> str:
+    signer = approval.aprovado_por
+    return (signer.get_full_name() or signer.username) if signer else '—'
+
+
 def try_build_consolidated_approval_email_pdf(work_order: WorkOrder) -> tuple[bytes, str] | None:
     """
     Monta o PDF único (anexos do pedido + página de assinatura) para o e-mail de aprovação.
@@ -349,9 +404,16 @@ def try_build_consolidated_approval_email_pdf(work_order: WorkOrder) -> tuple[by
         )
         return None
 
+    safe_codigo = work_order.codigo.replace('/', '-').replace('\\', '-')
+    nome_arquivo = f'{safe_codigo}_aprovado_consolidado.pdf'
+    signer_name = approval_signer_name(approval)
+    attachments = ordered_attachments_for_consolidation(work_order)
+    done = _done_job(work_order, consolidation_fingerprint(work_order, approval, attachments, signer_name))
+    if done is not None:
+        with done.arquivo.open('rb') as fh:
+            return fh.read(), nome_arquivo
+
     try:
-        signer = approval.aprovado_por
-        signer_name = (signer.get_full_name() or signer.username) if signer else '—'
         pdf_bytes = build_consolidated_signature_pdf(
             work_order=work_order,
             signature_data=approval.signature_data,
@@ -365,9 +427,38 @@ def try_build_consolidated_approval_email_pdf(work_order: WorkOrder) -> tuple[by
             exc,
         )
         return None
+    return pdf_bytes, nome_arquivo
 
-    safe_codigo = work_order.codigo.replace('/', '-').replace('\\', '-')
-    return pdf_bytes, f'{safe_codigo}_aprovado_consolidado.pdf'
+
+def _consolidation_attachments(work_order: WorkOrder, attachment_order: list[int] | None) -> list[Attachment]:
+    attachments = ordered_attachments_for_consolidation(work_order)
+    attachments = _reorder_attachments(attachments, attachment_order)
+    _validate_attachments(attachments)
+    for att in attachments:
+        if _attachment_ext(att) not in {PDF_EXT, *IMAGE_EXTS}:
+            raise UnsupportedAttachmentsError([att.get_nome_display()])
+    return attachments
+
+
+def write_consolidated_signature_pdf(
+    output,
+    *,
+    work_order: WorkOrder,
+    signature_data: str,
+    signer_name: str,
+    signed_at=None,
+    attachment_order: list[int] | None = None,
+) -> None:
+    """Grava em ``output`` (arquivo binário) os anexos vigentes + página de assinatura."""
+    attachments = _consolidation_attachments(work_order, attachment_order)
+    parts = [_attachment_part_name(att) for att in attachments]
+    signature_page = build_signature_page_pdf(
+        work_order=work_order,
+        signer_name=signer_name,
+        signature_data=signature_data,
+        signed_at=signed_at,
+    )
+    _write_merged_pdf(parts, signature_page, output)
 
 
 def build_consolidated_signature_pdf(
@@ -378,25 +469,154 @@ def build_consolidated_signature_pdf(
     signed_at=None,
     attachment_order: list[int] | None = None,
 ) -> bytes:
-    attachments = ordered_attachments_for_consolidation(work_order)
-    attachments = _reorder_attachments(attachments, attachment_order)
-    _validate_attachments(attachments)
+    """Versão síncrona em memória (anexo de e-mail); para a UI prefira ``request_consolidated_pdf_job``."""
+    out = io.BytesIO()
+    write_consolidated_signature_pdf(
+        out,
+        work_order=work_order,
+        signature_data=signature_data,
+        signer_name=signer_name,
+        signed_at=signed_at,
+        attachment_order=attachment_order,
+    )
+    return out.getvalue()
 
-    parts: list[bytes] = []
-    for att in attachments:
-        ext = _attachment_ext(att)
-        if ext in BLOCKED_EXTS:
-            continue
-        if ext not in {PDF_EXT, *IMAGE_EXTS}:
-            raise UnsupportedAttachmentsError([att.get_nome_display()])
-        parts.append(_pdf_bytes_from_attachment(att))
 
-    parts.append(
-        build_signature_page_pdf(
-            work_order=work_order,
-            signer_name=signer_name,
-            signature_data=signature_data,
-            signed_at=signed_at,
-        )
+# ---------------------------------------------------------------------------
+# Job em background (PdfConsolidadoJob)
+# ---------------------------------------------------------------------------
+
+
+def consolidation_fingerprint(
+    work_order: WorkOrder,
+    approval: Approval,
+    attachments: list[Attachment],
+    signer_name: str,
+) -> str:
+    """Hash do que entra no PDF: anexos (na ordem), assinatura e dados da página final."""
+    payload = {
+        'approval': approval.pk,
+        'signer': signer_name,
+        'attachments': [[att.pk, att.arquivo.name] for att in attachments],
+        'work_order': [
+            work_order.codigo,
+            work_order.tipo_solicitacao,
+            work_order.nome_credor,
+            work_order.obra.nome if work_order.obra_id else '',
+        ],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+# Job pendente/gerando sem progresso (``atualizado_em``) por mais que isso é considerado parado.
+JOB_STALE_AFTER = timedelta(minutes=15)
+
+
+def _done_job(work_order: WorkOrder, fingerprint: str) -> PdfConsolidadoJob | None:
+    done = (
+        PdfConsolidadoJob.objects.filter(work_order=work_order, impressao_digital=fingerprint, status='concluido')
+        .exclude(arquivo='')
+        .order_by('-concluido_em')
+        .first()
+    )
+    if done and default_storage.exists(done.arquivo.name):
+        return done
+    return None
+
+
+def request_consolidated_pdf_job(
+    work_order: WorkOrder,
+    approval: Approval,
+    *,
+    attachment_order: list[int] | None = None,
+    user=None,
+) -> PdfConsolidadoJob:
+    """
+    Devolve o job do PDF consolidado, criando e enfileirando (após o commit) um novo se preciso.
+
+    Reaproveita o job concluído ou ainda na fila com a mesma impressão digital; um job ativo
+    sem progresso há ``JOB_STALE_AFTER`` (worker caiu, thread morreu no deploy) é reenfileirado.
+    Erros de validação (sem anexos, formato bloqueado, ordem inválida) sobem como
+    ``ConsolidationError``.
+    """
+    from gestao_aprovacao.tasks import agendar_pdf_consolidado_job
+
+    attachments = _consolidation_attachments(work_order, attachment_order)
+    fingerprint = consolidation_fingerprint(work_order, approval, attachments, approval_signer_name(approval))
+    done = _done_job(work_order, fingerprint)
+    if done is not None:
+        return done
+    active_qs = PdfConsolidadoJob.objects.filter(
+        work_order=work_order,
+        impressao_digital=fingerprint,
+        status__in=['pendente', 'gerando'],
+    )
+    active = active_qs.first()
+    if active:
+        stale = timezone.now() - JOB_STALE_AFTER
+        # Update condicional: só uma requisição reenfileira o mesmo job parado.
+        if active_qs.filter(pk=active.pk, atualizado_em__lt=stale).update(atualizado_em=timezone.now()):
+            logger.warning('PDF consolidado: job id=%s parado desde %s, reenfileirando.', active.pk, active.atualizado_em)
+            transaction.on_commit(lambda: agendar_pdf_consolidado_job(active.pk))
+        return active
+
+    job = PdfConsolidadoJob.objects.create(
+        work_order=work_order,
+        aprovacao=approval,
+        solicitado_por=user if getattr(user, 'is_authenticated', False) else None,
+        ordem_anexos=[att.pk for att in attachments],
+        anexos_total=len(attachments),
+        impressao_digital=fingerprint,
+    )
+    transaction.on_commit(lambda: agendar_pdf_consolidado_job(job.pk))
+    return job
+
+
+def build_consolidated_pdf_job(job: PdfConsolidadoJob) -> None:
+    """
+    Executa o job: garante a parte PDF de cada anexo (progresso salvo a cada anexo), monta o
+    documento num arquivo temporário e o grava em ``job.arquivo``.
+
+    Levanta exceção em caso de falha; quem chama marca o job como ``falhou``.
+    """
+    approval = job.aprovacao
+    if approval is None or not approval.signature_data:
+        raise ConsolidationError('A aprovação com assinatura deste PDF não existe mais.')
+    work_order = job.work_order
+    attachments = _consolidation_attachments(work_order, job.ordem_anexos)
+    signer_name = approval_signer_name(approval)
+
+    job.status = 'gerando'
+    job.iniciado_em = job.iniciado_em or timezone.now()
+    job.anexos_total = len(attachments)
+    job.anexos_prontos = 0
+    job.erro = ''
+    job.save(update_fields=['status', 'iniciado_em', 'anexos_total', 'anexos_prontos', 'erro', 'atualizado_em'])
+
+    parts = []
+    for idx, att in enumerate(attachments, start=1):
+        parts.append(_attachment_part_name(att))
+        PdfConsolidadoJob.objects.filter(pk=job.pk).update(anexos_prontos=idx, atualizado_em=timezone.now())
+
+    signature_page = build_signature_page_pdf(
+        work_order=work_order,
+        signer_name=signer_name,
+        signature_data=approval.signature_data,
+        signed_at=approval.created_at,
+    )
+    safe_codigo = work_order.codigo.replace('/', '-').replace('\\', '-')
+    old_name = job.arquivo.name if job.arquivo else ''
+    with tempfile.TemporaryFile() as out:
+        _write_merged_pdf(parts, signature_page, out)
+        out.seek(0)
+        job.arquivo.save(f'{safe_codigo}_zapsign.pdf', File(out), save=False)
+    if old_name and old_name != job.arquivo.name:
+        default_storage.delete(old_name)
+
+    job.impressao_digital = consolidation_fingerprint(work_order, approval, attachments, signer_name)
+    job.anexos_prontos = len(attachments)
+    job.status = 'concluido'
+    job.concluido_em = timezone.now()
+    job.save(
+        update_fields=['arquivo', 'impressao_digital', 'anexos_prontos', 'status', 'concluido_em', 'atualizado_em']
     )
-    return _merge_pdf_parts(parts)
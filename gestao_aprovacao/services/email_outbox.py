@@ -0,0 +1,277 @@
+"""
+Outbox persistente de e-mails do GestControll.
+
+Fluxo:
+
+1. A view/serviço chama ``enfileirar_email(chave=..., ...)``: grava um ``EmailOutbox`` (e o
+   ``EmailLog`` correspondente) na mesma transação e, após o commit, agenda o worker.
+   Uma chave já pendente ou enviada não é enfileirada de novo; chave que falhou em
+   definitivo é reaberta (reenvio manual pela tela de logs).
+2. ``processar_outbox()`` reserva lotes de mensagens vencidas, abre **uma** conexão SMTP por
+   lote e envia tudo por ela. Falhas são reagendadas com backoff exponencial
+   (``EMAIL_OUTBOX_BACKOFF_BASE`` × 2^(n-1), limitado a ``EMAIL_OUTBOX_BACKOFF_MAX``) até
+   ``max_tentativas``.
+
+Anexos pesados (PDF consolidado da aprovação) não vão para o banco: a mensagem guarda o
+nome de um provedor em ``anexos`` e o worker os gera no momento do envio.
+
+Execução do worker: task Celery ``gestao_aprovacao.tasks.processar_outbox_email_task``
+(beat a cada ``EMAIL_OUTBOX_BEAT_SECONDS``), thread local quando o broker está fora e
+``python manage.py processar_outbox_email`` para cron.
+"""
+from __future__ import annotations
+
+import logging
+import random
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from gestao_aprovacao.models import EmailLog, EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# Nome curto gravado em EmailOutbox.anexos → callable(email, args) que anexa os arquivos.
+PROVEDORES_ANEXOS = {
+    'aprovacao_pdf': 'gestao_aprovacao.email_utils.anexar_pdfs_email_aprovacao',
+}
+
+# Tempo que um lote fica reservado; passado isso (worker caiu) volta a ser elegível.
+RESERVA_LOTE = timedelta(minutes=15)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def calcular_backoff(tentativas: int) -> timedelta:
+    """Espera antes da próxima tentativa: base × 2^(n-1), com teto e ~10% de jitter."""
+    base = float(_setting('EMAIL_OUTBOX_BACKOFF_BASE', 30))
+    teto = float(_setting('EMAIL_OUTBOX_BACKOFF_MAX', 3600))
+    espera = min(teto, base * (2 ** max(0, tentativas - 1)))
+    return timedelta(seconds=espera + random.uniform(0, espera * 0.1))
+
+
+def enfileirar_email(
+    *,
+    chave: str,
+    tipo_email: str,
+    destinatarios: Iterable[str],
+    assunto: str,
+    corpo_texto: str = '',
+    corpo_html: str = '',
+    remetente: Optional[str] = None,
+    work_order=None,
+    anexos: str = '',
+    anexos_args: Optional[dict] = None,
+    conteudo_sensivel: bool = False,
+    max_tentativas: Optional[int] = None,
+) -> tuple[EmailOutbox, bool]:
+    """
+    Enfileira um e-mail. Retorna ``(item, criado)``; ``criado`` é False quando a chave já
+    estava na fila ou já foi enviada (deduplicação).
+    """
+    from gestao_aprovacao.email_utils import _criar_log_email, _normalizar_destinatarios
+
+    destinatarios = _normalizar_destinatarios(destinatarios)
+    if anexos and anexos not in PROVEDORES_ANEXOS:
+        raise ValueError(f'Provedor de anexos desconhecido: {anexos}')
+    campos = {
+        'tipo_email': tipo_email,
+        'work_order': work_order,
+        'remetente': remetente or getattr(settings, 'DEFAULT_FROM_EMAIL', '') or '',
+        'destinatarios': destinatarios,
+        'assunto': assunto[:500],
+        'corpo_texto': corpo_texto or '',
+        'corpo_html': corpo_html or '',
+        'anexos': anexos or '',
+        'anexos_args': anexos_args or {},
+        'conteudo_sensivel': conteudo_sensivel,
+        'max_tentativas': max_tentativas or int(_setting('EMAIL_OUTBOX_MAX_TENTATIVAS', 6)),
+        'status': 'pendente',
+        'tentativas': 0,
+        'proxima_tentativa_em': timezone.now(),
+        'ultimo_erro': '',
+        'enviado_em': None,
+    }
+    with transaction.atomic():
+        item = EmailOutbox.objects.select_for_update().filter(chave=chave).first()
+        if item is not None and item.status != 'falhou':
+            return item, False
+        if item is None:
+            try:
+                with transaction.atomic():
+                    item = EmailOutbox.objects.create(chave=chave, **campos)
+            except IntegrityError:
+                return EmailOutbox.objects.get(chave=chave), False
+        else:
+            for campo, valor in campos.items():
+                setattr(item, campo, valor)
+            item.save()
+        item.email_log = _criar_log_email(tipo_email, work_order, destinatarios, assunto)
+        if item.email_log is not None:
+            item.save(update_fields=['email_log', 'atualizado_em'])
+        transaction.on_commit(_agendar_worker)
+    return item, True
+
+
+def _agendar_worker():
+    try:
+        from gestao_aprovacao.tasks import agendar_processamento_outbox
+
+        agendar_processamento_outbox()
+    except Exception:
+        logger.exception('email_outbox: não foi possível agendar o worker.')
+
+
+def proxima_tentativa_pendente():
+    """Quando vence a próxima mensagem pendente (None se a fila está vazia)."""
+    return (
+        EmailOutbox.objects.filter(status__in=['pendente', 'processando'])
+        .order_by('proxima_tentativa_em')
+        .values_list('proxima_tentativa_em', flat=True)
+        .first()
+    )
+
+
+def _reservar_lote(tamanho: int) -> list[EmailOutbox]:
+    agora = timezone.now()
+    with transaction.atomic():
+        itens = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status__in=['pendente', 'processando'], proxima_tentativa_em__lte=agora)
+            .select_related('email_log')
+            .order_by('proxima_tentativa_em', 'pk')[:tamanho]
+        )
+        if itens:
+            EmailOutbox.objects.filter(pk__in=[i.pk for i in itens]).update(
+                status='processando',
+                proxima_tentativa_em=agora + RESERVA_LOTE,
+                atualizado_em=agora,
+            )
+    return itens
+
+
+def _montar_mensagem(item: EmailOutbox, connection) -> EmailMultiAlternatives:
+    email = EmailMultiAlternatives(
+        subject=item.assunto,
+        body=item.corpo_texto,
+        from_email=item.remetente or None,
+        to=list(item.destinatarios or []),
+        connection=connection,
+    )
+    if item.corpo_html:
+        email.attach_alternative(item.corpo_html, 'text/html')
+    if item.anexos:
+        provedor = import_string(PROVEDORES_ANEXOS[item.anexos])
+        provedor(email, item.anexos_args or {})
+    return email
+
+
+def _marcar_enviado(item: EmailOutbox) -> None:
+    item.status = 'enviado'
+    item.tentativas += 1
+    item.enviado_em = timezone.now()
+    item.ultimo_erro = ''
+    campos = ['status', 'tentativas', 'enviado_em', 'ultimo_erro', 'atualizado_em']
+    if item.conteudo_sensivel:
+        item.corpo_texto = ''
+        item.corpo_html = ''
+        campos += ['corpo_texto', 'corpo_html']
+    item.save(update_fields=campos)
+    if item.email_log is not None:
+        try:
+            item.email_log.marcar_como_enviado()
+        except Exception as exc:
+            logger.warning('email_outbox: erro ao atualizar log %s: %s', item.email_log_id, exc)
+
+
+def _marcar_falha(item: EmailOutbox, erro) -> bool:
+    """Registra a falha; retorna True se ainda haverá nova tentativa."""
+    item.tentativas += 1
+    item.ultimo_erro = str(erro)[:4000]
+    campos = ['status', 'tentativas', 'ultimo_erro', 'proxima_tentativa_em', 'atualizado_em']
+    vai_tentar = item.tentativas < item.max_tentativas
+    if vai_tentar:
+        item.status = 'pendente'
+        item.proxima_tentativa_em = timezone.now() + calcular_backoff(item.tentativas)
+    else:
+        item.status = 'falhou'
+        if item.conteudo_sensivel:
+            item.corpo_texto = ''
+            item.corpo_html = ''
+            campos += ['corpo_texto', 'corpo_html']
+    item.save(update_fields=campos)
+    if item.email_log_id:
+        if vai_tentar:
+            EmailLog.objects.filter(pk=item.email_log_id).update(
+                mensagem_erro=item.ultimo_erro[:1000],
+                tentativas=item.tentativas,
+                atualizado_em=timezone.now(),
+            )
+        else:
+            try:
+                item.email_log.marcar_como_falhou(item.ultimo_erro)
+            except Exception as exc:
+                logger.warning('email_outbox: erro ao atualizar log %s: %s', item.email_log_id, exc)
+    return vai_tentar
+
+
+def _enviar_lote(itens: list[EmailOutbox], stats: dict) -> None:
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.error('email_outbox: conexão SMTP indisponível (%d mensagem(ns) reagendadas): %s', len(itens), exc)
+        for item in itens:
+            stats['reagendados' if _marcar_falha(item, exc) else 'falhos'] += 1
+        return
+    try:
+        for item in itens:
+            try:
+                email = _montar_mensagem(item, connection)
+                if not connection.send_messages([email]):
+                    raise RuntimeError('backend de e-mail não confirmou o envio')
+            except Exception as exc:
+                logger.warning('email_outbox: falha em %s (tentativa %d): %s', item.chave, item.tentativas + 1, exc)
+                stats['reagendados' if _marcar_falha(item, exc) else 'falhos'] += 1
+                # A sessão SMTP pode ter caído; reabre para o restante do lote.
+                try:
+                    connection.close()
+                    connection.open()
+                except Exception:
+                    logger.debug('email_outbox: reabertura da conexão falhou.', exc_info=True)
+                continue
+            _marcar_enviado(item)
+            stats['enviados'] += 1
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def processar_outbox(*, tamanho_lote: Optional[int] = None, max_lotes: Optional[int] = None) -> dict:
+    """
+    Envia as mensagens vencidas em lotes até esvaziar a fila (ou ``max_lotes``).
+    Retorna contagens ``{'enviados', 'reagendados', 'falhos'}``.
+    """
+    tamanho = int(tamanho_lote or _setting('EMAIL_OUTBOX_TAMANHO_LOTE', 50))
+    stats = {'enviados': 0, 'reagendados': 0, 'falhos': 0}
+    lotes = 0
+    while True:
+        itens = _reservar_lote(tamanho)
+        if not itens:
+            break
+        _enviar_lote(itens, stats)
+        lotes += 1
+        if max_lotes and lotes >= max_lotes:
+            break
+    if any(stats.values()):
+        logger.info('email_outbox: %s', stats)
+    return stats
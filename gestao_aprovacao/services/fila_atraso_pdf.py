@@ -2,40 +2,26 @@
 from __future__ import annotations
 
 import io
-import os
 from collections import Counter
 from decimal import Decimal
 from typing import Any
 
-from django.conf import settings
 from django.utils import timezone
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.units import cm
 from reportlab.platypus import LongTable, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 from xml.sax.saxutils import escape as xml_escape
 
+from core.utils.pdf_assets import pdf_assets
+
 
 def _pdf_esc(text) -> str:
     return xml_escape(str(text or ""))
 
 
-def _logo_path():
-    logo_dir = os.path.join(settings.BASE_DIR, "core", "static", "core", "images")
-    for name in (
-        "lpla-logo-pdf-transparent.png",
-        "lpla-logo-pdf.png",
-        "lplan-logo2.png",
-        "lplan_logo.png",
-    ):
-        p = os.path.join(logo_dir, name)
-        if os.path.exists(p):
-            return p
-    return None
-
-
 def _clip(v, n=80) -> str:
     txt = str(v or "").strip()
     if len(txt) <= n:
@@ -89,8 +75,6 @@ def _build_pdf_header(
     styles,
 ) -> Table:
     """Cabeçalho do relatório com logo, título e metadados em faixa destacada."""
-    from reportlab.platypus import Image as RLImage
-
     escopo_txt = "Alcance administrativo" if escopo_admin else "Alcance do aprovador"
     gerado_em = timezone.now().strftime("%d/%m/%Y às %H:%M")
 
@@ -157,9 +141,8 @@ def _build_pdf_header(
         ])
     )
 
-    lp = _logo_path()
-    if lp:
-        logo = RLImage(lp, width=3.2 * cm, height=0.78 * cm)
+    if pdf_assets.logo_bytes:
+        logo = pdf_assets.logo_flowable(3.2 * cm, 0.78 * cm)
         logo_wrap = Table([[logo]], colWidths=[3.5 * cm])
         logo_wrap.setStyle(
             TableStyle([
@@ -251,7 +234,7 @@ def build_fila_atraso_pdf(
         topMargin=1.5 * cm,
         bottomMargin=1.5 * cm,
     )
-    styles = getSampleStyleSheet()
+    styles = pdf_assets.sample_styles()
     w = doc.width
     resumo = _build_resumo(pedidos)
 
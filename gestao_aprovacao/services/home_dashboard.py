@@ -2,10 +2,11 @@
 Dados para a dashboard inicial do GestControll (escopo pessoal ou administrativo).
 
 Mantém consultas enxutas e mesma regra de escopo da home legada (`queryset_workorders_home_scope`).
+KPIs e o aviso de fila em atraso vêm dos resumos materializados (`services.resumo_home`).
 """
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import Any
 
 from django.db.models import Count, Prefetch, Q, DateTimeField
@@ -14,6 +15,7 @@ from django.urls import reverse
 from django.utils import timezone
 
 from gestao_aprovacao.models import Approval, Comment, Empresa, Obra, WorkOrder, WorkOrderPermission
+from gestao_aprovacao.services.resumo_home import ha_fila_em_atraso, kpis_home
 
 _REPROVACOES_PREFETCH = Prefetch(
     "approvals",
@@ -31,15 +33,14 @@ from gestao_aprovacao.utils import (
 )
 
 
-def _workorders_obras_ativas(qs):
-    """Somente pedidos de obras ativas (``Obra.ativo`` espelha ``Project.is_active``)."""
-    return qs.filter(obra__ativo=True)
-
-
-def queryset_workorders_home_scope(user):
-    """Pedidos relevantes por perfil — espelha a dashboard home original."""
+def home_scope_q(user) -> Q:
+    """
+    Escopo da home por perfil como filtro sobre ``obra``/``criado_por``: vale para
+    ``WorkOrder`` e para os resumos materializados (``services.resumo_home``).
+    Somente obras ativas (``Obra.ativo`` espelha ``Project.is_active``).
+    """
     if is_admin(user):
-        qs = WorkOrder.objects.select_related("obra", "obra__empresa", "criado_por").all()
+        q = Q()
     elif is_aprovador(user):
         obras_ids = Obra.objects.filter(
             id__in=WorkOrderPermission.objects.filter(
@@ -57,14 +58,10 @@ def queryset_workorders_home_scope(user):
         obras_sem_empresa_ids = list(
             Obra.objects.filter(id__in=obras_ids, empresa_id__isnull=True).values_list("id", flat=True)
         )
-        qs = WorkOrder.objects.filter(
-            Q(obra__empresa_id__in=empresas_ids) | Q(obra_id__in=obras_sem_empresa_ids)
-        ).select_related("obra", "obra__empresa", "criado_por")
+        q = Q(obra__empresa_id__in=empresas_ids) | Q(obra_id__in=obras_sem_empresa_ids)
     elif is_responsavel_empresa(user):
         empresas_resp = Empresa.objects.filter(responsavel=user, ativo=True)
-        qs = WorkOrder.objects.filter(obra__empresa__in=empresas_resp).select_related(
-            "obra", "obra__empresa", "criado_por"
-        )
+        q = Q(obra__empresa__in=empresas_resp)
     elif is_engenheiro(user):
         obras_ids = Obra.objects.filter(
             id__in=WorkOrderPermission.objects.filter(
@@ -74,17 +71,17 @@ def queryset_workorders_home_scope(user):
             ).values_list("obra_id", flat=True),
             ativo=True,
         ).values_list("id", flat=True)
-        if obras_ids:
-            qs = (
-                WorkOrder.objects.filter(Q(criado_por=user) | Q(obra_id__in=obras_ids))
-                .select_related("obra", "obra__empresa", "criado_por")
-                .distinct()
-            )
-        else:
-            qs = WorkOrder.objects.filter(criado_por=user).select_related("obra", "obra__empresa", "criado_por")
+        q = Q(criado_por=user) | Q(obra_id__in=obras_ids) if obras_ids else Q(criado_por=user)
     else:
-        qs = WorkOrder.objects.filter(criado_por=user).select_related("obra", "obra__empresa", "criado_por")
-    return _workorders_obras_ativas(qs)
+        q = Q(criado_por=user)
+    return q & Q(obra__ativo=True)
+
+
+def queryset_workorders_home_scope(user, scope_q: Q | None = None):
+    """Pedidos relevantes por perfil — espelha a dashboard home original."""
+    if scope_q is None:
+        scope_q = home_scope_q(user)
+    return WorkOrder.objects.filter(scope_q).select_related("obra", "obra__empresa", "criado_por")
 
 
 # Lista unificada da home: prioridades no topo, depois recentes até o limite.
@@ -131,11 +128,6 @@ def _format_ultimo_motivo_reprovacao(approval) -> str:
     return " | ".join(parts) if parts else "—"
 
 
-def _local_month_start():
-    d0 = timezone.localdate().replace(day=1)
-    return timezone.make_aware(datetime.combine(d0, datetime.min.time()))
-
-
 def _projects_with_active_fronts(project_ids) -> set[int]:
     if not project_ids:
         return set()
@@ -179,10 +171,19 @@ def _feed_row_base(wo, *, admin_scope: bool, projects_with_fronts: set[int]) ->
     }
 
 
-def collect_aprovador_fila_atraso(user, scoped_qs, *, limit: int | None = None) -> list[dict[str, Any]]:
+def collect_aprovador_fila_atraso(
+    user,
+    scoped_qs,
+    *,
+    limit: int | None = None,
+    scope_q: Q | None = None,
+) -> list[dict[str, Any]]:
     """
     Pedidos pendentes/reaprovação há mais de APROVADOR_FILA_ATRASO_DIAS dias
     (data de envio, ou criação se não houver envio), no escopo do usuário.
+
+    Com ``scope_q`` (filtro equivalente a ``scoped_qs``) os resumos materializados dizem antes
+    se há algum pedido em atraso; sem nenhum, os pedidos nem são consultados.
     """
     from gestao_aprovacao.utils import is_aprovador
 
@@ -191,6 +192,8 @@ def collect_aprovador_fila_atraso(user, scoped_qs, *, limit: int | None = None)
 
     now = timezone.now()
     cutoff_fila = now - timedelta(days=APROVADOR_FILA_ATRASO_DIAS)
+    if scope_q is not None and not ha_fila_em_atraso(scope_q, cutoff_fila):
+        return []
     candidatos = (
         scoped_qs.filter(status__in=["pendente", "reaprovacao"])
         .annotate(wait_from=Coalesce("data_envio", "created_at", output_field=DateTimeField()))
@@ -242,9 +245,10 @@ def collect_aprovador_fila_atraso(user, scoped_qs, *, limit: int | None = None)
     return pedidos
 
 
-def _build_dashboard_context(user, scoped_qs, *, admin_scope: bool) -> dict[str, Any]:
+def _build_dashboard_context(user, scoped_qs, *, admin_scope: bool, scope_q: Q | None = None) -> dict[str, Any]:
     now = timezone.now()
-    start_month = _local_month_start()
+    if scope_q is None:
+        scope_q = home_scope_q(user)
     mine = scoped_qs.filter(criado_por=user)
     agg_qs = scoped_qs if admin_scope else mine
     project_ids = set(
@@ -255,27 +259,13 @@ def _build_dashboard_context(user, scoped_qs, *, admin_scope: bool) -> dict[str,
     projects_with_fronts = _projects_with_active_fronts(project_ids)
     user_is_approver = is_aprovador(user) and not is_admin(user)
 
-    criados_mes = agg_qs.filter(created_at__gte=start_month).count()
-
-    aprovados_mes = agg_qs.filter(
-        status="aprovado",
-        data_aprovacao__isnull=False,
-        data_aprovacao__gte=start_month,
-    ).count()
-
-    reprov_eventos_distintos_mes = (
-        Approval.objects.filter(
-            decisao="reprovado",
-            created_at__gte=start_month,
-            work_order__in=agg_qs,
-        )
-        .values("work_order_id")
-        .distinct()
-        .count()
-    )
-
-    pendente_equipe_aguarda = agg_qs.filter(status__in=["pendente", "reaprovacao"]).count()
-    solicitante_deve_agir = agg_qs.filter(status__in=["rascunho", "reprovado", "reaprovacao"]).count()
+    # Totais do mês e situação atual: soma dos resumos por obra/frente/solicitante.
+    kpis = kpis_home(scope_q, criado_por=None if admin_scope else user)
+    criados_mes = kpis['criados']
+    aprovados_mes = kpis['aprovados']
+    reprov_eventos_distintos_mes = kpis['reprovados']
+    pendente_equipe_aguarda = kpis['aguardando_aprovacao']
+    solicitante_deve_agir = kpis['acao_solicitante']
 
     fila_aprovacao: list[WorkOrder] = []
     if not admin_scope and user_is_approver:
@@ -428,7 +418,7 @@ def _build_dashboard_context(user, scoped_qs, *, admin_scope: bool) -> dict[str,
     dash_tags_reprovacao: list[dict[str, Any]]
 
     if is_aprovador(user):
-        todos_atraso = collect_aprovador_fila_atraso(user, scoped_qs)
+        todos_atraso = collect_aprovador_fila_atraso(user, scoped_qs, scope_q=scope_q)
         pedidos_atraso = todos_atraso[:APROVADOR_FILA_ATRASO_MAX_ITENS]
 
         dash_aprovador_fila_atraso = {
@@ -511,9 +501,9 @@ def _build_dashboard_context(user, scoped_qs, *, admin_scope: bool) -> dict[str,
     }
 
 
-def build_personal_dashboard_context(user, scoped_qs) -> dict[str, Any]:
-    return _build_dashboard_context(user, scoped_qs, admin_scope=False)
+def build_personal_dashboard_context(user, scoped_qs, *, scope_q: Q | None = None) -> dict[str, Any]:
+    return _build_dashboard_context(user, scoped_qs, admin_scope=False, scope_q=scope_q)
 
 
-def build_admin_dashboard_context(user, scoped_qs) -> dict[str, Any]:
-    return _build_dashboard_context(user, scoped_qs, admin_scope=True)
+def build_admin_dashboard_context(user, scoped_qs, *, scope_q: Q | None = None) -> dict[str, Any]:
+    return _build_dashboard_context(user, scoped_qs, admin_scope=True, scope_q=scope_q)
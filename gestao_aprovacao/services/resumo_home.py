@@ -0,0 +1,153 @@
+"""
+Resumos materializados da home do GestControll (``ResumoPedidosStatus`` e ``ResumoPedidosMes``).
+
+As linhas são por (obra, frente, solicitante) e recalculadas por obra, com poucos GROUP BY,
+após o commit de cada transição de ``WorkOrder``/``Approval`` (sinais em
+``gestao_aprovacao.signals``). A home soma as linhas do escopo do usuário (mesmos filtros de
+``home_scope_q`` e de frente usados nos pedidos), sem varrer os pedidos.
+
+Carga inicial na migração 0038; recarga completa: ``python manage.py reconstruir_resumo_home``.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Count, DateTimeField, F, Min, Q, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from gestao_aprovacao.models import Approval, Obra, ResumoPedidosMes, ResumoPedidosStatus, WorkOrder
+
+logger = logging.getLogger(__name__)
+
+STATUS_AGUARDANDO_APROVACAO = ('pendente', 'reaprovacao')
+STATUS_ACAO_SOLICITANTE = ('rascunho', 'reprovado', 'reaprovacao')
+
+_agendamento = threading.local()
+
+
+def _mes_de(valor):
+    return valor.date() if isinstance(valor, datetime) else valor
+
+
+def _linhas_status(obra_id: int) -> list[ResumoPedidosStatus]:
+    aguardando = Q(status__in=STATUS_AGUARDANDO_APROVACAO)
+    linhas = (
+        WorkOrder.objects.filter(obra_id=obra_id)
+        .filter(aguardando | Q(status__in=STATUS_ACAO_SOLICITANTE))
+        .values('front_id', 'criado_por_id')
+        .annotate(
+            aguardando_aprovacao=Count('id', filter=aguardando),
+            acao_solicitante=Count('id', filter=Q(status__in=STATUS_ACAO_SOLICITANTE)),
+            fila_desde=Min(Coalesce('data_envio', 'created_at', output_field=DateTimeField()), filter=aguardando),
+        )
+        .order_by()
+    )
+    return [ResumoPedidosStatus(obra_id=obra_id, **linha) for linha in linhas]
+
+
+def _linhas_mes(obra_id: int) -> list[ResumoPedidosMes]:
+    chaves = ('front_id', 'criado_por_id', 'mes')
+    totais: dict[tuple, dict[str, int]] = {}
+
+    def _somar(qs, campo):
+        for linha in qs:
+            chave = (linha['front_id'], linha['criado_por_id'], _mes_de(linha['mes']))
+            totais.setdefault(chave, {'criados': 0, 'aprovados': 0, 'reprovados': 0})[campo] = linha['n']
+
+    pedidos = WorkOrder.objects.filter(obra_id=obra_id)
+    _somar(
+        pedidos.annotate(mes=TruncMonth('created_at')).values(*chaves).annotate(n=Count('id')).order_by(),
+        'criados',
+    )
+    _somar(
+        pedidos.filter(status='aprovado', data_aprovacao__isnull=False)
+        .annotate(mes=TruncMonth('data_aprovacao'))
+        .values(*chaves)
+        .annotate(n=Count('id'))
+        .order_by(),
+        'aprovados',
+    )
+    _somar(
+        Approval.objects.filter(decisao='reprovado', work_order__obra_id=obra_id)
+        .annotate(
+            mes=TruncMonth('created_at'),
+            front_id=F('work_order__front_id'),
+            criado_por_id=F('work_order__criado_por_id'),
+        )
+        .values(*chaves)
+        .annotate(n=Count('work_order_id', distinct=True))
+        .order_by(),
+        'reprovados',
+    )
+    return [
+        ResumoPedidosMes(obra_id=obra_id, front_id=front_id, criado_por_id=criado_por_id, mes=mes, **valores)
+        for (front_id, criado_por_id, mes), valores in totais.items()
+    ]
+
+
+def recalcular_resumos_obra(obra_id: int) -> None:
+    """Regrava os resumos de uma obra (lock na linha da obra serializa recálculos concorrentes)."""
+    with transaction.atomic():
+        if not Obra.objects.select_for_update().filter(pk=obra_id).exists():
+            return
+        ResumoPedidosStatus.objects.filter(obra_id=obra_id).delete()
+        ResumoPedidosMes.objects.filter(obra_id=obra_id).delete()
+        ResumoPedidosStatus.objects.bulk_create(_linhas_status(obra_id))
+        ResumoPedidosMes.objects.bulk_create(_linhas_mes(obra_id), batch_size=500)
+
+
+def reconstruir_resumos(obra_ids=None) -> int:
+    """Recalcula todas as obras (ou só ``obra_ids``). Retorna quantas foram processadas."""
+    ids = list(obra_ids) if obra_ids is not None else list(Obra.objects.values_list('id', flat=True))
+    for obra_id in ids:
+        recalcular_resumos_obra(obra_id)
+    return len(ids)
+
+
+def agendar_recalculo_obra(obra_id) -> None:
+    """Recalcula os resumos da obra após o commit (uma vez por transação)."""
+    if not obra_id:
+        return
+    agendadas = getattr(_agendamento, 'ids', None)
+    if agendadas is None:
+        agendadas = _agendamento.ids = set()
+    agendadas.add(obra_id)
+
+    def _executar():
+        if obra_id not in agendadas:
+            return
+        agendadas.discard(obra_id)
+        try:
+            recalcular_resumos_obra(obra_id)
+        except Exception:
+            logger.exception('Falha ao recalcular resumos da home da obra %s', obra_id)
+
+    transaction.on_commit(_executar)
+
+
+def kpis_home(scope_q: Q, *, criado_por=None) -> dict[str, int]:
+    """Totais do mês corrente e situação atual, somando os resumos do escopo."""
+    status_qs = ResumoPedidosStatus.objects.filter(scope_q)
+    mes_qs = ResumoPedidosMes.objects.filter(scope_q, mes=timezone.localdate().replace(day=1))
+    if criado_por is not None:
+        status_qs = status_qs.filter(criado_por=criado_por)
+        mes_qs = mes_qs.filter(criado_por=criado_por)
+    status = status_qs.aggregate(
+        aguardando_aprovacao=Coalesce(Sum('aguardando_aprovacao'), 0),
+        acao_solicitante=Coalesce(Sum('acao_solicitante'), 0),
+    )
+    mes = mes_qs.aggregate(
+        criados=Coalesce(Sum('criados'), 0),
+        aprovados=Coalesce(Sum('aprovados'), 0),
+        reprovados=Coalesce(Sum('reprovados'), 0),
+    )
+    return {**status, **mes}
+
+
+def ha_fila_em_atraso(scope_q: Q, cutoff) -> bool:
+    """Há pedido pendente/em reaprovação no escopo esperando desde antes de ``cutoff``?"""
+    return ResumoPedidosStatus.objects.filter(scope_q, fila_desde__lte=cutoff).exists()
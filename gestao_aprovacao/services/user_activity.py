@@ -0,0 +1,355 @@
+"""
+Stream de atividade por usuário (``UserActivityEvent``) usado pela linha do tempo do painel
+de governança.
+
+Cada fonte tem um extrator que transforma o registro de origem em eventos; os sinais em
+``gestao_aprovacao.signals`` gravam no ``post_save`` e removem no ``post_delete``. A gravação é
+um upsert pela chave ``(source, source_pk, kind)``: repetir não duplica, e os tipos que o
+extrator deixou de devolver (exclusão não mais solicitada, revisão de diário desfeita) saem.
+A migração 0037 faz a carga inicial; ``reconstruir_atividades()`` (comando
+``reconstruir_atividade_usuarios``) recarrega tudo.
+
+``fetch_timeline_page()`` filtra por módulo, obra e período no banco e pagina por cursor
+(``-at, -id``), sem teto por fonte.
+"""
+from __future__ import annotations
+
+import base64
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Iterable
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import UserLoginLog
+from core.models import ConstructionDiary
+from gestao_aprovacao.models import (
+    Approval,
+    Attachment,
+    Comment,
+    Obra,
+    StatusHistory,
+    UserActivityEvent,
+    WorkOrder,
+)
+
+logger = logging.getLogger(__name__)
+
+MODULE_LABELS = {
+    'gestao': 'GestControll',
+    'diario': 'Diário de obra',
+    'contas': 'Sessões',
+    'admin': 'Auditoria',
+}
+
+_UPDATE_FIELDS = [
+    'user', 'at', 'module', 'label', 'detail', 'severity', 'success',
+    'obra', 'project', 'url_name', 'url_kwargs',
+]
+
+
+def _evento(source: str, obj, *, user_id, at, module, kind, label, detail='', severity='info',
+            success=True, obra_id=None, project_id=None, url=None) -> dict[str, Any]:
+    url_name, url_kwargs = url or ('', {})
+    return {
+        'source': source,
+        'source_pk': obj.pk,
+        'user_id': user_id,
+        'at': at,
+        'module': module,
+        'kind': kind,
+        'label': label[:500],
+        'detail': (detail or '')[:500],
+        'severity': severity,
+        'success': success,
+        'obra_id': obra_id,
+        'project_id': project_id,
+        'url_name': url_name,
+        'url_kwargs': url_kwargs,
+    }
+
+
+def _audit_severity(action_code: str) -> str:
+    if action_code == 'user_deleted':
+        return 'danger'
+    if action_code in ('obra_workorder_perm_remove', 'user_signup_request_internal', 'user_signup_rejected'):
+        return 'warning'
+    if action_code == 'user_signup_approved':
+        return 'success'
+    return 'info'
+
+
+def _de_login(row: UserLoginLog) -> list[dict]:
+    return [_evento('login', row, user_id=row.user_id, at=row.created_at, module='contas',
+                    kind='login', label='Sessão iniciada')]
+
+
+def _de_auditoria(row) -> list[dict]:
+    if not row.subject_user_id:
+        return []
+    actor_l = row.actor.get_username() if row.actor_id else '—'
+    return [_evento(
+        'audit', row, user_id=row.subject_user_id, at=row.created_at, module='admin',
+        kind=row.action_code, label=row.summary, detail=f'Executor: {actor_l}',
+        severity=_audit_severity(row.action_code),
+        url=('central_audit_event_detail', {'pk': row.pk}),
+    )]
+
+
+def _de_pedido(wo: WorkOrder) -> list[dict]:
+    url = ('gestao:detail_workorder', {'pk': wo.pk})
+    out = [_evento(
+        'workorder', wo, user_id=wo.criado_por_id, at=wo.created_at, module='gestao',
+        kind='pedido_criado', label=f"Pedido {wo.codigo} criado",
+        detail=wo.obra.nome if wo.obra_id else '', obra_id=wo.obra_id, url=url,
+    )]
+    if wo.solicitado_exclusao and wo.solicitado_exclusao_por_id and wo.solicitado_exclusao_em:
+        out.append(_evento(
+            'workorder', wo, user_id=wo.solicitado_exclusao_por_id, at=wo.solicitado_exclusao_em,
+            module='gestao', kind='exclusao_solicitada', label=f"Solicitou exclusão — {wo.codigo}",
+            detail=wo.motivo_exclusao or '', severity='warning', obra_id=wo.obra_id, url=url,
+        ))
+    return out
+
+
+def _de_aprovacao(ap: Approval) -> list[dict]:
+    wo = ap.work_order
+    reprovado = ap.decisao == 'reprovado'
+    return [_evento(
+        'approval', ap, user_id=ap.aprovado_por_id, at=ap.created_at, module='gestao',
+        kind=f"aprovacao_{ap.decisao}",
+        label=f"{'Reprovou' if reprovado else 'Aprovou'} pedido {wo.codigo}",
+        detail=ap.comentario or '', severity='danger' if reprovado else 'success',
+        success=ap.decisao == 'aprovado', obra_id=wo.obra_id,
+        url=('gestao:detail_workorder', {'pk': ap.work_order_id}),
+    )]
+
+
+def _de_status(sh: StatusHistory) -> list[dict]:
+    wo = sh.work_order
+    return [_evento(
+        'statushistory', sh, user_id=sh.alterado_por_id, at=sh.created_at, module='gestao',
+        kind='mudanca_status',
+        label=f"Status {wo.codigo}: {sh.status_anterior or '—'} → {sh.status_novo}",
+        detail=sh.observacao or '', severity='warning', obra_id=wo.obra_id,
+        url=('gestao:detail_workorder', {'pk': sh.work_order_id}),
+    )]
+
+
+def _de_comentario(c: Comment) -> list[dict]:
+    wo = c.work_order
+    return [_evento(
+        'comment', c, user_id=c.autor_id, at=c.created_at, module='gestao', kind='comentario',
+        label=f"Comentário no pedido {wo.codigo}", detail=c.texto or '', obra_id=wo.obra_id,
+        url=('gestao:detail_workorder', {'pk': c.work_order_id}),
+    )]
+
+
+def _de_anexo(a: Attachment) -> list[dict]:
+    wo = a.work_order
+    return [_evento(
+        'attachment', a, user_id=a.enviado_por_id, at=a.created_at, module='gestao', kind='anexo',
+        label=f"Anexo no pedido {wo.codigo}", detail=a.get_nome_display(), obra_id=wo.obra_id,
+        url=('gestao:detail_workorder', {'pk': a.work_order_id}),
+    )]
+
+
+def _de_diario(d: ConstructionDiary) -> list[dict]:
+    url = ('diary-detail', {'pk': d.pk})
+    out = [_evento(
+        'diary', d, user_id=d.created_by_id, at=d.created_at, module='diario', kind='diario_criado',
+        label=f"Diário de obra ({d.project.code}) — {d.date}", project_id=d.project_id, url=url,
+    )]
+    if d.reviewed_by_id and d.approved_at:
+        out.append(_evento(
+            'diary', d, user_id=d.reviewed_by_id, at=d.approved_at, module='diario',
+            kind='diario_revisado', label=f"Revisão/aprovação de diário ({d.project.code}) — {d.date}",
+            severity='success', project_id=d.project_id, url=url,
+        ))
+    return out
+
+
+def _fontes() -> list[tuple[Any, str, Callable[[Any], list[dict]], Callable[[], Any]]]:
+    """(modelo, origem, extrator, queryset da carga inicial) de cada fonte."""
+    from audit.models import AuditEvent
+
+    return [
+        (UserLoginLog, 'login', _de_login, lambda: UserLoginLog.objects.all()),
+        (AuditEvent, 'audit', _de_auditoria,
+         lambda: AuditEvent.objects.filter(subject_user__isnull=False).select_related('actor')),
+        (WorkOrder, 'workorder', _de_pedido, lambda: WorkOrder.objects.select_related('obra')),
+        (Approval, 'approval', _de_aprovacao, lambda: Approval.objects.select_related('work_order')),
+        (StatusHistory, 'statushistory', _de_status, lambda: StatusHistory.objects.select_related('work_order')),
+        (Comment, 'comment', _de_comentario, lambda: Comment.objects.select_related('work_order')),
+        (Attachment, 'attachment', _de_anexo, lambda: Attachment.objects.select_related('work_order')),
+        (ConstructionDiary, 'diary', _de_diario, lambda: ConstructionDiary.objects.select_related('project')),
+    ]
+
+
+def _fonte_para(model) -> tuple[str, Callable[[Any], list[dict]]] | None:
+    for fonte_model, source, extrator, _ in _fontes():
+        if model is fonte_model:
+            return source, extrator
+    return None
+
+
+def extrator_para(model) -> Callable[[Any], list[dict]] | None:
+    fonte = _fonte_para(model)
+    return fonte[1] if fonte else None
+
+
+def _gravar(eventos: Iterable[dict]) -> int:
+    objs = [UserActivityEvent(**ev) for ev in eventos if ev['user_id'] and ev['at']]
+    if not objs:
+        return 0
+    # MySQL resolve o conflito pela chave única sem aceitar ``unique_fields``.
+    unique_fields = (
+        ['source', 'source_pk', 'kind'] if connection.features.supports_update_conflicts_with_target else None
+    )
+    UserActivityEvent.objects.bulk_create(
+        objs,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=_UPDATE_FIELDS,
+    )
+    return len(objs)
+
+
+def registrar_atividade(instance) -> int:
+    """
+    Grava os eventos de ``instance`` (chamado pelos sinais) e remove os tipos que o extrator
+    deixou de devolver. Falha na projeção é logada e não derruba o save de origem (savepoint
+    próprio).
+    """
+    fonte = _fonte_para(type(instance))
+    if fonte is None:
+        return 0
+    source, extrator = fonte
+    try:
+        with transaction.atomic():
+            eventos = [ev for ev in extrator(instance) if ev['user_id'] and ev['at']]
+            UserActivityEvent.objects.filter(source=source, source_pk=instance.pk).exclude(
+                kind__in=[ev['kind'] for ev in eventos]
+            ).delete()
+            return _gravar(eventos)
+    except Exception:
+        logger.exception('Falha ao registrar atividade de %s %s', type(instance).__name__, instance.pk)
+        return 0
+
+
+def remover_atividade(instance) -> int:
+    """Remove os eventos de ``instance`` (registro de origem excluído). Retorna quantos saíram."""
+    fonte = _fonte_para(type(instance))
+    if fonte is None or instance.pk is None:
+        return 0
+    deleted, _ = UserActivityEvent.objects.filter(source=fonte[0], source_pk=instance.pk).delete()
+    return deleted
+
+
+def registrar_atividades_em_lote(instances: Iterable) -> int:
+    """Como ``registrar_atividade``, para registros gravados via ``bulk_create`` (sem ``post_save``)."""
+    eventos: list[dict] = []
+    for instance in instances:
+        extrator = extrator_para(type(instance))
+        if extrator is not None:
+            eventos.extend(extrator(instance))
+    try:
+        with transaction.atomic():
+            return _gravar(eventos)
+    except Exception:
+        logger.exception('Falha ao registrar atividades em lote (%s eventos)', len(eventos))
+        return 0
+
+
+def reconstruir_atividades(*, lote: int = 1000) -> dict[str, int]:
+    """Carga (ou recarga) completa do stream a partir das fontes. Idempotente."""
+    stats: dict[str, int] = {}
+    for model, _source, extrator, queryset in _fontes():
+        total = 0
+        buffer: list[dict] = []
+        for obj in queryset().order_by('pk').iterator(chunk_size=lote):
+            buffer.extend(extrator(obj))
+            if len(buffer) >= lote:
+                total += _gravar(buffer)
+                buffer = []
+        total += _gravar(buffer)
+        stats[model._meta.label] = total
+    return stats
+
+
+@dataclass
+class TimelineOptions:
+    period_days: int  # 0 = sem limite inferior
+    module: str  # '', 'gestao', 'diario', 'contas', 'admin'
+    obra_id: int | None
+
+
+def encode_cursor(ev: UserActivityEvent) -> str:
+    raw = f'{ev.at.isoformat()}|{ev.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str | None) -> tuple[datetime, int] | None:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        at_raw, pk_raw = raw.rsplit('|', 1)
+        at = parse_datetime(at_raw)
+        return (at, int(pk_raw)) if at else None
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def timeline_queryset(target_user, opts: TimelineOptions):
+    from gestao_aprovacao.services.user_governance import _date_from_period
+
+    qs = UserActivityEvent.objects.filter(user=target_user)
+    if opts.module:
+        qs = qs.filter(module=opts.module)
+    date_from = _date_from_period(opts.period_days) if opts.period_days else None
+    if date_from:
+        qs = qs.filter(at__gte=date_from)
+    if opts.obra_id:
+        # Sessões e auditoria não têm obra; diário casa pelo projeto vinculado à obra.
+        project_id = Obra.objects.filter(pk=opts.obra_id).values_list('project_id', flat=True).first()
+        diario_q = Q(module='diario', project_id=project_id) if project_id else Q(module='diario')
+        qs = qs.filter(Q(module__in=('contas', 'admin')) | Q(module='gestao', obra_id=opts.obra_id) | diario_q)
+    return qs
+
+
+def fetch_timeline_page(target_user, opts: TimelineOptions, *, cursor: str | None = None,
+                        page_size: int = 25) -> dict[str, Any]:
+    """
+    Uma página da linha do tempo (mais recentes primeiro). ``next_cursor`` é None na última
+    página; eventos vêm como dicts com ``reverse`` e ``module_label`` para o template.
+    """
+    qs = timeline_queryset(target_user, opts)
+    pos = decode_cursor(cursor)
+    if pos:
+        at, pk = pos
+        qs = qs.filter(Q(at__lt=at) | Q(at=at, pk__lt=pk))
+    rows = list(qs.order_by('-at', '-id')[: page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    events = [
+        {
+            'at': r.at,
+            'module': r.module,
+            'module_label': MODULE_LABELS.get(r.module, r.module or '—'),
+            'kind': r.kind,
+            'label': r.label,
+            'detail': r.detail,
+            'severity': r.severity,
+            'success': r.success,
+            'reverse': (r.url_name, r.url_kwargs) if r.url_name else None,
+        }
+        for r in rows
+    ]
+    return {
+        'events': events,
+        'next_cursor': encode_cursor(rows[-1]) if has_more else None,
+    }
@@ -1,10 +1,9 @@
 """
 Agregação de dados para o painel de governança operacional do usuário (administração).
-Somente leitura sobre modelos existentes; sem efeitos colaterais.
+Somente leitura sobre modelos existentes; a linha do tempo vem de services.user_activity.
 """
 from __future__ import annotations
 
-from dataclasses import dataclass
 from datetime import timedelta
 from typing import Any
 
@@ -20,7 +19,6 @@ from gestao_aprovacao.models import (
     Attachment,
     Comment,
     Empresa,
-    Obra,
     StatusHistory,
     UserEmpresa,
     WorkOrder,
@@ -431,264 +429,6 @@ def build_critical_highlights(target_user, limit: int = 25) -> list[dict[str, An
     return out[:limit]
 
 
-def _obra_to_project_id(obra_id: int | None) -> int | None:
-    if not obra_id:
-        return None
-    try:
-        o = Obra.objects.only('project_id').get(pk=obra_id)
-        return o.project_id
-    except Obra.DoesNotExist:
-        return None
-
-
-@dataclass
-class TimelineOptions:
-    period_days: int  # 0 = sem limite inferior (usa cap por fonte)
-    module: str  # '', 'gestao', 'diario', 'contas', 'admin'
-    obra_id: int | None
-    max_merged: int = 2000
-    per_source_cap: int = 400
-
-
-def build_timeline_events(target_user, opts: TimelineOptions) -> list[dict[str, Any]]:
-    date_from = _date_from_period(opts.period_days) if opts.period_days else None
-    project_id_filter = _obra_to_project_id(opts.obra_id)
-
-    events: list[dict[str, Any]] = []
-
-    def _append(ev: dict):
-        events.append(ev)
-
-    # —— Contas / login ——
-    if opts.module in ('', 'contas'):
-        qs = UserLoginLog.objects.filter(user=target_user)
-        if date_from:
-            qs = qs.filter(created_at__gte=date_from)
-        qs = qs.order_by('-created_at')[: opts.per_source_cap]
-        for row in qs:
-            _append(
-                {
-                    'at': row.created_at,
-                    'module': 'contas',
-                    'kind': 'login',
-                    'label': 'Sessão iniciada',
-                    'detail': '',
-                    'severity': 'info',
-                    'success': True,
-                    'reverse': None,
-                }
-            )
-
-    # —— Auditoria administrativa (usuário como alvo do evento) ——
-    if opts.module in ('', 'admin'):
-        from audit.models import AuditEvent
-
-        aqs = AuditEvent.objects.filter(subject_user=target_user).select_related('actor')
-        if date_from:
-            aqs = aqs.filter(created_at__gte=date_from)
-        for row in aqs.order_by('-created_at')[: opts.per_source_cap]:
-            actor_l = row.actor.get_username() if row.actor_id else '—'
-            if row.action_code == 'user_deleted':
-                sev = 'danger'
-            elif row.action_code in (
-                'obra_workorder_perm_remove',
-                'user_signup_request_internal',
-                'user_signup_rejected',
-            ):
-                sev = 'warning'
-            elif row.action_code == 'user_signup_approved':
-                sev = 'success'
-            else:
-                sev = 'info'
-            _append(
-                {
-                    'at': row.created_at,
-                    'module': 'admin',
-                    'kind': row.action_code,
-                    'label': row.summary,
-                    'detail': f'Executor: {actor_l}',
-                    'severity': sev,
-                    'success': True,
-                    'reverse': ('central_audit_event_detail', {'pk': row.pk}),
-                }
-            )
-
-    # —— Gestão ——
-    if opts.module in ('', 'gestao'):
-        wo_base = WorkOrder.objects.filter(criado_por=target_user).select_related('obra')
-        if date_from:
-            wo_base = wo_base.filter(created_at__gte=date_from)
-        if opts.obra_id:
-            wo_base = wo_base.filter(obra_id=opts.obra_id)
-        for wo in wo_base.order_by('-created_at')[: opts.per_source_cap]:
-            _append(
-                {
-                    'at': wo.created_at,
-                    'module': 'gestao',
-                    'kind': 'pedido_criado',
-                    'label': f"Pedido {wo.codigo} criado",
-                    'detail': wo.obra.nome if wo.obra_id else '',
-                    'severity': 'info',
-                    'success': True,
-                    'reverse': ('gestao:detail_workorder', {'pk': wo.pk}),
-                }
-            )
-
-        ap_base = Approval.objects.filter(aprovado_por=target_user).select_related('work_order', 'work_order__obra')
-        if date_from:
-            ap_base = ap_base.filter(created_at__gte=date_from)
-        if opts.obra_id:
-            ap_base = ap_base.filter(work_order__obra_id=opts.obra_id)
-        for ap in ap_base.order_by('-created_at')[: opts.per_source_cap]:
-            sev = 'danger' if ap.decisao == 'reprovado' else 'success'
-            _append(
-                {
-                    'at': ap.created_at,
-                    'module': 'gestao',
-                    'kind': f"aprovacao_{ap.decisao}",
-                    'label': f"{'Reprovou' if ap.decisao == 'reprovado' else 'Aprovou'} pedido {ap.work_order.codigo}",
-                    'detail': (ap.comentario or '')[:300],
-                    'severity': sev,
-                    'success': ap.decisao == 'aprovado',
-                    'reverse': ('gestao:detail_workorder', {'pk': ap.work_order_id}),
-                }
-            )
-
-        sh_base = StatusHistory.objects.filter(alterado_por=target_user).select_related(
-            'work_order', 'work_order__obra'
-        )
-        if date_from:
-            sh_base = sh_base.filter(created_at__gte=date_from)
-        if opts.obra_id:
-            sh_base = sh_base.filter(work_order__obra_id=opts.obra_id)
-        for sh in sh_base.order_by('-created_at')[: opts.per_source_cap]:
-            _append(
-                {
-                    'at': sh.created_at,
-                    'module': 'gestao',
-                    'kind': 'mudanca_status',
-                    'label': f"Status {sh.work_order.codigo}: {sh.status_anterior or '—'} → {sh.status_novo}",
-                    'detail': (sh.observacao or '')[:300],
-                    'severity': 'warning',
-                    'success': True,
-                    'reverse': ('gestao:detail_workorder', {'pk': sh.work_order_id}),
-                }
-            )
-
-        c_base = Comment.objects.filter(autor=target_user).select_related('work_order', 'work_order__obra')
-        if date_from:
-            c_base = c_base.filter(created_at__gte=date_from)
-        if opts.obra_id:
-            c_base = c_base.filter(work_order__obra_id=opts.obra_id)
-        for c in c_base.order_by('-created_at')[: opts.per_source_cap]:
-            _append(
-                {
-                    'at': c.created_at,
-                    'module': 'gestao',
-                    'kind': 'comentario',
-                    'label': f"Comentário no pedido {c.work_order.codigo}",
-                    'detail': (c.texto or '')[:300],
-                    'severity': 'info',
-                    'success': True,
-                    'reverse': ('gestao:detail_workorder', {'pk': c.work_order_id}),
-                }
-            )
-
-        at_base = Attachment.objects.filter(enviado_por=target_user).select_related('work_order', 'work_order__obra')
-        if date_from:
-            at_base = at_base.filter(created_at__gte=date_from)
-        if opts.obra_id:
-            at_base = at_base.filter(work_order__obra_id=opts.obra_id)
-        for a in at_base.order_by('-created_at')[: opts.per_source_cap]:
-            _append(
-                {
-                    'at': a.created_at,
-                    'module': 'gestao',
-                    'kind': 'anexo',
-                    'label': f"Anexo no pedido {a.work_order.codigo}",
-                    'detail': a.get_nome_display(),
-                    'severity': 'info',
-                    'success': True,
-                    'reverse': ('gestao:detail_workorder', {'pk': a.work_order_id}),
-                }
-            )
-
-        ex_base = WorkOrder.objects.filter(solicitado_exclusao_por=target_user, solicitado_exclusao=True).select_related(
-            'obra'
-        )
-        if date_from:
-            ex_base = ex_base.filter(solicitado_exclusao_em__gte=date_from)
-        if opts.obra_id:
-            ex_base = ex_base.filter(obra_id=opts.obra_id)
-        for wo in ex_base.order_by('-solicitado_exclusao_em')[: opts.per_source_cap]:
-            if wo.solicitado_exclusao_em:
-                _append(
-                    {
-                        'at': wo.solicitado_exclusao_em,
-                        'module': 'gestao',
-                        'kind': 'exclusao_solicitada',
-                        'label': f"Solicitou exclusão — {wo.codigo}",
-                        'detail': (wo.motivo_exclusao or '')[:300],
-                        'severity': 'warning',
-                        'success': True,
-                        'reverse': ('gestao:detail_workorder', {'pk': wo.pk}),
-                    }
-                )
-
-    # —— Diário ——
-    if opts.module in ('', 'diario'):
-        d_created = ConstructionDiary.objects.filter(created_by=target_user).select_related('project')
-        if date_from:
-            d_created = d_created.filter(created_at__gte=date_from)
-        if project_id_filter:
-            d_created = d_created.filter(project_id=project_id_filter)
-        for d in d_created.order_by('-created_at')[: opts.per_source_cap]:
-            _append(
-                {
-                    'at': d.created_at,
-                    'module': 'diario',
-                    'kind': 'diario_criado',
-                    'label': f"Diário de obra ({d.project.code}) — {d.date}",
-                    'detail': '',
-                    'severity': 'info',
-                    'success': True,
-                    'reverse': ('diary-detail', {'pk': d.pk}),
-                }
-            )
-
-        d_rev = ConstructionDiary.objects.filter(reviewed_by=target_user).select_related('project')
-        if date_from:
-            d_rev = d_rev.filter(approved_at__gte=date_from)
-        if project_id_filter:
-            d_rev = d_rev.filter(project_id=project_id_filter)
-        for d in d_rev.order_by('-approved_at')[: opts.per_source_cap]:
-            if d.approved_at:
-                _append(
-                    {
-                        'at': d.approved_at,
-                        'module': 'diario',
-                        'kind': 'diario_revisado',
-                        'label': f"Revisão/aprovação de diário ({d.project.code}) — {d.date}",
-                        'detail': '',
-                        'severity': 'success',
-                        'success': True,
-                        'reverse': ('diary-detail', {'pk': d.pk}),
-                    }
-                )
-
-    events.sort(key=lambda x: x['at'], reverse=True)
-    events = events[: opts.max_merged]
-    _module_pt = {
-        'gestao': 'GestControll',
-        'diario': 'Diário de obra',
-        'contas': 'Sessões',
-        'admin': 'Auditoria',
-    }
-    for ev in events:
-        ev['module_label'] = _module_pt.get(ev.get('module'), ev.get('module') or '—')
-    return events
-
-
 def operational_alerts(target_user, kpis: dict) -> list[dict[str, str]]:
     """Alertas conservadores baseados só em dados presentes."""
     alerts: list[dict[str, str]] = []
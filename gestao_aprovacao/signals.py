@@ -0,0 +1,93 @@
+"""
+Sinais do GestControll.
+- Alimenta o stream de atividade por usuário (UserActivityEvent) a cada save das fontes da
+  linha do tempo de governança e a cada flush em lote da auditoria; remove os eventos de um
+  registro de origem excluído.
+- Agenda o recálculo dos resumos da home (ResumoPedidosStatus/Mes) da obra em cada
+  transição de pedido ou aprovação.
+- Remove do cache a página PDF gerada a partir de um anexo de imagem excluído.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from audit.recording import audit_events_recorded
+from gestao_aprovacao.models import Approval, Attachment, WorkOrder
+from gestao_aprovacao.services.consolidated_signature_pdf import discard_cached_parts
+from gestao_aprovacao.services.resumo_home import agendar_recalculo_obra
+from gestao_aprovacao.services.user_activity import (
+    _fontes,
+    registrar_atividade,
+    registrar_atividades_em_lote,
+    remover_atividade,
+)
+
+
+def _registrar_atividade(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    registrar_atividade(instance)
+
+
+def _remover_atividade(sender, instance, **kwargs):
+    remover_atividade(instance)
+
+
+for _model, _source, _extrator, _queryset in _fontes():
+    post_save.connect(
+        _registrar_atividade,
+        sender=_model,
+        dispatch_uid=f'user_activity_{_model._meta.label_lower}',
+    )
+    if _source in ('login', 'audit'):
+        # Saem só pelo expurgo, no mesmo horizonte do stream; sem receptor o DELETE do expurgo
+        # continua em lote.
+        continue
+    post_delete.connect(
+        _remover_atividade,
+        sender=_model,
+        dispatch_uid=f'user_activity_delete_{_model._meta.label_lower}',
+    )
+
+
+@receiver(audit_events_recorded, dispatch_uid='user_activity_audit_batch')
+def _registrar_auditoria_em_lote(sender, events, **kwargs):
+    registrar_atividades_em_lote(events)
+
+
+@receiver(pre_save, sender=WorkOrder, dispatch_uid='resumo_home_workorder_obra_anterior')
+def _guardar_obra_anterior(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Pedido trocado de obra: a obra antiga também precisa ser recalculada.
+    if raw or not instance.pk or (update_fields is not None and 'obra' not in update_fields):
+        return
+    instance._obra_id_anterior = (
+        WorkOrder.objects.filter(pk=instance.pk).values_list('obra_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=WorkOrder, dispatch_uid='resumo_home_workorder_save')
+@receiver(post_delete, sender=WorkOrder, dispatch_uid='resumo_home_workorder_delete')
+def _pedido_alterado(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    agendar_recalculo_obra(instance.obra_id)
+    anterior = getattr(instance, '_obra_id_anterior', None)
+    if anterior and anterior != instance.obra_id:
+        agendar_recalculo_obra(anterior)
+
+
+@receiver(post_save, sender=Approval, dispatch_uid='resumo_home_approval_save')
+@receiver(post_delete, sender=Approval, dispatch_uid='resumo_home_approval_delete')
+def _aprovacao_alterada(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if Approval.work_order.is_cached(instance):
+        obra_id = instance.work_order.obra_id
+    else:
+        obra_id = WorkOrder.objects.filter(pk=instance.work_order_id).values_list('obra_id', flat=True).first()
+    agendar_recalculo_obra(obra_id)
+
+
+@receiver(post_delete, sender=Attachment, dispatch_uid='pdf_consolidado_descartar_cache')
+def _anexo_excluido(sender, instance, **kwargs):
+    if instance.arquivo:
+        discard_cached_parts(instance)
@@ -0,0 +1,130 @@
+"""
+Tarefas Celery do GestControll: worker da fila persistente de e-mails (EmailOutbox) e
+geração do PDF consolidado com assinatura (PdfConsolidadoJob).
+
+Sem broker acessível o processamento roda numa única thread local por processo, que
+drena a fila e agenda (Timer) a próxima tentativa com backoff.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+
+from celery import shared_task
+from django.db import close_old_connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_local_lock = threading.Lock()
+_local_timer: threading.Timer | None = None
+
+
+@shared_task(ignore_result=True)
+def processar_outbox_email_task():
+    """Envia os e-mails vencidos da outbox (também agendada pelo beat)."""
+    from gestao_aprovacao.services.email_outbox import processar_outbox
+
+    close_old_connections()
+    try:
+        return processar_outbox()
+    finally:
+        close_old_connections()
+
+
+def _processar_local() -> None:
+    """Drena a outbox na thread atual; só uma execução local por vez."""
+    from gestao_aprovacao.services.email_outbox import processar_outbox, proxima_tentativa_pendente
+
+    if not _local_lock.acquire(blocking=False):
+        return
+    try:
+        close_old_connections()
+        processar_outbox()
+        proxima = proxima_tentativa_pendente()
+    except Exception:
+        logger.exception('processar_outbox (thread local) falhou')
+        proxima = None
+    finally:
+        close_old_connections()
+        _local_lock.release()
+    if proxima is not None:
+        _agendar_timer_local(max(1.0, (proxima - timezone.now()).total_seconds()))
+
+
+def _agendar_timer_local(segundos: float) -> None:
+    global _local_timer
+    if _local_timer is not None and _local_timer.is_alive():
+        _local_timer.cancel()
+    _local_timer = threading.Timer(segundos, _processar_local)
+    _local_timer.daemon = True
+    _local_timer.start()
+
+
+def agendar_processamento_outbox() -> None:
+    """Dispara o worker: fila Celery quando o broker responde, senão thread local."""
+    from core.tasks import _celery_broker_reachable
+
+    if _celery_broker_reachable():
+        try:
+            processar_outbox_email_task.apply_async(ignore_result=True)
+            return
+        except Exception:
+            logger.exception('processar_outbox_email_task: apply_async() falhou, usando thread.')
+    threading.Thread(target=_processar_local, name='email-outbox', daemon=True).start()
+
+
+def executar_pdf_consolidado_job(job_id: int) -> None:
+    """
+    Executa um PdfConsolidadoJob. Idempotente: jobs concluídos são ignorados e as páginas
+    de imagens já convertidas vêm do cache, então reexecutar só refaz o que faltou.
+    """
+    from gestao_aprovacao.models import PdfConsolidadoJob
+    from gestao_aprovacao.services.consolidated_signature_pdf import (
+        ConsolidationError,
+        build_consolidated_pdf_job,
+    )
+
+    close_old_connections()
+    try:
+        job = (
+            PdfConsolidadoJob.objects.select_related('work_order__obra', 'aprovacao__aprovado_por')
+            .filter(pk=job_id)
+            .first()
+        )
+        if job is None:
+            logger.warning('executar_pdf_consolidado_job: job id=%s não encontrado.', job_id)
+            return
+        if job.status == 'concluido':
+            return
+        try:
+            build_consolidated_pdf_job(job)
+        except Exception as exc:
+            logger.exception('executar_pdf_consolidado_job: erro job_id=%s', job_id)
+            PdfConsolidadoJob.objects.filter(pk=job_id).update(
+                status='falhou',
+                erro=str(exc)[:4000],
+                concluido_em=timezone.now(),
+                atualizado_em=timezone.now(),
+            )
+            # Erro de negócio (anexos mudaram, assinatura removida): nova tentativa não adianta.
+            if not isinstance(exc, ConsolidationError):
+                raise
+    finally:
+        close_old_connections()
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=60, ignore_result=True)
+def gerar_pdf_consolidado_task(self, job_id: int):
+    """Fila Celery: PDF consolidado com assinatura (ver PdfConsolidadoJob)."""
+    try:
+        executar_pdf_consolidado_job(job_id)
+    except Exception as exc:
+        raise self.retry(exc=exc)
+
+
+def agendar_pdf_consolidado_job(job_id: int) -> None:
+    """Agenda a geração do PDF consolidado (fila Celery ou thread)."""
+    from core.tasks import _enqueue_or_thread
+
+    _enqueue_or_thread(gerar_pdf_consolidado_task, executar_pdf_consolidado_job, job_id, 'pdf-consolidado')
@@ -107,18 +107,18 @@ class AttachmentReprovacaoFlowTests(TestCase):
         ordem = [terceiro.pk, primeiro.pk, segundo.pk]
         capturado = []
 
-        def _merge_spy(parts):
-            capturado.extend(parts)
-            return b'pdf-final'
+        def _merge_spy(parts, signature_page, output):
+            capturado.extend([*parts, signature_page])
+            output.write(b'pdf-final')
 
         with patch(
-            'gestao_aprovacao.services.consolidated_signature_pdf._pdf_bytes_from_attachment',
-            side_effect=lambda att: f'att-{att.pk}'.encode('utf-8'),
+            'gestao_aprovacao.services.consolidated_signature_pdf._attachment_part_name',
+            side_effect=lambda att: f'att-{att.pk}',
         ), patch(
             'gestao_aprovacao.services.consolidated_signature_pdf.build_signature_page_pdf',
             return_value=b'assinatura',
         ), patch(
-            'gestao_aprovacao.services.consolidated_signature_pdf._merge_pdf_parts',
+            'gestao_aprovacao.services.consolidated_signature_pdf._write_merged_pdf',
             side_effect=_merge_spy,
         ):
             result = build_consolidated_signature_pdf(
@@ -132,9 +132,9 @@ class AttachmentReprovacaoFlowTests(TestCase):
         self.assertEqual(
             capturado,
             [
-                f'att-{terceiro.pk}'.encode('utf-8'),
-                f'att-{primeiro.pk}'.encode('utf-8'),
-                f'att-{segundo.pk}'.encode('utf-8'),
+                f'att-{terceiro.pk}',
+                f'att-{primeiro.pk}',
+                f'att-{segundo.pk}',
                 b'assinatura',
             ],
         )
@@ -0,0 +1,109 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from gestao_aprovacao.admin import EmailOutboxAdmin
+from gestao_aprovacao.email_utils import enviar_email_credenciais_novo_usuario
+from gestao_aprovacao.models import EmailLog, EmailOutbox
+from gestao_aprovacao.services.email_outbox import enfileirar_email, processar_outbox
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_OUTBOX_BACKOFF_BASE=30,
+)
+class EmailOutboxTests(TestCase):
+    def _enfileirar(self, chave, para='dest@t.com', **kwargs):
+        return enfileirar_email(
+            chave=chave,
+            tipo_email='novo_pedido',
+            destinatarios=[para],
+            assunto=f'Assunto {chave}',
+            corpo_texto='texto',
+            corpo_html='<p>html</p>',
+            **kwargs,
+        )
+
+    def test_chave_duplicada_nao_enfileira_de_novo(self):
+        _, criado = self._enfileirar('pedido:1:10')
+        _, duplicado = self._enfileirar('pedido:1:10')
+        self.assertTrue(criado)
+        self.assertFalse(duplicado)
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+        self.assertEqual(EmailLog.objects.filter(status='pendente').count(), 1)
+
+        processar_outbox()
+        _, apos_envio = self._enfileirar('pedido:1:10')
+        self.assertFalse(apos_envio)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_lote_usa_uma_conexao_e_apaga_conteudo_sensivel(self):
+        self._enfileirar('a', para='a@t.com')
+        self._enfileirar('b', para='b@t.com', conteudo_sensivel=True)
+        with patch.object(EmailBackend, 'open', autospec=True, return_value=True) as aberta:
+            stats = processar_outbox()
+        self.assertEqual(aberta.call_count, 1)
+        self.assertEqual(stats, {'enviados': 2, 'reagendados': 0, 'falhos': 0})
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['a@t.com', 'b@t.com'])
+        sensivel = EmailOutbox.objects.get(chave='b')
+        self.assertEqual((sensivel.status, sensivel.corpo_texto, sensivel.corpo_html), ('enviado', '', ''))
+        self.assertEqual(sensivel.email_log.status, 'enviado')
+
+    def test_falha_reagenda_com_backoff_e_desiste_no_limite(self):
+        item, _ = self._enfileirar('falha', max_tentativas=2)
+        with patch.object(EmailBackend, 'send_messages', autospec=True, side_effect=OSError('smtp fora')):
+            antes = timezone.now()
+            stats = processar_outbox()
+            self.assertEqual(stats['reagendados'], 1)
+            item.refresh_from_db()
+            self.assertEqual((item.status, item.tentativas), ('pendente', 1))
+            self.assertGreaterEqual(item.proxima_tentativa_em, antes + timedelta(seconds=30))
+
+            # Ainda não venceu: o worker não reenvia.
+            self.assertEqual(processar_outbox()['reagendados'], 0)
+
+            EmailOutbox.objects.filter(pk=item.pk).update(proxima_tentativa_em=timezone.now())
+            stats = processar_outbox()
+        self.assertEqual(stats['falhos'], 1)
+        item.refresh_from_db()
+        self.assertEqual(item.status, 'falhou')
+        self.assertIn('smtp fora', item.email_log.mensagem_erro)
+
+        # Reenvio manual: a mesma chave reabre a mensagem que falhou.
+        _, reaberto = self._enfileirar('falha')
+        self.assertTrue(reaberto)
+        processar_outbox()
+        self.assertEqual(len(mail.outbox), 1)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_HOST_USER='sistema@t.com',
+    EMAIL_HOST_PASSWORD='x',
+)
+class EmailCredenciaisTests(TestCase):
+    def test_credenciais_sao_enviadas_sem_passar_pela_outbox(self):
+        enviado = enviar_email_credenciais_novo_usuario('novo@t.com', 'novo', 'S3nh@-Secreta')
+        self.assertTrue(enviado)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('S3nh@-Secreta', mail.outbox[0].body)
+        self.assertFalse(EmailOutbox.objects.exists())
+        log = EmailLog.objects.get(tipo_email='credenciais_usuario')
+        self.assertEqual(log.status, 'enviado')
+        self.assertNotIn('S3nh@-Secreta', log.assunto)
+
+    def test_falha_no_envio_fica_no_log_sem_a_senha(self):
+        with patch.object(EmailBackend, 'send_messages', autospec=True, side_effect=OSError('smtp fora')):
+            enviado = enviar_email_credenciais_novo_usuario('novo@t.com', 'novo', 'S3nh@-Secreta')
+        self.assertFalse(enviado)
+        self.assertFalse(EmailOutbox.objects.exists())
+        log = EmailLog.objects.get(tipo_email='credenciais_usuario')
+        self.assertEqual(log.status, 'falhou')
+        self.assertNotIn('S3nh@-Secreta', log.mensagem_erro)
+
+    def test_admin_da_outbox_nao_exibe_os_corpos(self):
+        self.assertTrue({'corpo_texto', 'corpo_html'} <= set(EmailOutboxAdmin.exclude))
@@ -0,0 +1,161 @@
+"""
+PDF consolidado com assinatura: job em background, cache das páginas de imagem e reaproveitamento.
+"""
+from __future__ import annotations
+
+import base64
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from PyPDF2 import PdfReader
+from reportlab.pdfgen import canvas
+
+from gestao_aprovacao.models import Approval, Attachment, Empresa, Obra, PdfConsolidadoJob, WorkOrder
+from gestao_aprovacao.services import consolidated_signature_pdf
+from gestao_aprovacao.services.consolidated_signature_pdf import request_consolidated_pdf_job
+from gestao_aprovacao.tasks import executar_pdf_consolidado_job
+
+_MEDIA = tempfile.mkdtemp(prefix='pdf_consolidado_test_')
+
+
+def _png_bytes(size=(40, 20)) -> bytes:
+    buf = io.BytesIO()
+    Image.frombytes('RGB', size, os.urandom(size[0] * size[1] * 3)).save(buf, format='PNG')
+    return buf.getvalue()
+
+
+def _pdf_bytes(pages=2) -> bytes:
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf)
+    for i in range(pages):
+        c.drawString(72, 720, f'Pagina {i + 1}')
+        c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+@override_settings(MEDIA_ROOT=_MEDIA)
+class PdfConsolidadoJobTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(_MEDIA, ignore_errors=True)
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', password='x')
+        empresa = Empresa.objects.create(codigo='E1', nome='Empresa 1')
+        obra = Obra.objects.create(codigo='O1', nome='Obra 1', empresa=empresa)
+        self.workorder = WorkOrder.objects.create(
+            obra=obra,
+            codigo='P-001',
+            nome_credor='Fornecedor',
+            tipo_solicitacao='contrato',
+            status='aprovado',
+            criado_por=self.admin,
+        )
+        self._attach('contrato.pdf', _pdf_bytes(2))
+        self._attach('foto.png', _png_bytes())
+        self.approval = Approval.objects.create(
+            work_order=self.workorder,
+            aprovado_por=self.admin,
+            decisao='aprovado',
+            signature_data='data:image/png;base64,' + base64.b64encode(_png_bytes((120, 40))).decode(),
+        )
+
+    def _attach(self, name, content):
+        return Attachment.objects.create(
+            work_order=self.workorder,
+            arquivo=SimpleUploadedFile(name, content),
+            nome=name,
+            enviado_por=self.admin,
+        )
+
+    def _request(self):
+        with mock.patch(
+            'gestao_aprovacao.tasks.agendar_pdf_consolidado_job', side_effect=executar_pdf_consolidado_job,
+        ), self.captureOnCommitCallbacks(execute=True):
+            job = request_consolidated_pdf_job(self.workorder, self.approval, user=self.admin)
+        job.refresh_from_db()
+        return job
+
+    def test_job_gera_artefato_com_anexos_e_pagina_de_assinatura(self):
+        job = self._request()
+        self.assertEqual(job.status, 'concluido')
+        self.assertEqual((job.anexos_prontos, job.anexos_total), (2, 2))
+        with job.arquivo.open('rb') as fh:
+            reader = PdfReader(io.BytesIO(fh.read()))
+        self.assertEqual(len(reader.pages), 4)
+        self.assertIn('Pagina 2', reader.pages[1].extract_text())
+
+        # Pedido sem mudança reaproveita o artefato.
+        self.assertEqual(self._request().pk, job.pk)
+        self.assertEqual(PdfConsolidadoJob.objects.count(), 1)
+
+    def test_novo_anexo_gera_outro_job_sem_reconverter_imagens(self):
+        first = self._request()
+        self._attach('aditivo.pdf', _pdf_bytes(1))
+        with mock.patch.object(
+            consolidated_signature_pdf, '_image_to_pdf', wraps=consolidated_signature_pdf._image_to_pdf,
+        ) as convert:
+            second = self._request()
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertEqual(second.status, 'concluido')
+        self.assertEqual(convert.call_count, 0)
+
+        foto = Attachment.objects.get(nome='foto.png')
+        cached = consolidated_signature_pdf._cached_part_name(foto)
+        self.assertTrue(default_storage.exists(cached))
+        foto.delete()
+        self.assertFalse(default_storage.exists(cached))
+
+    def test_view_acompanha_job_e_baixa_arquivo_pronto(self):
+        self.client.force_login(self.admin)
+        url = reverse('gestao:gerar_pdf_assinatura_workorder', args=[self.workorder.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        job = response.context['job']
+        self.assertEqual(job.status, 'pendente')
+
+        executar_pdf_consolidado_job(job.pk)
+        status = self.client.get(reverse('gestao:pdf_assinatura_status', args=[job.pk])).json()
+        self.assertEqual(status['progress'], 100)
+
+        response = self.client.get(url)
+        self.assertRedirects(
+            response, reverse('gestao:pdf_assinatura_arquivo', args=[job.pk]), fetch_redirect_response=False,
+        )
+        download = self.client.get(status['download_url'])
+        self.assertEqual(download['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(download.streaming_content).startswith(b'%PDF'))
+
+    def test_job_ativo_parado_e_reenfileirado_uma_vez(self):
+        with mock.patch('gestao_aprovacao.tasks.agendar_pdf_consolidado_job') as agendar, self.captureOnCommitCallbacks(
+            execute=True
+        ):
+            job = request_consolidated_pdf_job(self.workorder, self.approval, user=self.admin)
+        self.assertEqual(agendar.call_count, 1)
+
+        with mock.patch('gestao_aprovacao.tasks.agendar_pdf_consolidado_job') as agendar:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(request_consolidated_pdf_job(self.workorder, self.approval).pk, job.pk)
+            agendar.assert_not_called()
+
+            parado = timezone.now() - consolidated_signature_pdf.JOB_STALE_AFTER - timedelta(minutes=1)
+            PdfConsolidadoJob.objects.filter(pk=job.pk).update(status='gerando', atualizado_em=parado)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(request_consolidated_pdf_job(self.workorder, self.approval).pk, job.pk)
+                # Segunda requisição logo depois encontra o job "tocado" e não duplica.
+                request_consolidated_pdf_job(self.workorder, self.approval)
+            agendar.assert_called_once_with(job.pk)
+        self.assertEqual(PdfConsolidadoJob.objects.count(), 1)
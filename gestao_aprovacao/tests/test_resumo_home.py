@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.test import TestCase
+from django.utils import timezone
+
+from gestao_aprovacao.models import Approval, Empresa, Obra, ResumoPedidosStatus, WorkOrder
+from gestao_aprovacao.services.home_dashboard import collect_aprovador_fila_atraso
+from gestao_aprovacao.services.resumo_home import kpis_home, reconstruir_resumos
+
+
+class ResumoHomeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('solic', password='x')
+        self.aprovador = User.objects.create_user('apr', password='x')
+        empresa = Empresa.objects.create(codigo='E1', nome='Empresa 1')
+        self.obra = Obra.objects.create(codigo='O1', nome='Obra 1', empresa=empresa)
+        self.outra_obra = Obra.objects.create(codigo='O2', nome='Obra 2', empresa=empresa)
+
+    def _pedido(self, codigo, obra=None, status='pendente'):
+        return WorkOrder.objects.create(
+            obra=obra or self.obra,
+            codigo=codigo,
+            nome_credor='Fornecedor',
+            tipo_solicitacao='contrato',
+            status=status,
+            criado_por=self.user,
+        )
+
+    def test_transicoes_atualizam_resumos_apos_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            wo = self._pedido('P-001')
+            self._pedido('P-002', status='rascunho')
+            self._pedido('P-003', obra=self.outra_obra)
+
+        escopo = Q(obra=self.obra)
+        kpis = kpis_home(escopo)
+        self.assertEqual((kpis['aguardando_aprovacao'], kpis['acao_solicitante'], kpis['criados']), (1, 1, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Approval.objects.create(work_order=wo, aprovado_por=self.aprovador, decisao='reprovado', comentario='NF')
+            wo.status = 'reprovado'
+            wo.save(update_fields=['status'])
+        kpis = kpis_home(escopo)
+        self.assertEqual((kpis['aguardando_aprovacao'], kpis['acao_solicitante'], kpis['reprovados']), (0, 2, 1))
+        self.assertEqual(kpis_home(escopo, criado_por=self.aprovador)['criados'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            wo.status = 'aprovado'
+            wo.data_aprovacao = timezone.now()
+            wo.save(update_fields=['status', 'data_aprovacao'])
+        antes = kpis_home(Q())
+        ResumoPedidosStatus.objects.all().delete()
+        reconstruir_resumos()
+        self.assertEqual(kpis_home(Q()), antes)
+        self.assertEqual(antes['aprovados'], 1)
+
+    def test_fila_em_atraso_sem_pedido_antigo_nao_consulta_pedidos(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._pedido('P-001')
+        escopo = Q(obra=self.obra)
+        qs = WorkOrder.objects.filter(escopo)
+        admin = User.objects.create_superuser('admin', password='x')
+        # Grupo do aprovador + resumos; os pedidos não são lidos.
+        with self.assertNumQueries(2):
+            self.assertEqual(collect_aprovador_fila_atraso(admin, qs, scope_q=escopo), [])
+
+        WorkOrder.objects.filter(codigo='P-001').update(created_at=timezone.now() - timedelta(days=30))
+        reconstruir_resumos([self.obra.id])
+        self.assertEqual([i['codigo'] for i in collect_aprovador_fila_atraso(admin, qs, scope_q=escopo)], ['P-001'])
@@ -0,0 +1,171 @@
+from datetime import timedelta
+from importlib import import_module
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from accounts.models import UserLoginLog
+from audit.models import AuditEvent
+from audit.recording import buffered_audit_events, record_audit_event
+from audit.retention import DEFAULT_AUDIT_EVENT_RETENTION_DAYS, RETENTION_TARGETS, purge_target
+from gestao_aprovacao.models import Approval, Comment, Empresa, Obra, UserActivityEvent, WorkOrder
+from gestao_aprovacao.services.user_activity import (
+    TimelineOptions,
+    fetch_timeline_page,
+    reconstruir_atividades,
+)
+
+
+class UserActivityStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('solic', password='x')
+        self.aprovador = User.objects.create_user('apr', password='x')
+        empresa = Empresa.objects.create(codigo='E1', nome='Empresa 1')
+        self.obra = Obra.objects.create(codigo='O1', nome='Obra 1', empresa=empresa)
+        self.outra_obra = Obra.objects.create(codigo='O2', nome='Obra 2', empresa=empresa)
+
+    def _pedido(self, codigo, obra=None):
+        return WorkOrder.objects.create(
+            obra=obra or self.obra,
+            codigo=codigo,
+            nome_credor='Fornecedor',
+            tipo_solicitacao='contrato',
+            status='pendente',
+            criado_por=self.user,
+        )
+
+    def test_sinais_gravam_eventos_sem_duplicar(self):
+        wo = self._pedido('P-001')
+        Approval.objects.create(work_order=wo, aprovado_por=self.aprovador, decisao='reprovado', comentario='Falta NF')
+        wo.status = 'reprovado'
+        wo.save(update_fields=['status'])
+
+        self.assertEqual(
+            list(UserActivityEvent.objects.filter(user=self.user).values_list('kind', flat=True)),
+            ['pedido_criado'],
+        )
+        aprovacao = UserActivityEvent.objects.get(user=self.aprovador)
+        self.assertEqual((aprovacao.kind, aprovacao.severity, aprovacao.obra_id), ('aprovacao_reprovado', 'danger', self.obra.id))
+        self.assertEqual(aprovacao.url_kwargs, {'pk': wo.pk})
+
+        UserActivityEvent.objects.all().delete()
+        stats = reconstruir_atividades()
+        self.assertEqual(sum(stats.values()), 2)
+        reconstruir_atividades()
+        self.assertEqual(UserActivityEvent.objects.count(), 2)
+
+    def test_cursor_percorre_todos_os_eventos_sem_teto_por_fonte(self):
+        wo = self._pedido('P-001')
+        for i in range(7):
+            Comment.objects.create(work_order=wo, autor=self.user, texto=f'c{i}')
+        UserLoginLog.objects.create(user=self.user)
+        opts = TimelineOptions(period_days=0, module='', obra_id=None)
+
+        vistos, cursor = [], None
+        while True:
+            page = fetch_timeline_page(self.user, opts, cursor=cursor, page_size=3)
+            vistos.extend(page['events'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(len(vistos), 9)
+        self.assertEqual([e['at'] for e in vistos], sorted((e['at'] for e in vistos), reverse=True))
+        self.assertEqual(vistos[0]['module_label'], 'Sessões')
+
+    def test_filtro_por_obra_mantem_sessoes_e_exclui_outras_obras(self):
+        self._pedido('P-001')
+        self._pedido('P-002', obra=self.outra_obra)
+        UserLoginLog.objects.create(user=self.user)
+
+        page = fetch_timeline_page(self.user, TimelineOptions(period_days=30, module='', obra_id=self.obra.id))
+        self.assertEqual(sorted(e['kind'] for e in page['events']), ['login', 'pedido_criado'])
+        self.assertEqual([e['label'] for e in page['events'] if e['kind'] == 'pedido_criado'], ['Pedido P-001 criado'])
+
+        gestao = fetch_timeline_page(self.user, TimelineOptions(period_days=0, module='gestao', obra_id=None))
+        self.assertEqual(len(gestao['events']), 2)
+        self.assertIsNone(gestao['next_cursor'])
+
+    def test_exclusao_da_origem_remove_eventos(self):
+        wo = self._pedido('P-001')
+        comentario = Comment.objects.create(work_order=wo, autor=self.user, texto='c')
+        Approval.objects.create(work_order=wo, aprovado_por=self.aprovador, decisao='aprovado')
+        self.assertEqual(UserActivityEvent.objects.count(), 3)
+
+        comentario.delete()
+        self.assertFalse(UserActivityEvent.objects.filter(source='comment').exists())
+        wo.delete()
+        self.assertFalse(UserActivityEvent.objects.exists())
+
+    def test_tipo_que_deixou_de_valer_sai_do_stream(self):
+        wo = self._pedido('P-001')
+        wo.solicitado_exclusao = True
+        wo.solicitado_exclusao_por = self.user
+        wo.solicitado_exclusao_em = timezone.now()
+        wo.save()
+        self.assertEqual(
+            set(UserActivityEvent.objects.values_list('kind', flat=True)), {'pedido_criado', 'exclusao_solicitada'}
+        )
+
+        wo.solicitado_exclusao = False
+        wo.save()
+        self.assertEqual(list(UserActivityEvent.objects.values_list('kind', flat=True)), ['pedido_criado'])
+
+    def test_carga_da_migracao_igual_a_reconstrucao(self):
+        wo = self._pedido('P-001')
+        Approval.objects.create(work_order=wo, aprovado_por=self.aprovador, decisao='reprovado', comentario='NF')
+        Comment.objects.create(work_order=wo, autor=self.user, texto='c')
+        UserLoginLog.objects.create(user=self.user)
+        campos = ('source', 'source_pk', 'kind', 'user_id', 'at', 'label', 'detail', 'severity', 'obra_id', 'url_kwargs')
+
+        UserActivityEvent.objects.all().delete()
+        reconstruir_atividades()
+        esperado = sorted(UserActivityEvent.objects.values_list(*campos), key=repr)
+        UserActivityEvent.objects.all().delete()
+        import_module('gestao_aprovacao.migrations.0037_user_activity_event').backfill_atividades(apps, None)
+
+        self.assertEqual(sorted(UserActivityEvent.objects.values_list(*campos), key=repr), esperado)
+
+    def test_expurgo_segue_horizonte_da_auditoria(self):
+        target = RETENTION_TARGETS['user_activity_events']
+        self.assertEqual(target.default_days, RETENTION_TARGETS['audit_events'].default_days)
+        self._pedido('P-001')
+        antigo = UserActivityEvent.objects.get(user=self.user)
+        UserActivityEvent.objects.filter(pk=antigo.pk).update(
+            at=timezone.now() - timedelta(days=DEFAULT_AUDIT_EVENT_RETENTION_DAYS + 1)
+        )
+        UserLoginLog.objects.create(user=self.user)
+        self.assertEqual(UserActivityEvent.objects.count(), 2)
+
+        result = purge_target('user_activity_events')
+
+        self.assertEqual(result['deleted'], 1)
+        self.assertFalse(UserActivityEvent.objects.filter(pk=antigo.pk).exists())
+        self.assertEqual(UserActivityEvent.objects.count(), 1)
+
+
+class UserActivityAuditBatchTests(TransactionTestCase):
+    """Buffer de auditoria só adia eventos em autocommit: precisa de transações reais."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('solic', password='x')
+        self.aprovador = User.objects.create_user('apr', password='x')
+
+    def test_auditoria_em_buffer_grava_em_lote_na_ordem_e_projeta_no_stream(self):
+        with buffered_audit_events():
+            for i in range(3):
+                record_audit_event(
+                    actor=self.aprovador,
+                    subject_user=self.user,
+                    action_code='obra_workorder_perm_add',
+                    summary=f'Permissão {i}',
+                )
+            self.assertFalse(AuditEvent.objects.exists())
+
+        self.assertEqual(
+            list(AuditEvent.objects.order_by('pk').values_list('summary', flat=True)),
+            ['Permissão 0', 'Permissão 1', 'Permissão 2'],
+        )
+        page = fetch_timeline_page(self.user, TimelineOptions(period_days=0, module='admin', obra_id=None))
+        self.assertEqual([e['label'] for e in page['events']], ['Permissão 2', 'Permissão 1', 'Permissão 0'])
@@ -25,6 +25,8 @@ urlpatterns = [
     path('pedidos/<int:pk>/exportar-pdf/', views.exportar_snapshot_workorder_pdf, name='exportar_snapshot_workorder_pdf'),
     path('pedidos/<int:pk>/leitura-pdf/', views.leitura_pedido_pdf, name='leitura_pedido_pdf'),
     path('pedidos/<int:pk>/pdf-assinatura/', views.gerar_pdf_assinatura_workorder, name='gerar_pdf_assinatura_workorder'),
+    path('pdf-assinatura/<int:job_id>/status/', views.pdf_assinatura_status, name='pdf_assinatura_status'),
+    path('pdf-assinatura/<int:job_id>/arquivo/', views.pdf_assinatura_arquivo, name='pdf_assinatura_arquivo'),
     path('pedidos/<int:pk>/editar/', views.edit_workorder, name='edit_workorder'),
     
     # Aprovação
@@ -10,7 +10,7 @@ from django.db import transaction, IntegrityError
 from django.db.models import Q, Min, Max, Value, Prefetch, Count
 from django.db.models.functions import Coalesce
 from django.utils import timezone
-from django.http import JsonResponse, HttpResponse
+from django.http import FileResponse, Http404, JsonResponse, HttpResponse
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.urls import reverse
@@ -25,15 +25,16 @@ import logging
 import uuid
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.units import cm
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, LongTable
 from xml.sax.saxutils import escape as xml_escape
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from core.utils.pdf_assets import pdf_assets
 from .models import (
     Empresa, Obra, WorkOrder, Approval, Attachment, StatusHistory,
     WorkOrderPermission, UserEmpresa, UserProfile, Notificacao, Comment, Lembrete, TagErro, EmailLog,
-    AprovacaoEmailDestinatario,
+    AprovacaoEmailDestinatario, PdfConsolidadoJob,
 )
 from .forms import EmpresaForm, ObraForm, WorkOrderForm, AttachmentForm, AprovacaoEmailDestinatarioForm
 from .utils import (
@@ -69,6 +70,7 @@ from gestao_aprovacao.services.home_dashboard import (
     build_admin_dashboard_context,
     build_personal_dashboard_context,
     collect_aprovador_fila_atraso,
+    home_scope_q,
     queryset_workorders_home_scope,
 )
 from gestao_aprovacao.services.fila_atraso_pdf import build_fila_atraso_pdf
@@ -80,9 +82,9 @@ from gestao_aprovacao.sla import (
 from gestao_aprovacao.signature_utils import validate_signature_data
 from gestao_aprovacao.services.consolidated_signature_pdf import (
     ConsolidationError,
-    build_consolidated_signature_pdf,
     consolidation_precheck,
     latest_approval_signature,
+    request_consolidated_pdf_job,
 )
 from gestao_aprovacao.services.attachment_versions import (
     assign_new_attachment_version,
@@ -103,15 +105,14 @@ from .email_utils import (
     enviar_email_novo_pedido,
     enviar_email_reprovacao,
 )
+from .services.user_activity import TimelineOptions, fetch_timeline_page, timeline_queryset
 from .services.user_governance import (
-    TimelineOptions,
     build_audit_insights,
     build_critical_highlights,
     build_kpis,
     build_pending_queues,
     build_scope,
     build_strategic_insights,
-    build_timeline_events,
     operational_alerts,
     usage_by_obra_gestao,
     viewer_can_see_target_user,
@@ -442,15 +443,19 @@ def home(request):
         is_admin(user)
     )
 
-    workorders = queryset_workorders_home_scope(user)
-    workorders = _apply_front_scope_to_workorders_queryset(user, workorders)
+    scope_q = home_scope_q(user)
+    workorders = queryset_workorders_home_scope(user, scope_q)
+    front_q = _front_scope_q(user, workorders)
+    if front_q is not None:
+        workorders = workorders.filter(front_q).distinct()
+        scope_q &= front_q
 
     admin_user = is_admin(user)
 
     dash_ctx = (
-        build_admin_dashboard_context(user, workorders)
+        build_admin_dashboard_context(user, workorders, scope_q=scope_q)
         if admin_user
-        else build_personal_dashboard_context(user, workorders)
+        else build_personal_dashboard_context(user, workorders, scope_q=scope_q)
     )
 
     context = {
@@ -550,8 +555,17 @@ def _workorders_base_queryset_and_obras(user):
 
 
 def _apply_front_scope_to_workorders_queryset(user, workorders):
+    """Restringe o queryset de pedidos por escopo de frente (ver ``_front_scope_q``)."""
+    allowed_q = _front_scope_q(user, workorders)
+    if allowed_q is None:
+        return workorders
+    return workorders.filter(allowed_q).distinct()
+
+
+def _front_scope_q(user, workorders):
     """
-    Restringe o queryset de pedidos por escopo de frente.
+    Filtro de escopo de frente para os pedidos de ``workorders`` (None = sem restrição).
+    Usa só ``obra``/``front``, então também filtra os resumos da home.
 
     Regras:
     - admin/staff/superuser: sem restrição.
@@ -562,7 +576,7 @@ def _apply_front_scope_to_workorders_queryset(user, workorders):
       - pedidos sem frente (obra toda) ficam visíveis no escopo da obra.
     """
     if is_admin(user) or getattr(user, 'is_superuser', False) or getattr(user, 'is_staff', False):
-        return workorders
+        return None
 
     project_ids = list(
         workorders.exclude(obra__project_id__isnull=True)
@@ -570,7 +584,7 @@ def _apply_front_scope_to_workorders_queryset(user, workorders):
         .distinct()
     )
     if not project_ids:
-        return workorders
+        return None
 
     active_front_project_ids = set(
         ProjectFront.objects.filter(
@@ -579,7 +593,7 @@ def _apply_front_scope_to_workorders_queryset(user, workorders):
         ).values_list('project_id', flat=True).distinct()
     )
     if not active_front_project_ids:
-        return workorders
+        return None
 
     project_ids_with_memberships = set(
         ProjectFrontMember.objects.filter(
@@ -613,7 +627,7 @@ def _apply_front_scope_to_workorders_queryset(user, workorders):
         obra__project_id__in=active_front_project_ids,
         front__isnull=True,
     )
-    return workorders.filter(allowed_q).distinct()
+    return allowed_q
 
 
 def _parse_workorder_list_date(s):
@@ -965,17 +979,6 @@ def export_list_workorders_pdf(request):
     color_border = colors.HexColor('#D0D9E3')
     color_text = colors.HexColor('#1C1C1C')
 
-    def _logo_path():
-        logo_dir = os.path.join(settings.BASE_DIR, 'core', 'static', 'core', 'images')
-        for name in (
-            'lpla-logo-pdf-transparent.png', 'lpla-logo-pdf.png', 'lplan-logo2.png',
-            'lplan_logo.png', 'lplan_logo.jpg', 'lplan_logo.jpeg',
-        ):
-            p = os.path.join(logo_dir, name)
-            if os.path.exists(p):
-                return p
-        return None
-
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(
         buffer,
@@ -985,7 +988,7 @@ def export_list_workorders_pdf(request):
         topMargin=1.4 * cm,
         bottomMargin=1.4 * cm,
     )
-    styles = getSampleStyleSheet()
+    styles = pdf_assets.sample_styles()
     content_width = doc.width
     report_width = max(content_width - (0.3 * cm), 12 * cm)
     normal = ParagraphStyle('ListPdfNormal', parent=styles['Normal'], fontName='Helvetica', fontSize=7.5, textColor=color_text, leading=9)
@@ -1022,12 +1025,10 @@ def export_list_workorders_pdf(request):
         sub_style,
     )
 
-    lp = _logo_path()
-    if lp:
-        from reportlab.platypus import Image as RLImage
+    if pdf_assets.logo_bytes:
         logo_col_w = min(4.8 * cm, report_width * 0.30)
         text_col_w = max(report_width - logo_col_w, 8 * cm)
-        logo = RLImage(lp, width=4.4 * cm, height=1.05 * cm)
+        logo = pdf_assets.logo_flowable(4.4 * cm, 1.05 * cm)
         text_block = Table([[title_main], [title_sub]], colWidths=[text_col_w])
         text_block.setStyle(TableStyle([
             ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -2535,21 +2536,6 @@ def exportar_snapshot_workorder_pdf(request, pk):
             return '-'
         return f"R$ {value:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
 
-    def _get_logo_path():
-        logo_dir = os.path.join(settings.BASE_DIR, 'core', 'static', 'core', 'images')
-        for name in (
-            'lpla-logo-pdf-transparent.png',
-            'lpla-logo-pdf.png',
-            'lplan-logo2.png',
-            'lplan_logo.png',
-            'lplan_logo.jpg',
-            'lplan_logo.jpeg',
-        ):
-            path = os.path.join(logo_dir, name)
-            if os.path.exists(path):
-                return path
-        return None
-
     # Paleta igual aos badges da UI (list_workorders.css)
     status_palette = {
         'criacao': {'bg': colors.HexColor('#e3f2fd'), 'fg': colors.HexColor('#1565c0')},      # rascunho (igual badge tipo/azul lista)
@@ -2577,7 +2563,7 @@ def exportar_snapshot_workorder_pdf(request, pk):
         topMargin=1.7 * cm,
         bottomMargin=1.5 * cm,
     )
-    styles = getSampleStyleSheet()
+    styles = pdf_assets.sample_styles()
     elements = []
 
     normal = ParagraphStyle('SnapNormal', parent=styles['Normal'], fontName='Helvetica', fontSize=9.2, textColor=color_text, leading=12)
@@ -2625,10 +2611,8 @@ def exportar_snapshot_workorder_pdf(request, pk):
         f"<font color='#1A3A5C' size='9'>Pedido: {_safe(workorder.codigo)} · Gerado em {datetime.now().strftime('%d/%m/%Y %H:%M')}</font>",
         ParagraphStyle('SnapSub', parent=styles['Normal'], fontName='Helvetica', fontSize=9, textColor=color_primary, alignment=TA_CENTER, leading=11),
     )
-    logo_path = _get_logo_path()
-    if logo_path:
-        from reportlab.platypus import Image as RLImage
-        logo = RLImage(logo_path, width=4.8 * cm, height=1.15 * cm)
+    if pdf_assets.logo_bytes:
+        logo = pdf_assets.logo_flowable(4.8 * cm, 1.15 * cm)
         text_block = Table([[title_main], [title_sub]], colWidths=[11.2 * cm])
         text_block.setStyle(TableStyle([
             ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -2834,34 +2818,26 @@ def _parse_attachment_order_query(raw_value: str) -> list[int]:
     return ordered_ids
 
 
-def _gerar_pdf_assinatura_response(
-    request,
-    workorder,
-    *,
-    signature_data,
-    signer_name,
-    signed_at=None,
-    attachment_order: list[int] | None = None,
-):
-    try:
-        pdf_bytes = build_consolidated_signature_pdf(
-            work_order=workorder,
-            signature_data=signature_data,
-            signer_name=signer_name,
-            signed_at=signed_at,
-            attachment_order=attachment_order,
-        )
-    except ConsolidationError as exc:
-        msg = str(exc)
-        if _request_accepts_json_response(request):
-            return JsonResponse({'ok': False, 'error': msg}, status=400)
-        messages.error(request, msg)
-        return redirect('gestao:detail_workorder', pk=workorder.pk)
+def _pdf_consolidado_job_payload(job) -> dict:
+    done = job.status == 'concluido' and bool(job.arquivo)
+    return {
+        'ok': job.status != 'falhou',
+        'job_id': job.pk,
+        'status': job.status,
+        'status_label': job.get_status_display(),
+        'anexos_prontos': job.anexos_prontos,
+        'anexos_total': job.anexos_total,
+        'progress': job.percentual,
+        'error': job.erro[:300] if job.status == 'falhou' else '',
+        'download_url': reverse('gestao:pdf_assinatura_arquivo', args=[job.pk]) if done else '',
+    }
 
-    nome_arquivo = f'{workorder.codigo}_zapsign.pdf'.replace('/', '-').replace('\\', '-')
-    response = HttpResponse(pdf_bytes, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
-    return response
+
+def _pdf_consolidado_job_for_user(user, job_id: int) -> PdfConsolidadoJob:
+    job = get_object_or_404(PdfConsolidadoJob.objects.select_related('work_order'), pk=job_id)
+    if not _workorder_ajax_permission_flags(job.work_order, user)['tem_permissao']:
+        raise Http404()
+    return job
 
 
 @login_required
@@ -2870,6 +2846,10 @@ def gerar_pdf_assinatura_workorder(request, pk):
     """
     Unifica anexos do pedido em um PDF e acrescenta a página de assinatura
     já registrada na aprovação do pedido (sem pedir assinatura novamente).
+
+    A montagem roda em background (PdfConsolidadoJob): se já existe artefato atualizado,
+    baixa direto; senão mostra a página de acompanhamento, que consulta o status até o
+    arquivo ficar pronto.
     """
     workorder = get_object_or_404(WorkOrder, pk=pk)
     perm = _workorder_ajax_permission_flags(workorder, request.user)
@@ -2892,17 +2872,53 @@ def gerar_pdf_assinatura_workorder(request, pk):
         )
         return redirect('gestao:detail_workorder', pk=workorder.pk)
 
-    signer = approval.aprovado_por
-    signer_name = (signer.get_full_name() or signer.username) if signer else '—'
-    attachment_order = _parse_attachment_order_query(request.GET.get('anexos', ''))
-    return _gerar_pdf_assinatura_response(
-        request,
-        workorder,
-        signature_data=approval.signature_data,
-        signer_name=signer_name,
-        signed_at=approval.created_at,
-        attachment_order=attachment_order,
-    )
+    try:
+        attachment_order = _parse_attachment_order_query(request.GET.get('anexos', ''))
+        job = request_consolidated_pdf_job(
+            workorder,
+            approval,
+            attachment_order=attachment_order,
+            user=request.user,
+        )
+    except ConsolidationError as exc:
+        msg = str(exc)
+        if _request_accepts_json_response(request):
+            return JsonResponse({'ok': False, 'error': msg}, status=400)
+        messages.error(request, msg)
+        return redirect('gestao:detail_workorder', pk=workorder.pk)
+
+    if _request_accepts_json_response(request):
+        return JsonResponse(_pdf_consolidado_job_payload(job))
+    if job.status == 'concluido' and job.arquivo:
+        return redirect('gestao:pdf_assinatura_arquivo', job_id=job.pk)
+    return render(request, 'obras/pdf_assinatura_status.html', {
+        'workorder': workorder,
+        'job': job,
+        'job_payload': _pdf_consolidado_job_payload(job),
+    })
+
+
+@login_required
+@require_http_methods(['GET'])
+def pdf_assinatura_status(request, job_id):
+    """Polling do job do PDF consolidado."""
+    job = _pdf_consolidado_job_for_user(request.user, job_id)
+    return JsonResponse(_pdf_consolidado_job_payload(job))
+
+
+@login_required
+@require_http_methods(['GET'])
+def pdf_assinatura_arquivo(request, job_id):
+    """Download do PDF consolidado gerado pelo job (lido do storage, sem carregar em memória)."""
+    job = _pdf_consolidado_job_for_user(request.user, job_id)
+    if job.status != 'concluido' or not job.arquivo:
+        raise Http404()
+    try:
+        fh = job.arquivo.open('rb')
+    except (FileNotFoundError, OSError):
+        raise Http404() from None
+    nome_arquivo = f'{job.work_order.codigo}_zapsign.pdf'.replace('/', '-').replace('\\', '-')
+    return FileResponse(fh, content_type='application/pdf', as_attachment=True, filename=nome_arquivo)
 
 
 @login_required
@@ -4148,14 +4164,11 @@ def user_governance_panel(request, pk):
         module=module,
         obra_id=obra_filter_id,
     )
-    timeline_events = build_timeline_events(target, timeline_opts)
-    for ev in timeline_events:
+    timeline_cursor = (request.GET.get('cursor') or '').strip() or None
+    timeline = fetch_timeline_page(target, timeline_opts, cursor=timeline_cursor)
+    for ev in timeline['events']:
         ev['href'] = _user_governance_resolve_href(ev)
 
-    paginator = Paginator(timeline_events, 25)
-    page_number = request.GET.get('page')
-    timeline_page = paginator.get_page(page_number)
-
     if is_responsavel_empresa(request.user) and not is_admin(request.user):
         _emp_filt = Empresa.objects.filter(responsavel=request.user, ativo=True)
         obras_filtro = Obra.objects.filter(empresa__in=_emp_filt, ativo=True).order_by('nome', 'codigo')
@@ -4184,8 +4197,10 @@ def user_governance_panel(request, pk):
         'scope': scope,
         'pending': pending,
         'critical': critical,
-        'timeline_page': timeline_page,
-        'timeline_total': paginator.count,
+        'timeline_page': timeline['events'],
+        'timeline_next_cursor': timeline['next_cursor'],
+        'timeline_is_first_page': not timeline_cursor,
+        'timeline_total': timeline_queryset(target, timeline_opts).count(),
         'period_days': period_days,
         'module_filter': module,
         'obra_filter': str(obra_filter_id) if obra_filter_id else '',
@@ -6968,8 +6983,6 @@ def _gerar_csv_historico(solicitante, reprovacoes, dias_periodo, tipo_solicitaca
 def _gerar_pdf_historico(solicitante, reprovacoes, dias_periodo, tipo_solicitacao, total_reprovacoes, tags_count):
     """Gera PDF corporativo de histórico de reprovações (padrão visual LPLAN)."""
     import functools
-    from reportlab.lib.utils import ImageReader
-    from reportlab.platypus import Image as RLImage
     from reportlab.lib.units import mm
     from reportlab.pdfgen import canvas
 
@@ -7000,41 +7013,6 @@ def _gerar_pdf_historico(solicitante, reprovacoes, dias_periodo, tipo_solicitaca
             return default
         return v.strftime('%d/%m/%Y %H:%M')
 
-    def _get_logo_path():
-        """
-        Usa a mesma resolução de logo do PDF do Diário de Obra,
-        garantindo padronização visual entre relatórios.
-        """
-        explicit_logo = os.path.join(
-            settings.BASE_DIR,
-            'core',
-            'static',
-            'core',
-            'images',
-            'lpla-logo-pdf-transparent.png',
-        )
-        if os.path.exists(explicit_logo):
-            return explicit_logo
-
-        try:
-            from core.utils.pdf_generator import _get_logo_absolute_path
-            return _get_logo_absolute_path()
-        except Exception:
-            base = settings.BASE_DIR
-            logo_dir = os.path.join(base, 'core', 'static', 'core', 'images')
-            for name in (
-                'lpla-logo-pdf-transparent.png',
-                'lpla-logo-pdf.png',
-                'lplan-logo2.png',
-                'lplan_logo.png',
-                'lplan_logo.jpg',
-                'lplan_logo.jpeg',
-            ):
-                p = os.path.join(logo_dir, name)
-                if os.path.exists(p):
-                    return p
-            return None
-
     class _HistoricoCanvas(canvas.Canvas):
         """Canvas com rodapé institucional e numeração de página."""
         def __init__(self, *args, generated_at='', content_frame=None, **kwargs):
@@ -7116,7 +7094,7 @@ def _gerar_pdf_historico(solicitante, reprovacoes, dias_periodo, tipo_solicitaca
         topMargin=1.3 * cm,
         bottomMargin=1.8 * cm,
     )
-    styles = getSampleStyleSheet()
+    styles = pdf_assets.sample_styles()
     elements = []
     content_width = doc.width
 
@@ -7153,23 +7131,11 @@ def _gerar_pdf_historico(solicitante, reprovacoes, dias_periodo, tipo_solicitaca
         ),
     )
 
-    logo_path = _get_logo_path()
     logo_col_w = 5.2 * cm
     text_col_w = max(content_width - (2 * logo_col_w), 1.0 * cm)
-    if logo_path:
-        max_logo_w = 4.8 * cm
-        max_logo_h = 1.15 * cm
-        logo_w = max_logo_w
-        logo_h = max_logo_h
-        try:
-            src_w, src_h = ImageReader(logo_path).getSize()
-            if src_w and src_h:
-                scale = min(max_logo_w / float(src_w), max_logo_h / float(src_h))
-                logo_w = max(1.0 * cm, float(src_w) * scale)
-                logo_h = max(0.4 * cm, float(src_h) * scale)
-        except Exception:
-            pass
-        logo = RLImage(logo_path, width=logo_w, height=logo_h)
+    if pdf_assets.logo_bytes:
+        logo_w, logo_h = pdf_assets.scaled_logo_size(4.8 * cm, 1.15 * cm, min_w=1.0 * cm, min_h=0.4 * cm)
+        logo = pdf_assets.logo_flowable(logo_w, logo_h)
         right_spacer = Paragraph(" ", ParagraphStyle(name='HistHeaderSpacer', fontSize=1))
         text_block = Table([[header_title], [Spacer(1, 1.5)], [header_sub]], colWidths=[text_col_w], hAlign='CENTER')
         text_block.setStyle(TableStyle([
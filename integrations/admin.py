@@ -4,6 +4,7 @@ from .models import (
     ExternalDocument,
     IntegrationCommandLog,
     IntegrationEventLog,
+    IntegrationOutboxEvent,
     OperationsSyncRecord,
     SignatureRequest,
 )
@@ -17,6 +18,14 @@ class IntegrationEventLogAdmin(admin.ModelAdmin):
     readonly_fields = ("created_at", "updated_at")
 
 
+@admin.register(IntegrationOutboxEvent)
+class IntegrationOutboxEventAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "event_type", "status", "attempts", "next_attempt_at", "source")
+    list_filter = ("status", "event_type", "source")
+    search_fields = ("event_type", "correlation_id", "last_error")
+    readonly_fields = ("created_at", "updated_at", "processed_at")
+
+
 @admin.register(IntegrationCommandLog)
 class IntegrationCommandLogAdmin(admin.ModelAdmin):
     list_display = ("created_at", "source", "command_name", "external_user_email", "success")
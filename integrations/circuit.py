@@ -0,0 +1,48 @@
+import logging
+import time
+
+from django.core.cache import cache
+
+from integrations import config
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Disjuntor por provedor, com estado no cache (compartilhado entre workers).
+
+    Após ``INTEGRATIONS_CIRCUIT_FAILURE_THRESHOLD`` falhas seguidas o circuito abre por
+    ``INTEGRATIONS_CIRCUIT_OPEN_SECONDS``: o provedor não é chamado e os eventos ficam
+    pendentes para ele. Vencido o prazo, uma chamada de teste decide se fecha ou reabre.
+    """
+
+    def __init__(self, provider_name: str):
+        self.provider_name = provider_name
+        self._failures_key = f"integrations:circuit:{provider_name}:failures"
+        self._open_key = f"integrations:circuit:{provider_name}:open_until"
+
+    def allow(self) -> bool:
+        open_until = cache.get(self._open_key)
+        return not open_until or open_until <= time.time()
+
+    def record_success(self) -> None:
+        cache.delete_many([self._failures_key, self._open_key])
+
+    def record_failure(self) -> None:
+        timeout = max(config.INTEGRATIONS_CIRCUIT_OPEN_SECONDS * 4, 3600)
+        cache.add(self._failures_key, 0, timeout=timeout)
+        try:
+            failures = cache.incr(self._failures_key)
+        except ValueError:
+            failures = 1
+            cache.set(self._failures_key, failures, timeout=timeout)
+        if failures >= config.INTEGRATIONS_CIRCUIT_FAILURE_THRESHOLD:
+            open_seconds = config.INTEGRATIONS_CIRCUIT_OPEN_SECONDS
+            cache.set(self._open_key, time.time() + open_seconds, timeout=open_seconds * 2)
+            logger.warning(
+                "Circuito da integracao %s aberto por %ss apos %s falhas",
+                self.provider_name,
+                open_seconds,
+                failures,
+            )
@@ -10,8 +10,25 @@ def get_str(name: str, default: str = "") -> str:
     return str(os.environ.get(name, default)).strip()
 
 
+def get_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
 INTEGRATIONS_ENABLED = get_bool("INTEGRATIONS_ENABLED", True)
 
+# Outbox de eventos (integrations.outbox) e fan-out entre provedores
+INTEGRATIONS_OUTBOX_BATCH_SIZE = get_int("INTEGRATIONS_OUTBOX_BATCH_SIZE", 50)
+INTEGRATIONS_OUTBOX_MAX_ATTEMPTS = get_int("INTEGRATIONS_OUTBOX_MAX_ATTEMPTS", 6)
+INTEGRATIONS_OUTBOX_BACKOFF_BASE = get_int("INTEGRATIONS_OUTBOX_BACKOFF_BASE", 30)  # segundos
+INTEGRATIONS_OUTBOX_BACKOFF_MAX = get_int("INTEGRATIONS_OUTBOX_BACKOFF_MAX", 3600)
+INTEGRATIONS_PROVIDER_TIMEOUT = get_int("INTEGRATIONS_PROVIDER_TIMEOUT", 30)  # segundos por provedor
+INTEGRATIONS_MAX_WORKERS = get_int("INTEGRATIONS_MAX_WORKERS", 8)  # threads do pool de fan-out (por processo)
+INTEGRATIONS_CIRCUIT_FAILURE_THRESHOLD = get_int("INTEGRATIONS_CIRCUIT_FAILURE_THRESHOLD", 5)
+INTEGRATIONS_CIRCUIT_OPEN_SECONDS = get_int("INTEGRATIONS_CIRCUIT_OPEN_SECONDS", 300)
+
 AZURE_TENANT_ID = get_str("AZURE_TENANT_ID")
 AZURE_CLIENT_ID = get_str("AZURE_CLIENT_ID")
 AZURE_CLIENT_SECRET = get_str("AZURE_CLIENT_SECRET")
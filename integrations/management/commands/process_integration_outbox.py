@@ -0,0 +1,25 @@
+"""
+Entrega os eventos pendentes da outbox de integracoes (IntegrationOutboxEvent).
+
+Para ambientes sem Celery beat, agende no cron (ex.: a cada minuto):
+
+    python manage.py process_integration_outbox
+    python manage.py process_integration_outbox --batch-size 100 --max-batches 5
+"""
+from django.core.management.base import BaseCommand
+
+from integrations.outbox import process_outbox
+
+
+class Command(BaseCommand):
+    help = "Entrega os eventos vencidos da outbox de integracoes em lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Eventos por lote.")
+        parser.add_argument("--max-batches", type=int, default=None, help="Para apos N lotes.")
+
+    def handle(self, *args, **options):
+        stats = process_outbox(batch_size=options["batch_size"], max_batches=options["max_batches"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Entregues: {stats['delivered']} | Reagendados: {stats['rescheduled']} | Falhos: {stats['failed']}"
+        ))
@@ -42,6 +42,49 @@ class IntegrationEventLog(models.Model):
         return f"{self.event_type} [{self.provider}] - {self.status}"
 
 
+class IntegrationOutboxEvent(models.Model):
+    """Evento gravado na mesma transação do save que o originou; o worker entrega aos provedores."""
+
+    STATUS_PENDING = "pending"
+    STATUS_PROCESSING = "processing"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pendente"),
+        (STATUS_PROCESSING, "Processando"),
+        (STATUS_DONE, "Entregue"),
+        (STATUS_FAILED, "Falha"),
+    ]
+
+    event_type = models.CharField(max_length=120, db_index=True)
+    source = models.CharField(max_length=120, blank=True)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="integration_outbox_events",
+    )
+    payload = models.JSONField(default=dict, blank=True)
+    correlation_id = models.CharField(max_length=64, blank=True, db_index=True)
+    # Provedores que ainda não confirmaram a entrega (vazio = todos os habilitados).
+    pending_providers = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.event_type} #{self.pk} - {self.status}"
+
+
 class IntegrationCommandLog(models.Model):
     source = models.CharField(max_length=40, default="teams")
     command_text = models.CharField(max_length=500, blank=True)
@@ -0,0 +1,152 @@
+"""
+Outbox dos eventos de integração.
+
+``dispatch_event_on_commit`` grava um ``IntegrationOutboxEvent`` na transação do save;
+``process_outbox()`` reserva lotes (``select_for_update(skip_locked=True)``) e entrega cada
+evento aos provedores via ``dispatch_integration_event``. Só os provedores que falharam (ou
+estavam com o circuito aberto) ficam em ``pending_providers`` para a próxima tentativa, com
+backoff exponencial até ``INTEGRATIONS_OUTBOX_MAX_ATTEMPTS``. Entregas em que todos os
+provedores foram pulados (``skipped``) não contam como tentativa.
+
+Worker: ``integrations.tasks.process_integration_outbox_task`` (beat e após cada commit),
+thread local sem broker e ``python manage.py process_integration_outbox``.
+"""
+import logging
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from integrations import config
+from integrations.models import IntegrationOutboxEvent
+from integrations.services import dispatch_integration_event
+
+logger = logging.getLogger(__name__)
+
+# Tempo que um lote fica reservado; passado isso (worker caiu) volta a ser elegível.
+CLAIM_LEASE = timedelta(minutes=10)
+
+
+def compute_backoff(attempts: int) -> timedelta:
+    """Espera antes da próxima tentativa: base × 2^(n-1), com teto e ~10% de jitter."""
+    base = float(config.INTEGRATIONS_OUTBOX_BACKOFF_BASE)
+    wait = min(float(config.INTEGRATIONS_OUTBOX_BACKOFF_MAX), base * (2 ** max(0, attempts - 1)))
+    return timedelta(seconds=wait + random.uniform(0, wait * 0.1))
+
+
+def _due_filter(now):
+    return Q(status__in=[IntegrationOutboxEvent.STATUS_PENDING, IntegrationOutboxEvent.STATUS_PROCESSING]) & (
+        Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now)
+    )
+
+
+def next_due_at():
+    """Quando vence o próximo evento pendente (None se a fila está vazia)."""
+    pending = IntegrationOutboxEvent.objects.filter(
+        status__in=[IntegrationOutboxEvent.STATUS_PENDING, IntegrationOutboxEvent.STATUS_PROCESSING]
+    )
+    if pending.filter(next_attempt_at__isnull=True).exists():
+        return timezone.now()
+    return pending.order_by("next_attempt_at").values_list("next_attempt_at", flat=True).first()
+
+
+def _claim_batch(size: int) -> list[IntegrationOutboxEvent]:
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            IntegrationOutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(_due_filter(now))
+            .order_by("id")[:size]
+        )
+        if events:
+            IntegrationOutboxEvent.objects.filter(pk__in=[e.pk for e in events]).update(
+                status=IntegrationOutboxEvent.STATUS_PROCESSING,
+                next_attempt_at=now + CLAIM_LEASE,
+                updated_at=now,
+            )
+    return events
+
+
+def _deliver(event: IntegrationOutboxEvent) -> str:
+    """Entrega um evento e grava o desfecho; retorna o status final."""
+    results = dispatch_integration_event(
+        event_type=event.event_type,
+        payload=event.payload or {},
+        source=event.source or "app",
+        actor_id=event.actor_id,
+        # Estável entre tentativas: o fan-out reconhece uma chamada anterior ainda em execução.
+        correlation_id=event.correlation_id or f"outbox-{event.pk}",
+        providers=event.pending_providers or None,
+    )
+    failed = [r for r in results if not r["ok"]]
+    if not failed or any(not r.get("skipped") for r in results):
+        # Circuito aberto / chamada anterior em andamento não chamam o provedor: não é tentativa.
+        event.attempts += 1
+    if not failed:
+        event.status = IntegrationOutboxEvent.STATUS_DONE
+        event.pending_providers = []
+        event.last_error = ""
+        event.processed_at = timezone.now()
+        event.next_attempt_at = None
+    else:
+        event.pending_providers = [r["provider"] for r in failed]
+        event.last_error = "; ".join(f"{r['provider']}: {r['error']}" for r in failed)[:4000]
+        if event.attempts >= config.INTEGRATIONS_OUTBOX_MAX_ATTEMPTS:
+            event.status = IntegrationOutboxEvent.STATUS_FAILED
+            event.processed_at = timezone.now()
+            event.next_attempt_at = None
+        else:
+            event.status = IntegrationOutboxEvent.STATUS_PENDING
+            event.next_attempt_at = timezone.now() + compute_backoff(event.attempts)
+    event.save(
+        update_fields=[
+            "status",
+            "attempts",
+            "pending_providers",
+            "last_error",
+            "processed_at",
+            "next_attempt_at",
+            "updated_at",
+        ]
+    )
+    return event.status
+
+
+def process_outbox(*, batch_size: int | None = None, max_batches: int | None = None) -> dict:
+    """
+    Entrega os eventos vencidos em lotes até esvaziar a fila (ou ``max_batches``).
+    Retorna contagens ``{'delivered', 'rescheduled', 'failed'}``.
+    """
+    size = int(batch_size or config.INTEGRATIONS_OUTBOX_BATCH_SIZE)
+    stats = {"delivered": 0, "rescheduled": 0, "failed": 0}
+    keys = {
+        IntegrationOutboxEvent.STATUS_DONE: "delivered",
+        IntegrationOutboxEvent.STATUS_PENDING: "rescheduled",
+        IntegrationOutboxEvent.STATUS_FAILED: "failed",
+    }
+    batches = 0
+    while True:
+        events = _claim_batch(size)
+        if not events:
+            break
+        for event in events:
+            try:
+                status = _deliver(event)
+            except Exception:
+                logger.exception("Erro ao entregar evento de integracao %s", event.pk)
+                IntegrationOutboxEvent.objects.filter(pk=event.pk).update(
+                    status=IntegrationOutboxEvent.STATUS_PENDING,
+                    next_attempt_at=timezone.now() + compute_backoff(event.attempts + 1),
+                    attempts=event.attempts + 1,
+                    updated_at=timezone.now(),
+                )
+                status = IntegrationOutboxEvent.STATUS_PENDING
+            stats[keys[status]] += 1
+        batches += 1
+        if max_batches and batches >= max_batches:
+            break
+    if any(stats.values()):
+        logger.info("Outbox de integracoes: %s", stats)
+    return stats
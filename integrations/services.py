@@ -1,12 +1,16 @@
 import logging
+import threading
 import time
 import uuid
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Iterable
 
-from django.db import transaction
+from django.db import close_old_connections, transaction
 
+from integrations import config
 from integrations.audit import mark_event_error, mark_event_success, start_event_log
 from integrations.base import IntegrationContext
+from integrations.circuit import CircuitBreaker
 from integrations.providers import ERPProvider, OperationsProvider, PowerBIProvider, SharePointProvider, SignatureProvider, TeamsProvider
 
 logger = logging.getLogger(__name__)
@@ -20,6 +24,57 @@ PROVIDERS = [
     ERPProvider(),
 ]
 
+# Chamada que estourou o timeout é esquecida depois disso (ainda em execução ou não).
+INFLIGHT_TTL_SECONDS = 3600
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+# (correlation_id, provedor) -> (future, início): chamadas que estouraram o timeout mas
+# continuam rodando. Uma nova tentativa do mesmo evento espera por elas em vez de repetir.
+_inflight: dict[tuple[str, str], tuple[Any, float]] = {}
+_inflight_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    """Pool único do processo (limitado por ``INTEGRATIONS_MAX_WORKERS``)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=max(1, config.INTEGRATIONS_MAX_WORKERS), thread_name_prefix="integration"
+            )
+        return _pool
+
+
+def _call_provider(provider, context: IntegrationContext, payload: dict[str, Any]):
+    """Executado no pool: o provedor pode usar o ORM; as conexões da thread são fechadas."""
+    close_old_connections()
+    try:
+        return provider.handle_event(context, payload)
+    finally:
+        close_old_connections()
+
+
+def _previous_call(key: tuple[str, str]):
+    """
+    Situação de uma chamada anterior do mesmo evento que estourou o timeout:
+    ``("running", None)``, ``("ok", resposta)`` ou ``(None, None)`` (nenhuma/falhou: chamar de novo).
+    """
+    with _inflight_lock:
+        now = time.monotonic()
+        for stale in [k for k, (_f, started) in _inflight.items() if now - started > INFLIGHT_TTL_SECONDS]:
+            del _inflight[stale]
+        entry = _inflight.get(key)
+        if entry is None:
+            return None, None
+        future = entry[0]
+        if not future.done():
+            return "running", None
+        del _inflight[key]
+    if future.cancelled() or future.exception() is not None:
+        return None, None
+    return "ok", future.result()
+
 
 def dispatch_integration_event(
     *,
@@ -28,7 +83,19 @@ def dispatch_integration_event(
     source: str = "app",
     actor_id: int | None = None,
     correlation_id: str | None = None,
+    providers: Iterable[str] | None = None,
 ) -> list[dict[str, Any]]:
+    """
+    Entrega o evento aos provedores habilitados (ou só a ``providers``) em paralelo.
+
+    Cada provedor tem timeout (``INTEGRATIONS_PROVIDER_TIMEOUT``) e disjuntor próprio:
+    com o circuito aberto ele é pulado (``circuit_open``) sem atrasar os demais. Logs no
+    banco são gravados na thread chamadora; as threads do pool só fazem a chamada externa.
+
+    Provedor que estoura o timeout continua rodando no pool: a próxima tentativa do mesmo
+    evento (mesmo ``correlation_id``) não o chama de novo enquanto ele roda (``in_flight``)
+    e aproveita a resposta se ele terminar com sucesso. Resultados pulados levam ``skipped``.
+    """
     correlation_id = correlation_id or uuid.uuid4().hex
     context = IntegrationContext(
         event_type=event_type,
@@ -36,10 +103,34 @@ def dispatch_integration_event(
         actor_id=actor_id,
         correlation_id=correlation_id,
     )
+    only = set(providers) if providers is not None else None
     results: list[dict[str, Any]] = []
+    active = []
     for provider in PROVIDERS:
+        if only is not None and provider.provider_name not in only:
+            continue
         if not provider.is_enabled():
             continue
+        key = (correlation_id, provider.provider_name)
+        state, response = _previous_call(key)
+        if state == "running":
+            results.append({"provider": provider.provider_name, "ok": False, "error": "in_flight", "skipped": True})
+            continue
+        breaker = CircuitBreaker(provider.provider_name)
+        if state == "ok":
+            breaker.record_success()
+            results.append({"provider": provider.provider_name, "ok": True, "response": response})
+            continue
+        if not breaker.allow():
+            results.append({"provider": provider.provider_name, "ok": False, "error": "circuit_open", "skipped": True})
+            continue
+        active.append((provider, breaker))
+    if not active:
+        return results
+
+    pool = _get_pool()
+    running = []
+    for provider, breaker in active:
         log = start_event_log(
             event_type=event_type,
             provider=provider.provider_name,
@@ -48,17 +139,33 @@ def dispatch_integration_event(
             actor_id=actor_id,
             correlation_id=correlation_id,
         )
-        started = time.monotonic()
+        future = pool.submit(_call_provider, provider, context, payload)
+        running.append((provider, breaker, log, time.monotonic(), future))
+
+    deadline = time.monotonic() + config.INTEGRATIONS_PROVIDER_TIMEOUT
+    for provider, breaker, log, started, future in running:
         try:
-            response = provider.handle_event(context, payload)
-            elapsed = int((time.monotonic() - started) * 1000)
-            mark_event_success(log, response=response, latency_ms=elapsed)
-            results.append({"provider": provider.provider_name, "ok": True, "response": response})
+            response = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            error = f"timeout apos {config.INTEGRATIONS_PROVIDER_TIMEOUT}s"
+            logger.warning("Integracao %s excedeu o tempo para evento %s", provider.provider_name, event_type)
+            if not future.cancel():
+                # Já começou: segue no pool; a próxima tentativa não duplica a chamada.
+                with _inflight_lock:
+                    _inflight[(correlation_id, provider.provider_name)] = (future, started)
         except Exception as exc:
+            error = str(exc)
             logger.exception("Falha na integracao %s para evento %s", provider.provider_name, event_type)
+        else:
             elapsed = int((time.monotonic() - started) * 1000)
-            mark_event_error(log, error=str(exc), latency_ms=elapsed)
-            results.append({"provider": provider.provider_name, "ok": False, "error": str(exc)})
+            breaker.record_success()
+            mark_event_success(log, response=response, latency_ms=elapsed)
+            results.append({"provider": provider.provider_name, "ok": True, "response": response})
+            continue
+        elapsed = int((time.monotonic() - started) * 1000)
+        breaker.record_failure()
+        mark_event_error(log, error=error, latency_ms=elapsed)
+        results.append({"provider": provider.provider_name, "ok": False, "error": error})
     return results
 
 
@@ -69,15 +176,29 @@ def dispatch_event_on_commit(
     source: str = "app",
     actor_id: int | None = None,
 ):
-    from integrations.tasks import dispatch_event_task
+    """
+    Grava o evento na outbox dentro da transação atual (some junto se houver rollback) e,
+    após o commit, agenda o worker. Não fala com o broker nem com os provedores no save.
+    """
+    from integrations.models import IntegrationOutboxEvent
+
+    if not config.INTEGRATIONS_ENABLED:
+        return None
+    event = IntegrationOutboxEvent.objects.create(
+        event_type=event_type,
+        payload=payload or {},
+        source=source,
+        actor_id=actor_id,
+        correlation_id=uuid.uuid4().hex,
+    )
+    transaction.on_commit(_schedule_outbox_worker)
+    return event
 
-    def _enqueue():
-        dispatch_event_task.delay(
-            event_type=event_type,
-            payload=payload,
-            source=source,
-            actor_id=actor_id,
-        )
 
-    transaction.on_commit(_enqueue)
+def _schedule_outbox_worker():
+    try:
+        from integrations.tasks import schedule_outbox_processing
 
+        schedule_outbox_processing()
+    except Exception:
+        logger.exception("Nao foi possivel agendar o worker da outbox de integracoes")
@@ -1,12 +1,73 @@
 import logging
+import threading
 
 from celery import shared_task
+from django.db import close_old_connections
+from django.utils import timezone
 
 from integrations.services import dispatch_integration_event
 
 logger = logging.getLogger(__name__)
 
+_local_lock = threading.Lock()
+_local_timer: threading.Timer | None = None
 
+
+@shared_task(ignore_result=True)
+def process_integration_outbox_task():
+    """Entrega os eventos vencidos da outbox de integracoes (tambem agendada pelo beat)."""
+    from integrations.outbox import process_outbox
+
+    close_old_connections()
+    try:
+        return process_outbox()
+    finally:
+        close_old_connections()
+
+
+def _process_local() -> None:
+    """Drena a outbox na thread atual; so uma execucao local por vez."""
+    from integrations.outbox import next_due_at, process_outbox
+
+    if not _local_lock.acquire(blocking=False):
+        return
+    try:
+        close_old_connections()
+        process_outbox()
+        due = next_due_at()
+    except Exception:
+        logger.exception("process_outbox (thread local) falhou")
+        due = None
+    finally:
+        close_old_connections()
+        _local_lock.release()
+    if due is not None:
+        _schedule_local_timer(max(1.0, (due - timezone.now()).total_seconds()))
+
+
+def _schedule_local_timer(seconds: float) -> None:
+    global _local_timer
+    if _local_timer is not None and _local_timer.is_alive():
+        _local_timer.cancel()
+    _local_timer = threading.Timer(seconds, _process_local)
+    _local_timer.daemon = True
+    _local_timer.start()
+
+
+def schedule_outbox_processing() -> None:
+    """Dispara o worker: fila Celery quando o broker responde, senao thread local."""
+    from core.tasks import _celery_broker_reachable
+
+    if _celery_broker_reachable():
+        try:
+            process_integration_outbox_task.apply_async(ignore_result=True)
+            return
+        except Exception:
+            logger.exception("process_integration_outbox_task: apply_async() falhou, usando thread.")
+    threading.Thread(target=_process_local, name="integration-outbox", daemon=True).start()
+
+
+# Mantida para mensagens ja enfileiradas no broker antes da outbox.
 @shared_task(bind=True, max_retries=3, default_retry_delay=30)
 def dispatch_event_task(self, event_type: str, payload: dict, source: str = "app", actor_id: int | None = None):
     try:
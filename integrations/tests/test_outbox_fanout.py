@@ -0,0 +1,187 @@
+"""
+Fan-out dos eventos de integração (pool, timeout, disjuntor) e outbox.
+
+O app ``integrations`` está pausado em INSTALLED_APPS: sem ele não há tabelas e o módulo é pulado.
+"""
+from __future__ import annotations
+
+import threading
+import unittest
+from unittest import mock
+
+from django.apps import apps
+
+if not apps.is_installed("integrations"):
+    raise unittest.SkipTest("app integrations fora de INSTALLED_APPS")
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from integrations import config, services
+from integrations.base import BaseIntegrationProvider
+from integrations.models import IntegrationEventLog, IntegrationOutboxEvent
+from integrations.outbox import process_outbox
+
+
+class _Provider(BaseIntegrationProvider):
+    def __init__(self, name, handler):
+        self.provider_name = name
+        self.handler = handler
+        self.calls = 0
+        self.threads = []
+
+    def handle_event(self, context, payload):
+        self.calls += 1
+        self.threads.append(threading.current_thread().name)
+        return self.handler(context, payload)
+
+
+def _ok(context, payload):
+    return {"ok": payload.get("n")}
+
+
+def _boom(context, payload):
+    raise RuntimeError("fora do ar")
+
+
+class _IntegrationTestBase(TestCase):
+    def setUp(self):
+        cache.clear()
+        services._inflight.clear()
+        self.addCleanup(services._inflight.clear)
+
+    def use_providers(self, *providers):
+        patcher = mock.patch.object(services, "PROVIDERS", list(providers))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class DispatchFanOutTests(_IntegrationTestBase):
+    def test_providers_run_in_shared_pool_and_failures_are_isolated(self):
+        good = _Provider("bom", _ok)
+        bad = _Provider("ruim", _boom)
+        self.use_providers(good, bad)
+
+        results = services.dispatch_integration_event(event_type="evt", payload={"n": 1}, correlation_id="c1")
+        pool = services._get_pool()
+        services.dispatch_integration_event(event_type="evt", payload={"n": 2}, correlation_id="c2")
+
+        self.assertIs(services._get_pool(), pool)
+        by_provider = {r["provider"]: r for r in results}
+        self.assertEqual(by_provider["bom"], {"provider": "bom", "ok": True, "response": {"ok": 1}})
+        self.assertFalse(by_provider["ruim"]["ok"])
+        self.assertIn("fora do ar", by_provider["ruim"]["error"])
+        self.assertTrue(all(name.startswith("integration") for name in good.threads + bad.threads))
+        logs = IntegrationEventLog.objects.filter(correlation_id="c1")
+        self.assertEqual(logs.get(provider="bom").status, IntegrationEventLog.STATUS_SUCCESS)
+        self.assertEqual(logs.get(provider="ruim").status, IntegrationEventLog.STATUS_FAILED)
+
+    def test_only_requested_providers_are_called(self):
+        a = _Provider("a", _ok)
+        b = _Provider("b", _ok)
+        self.use_providers(a, b)
+        results = services.dispatch_integration_event(event_type="evt", payload={}, providers=["b"])
+        self.assertEqual([r["provider"] for r in results], ["b"])
+        self.assertEqual((a.calls, b.calls), (0, 1))
+
+    def test_circuit_opens_after_threshold_and_skips_provider(self):
+        bad = _Provider("ruim", _boom)
+        self.use_providers(bad)
+        with mock.patch.object(config, "INTEGRATIONS_CIRCUIT_FAILURE_THRESHOLD", 2):
+            for i in range(2):
+                services.dispatch_integration_event(event_type="evt", payload={}, correlation_id=f"c{i}")
+            results = services.dispatch_integration_event(event_type="evt", payload={}, correlation_id="c9")
+        self.assertEqual(bad.calls, 2)
+        self.assertEqual(results, [{"provider": "ruim", "ok": False, "error": "circuit_open", "skipped": True}])
+        self.assertFalse(IntegrationEventLog.objects.filter(correlation_id="c9").exists())
+
+    def test_timed_out_call_is_not_repeated_while_running(self):
+        release = threading.Event()
+        finished = threading.Event()
+
+        def slow(context, payload):
+            release.wait(5)
+            finished.set()
+            return {"entregue": True}
+
+        slow_provider = _Provider("lento", slow)
+        self.use_providers(slow_provider)
+        with mock.patch.object(config, "INTEGRATIONS_PROVIDER_TIMEOUT", 0.2):
+            first = services.dispatch_integration_event(event_type="evt", payload={}, correlation_id="c1")
+            second = services.dispatch_integration_event(event_type="evt", payload={}, correlation_id="c1")
+            release.set()
+            self.assertTrue(finished.wait(5))
+            services._inflight[("c1", "lento")][0].result(timeout=5)
+            third = services.dispatch_integration_event(event_type="evt", payload={}, correlation_id="c1")
+
+        self.assertFalse(first[0]["ok"])
+        self.assertIn("timeout", first[0]["error"])
+        self.assertEqual(second, [{"provider": "lento", "ok": False, "error": "in_flight", "skipped": True}])
+        self.assertEqual(third, [{"provider": "lento", "ok": True, "response": {"entregue": True}}])
+        self.assertEqual(slow_provider.calls, 1)
+        self.assertNotIn(("c1", "lento"), services._inflight)
+
+
+class OutboxTests(_IntegrationTestBase):
+    def _event(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=False):
+            return services.dispatch_event_on_commit(event_type="evt", payload={"n": 1}, **kwargs)
+
+    def test_event_is_written_in_transaction_and_delivered(self):
+        good = _Provider("bom", _ok)
+        self.use_providers(good)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            event = services.dispatch_event_on_commit(event_type="evt", payload={"n": 1})
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(good.calls, 0)
+
+        stats = process_outbox()
+
+        event.refresh_from_db()
+        self.assertEqual(stats, {"delivered": 1, "rescheduled": 0, "failed": 0})
+        self.assertEqual(event.status, IntegrationOutboxEvent.STATUS_DONE)
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(good.calls, 1)
+
+    def test_only_failed_providers_stay_pending_until_max_attempts(self):
+        good = _Provider("bom", _ok)
+        bad = _Provider("ruim", _boom)
+        self.use_providers(good, bad)
+        event = self._event()
+
+        with mock.patch.object(config, "INTEGRATIONS_OUTBOX_MAX_ATTEMPTS", 2), mock.patch.object(
+            config, "INTEGRATIONS_CIRCUIT_FAILURE_THRESHOLD", 99
+        ):
+            self.assertEqual(process_outbox()["rescheduled"], 1)
+            event.refresh_from_db()
+            self.assertEqual(event.pending_providers, ["ruim"])
+            self.assertEqual(event.attempts, 1)
+            self.assertIsNotNone(event.next_attempt_at)
+            self.assertIn("ruim: fora do ar", event.last_error)
+
+            IntegrationOutboxEvent.objects.filter(pk=event.pk).update(next_attempt_at=None)
+            self.assertEqual(process_outbox()["failed"], 1)
+
+        event.refresh_from_db()
+        self.assertEqual(event.status, IntegrationOutboxEvent.STATUS_FAILED)
+        self.assertEqual(event.attempts, 2)
+        self.assertEqual((good.calls, bad.calls), (1, 2))
+
+    def test_circuit_open_skip_does_not_count_as_attempt(self):
+        bad = _Provider("ruim", _boom)
+        self.use_providers(bad)
+        event = self._event()
+        with mock.patch.object(config, "INTEGRATIONS_CIRCUIT_FAILURE_THRESHOLD", 1):
+            process_outbox()
+            event.refresh_from_db()
+            self.assertEqual(event.attempts, 1)
+
+            IntegrationOutboxEvent.objects.filter(pk=event.pk).update(next_attempt_at=None)
+            stats = process_outbox()
+
+        event.refresh_from_db()
+        self.assertEqual(stats["rescheduled"], 1)
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(bad.calls, 1)
+        self.assertEqual(event.status, IntegrationOutboxEvent.STATUS_PENDING)
+        self.assertIn("circuit_open", event.last_error)
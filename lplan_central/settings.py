@@ -82,6 +82,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'core.csrf_middleware.CsrfViewMiddleware',  # Aceita origem quando host está em ALLOWED_HOSTS (cPanel)
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'audit.middleware.AuditBufferMiddleware',  # Eventos de auditoria do request num só INSERT em lote
     'accounts.middleware.ModuloIntegradoManutencaoMiddleware',
     'core.middleware.NoCacheForAuthenticatedUsersMiddleware',  # HTML autenticado: no-store + Expires (evita flash de documento em cache)
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -251,6 +252,9 @@ REST_FRAMEWORK = {
         'rest_framework.renderers.JSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
     ],
+    # Listagens paginadas por cursor (?cursor=, ?page_size=); ver core.pagination
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.ApiCursorPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', '100')),
 }
 
 # Security Settings
@@ -338,6 +342,9 @@ EMAIL_RDO_USE_SSL = os.environ.get('EMAIL_RDO_USE_SSL', str(EMAIL_USE_SSL)).lowe
 EMAIL_RDO_USE_TLS = os.environ.get('EMAIL_RDO_USE_TLS', str(EMAIL_USE_TLS)).lower() in ('true', '1', 'yes')
 EMAIL_RDO_HOST_USER = os.environ.get('EMAIL_RDO_HOST_USER', '')
 EMAIL_RDO_HOST_PASSWORD = os.environ.get('EMAIL_RDO_HOST_PASSWORD', '')
+# Despacho em lote dos e-mails de RDO aprovado: threads para gerar PDFs e diários por conexão SMTP
+RDO_EMAIL_PDF_WORKERS = int(os.environ.get('RDO_EMAIL_PDF_WORKERS', '3'))
+RDO_EMAIL_BATCH_SIZE = int(os.environ.get('RDO_EMAIL_BATCH_SIZE', '25'))
 # URL base do sistema (para links em e-mails). Ex.: https://sistema.empresa.com
 SITE_URL = os.environ.get('SITE_URL', 'http://localhost:8000').rstrip('/')
 
@@ -473,6 +480,59 @@ if SIENGE_CENTRAL_BEAT_ENABLED:
 else:
     CELERY_BEAT_SCHEDULE = {}
 
+# Outbox de e-mails do GestControll (gestao_aprovacao.services.email_outbox)
+EMAIL_OUTBOX_TAMANHO_LOTE = int(os.environ.get('EMAIL_OUTBOX_TAMANHO_LOTE', '50'))
+EMAIL_OUTBOX_MAX_TENTATIVAS = int(os.environ.get('EMAIL_OUTBOX_MAX_TENTATIVAS', '6'))
+EMAIL_OUTBOX_BACKOFF_BASE = int(os.environ.get('EMAIL_OUTBOX_BACKOFF_BASE', '30'))  # segundos
+EMAIL_OUTBOX_BACKOFF_MAX = int(os.environ.get('EMAIL_OUTBOX_BACKOFF_MAX', '3600'))
+EMAIL_OUTBOX_BEAT_SECONDS = int(os.environ.get('EMAIL_OUTBOX_BEAT_SECONDS', '60'))
+if EMAIL_OUTBOX_BEAT_SECONDS > 0:
+    CELERY_BEAT_SCHEDULE['gestao-email-outbox'] = {
+        'task': 'gestao_aprovacao.tasks.processar_outbox_email_task',
+        'schedule': timedelta(seconds=EMAIL_OUTBOX_BEAT_SECONDS),
+    }
+
+# Fila do webhook do Sienge (suprimentos.services.sienge_webhook_eventos)
+SIENGE_WEBHOOK_MAX_TENTATIVAS = int(os.environ.get('SIENGE_WEBHOOK_MAX_TENTATIVAS', '5'))
+SIENGE_WEBHOOK_BEAT_SECONDS = int(os.environ.get('SIENGE_WEBHOOK_BEAT_SECONDS', '120'))
+if SIENGE_WEBHOOK_BEAT_SECONDS > 0:
+    CELERY_BEAT_SCHEDULE['suprimentos-sienge-webhook'] = {
+        'task': 'suprimentos.tasks.processar_webhooks_sienge_task',
+        'schedule': timedelta(seconds=SIENGE_WEBHOOK_BEAT_SECONDS),
+    }
+
+# Reenvio dos e-mails de RDO aprovado que ficaram pendentes/falharam (core.diary_email)
+RDO_EMAIL_RESEND_BEAT_SECONDS = int(os.environ.get('RDO_EMAIL_RESEND_BEAT_SECONDS', '900'))
+if RDO_EMAIL_RESEND_BEAT_SECONDS > 0:
+    CELERY_BEAT_SCHEDULE['core-rdo-email-reenvio'] = {
+        'task': 'core.tasks.resend_failed_diary_emails_task',
+        'schedule': timedelta(seconds=RDO_EMAIL_RESEND_BEAT_SECONDS),
+    }
+
+# Mapa geográfico: abre o resumo do dia (GeoMapSummary) de cada obra com elementos
+MAPA_GEO_SUMMARY_BEAT_SECONDS = int(os.environ.get('MAPA_GEO_SUMMARY_BEAT_SECONDS', '86400'))
+if MAPA_GEO_SUMMARY_BEAT_SECONDS > 0:
+    CELERY_BEAT_SCHEDULE['mapa-geo-resumo-diario'] = {
+        'task': 'mapa_geo.tasks.refresh_map_summaries_task',
+        'schedule': timedelta(seconds=MAPA_GEO_SUMMARY_BEAT_SECONDS),
+    }
+
+# Central de Aprovações: snapshot dos totais da fila e opções de filtro (por utilizador)
+WORKFLOW_INBOX_CACHE_SECONDS = int(os.environ.get('WORKFLOW_INBOX_CACHE_SECONDS', '120'))
+
+# Outbox de eventos de integração (integrations.outbox); só com o app ativo.
+INTEGRATIONS_OUTBOX_BEAT_SECONDS = int(os.environ.get('INTEGRATIONS_OUTBOX_BEAT_SECONDS', '60'))
+if 'integrations' in INSTALLED_APPS and INTEGRATIONS_OUTBOX_BEAT_SECONDS > 0:
+    CELERY_BEAT_SCHEDULE['integrations-outbox'] = {
+        'task': 'integrations.tasks.process_integration_outbox_task',
+        'schedule': timedelta(seconds=INTEGRATIONS_OUTBOX_BEAT_SECONDS),
+    }
+
+# Expurgo por retenção (audit.retention): lotes por PK com pausa entre eles
+RETENTION_BATCH_SIZE = int(os.environ.get('RETENTION_BATCH_SIZE', '2000'))
+RETENTION_BATCH_PAUSE = float(os.environ.get('RETENTION_BATCH_PAUSE', '0.2'))  # segundos
+RETENTION_ARCHIVE_DIR = os.environ.get('RETENTION_ARCHIVE_DIR', str(BASE_DIR / 'retention_archive'))
+
 # CSRF: em produção (HTTPS) defina no .env:
 #   CSRF_TRUSTED_ORIGINS=https://sistema.lplan.com.br
 # Se acessar por HTTP (ex.: sem SSL no cPanel), inclua também as origens http:
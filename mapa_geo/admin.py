@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import GeoFeature, GeoObraConfig, GeoProgressSnapshot
+from .models import GeoFeature, GeoImportJob, GeoMapSummary, GeoObraConfig, GeoProgressSnapshot
 
 
 class GeoProgressSnapshotInline(admin.TabularInline):
@@ -39,3 +39,38 @@ class GeoProgressSnapshotAdmin(admin.ModelAdmin):
     list_display = ('feature', 'snapshot_date', 'progress_pct', 'status', 'source', 'created_at')
     list_filter = ('status', 'source', 'snapshot_date')
     search_fields = ('feature__name', 'feature__project__code')
+
+
+@admin.register(GeoMapSummary)
+class GeoMapSummaryAdmin(admin.ModelAdmin):
+    list_display = (
+        'project',
+        'summary_date',
+        'total',
+        'segments',
+        'overall_progress_pct',
+        'alerts_blocked',
+        'alerts_no_eap',
+        'alerts_stale',
+        'updated_at',
+    )
+    list_filter = ('summary_date',)
+    search_fields = ('project__code', 'project__name')
+
+
+@admin.register(GeoImportJob)
+class GeoImportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'project',
+        'source_name',
+        'status',
+        'processed',
+        'created_count',
+        'updated_count',
+        'requested_by',
+        'created_at',
+        'finished_at',
+    )
+    list_filter = ('status', 'created_at')
+    search_fields = ('project__code', 'source_name', 'source_label')
+    readonly_fields = ('created_at', 'updated_at', 'started_at', 'finished_at')
@@ -5,3 +5,6 @@ class MapaGeoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mapa_geo'
     verbose_name = 'Mapa Geográfico de Obras'
+
+    def ready(self):
+        import mapa_geo.signals  # noqa: F401
@@ -6,8 +6,6 @@ from __future__ import annotations
 
 from datetime import date, timedelta
 
-from decimal import Decimal
-
 from typing import Any
 
 
@@ -24,13 +22,15 @@ from core.models import ConstructionDiary, DailyWorkLog, DiaryImage, Project
 
 
 
-from .models import GeoFeature, GeoObraConfig, GeoProgressSnapshot
+from .models import GeoFeature, GeoProgressSnapshot
+
+from .progress_series import feature_item_at, feature_progress_series, progress_at
 
 from .services import (
 
     DIARY_STATUSES_FOR_GEO_PROGRESS,
 
-    _feature_to_geojson_dict,
+    MAP_STALE_PROGRESS_DAYS,
 
     _status_from_progress,
 
@@ -40,13 +40,19 @@ from .services import (
 
     get_map_summary,
 
-    resolve_feature_progress_and_status,
+    is_progress_stale,
+
+    latest_map_summaries,
+
+    map_summary_as_dict,
+
+    refresh_map_summary,
 
 )
 
 
 
-STALE_PROGRESS_DAYS = 30
+STALE_PROGRESS_DAYS = MAP_STALE_PROGRESS_DAYS
 
 
 
@@ -101,67 +107,95 @@ def enrich_feature_properties(feat: GeoFeature, *, progress=None, status=None) -
 
         props['last_diary_path'] = reverse('diary-detail', kwargs={'pk': diary.pk})
 
-        img = (
+        if hasattr(feat, 'geo_diary_photo'):
 
-            DiaryImage.objects.filter(diary=diary)
+            if feat.geo_diary_photo:
 
-            .exclude(image='')
+                props['diary_photo_url'] = DiaryImage._meta.get_field('image').storage.url(feat.geo_diary_photo)
 
-            .order_by('uploaded_at', 'id')
+        else:
 
-            .first()
+            img = (
 
-        )
+                DiaryImage.objects.filter(diary=diary)
+
+                .exclude(image='')
+
+                .order_by('uploaded_at', 'id')
 
-        if img and img.image:
+                .first()
 
-            props['diary_photo_url'] = img.image.url
+            )
+
+            if img and img.image:
+
+                props['diary_photo_url'] = img.image.url
 
     elif feat.activity_id and feat.activity and feat.activity.project_id == feat.project_id:
 
-        wl = (
+        last_diary = _last_activity_diary(feat)
 
-            DailyWorkLog.objects.filter(
+        if last_diary:
 
-                activity=feat.activity,
+            props['last_diary_date'] = last_diary.date.isoformat()
 
-                diary__project_id=feat.project_id,
+            props['last_diary_report'] = last_diary.report_number or last_diary.pk
 
-                diary__status__in=DIARY_STATUSES_FOR_GEO_PROGRESS,
+            props['last_diary_path'] = reverse('diary-detail', kwargs={'pk': last_diary.pk})
 
-            )
 
-            .select_related('diary')
 
-            .order_by('-diary__date', '-created_at')
+    if float(progress or 0) < 100 and feat.geometry_type == 'LineString':
 
-            .first()
+        if hasattr(feat, 'geo_last_snapshot_date'):
 
-        )
+            last_snap = feat.geo_last_snapshot_date
 
-        if wl and wl.diary:
+        else:
 
-            props['last_diary_date'] = wl.diary.date.isoformat()
+            last_snap = feat.snapshots.order_by('-snapshot_date').values_list('snapshot_date', flat=True).first()
 
-            props['last_diary_report'] = wl.diary.report_number or wl.diary.pk
+        ref = last_snap or (feat.updated_at.date() if feat.updated_at else None)
 
-            props['last_diary_path'] = reverse('diary-detail', kwargs={'pk': wl.diary.pk})
+        props['alert_stale'] = is_progress_stale(feat.geometry_type, progress, ref)
 
 
 
-    if float(progress or 0) < 100 and feat.geometry_type == 'LineString':
+    return props
 
-        last_snap = feat.snapshots.order_by('-snapshot_date').values_list('snapshot_date', flat=True).first()
 
-        ref = last_snap or (feat.updated_at.date() if feat.updated_at else None)
 
-        if ref and (timezone.localdate() - ref).days >= STALE_PROGRESS_DAYS:
 
-            props['alert_stale'] = True
 
+def _last_activity_diary(feat: GeoFeature):
 
+    """Último RDO com worklog da atividade do elemento (usa ``geo_last_diary`` quando anotado)."""
 
-    return props
+    if hasattr(feat, 'geo_last_diary'):
+
+        return feat.geo_last_diary
+
+    wl = (
+
+        DailyWorkLog.objects.filter(
+
+            activity=feat.activity,
+
+            diary__project_id=feat.project_id,
+
+            diary__status__in=DIARY_STATUSES_FOR_GEO_PROGRESS,
+
+        )
+
+        .select_related('diary')
+
+        .order_by('-diary__date', '-created_at')
+
+        .first()
+
+    )
+
+    return wl.diary if wl else None
 
 
 
@@ -197,11 +231,19 @@ def get_map_alerts(project: Project) -> dict[str, Any]:
 
 
 
-    for feat in GeoFeature.objects.filter(project=project, is_active=True).select_related('activity'):
+    # Regras avaliadas em lote sobre as colunas da série (valores gravados de cada elemento).
+
+    series = feature_progress_series(project)
 
-        extra = enrich_feature_properties(feat)
+    columns = series['columns']
 
-        if feat.status == 'blocked':
+    for index, (item, (progress, status)) in enumerate(zip(columns['items'], columns['manual'])):
+
+        props = item['properties']
+
+        name = props['name'] or 'Sem nome'
+
+        if status == 'blocked':
 
             items.append({
 
@@ -209,15 +251,15 @@ def get_map_alerts(project: Project) -> dict[str, Any]:
 
                 'severity': 'high',
 
-                'feature_id': feat.id,
+                'feature_id': item['id'],
 
-                'name': feat.name or 'Sem nome',
+                'name': name,
 
-                'message': f'Trecho bloqueado: {feat.name or feat.id}',
+                'message': f'Trecho bloqueado: {props["name"] or item["id"]}',
 
             })
 
-        if extra.get('alert_no_eap'):
+        if props.get('alert_no_eap'):
 
             items.append({
 
@@ -225,15 +267,15 @@ def get_map_alerts(project: Project) -> dict[str, Any]:
 
                 'severity': 'medium',
 
-                'feature_id': feat.id,
+                'feature_id': item['id'],
 
-                'name': feat.name or 'Sem nome',
+                'name': name,
 
-                'message': f'Sem vínculo EAP: {feat.name or "elemento"}',
+                'message': f'Sem vínculo EAP: {props["name"] or "elemento"}',
 
             })
 
-        if extra.get('alert_stale'):
+        if is_progress_stale(columns['geometry_type'][index], progress, columns['stale_ref'][index], today):
 
             items.append({
 
@@ -241,11 +283,11 @@ def get_map_alerts(project: Project) -> dict[str, Any]:
 
                 'severity': 'low',
 
-                'feature_id': feat.id,
+                'feature_id': item['id'],
 
-                'name': feat.name or 'Sem nome',
+                'name': name,
 
-                'message': f'Sem avanço há {STALE_PROGRESS_DAYS}+ dias: {feat.name or "trecho"}',
+                'message': f'Sem avanço há {STALE_PROGRESS_DAYS}+ dias: {props["name"] or "trecho"}',
 
             })
 
@@ -317,7 +359,7 @@ def get_map_alerts(project: Project) -> dict[str, Any]:
 
 def compare_features_at_dates(project: Project, date_a: date, date_b: date) -> dict[str, Any]:
 
-    """Compara progresso/status entre duas datas por elemento."""
+    """Compara progresso/status entre duas datas por elemento (uma leitura da série colunar)."""
 
     if date_a > date_b:
 
@@ -325,21 +367,15 @@ def compare_features_at_dates(project: Project, date_a: date, date_b: date) -> d
 
 
 
-    lines = list(
+    series = feature_progress_series(project)
 
-        GeoFeature.objects.filter(project=project, geometry_type='LineString', is_active=True).order_by(
+    columns = series['columns']
 
-            'sort_order', 'id'
-
-        )
-
-    )
-
-    line_total = len(lines)
+    today = timezone.localdate()
 
-    overall_a = _project_progress_at(project, date_a)
+    at_a = progress_at(series, date_a)
 
-    overall_b = _project_progress_at(project, date_b)
+    at_b = progress_at(series, date_b)
 
 
 
@@ -349,29 +385,9 @@ def compare_features_at_dates(project: Project, date_a: date, date_b: date) -> d
 
 
 
-    from .services import _features_queryset_for_project
+    for index, ((prog_a, status_a), (prog_b, status_b)) in enumerate(zip(at_a, at_b)):
 
-    qs = _features_queryset_for_project(project)
-
-    for feat in qs:
-
-        line_index = lines.index(feat) + 1 if feat in lines else None
-
-        prog_a, status_a = resolve_feature_progress_and_status(
-
-            feat, date_a, overall=overall_a, line_index=line_index, line_total=line_total
-
-        )
-
-        prog_b, status_b = resolve_feature_progress_and_status(
-
-            feat, date_b, overall=overall_b, line_index=line_index, line_total=line_total
-
-        )
-
-
-
-        created = feat.created_at.date() if feat.created_at else None
+        created = columns['created'][index]
 
         change_type = 'same'
 
@@ -393,9 +409,7 @@ def compare_features_at_dates(project: Project, date_a: date, date_b: date) -> d
 
 
 
-        item = _feature_to_geojson_dict(feat, progress=prog_b, status=status_b)
-
-        item['properties'].update(enrich_feature_properties(feat, progress=prog_b, status=status_b))
+        item = feature_item_at(series, index, prog_b, status_b, today=today)
 
         item['properties']['compare'] = {
 
@@ -445,17 +459,9 @@ def compare_features_at_dates(project: Project, date_a: date, date_b: date) -> d
 
 
 
-def _project_progress_at(project: Project, target: date) -> Decimal:
-    from .services import project_progress_at_date
-    return project_progress_at_date(project, target)
-
-
-
-
-
 def multi_obra_panorama(user) -> list[dict[str, Any]]:
 
-    """Resumo de mapas das obras acessíveis ao usuário."""
+    """Resumo de mapas das obras acessíveis ao usuário (resumos diários lidos numa consulta)."""
 
     from core.frontend_views import _get_projects_for_user
 
@@ -473,13 +479,21 @@ def multi_obra_panorama(user) -> list[dict[str, Any]]:
 
 
 
+    projects = list(projects[:80])
+
+    summaries = latest_map_summaries(p.id for p in projects)
+
     rows = []
 
-    for project in projects[:80]:
+    for project in projects:
+
+        summary = summaries.get(project.id)
 
-        summary = get_map_summary(project)
+        if summary is None:
 
-        config = GeoObraConfig.objects.filter(project=project).first()
+            summary = refresh_map_summary(project)
+
+        data = map_summary_as_dict(summary)
 
         rows.append({
 
@@ -491,21 +505,19 @@ def multi_obra_panorama(user) -> list[dict[str, Any]]:
 
             'is_active': project.is_active,
 
-            'total': summary['total'],
-
-            'segments': summary['segments'],
+            'total': data['total'],
 
-            'overall_progress_pct': summary['overall_progress_pct'],
+            'segments': data['segments'],
 
-            'map_url': reverse('mapa_geo:mapa') + f'?project={project.id}',
+            'overall_progress_pct': data['overall_progress_pct'],
 
-            'center': [
+            'alerts': data['alerts'],
 
-                float(config.center_latitude),
+            'summary_date': summary.summary_date,
 
-                float(config.center_longitude),
+            'map_url': reverse('mapa_geo:mapa') + f'?project={project.id}',
 
-            ] if config and config.center_latitude and config.center_longitude else None,
+            'center': data['center'],
 
         })
 
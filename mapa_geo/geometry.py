@@ -0,0 +1,181 @@
+"""
+Bounding box e níveis de simplificação das geometrias do mapa (sem dependências do Django).
+
+Cada ``GeoFeature`` guarda o retângulo envolvente e versões simplificadas (Douglas-Peucker)
+da linha/polígono para faixas de zoom do Leaflet. A API entrega a versão do nível pedido,
+só dos elementos que cruzam a área visível (ver ``features_tile_json``).
+"""
+from __future__ import annotations
+
+import math
+from typing import Any
+
+# Zoom máximo de cada nível -> tolerância de ~1 pixel (graus) nesse zoom.
+# Acima do último nível a geometria vai completa.
+SIMPLIFY_LEVELS = (10, 13, 15)
+
+
+def level_for_zoom(zoom: int | None) -> int | None:
+    """Nível de simplificação para um zoom do mapa (``None`` = geometria completa)."""
+    if zoom is None:
+        return None
+    for level in SIMPLIFY_LEVELS:
+        if zoom <= level:
+            return level
+    return None
+
+
+def _tolerance(level: int) -> float:
+    return 360.0 / (256 * 2 ** level)
+
+
+def _perpendicular_distance(p, a, b) -> float:
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    if dx == 0 and dy == 0:
+        return math.hypot(p[0] - a[0], p[1] - a[1])
+    t = ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / (dx * dx + dy * dy)
+    t = max(0.0, min(1.0, t))
+    return math.hypot(p[0] - (a[0] + t * dx), p[1] - (a[1] + t * dy))
+
+
+def simplify_coords(coords: list, tolerance: float) -> list:
+    """Douglas-Peucker iterativo (mantém primeiro e último ponto)."""
+    if len(coords) < 3:
+        return list(coords)
+    keep = [False] * len(coords)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(coords) - 1)]
+    while stack:
+        start, end = stack.pop()
+        farthest, index = 0.0, None
+        for i in range(start + 1, end):
+            d = _perpendicular_distance(coords[i], coords[start], coords[end])
+            if d > farthest:
+                farthest, index = d, i
+        if index is not None and farthest > tolerance:
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+    return [c for c, k in zip(coords, keep) if k]
+
+
+def simplify_geometry(geometry: dict[str, Any], tolerance: float) -> dict[str, Any] | None:
+    """Geometria simplificada, ou ``None`` se não reduz pontos (usa-se a original)."""
+    gtype = geometry.get('type')
+    coords = geometry.get('coordinates') or []
+    if gtype == 'LineString':
+        simplified = simplify_coords(coords, tolerance)
+        if len(simplified) >= len(coords):
+            return None
+        return {'type': gtype, 'coordinates': simplified}
+    if gtype == 'Polygon':
+        rings = []
+        for ring in coords:
+            simplified = simplify_coords(ring, tolerance)
+            # Anel precisa de ao menos 4 posições (fechado); se colapsar, fica o original.
+            rings.append(simplified if len(simplified) >= 4 else list(ring))
+        if sum(len(r) for r in rings) >= sum(len(r) for r in coords):
+            return None
+        return {'type': gtype, 'coordinates': rings}
+    return None
+
+
+def _positions(geometry: dict[str, Any]) -> list:
+    gtype = geometry.get('type')
+    coords = geometry.get('coordinates') or []
+    if gtype == 'Point':
+        return [coords] if len(coords) >= 2 else []
+    if gtype == 'LineString':
+        return coords
+    if gtype == 'Polygon':
+        return [p for ring in coords for p in ring]
+    return []
+
+
+def geometry_index_fields(geometry: dict[str, Any] | None) -> dict[str, Any]:
+    """Campos ``bbox_*`` e ``geometry_levels`` de ``GeoFeature`` para a geometria."""
+    fields: dict[str, Any] = {
+        'bbox_min_lon': None,
+        'bbox_min_lat': None,
+        'bbox_max_lon': None,
+        'bbox_max_lat': None,
+        'geometry_levels': {},
+    }
+    if not isinstance(geometry, dict):
+        return fields
+    try:
+        positions = [(float(p[0]), float(p[1])) for p in _positions(geometry)]
+    except (IndexError, TypeError, ValueError):
+        return fields
+    if not positions:
+        return fields
+    lons = [p[0] for p in positions]
+    lats = [p[1] for p in positions]
+    fields.update(
+        bbox_min_lon=min(lons),
+        bbox_min_lat=min(lats),
+        bbox_max_lon=max(lons),
+        bbox_max_lat=max(lats),
+    )
+    if geometry.get('type') in ('LineString', 'Polygon'):
+        previous = geometry
+        # Do nível mais detalhado ao mais grosseiro: cada um parte do anterior.
+        for level in reversed(SIMPLIFY_LEVELS):
+            simplified = simplify_geometry(previous, _tolerance(level))
+            if simplified is not None:
+                fields['geometry_levels'][level_key(level)] = simplified
+                previous = simplified
+    return fields
+
+
+def level_key(level: int) -> str:
+    """Chave do nível em ``geometry_levels`` (não numérica: chave de dígitos vira índice em JSON path)."""
+    return f'z{level}'
+
+
+def levels_from(level: int | None) -> list[str]:
+    """
+    Chaves de ``geometry_levels`` aceitáveis para o nível, da preferida à mais detalhada: um
+    nível que não reduziu pontos não é gravado e cai no seguinte (ou na geometria completa).
+    """
+    if level is None:
+        return []
+    return [level_key(lvl) for lvl in SIMPLIFY_LEVELS if lvl >= level]
+
+
+def _tile_x(lon: float, zoom: int) -> int:
+    return int((lon + 180.0) / 360.0 * 2 ** zoom)
+
+
+def _tile_y(lat: float, zoom: int) -> int:
+    lat = max(-85.0511, min(85.0511, lat))
+    rad = math.radians(lat)
+    return int((1.0 - math.asinh(math.tan(rad)) / math.pi) / 2.0 * 2 ** zoom)
+
+
+def _tile_lon(x: int, zoom: int) -> float:
+    return x / 2 ** zoom * 360.0 - 180.0
+
+
+def _tile_lat(y: int, zoom: int) -> float:
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / 2 ** zoom))))
+
+
+def snap_bbox_to_tiles(bbox: tuple[float, float, float, float], zoom: int) -> tuple[float, float, float, float]:
+    """
+    Expande ``(min_lon, min_lat, max_lon, max_lat)`` até as bordas dos tiles (XYZ) do zoom:
+    vistas próximas caem na mesma área e reaproveitam cache/ETag.
+    """
+    zoom = max(0, min(22, int(zoom)))
+    n = 2 ** zoom
+    min_lon, min_lat, max_lon, max_lat = bbox
+    x0 = max(0, min(n - 1, _tile_x(min_lon, zoom)))
+    x1 = max(0, min(n - 1, _tile_x(max_lon, zoom)))
+    y0 = max(0, min(n - 1, _tile_y(max_lat, zoom)))
+    y1 = max(0, min(n - 1, _tile_y(min_lat, zoom)))
+    return (
+        round(_tile_lon(x0, zoom), 7),
+        round(_tile_lat(y1 + 1, zoom), 7),
+        round(_tile_lon(x1 + 1, zoom), 7),
+        round(_tile_lat(y0, zoom), 7),
+    )
@@ -1,5 +1,3 @@
-import json
-import zipfile
 from pathlib import Path
 
 from django.core.management.base import BaseCommand, CommandError
@@ -7,8 +5,8 @@ from django.core.management.base import BaseCommand, CommandError
 from core.models import Project
 
 from mapa_geo.services import (
-    import_geojson_features,
-    kml_to_geojson_features,
+    import_feature_stream,
+    open_geo_import_source,
     sync_snapshots_from_diario,
 )
 
@@ -38,30 +36,22 @@ class Command(BaseCommand):
         except Project.DoesNotExist as exc:
             raise CommandError(f'Projeto não encontrado: {code}') from exc
 
-        suffix = path.suffix.lower()
-        if suffix == '.kmz':
-            with zipfile.ZipFile(path) as zf:
-                kml_name = 'doc.kml' if 'doc.kml' in zf.namelist() else next(
-                    (n for n in zf.namelist() if n.lower().endswith('.kml')),
-                    None,
+        size = path.stat().st_size or 1
+        try:
+            with path.open('rb') as fh, open_geo_import_source(fh, path.name) as (features, position):
+                stats = import_feature_stream(
+                    project,
+                    features,
+                    source_label=options['label'] or path.name,
+                    replace=options['replace'],
+                    on_progress=lambda s: self.stdout.write(
+                        f'  {s["total"]} elementos ({min(position() * 100 // size, 100)}% do arquivo)'
+                    ),
                 )
-                if not kml_name:
-                    raise CommandError('KMZ sem KML interno.')
-                raw = zf.read(kml_name).decode('utf-8', errors='replace')
-            payload = kml_to_geojson_features(raw)
-        else:
-            raw = path.read_text(encoding='utf-8', errors='replace')
-            if suffix == '.kml' or raw.lstrip().startswith('<'):
-                payload = kml_to_geojson_features(raw)
-            else:
-                payload = json.loads(raw)
-
-        stats = import_geojson_features(
-            project,
-            payload,
-            source_label=options['label'] or path.name,
-            replace=options['replace'],
-        )
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        if not stats['total']:
+            raise CommandError('Nenhuma feature encontrada no arquivo.')
         self.stdout.write(
             self.style.SUCCESS(
                 f'Importado em {project.code}: {stats["created"]} criados, {stats["updated"]} atualizados.'
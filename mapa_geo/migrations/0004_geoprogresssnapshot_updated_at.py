@@ -0,0 +1,18 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mapa_geo', '0003_remove_conditional_unique_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='geoprogresssnapshot',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
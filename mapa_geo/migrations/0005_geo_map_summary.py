@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:26
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0061_activity_progress_cache'),
+        ('mapa_geo', '0004_geoprogresssnapshot_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeoMapSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('summary_date', models.DateField(db_index=True, verbose_name='Data')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('segments', models.PositiveIntegerField(default=0)),
+                ('points', models.PositiveIntegerField(default=0)),
+                ('areas', models.PositiveIntegerField(default=0)),
+                ('gps_markers', models.PositiveIntegerField(default=0)),
+                ('eap_linked', models.PositiveIntegerField(default=0)),
+                ('overall_progress_pct', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=5)),
+                ('diaries_with_gps', models.PositiveIntegerField(default=0)),
+                ('last_diary_date', models.DateField(blank=True, null=True)),
+                ('timeline_dates', models.PositiveIntegerField(default=0)),
+                ('import_label', models.CharField(blank=True, max_length=200)),
+                ('alerts_blocked', models.PositiveIntegerField(default=0)),
+                ('alerts_no_eap', models.PositiveIntegerField(default=0)),
+                ('alerts_stale', models.PositiveIntegerField(default=0)),
+                ('center_latitude', models.DecimalField(blank=True, decimal_places=7, max_digits=10, null=True)),
+                ('center_longitude', models.DecimalField(blank=True, decimal_places=7, max_digits=10, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='geo_summaries', to='core.project', verbose_name='Projeto')),
+            ],
+            options={
+                'verbose_name': 'Resumo diário do mapa',
+                'verbose_name_plural': 'Resumos diários do mapa',
+                'ordering': ['-summary_date', 'project_id'],
+                'constraints': [models.UniqueConstraint(fields=('project', 'summary_date'), name='mapa_geo_unique_summary_per_project_date')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0061_activity_progress_cache'),
+        ('mapa_geo', '0005_geo_map_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeoImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.FileField(upload_to='mapa_geo/importacoes/%Y/%m/', verbose_name='Arquivo')),
+                ('source_name', models.CharField(blank=True, max_length=255, verbose_name='Nome original')),
+                ('source_label', models.CharField(blank=True, max_length=200, verbose_name='Fonte dos dados')),
+                ('replace', models.BooleanField(default=False, verbose_name='Substituir elementos')),
+                ('sync_diario', models.BooleanField(default=True, verbose_name='Gerar snapshots dos diários')),
+                ('status', models.CharField(choices=[('pending', 'Na fila'), ('running', 'Importando'), ('done', 'Concluída'), ('failed', 'Falhou')], db_index=True, default='pending', max_length=20, verbose_name='Status')),
+                ('bytes_total', models.PositiveBigIntegerField(default=0, verbose_name='Tamanho (bytes)')),
+                ('bytes_read', models.PositiveBigIntegerField(default=0, verbose_name='Bytes lidos')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Elementos processados')),
+                ('created_count', models.PositiveIntegerField(default=0, verbose_name='Criados')),
+                ('updated_count', models.PositiveIntegerField(default=0, verbose_name='Atualizados')),
+                ('snapshot_count', models.PositiveIntegerField(default=0, verbose_name='Snapshots')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Início')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fim')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='geo_import_jobs', to='core.project', verbose_name='Projeto')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Importação do mapa',
+                'verbose_name_plural': 'Importações do mapa',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:50
+
+from django.db import migrations, models
+
+from mapa_geo.geometry import geometry_index_fields
+
+
+def backfill_geometry_index(apps, schema_editor):
+    GeoFeature = apps.get_model('mapa_geo', 'GeoFeature')
+    batch = []
+    fields = None
+    for feat in GeoFeature.objects.only('id', 'geometry').iterator(chunk_size=500):
+        values = geometry_index_fields(feat.geometry)
+        fields = fields or list(values)
+        for attr, value in values.items():
+            setattr(feat, attr, value)
+        batch.append(feat)
+        if len(batch) >= 500:
+            GeoFeature.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        GeoFeature.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0061_activity_progress_cache'),
+        ('mapa_geo', '0006_geo_import_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='geofeature',
+            name='bbox_max_lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='geofeature',
+            name='bbox_max_lon',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='geofeature',
+            name='bbox_min_lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='geofeature',
+            name='bbox_min_lon',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='geofeature',
+            name='geometry_levels',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Geometria simplificada por nível de zoom (mapa_geo.geometry.SIMPLIFY_LEVELS)'),
+        ),
+        migrations.AddIndex(
+            model_name='geofeature',
+            index=models.Index(fields=['project', 'bbox_min_lon', 'bbox_max_lon'], name='mapa_geo_ge_project_c751f6_idx'),
+        ),
+        migrations.RunPython(backfill_geometry_index, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,14 @@
 from decimal import Decimal
 
+from django.conf import settings
 from django.db import models
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 
+from .geometry import geometry_index_fields
+
+GEOMETRY_INDEX_FIELDS = ('geometry_levels', 'bbox_min_lon', 'bbox_min_lat', 'bbox_max_lon', 'bbox_max_lat')
+
 
 class GeoObraConfig(models.Model):
     """Configuração do mapa geográfico por projeto."""
@@ -106,6 +111,16 @@ class GeoFeature(models.Model):
     geometry = models.JSONField(
         help_text='Geometria GeoJSON (coordinates apenas, sem wrapper Feature)',
     )
+    geometry_levels = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text='Geometria simplificada por nível de zoom (mapa_geo.geometry.SIMPLIFY_LEVELS)',
+    )
+    bbox_min_lon = models.FloatField(null=True, blank=True, editable=False)
+    bbox_min_lat = models.FloatField(null=True, blank=True, editable=False)
+    bbox_max_lon = models.FloatField(null=True, blank=True, editable=False)
+    bbox_max_lat = models.FloatField(null=True, blank=True, editable=False)
     latitude = models.DecimalField(
         max_digits=10,
         decimal_places=7,
@@ -141,10 +156,24 @@ class GeoFeature(models.Model):
             models.Index(fields=['project', 'geometry_type']),
             models.Index(fields=['project', 'kind']),
             models.Index(fields=['project', 'external_key']),
+            models.Index(fields=['project', 'bbox_min_lon', 'bbox_max_lon']),
         ]
         # Removida UniqueConstraint condicional (project, external_key) — MariaDB (W036).
         # Unicidade só quando external_key preenchida: validate_unique().
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'geometry' in update_fields:
+            self.refresh_geometry_index()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *GEOMETRY_INDEX_FIELDS}
+        super().save(*args, **kwargs)
+
+    def refresh_geometry_index(self) -> None:
+        """Recalcula bbox e níveis simplificados (importação em lote chama ``geometry_index_fields``)."""
+        for attr, value in geometry_index_fields(self.geometry).items():
+            setattr(self, attr, value)
+
     def validate_unique(self, exclude=None):
         super().validate_unique(exclude=exclude)
         ext = (self.external_key or '').strip()
@@ -195,6 +224,7 @@ class GeoProgressSnapshot(models.Model):
     )
     notes = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Snapshot de progresso geo'
@@ -209,3 +239,120 @@ class GeoProgressSnapshot(models.Model):
 
     def __str__(self):
         return f'{self.feature} @ {self.snapshot_date:%d/%m/%Y} ({self.progress_pct}%)'
+
+
+class GeoMapSummary(models.Model):
+    """
+    Resumo diário do mapa por projeto (contagens, progresso, alertas e centro), mantido pelo
+    pipeline de snapshots. O panorama multi-obra e ``get_map_summary`` leem daqui.
+    """
+
+    project = models.ForeignKey(
+        'core.Project',
+        on_delete=models.CASCADE,
+        related_name='geo_summaries',
+        verbose_name='Projeto',
+    )
+    summary_date = models.DateField(db_index=True, verbose_name='Data')
+    total = models.PositiveIntegerField(default=0)
+    segments = models.PositiveIntegerField(default=0)
+    points = models.PositiveIntegerField(default=0)
+    areas = models.PositiveIntegerField(default=0)
+    gps_markers = models.PositiveIntegerField(default=0)
+    eap_linked = models.PositiveIntegerField(default=0)
+    overall_progress_pct = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('0.00'))
+    diaries_with_gps = models.PositiveIntegerField(default=0)
+    last_diary_date = models.DateField(null=True, blank=True)
+    timeline_dates = models.PositiveIntegerField(default=0)
+    import_label = models.CharField(max_length=200, blank=True)
+    alerts_blocked = models.PositiveIntegerField(default=0)
+    alerts_no_eap = models.PositiveIntegerField(default=0)
+    alerts_stale = models.PositiveIntegerField(default=0)
+    center_latitude = models.DecimalField(max_digits=10, decimal_places=7, null=True, blank=True)
+    center_longitude = models.DecimalField(max_digits=10, decimal_places=7, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Resumo diário do mapa'
+        verbose_name_plural = 'Resumos diários do mapa'
+        ordering = ['-summary_date', 'project_id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['project', 'summary_date'],
+                name='mapa_geo_unique_summary_per_project_date',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.project} @ {self.summary_date:%d/%m/%Y}'
+
+
+class GeoImportJob(models.Model):
+    """
+    Importação em background de GeoJSON/KML/KMZ para o mapa de um projeto.
+
+    O arquivo fica em ``source`` até o job terminar; o worker lê KML/KMZ em streaming e grava
+    os elementos em lotes (``services.import_feature_stream``), atualizando contadores e bytes
+    lidos para a barra de progresso.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Na fila'),
+        ('running', 'Importando'),
+        ('done', 'Concluída'),
+        ('failed', 'Falhou'),
+    ]
+
+    project = models.ForeignKey(
+        'core.Project',
+        on_delete=models.CASCADE,
+        related_name='geo_import_jobs',
+        verbose_name='Projeto',
+    )
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Solicitado por',
+    )
+    source = models.FileField(upload_to='mapa_geo/importacoes/%Y/%m/', verbose_name='Arquivo')
+    source_name = models.CharField(max_length=255, blank=True, verbose_name='Nome original')
+    source_label = models.CharField(max_length=200, blank=True, verbose_name='Fonte dos dados')
+    replace = models.BooleanField(default=False, verbose_name='Substituir elementos')
+    sync_diario = models.BooleanField(default=True, verbose_name='Gerar snapshots dos diários')
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        db_index=True,
+        verbose_name='Status',
+    )
+    bytes_total = models.PositiveBigIntegerField(default=0, verbose_name='Tamanho (bytes)')
+    bytes_read = models.PositiveBigIntegerField(default=0, verbose_name='Bytes lidos')
+    processed = models.PositiveIntegerField(default=0, verbose_name='Elementos processados')
+    created_count = models.PositiveIntegerField(default=0, verbose_name='Criados')
+    updated_count = models.PositiveIntegerField(default=0, verbose_name='Atualizados')
+    snapshot_count = models.PositiveIntegerField(default=0, verbose_name='Snapshots')
+    error = models.TextField(blank=True, verbose_name='Erro')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='Início')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Fim')
+
+    class Meta:
+        verbose_name = 'Importação do mapa'
+        verbose_name_plural = 'Importações do mapa'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.project} — {self.source_name or self.source.name} ({self.get_status_display()})'
+
+    @property
+    def percent(self) -> int:
+        if self.status == 'done':
+            return 100
+        if not self.bytes_total:
+            return 0
+        return min(99, int(self.bytes_read * 100 / self.bytes_total))
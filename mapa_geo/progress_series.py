@@ -0,0 +1,154 @@
+"""
+Série colunar de progresso dos elementos do mapa, por projeto.
+
+Uma leitura (cache por versão dos dados, ``features_collection_version``) traz, em colunas
+alinhadas por elemento, o GeoJSON base, as datas/valores de progresso (worklogs da atividade
+EAP ou snapshots) e os dados das regras de alerta. Comparação entre datas, linha do tempo e
+alertas resolvem qualquer data por bisect, sem consulta por elemento.
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+from datetime import date
+from decimal import Decimal
+from typing import Any
+
+from django.core.cache import cache
+
+from core.services import ProgressService
+
+from .models import GeoFeature, GeoProgressSnapshot
+from .services import (
+    _ProgressSeries,
+    _features_queryset_for_project,
+    _status_from_progress,
+    _worklog_series,
+    features_collection_version,
+    features_geojson_at_date,
+    is_progress_stale,
+)
+
+SERIES_CACHE_TTL_SECONDS = 30 * 60
+
+
+def _build_series(project, version: str) -> dict[str, Any]:
+    items = features_geojson_at_date(project, None)['features']
+    meta = {
+        row['id']: row
+        for row in _features_queryset_for_project(project).values(
+            'id', 'activity_id', 'geometry_type', 'progress_pct', 'status', 'created_at', 'updated_at'
+        )
+    }
+    line_ids = GeoFeature.objects.filter(
+        project=project, geometry_type='LineString', is_active=True
+    ).order_by('sort_order', 'id').values_list('id', flat=True)
+    line_index = {pk: i for i, pk in enumerate(line_ids, start=1)}
+
+    snapshots: dict[int, _ProgressSeries] = {}
+    last_snapshot: dict[int, date] = {}
+    rows = GeoProgressSnapshot.objects.filter(feature_id__in=list(meta)).order_by('snapshot_date').values_list(
+        'feature_id', 'snapshot_date', 'progress_pct', 'status'
+    )
+    for feature_id, day, progress, status in rows:
+        snapshots.setdefault(feature_id, _ProgressSeries()).put(day, (progress, status))
+        last_snapshot[feature_id] = day
+    worklogs = _worklog_series(project)
+
+    columns: dict[str, list] = {
+        'items': [],
+        'eap': [],
+        'geometry_type': [],
+        'line_index': [],
+        'manual': [],
+        'created': [],
+        'stale_ref': [],
+        'series': [],
+    }
+    for item in items:
+        row = meta[item['id']]
+        eap = bool(row['activity_id'])
+        series = worklogs.get(row['activity_id']) if eap else snapshots.get(row['id'])
+        updated = row['updated_at'].date() if row['updated_at'] else None
+        columns['items'].append(item)
+        columns['eap'].append(eap)
+        columns['geometry_type'].append(row['geometry_type'])
+        columns['line_index'].append(line_index.get(row['id']))
+        columns['manual'].append((row['progress_pct'], row['status']))
+        columns['created'].append(row['created_at'].date() if row['created_at'] else None)
+        columns['stale_ref'].append(last_snapshot.get(row['id']) or updated)
+        columns['series'].append((series.dates, series.values) if series else ([], []))
+
+    overall = worklogs.get(None)
+    try:
+        overall_fallback = ProgressService.get_project_overall_progress(project.id)
+    except Exception:
+        overall_fallback = Decimal('0.00')
+    return {
+        'version': version,
+        'columns': columns,
+        'line_total': len(line_index),
+        'overall': (overall.dates, overall.values) if overall else ([], []),
+        'overall_fallback': overall_fallback,
+    }
+
+
+def feature_progress_series(project) -> dict[str, Any]:
+    """Série colunar do projeto (cache por versão dos dados; reconstruída quando algo muda)."""
+    version = features_collection_version(project)
+    key = f'mapa_geo:series:{project.pk}:{version}'
+    data = cache.get(key)
+    if data is None:
+        data = _build_series(project, version)
+        cache.set(key, data, SERIES_CACHE_TTL_SECONDS)
+    return data
+
+
+def _at(column: tuple[list, list], target: date):
+    dates, values = column
+    i = bisect_right(dates, target)
+    return values[i - 1] if i else None
+
+
+def progress_at(data: dict[str, Any], target: date) -> list[tuple[Decimal, str]]:
+    """
+    (progresso, status) de cada elemento em ``target``, na ordem das colunas. Mesmas regras de
+    ``resolve_feature_progress_and_status``: atividade EAP > snapshot até a data > proporcional
+    da linha > progresso manual.
+    """
+    columns = data['columns']
+    overall = _at(data['overall'], target)
+    if overall is None:
+        overall = data['overall_fallback']
+    line_total = data['line_total']
+    out = []
+    for eap, gtype, line_index, manual, series in zip(
+        columns['eap'], columns['geometry_type'], columns['line_index'], columns['manual'], columns['series']
+    ):
+        value = _at(series, target)
+        if eap:
+            progress = value if value is not None else Decimal('0.00')
+            out.append((progress, _status_from_progress(progress)))
+        elif value is not None:
+            out.append(value)
+        elif gtype == 'LineString' and line_index is not None and line_total > 0:
+            threshold = (Decimal(line_index) / Decimal(line_total)) * Decimal('100')
+            progress = overall if overall >= threshold else Decimal('0')
+            out.append((progress, _status_from_progress(progress)))
+        else:
+            out.append(manual)
+    return out
+
+
+def feature_item_at(data: dict[str, Any], index: int, progress: Decimal, status: str, *, today: date) -> dict:
+    """GeoJSON base do elemento com progresso/status e alertas que dependem deles."""
+    item = data['columns']['items'][index]
+    props = {
+        **item['properties'],
+        'status': status,
+        'progress_pct': float(progress),
+        'alert_blocked': status == 'blocked',
+        'alert_stale': is_progress_stale(
+            data['columns']['geometry_type'][index], progress, data['columns']['stale_ref'][index], today
+        ),
+    }
+    return {**item, 'properties': props}
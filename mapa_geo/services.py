@@ -1,18 +1,26 @@
 from __future__ import annotations
 
+import codecs
 import hashlib
+import io
 import json
 import re
+import zipfile
 import xml.etree.ElementTree as ET
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
 from datetime import date
 from decimal import Decimal
 from typing import Any
 
-from django.db import transaction
-from django.db.models import Max
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F, Max, OuterRef, Q, Subquery
+from django.db.models.fields.json import KeyTransform
 from django.utils import timezone
 
-from core.models import Activity, ConstructionDiary, DailyWorkLog, DiaryStatus, Project
+from core.models import Activity, ConstructionDiary, DailyWorkLog, DiaryImage, DiaryStatus, Project
 from core.services import ProgressService
 
 DIARY_STATUSES_FOR_GEO_PROGRESS = (
@@ -22,10 +30,20 @@ DIARY_STATUSES_FOR_GEO_PROGRESS = (
     DiaryStatus.SALVAMENTO_PARCIAL,
 )
 
-from .models import GeoFeature, GeoObraConfig, GeoProgressSnapshot
+from .geometry import geometry_index_fields, level_for_zoom, levels_from, snap_bbox_to_tiles
+from .models import (
+    GEOMETRY_INDEX_FIELDS,
+    GeoFeature,
+    GeoImportJob,
+    GeoMapSummary,
+    GeoObraConfig,
+    GeoProgressSnapshot,
+)
 
 KML_NS = {'kml': 'http://www.opengis.net/kml/2.2'}
 
+FEATURES_CACHE_TTL_SECONDS = 15 * 60
+
 
 def _decimal(value: float | int | str | None) -> Decimal | None:
     if value is None:
@@ -101,6 +119,170 @@ def _external_key(name: str, folder: str, geometry_type: str) -> str:
     return hashlib.md5(raw.encode('utf-8')).hexdigest()[:32]
 
 
+GEO_IMPORT_CHUNK_SIZE = 500
+
+_IMPORT_UPDATE_FIELDS = [
+    'name',
+    'folder',
+    'description',
+    'geometry_type',
+    'geometry',
+    'latitude',
+    'longitude',
+    'kind',
+    'sort_order',
+    'is_active',
+    'updated_at',
+    *GEOMETRY_INDEX_FIELDS,
+]
+
+
+def _feature_import_fields(item: Any) -> tuple[str, dict[str, Any]] | None:
+    """(``_external_key``, campos) de uma Feature GeoJSON; ``None`` se não for importável."""
+    if not isinstance(item, dict) or item.get('type') != 'Feature':
+        return None
+    geom = item.get('geometry') or {}
+    gtype = geom.get('type')
+    if gtype not in ('Point', 'LineString', 'Polygon'):
+        return None
+
+    props = item.get('properties') or {}
+    name = str(props.get('name') or '').strip()
+    folder = str(props.get('folder') or '').strip()
+    description = str(props.get('description') or '').strip()
+    lat, lon = _coords_centroid(gtype, geom)
+    return _external_key(name, folder, gtype), {
+        'name': name[:255],
+        'folder': folder[:500],
+        'description': description,
+        'geometry_type': gtype,
+        'geometry': geom,
+        'latitude': lat,
+        'longitude': lon,
+        'kind': _infer_kind(name, folder, gtype),
+        'sort_order': 0,
+        'is_active': True,
+        **geometry_index_fields(geom),
+    }
+
+
+def _upsert_feature_chunk(project: Project, chunk: dict[str, dict[str, Any]]) -> int:
+    """
+    Grava um lote chaveado por ``external_key``: existentes via ``bulk_update``, novos via
+    ``bulk_create`` (sem constraint única na chave, não dá para usar upsert do banco).
+    Retorna quantos já existiam.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        existing: dict[str, GeoFeature] = {}
+        for feat in GeoFeature.objects.filter(project=project, external_key__in=list(chunk)).order_by('pk'):
+            existing.setdefault(feat.external_key, feat)
+        to_update = []
+        to_create = []
+        for ext, fields in chunk.items():
+            feat = existing.get(ext)
+            if feat is None:
+                to_create.append(GeoFeature(project=project, external_key=ext, **fields))
+                continue
+            for attr, value in fields.items():
+                setattr(feat, attr, value)
+            feat.updated_at = now
+            to_update.append(feat)
+        if to_update:
+            GeoFeature.objects.bulk_update(to_update, _IMPORT_UPDATE_FIELDS)
+        if to_create:
+            GeoFeature.objects.bulk_create(to_create)
+    return len(to_update)
+
+
+def _sweep_unseen_features(project: Project, seen: set[str]) -> int:
+    """
+    Fim de uma importação com ``replace``: numa transação, apaga os elementos do projeto cuja
+    chave não está em ``seen`` e as cópias extras de uma chave (o upsert grava na de menor pk).
+    Retorna quantos foram removidos.
+    """
+    with transaction.atomic():
+        kept: set[str] = set()
+        stale: list[int] = []
+        rows = (
+            GeoFeature.objects.select_for_update()
+            .filter(project=project)
+            .order_by('pk')
+            .values_list('pk', 'external_key')
+        )
+        for pk, ext in rows:
+            if ext in seen and ext not in kept:
+                kept.add(ext)
+            else:
+                stale.append(pk)
+        for start in range(0, len(stale), GEO_IMPORT_CHUNK_SIZE):
+            GeoFeature.objects.filter(pk__in=stale[start : start + GEO_IMPORT_CHUNK_SIZE]).delete()
+    return len(stale)
+
+
+def import_feature_stream(
+    project: Project,
+    items,
+    *,
+    source_label: str = '',
+    replace: bool = False,
+    chunk_size: int = GEO_IMPORT_CHUNK_SIZE,
+    on_progress=None,
+) -> dict[str, int]:
+    """
+    Importa Features GeoJSON de um iterável (lista ou gerador do parser de KML) em lotes de
+    ``chunk_size``, cada um numa transação. ``on_progress(stats)`` é chamado após cada lote.
+    Linhas recebem ``sort_order`` na ordem do arquivo.
+
+    Com ``replace`` os elementos não são apagados antes: as chaves gravadas são marcadas e só
+    depois do último lote os elementos que o arquivo não trouxe são removidos, numa transação
+    (``_sweep_unseen_features``). Se a leitura falhar no meio, nenhum elemento existente some.
+    """
+    config, _ = GeoObraConfig.objects.get_or_create(project=project)
+    if source_label:
+        config.import_label = source_label[:200]
+        config.save(update_fields=['import_label', 'updated_at'])
+
+    stats = {'created': 0, 'updated': 0, 'total': 0, 'removed': 0}
+    sort_line = 0
+    chunk: dict[str, dict[str, Any]] = {}
+    seen: set[str] = set()
+
+    def _flush():
+        updated = _upsert_feature_chunk(project, chunk)
+        seen.update(chunk)
+        stats['updated'] += updated
+        stats['created'] += len(chunk) - updated
+        chunk.clear()
+        if on_progress:
+            on_progress(stats)
+
+    for item in items:
+        parsed = _feature_import_fields(item)
+        if parsed is None:
+            continue
+        ext, fields = parsed
+        if fields['geometry_type'] == 'LineString':
+            sort_line += 1
+            fields['sort_order'] = sort_line
+        stats['total'] += 1
+        if ext in chunk:
+            # Chave repetida no mesmo lote: a última ocorrência vence (conta como atualização).
+            stats['updated'] += 1
+        chunk[ext] = fields
+        if len(chunk) >= chunk_size:
+            _flush()
+    if chunk:
+        _flush()
+    if replace and seen:
+        # Só remove os elementos atuais quando o arquivo trouxe ao menos um elemento válido.
+        stats['removed'] = _sweep_unseen_features(project, seen)
+
+    _update_project_center_from_features(project)
+    schedule_map_summary_refresh(project.pk)
+    return stats
+
+
 def import_geojson_features(
     project: Project,
     payload: dict[str, Any],
@@ -108,7 +290,7 @@ def import_geojson_features(
     source_label: str = '',
     replace: bool = False,
 ) -> dict[str, int]:
-    """Importa FeatureCollection GeoJSON para o projeto."""
+    """Importa FeatureCollection GeoJSON para o projeto (lotes de ``import_feature_stream``)."""
     if payload.get('type') != 'FeatureCollection':
         raise ValueError('O arquivo deve ser um GeoJSON FeatureCollection.')
 
@@ -116,137 +298,300 @@ def import_geojson_features(
     if not features:
         raise ValueError('Nenhuma feature encontrada no GeoJSON.')
 
-    if replace:
-        GeoFeature.objects.filter(project=project).delete()
+    return import_feature_stream(project, features, source_label=source_label, replace=replace)
 
-    created = 0
-    updated = 0
-    sort_line = 0
 
-    with transaction.atomic():
-        config, _ = GeoObraConfig.objects.get_or_create(project=project)
-        if source_label:
-            config.import_label = source_label[:200]
-            config.save(update_fields=['import_label', 'updated_at'])
+def run_geo_import_job(job: GeoImportJob) -> dict[str, int]:
+    """
+    Executa a importação do job: lê ``job.source`` em streaming, grava em lotes atualizando o
+    progresso no banco e, se pedido, regenera os snapshots dos diários.
+    """
+    GeoImportJob.objects.filter(pk=job.pk).update(
+        status='running', started_at=timezone.now(), error='', bytes_total=job.source.size
+    )
+    with job.source.open('rb') as fh, open_geo_import_source(fh, job.source_name or job.source.name) as (
+        features,
+        position,
+    ):
 
-        for item in features:
-            if not isinstance(item, dict) or item.get('type') != 'Feature':
-                continue
-            geom = item.get('geometry') or {}
-            gtype = geom.get('type')
-            if gtype not in ('Point', 'LineString', 'Polygon'):
-                continue
+        def _progress(stats):
+            GeoImportJob.objects.filter(pk=job.pk).update(
+                processed=stats['total'],
+                created_count=stats['created'],
+                updated_count=stats['updated'],
+                bytes_read=position(),
+                updated_at=timezone.now(),
+            )
 
-            props = item.get('properties') or {}
-            name = str(props.get('name') or '').strip()
-            folder = str(props.get('folder') or '').strip()
-            description = str(props.get('description') or '').strip()
-            ext = _external_key(name, folder, gtype)
-            kind = _infer_kind(name, folder, gtype)
+        stats = import_feature_stream(
+            job.project,
+            features,
+            source_label=job.source_label,
+            replace=job.replace,
+            on_progress=_progress,
+        )
+    if not stats['total']:
+        raise ValueError('Nenhuma feature encontrada no arquivo.')
+    snapshots = sync_snapshots_from_diario(job.project)['snapshots'] if job.sync_diario else 0
+    GeoImportJob.objects.filter(pk=job.pk).update(
+        status='done',
+        processed=stats['total'],
+        created_count=stats['created'],
+        updated_count=stats['updated'],
+        snapshot_count=snapshots,
+        bytes_read=F('bytes_total'),
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+    return {**stats, 'snapshots': snapshots}
 
-            if gtype == 'LineString':
-                sort_line += 1
-                order = sort_line
-            else:
-                order = 0
-
-            lat, lon = _coords_centroid(gtype, geom)
-            defaults = {
-                'name': name[:255],
-                'folder': folder[:500],
-                'description': description,
-                'geometry_type': gtype,
-                'geometry': geom,
-                'latitude': lat,
-                'longitude': lon,
-                'kind': kind,
-                'sort_order': order,
-                'is_active': True,
-            }
 
-            obj, was_created = GeoFeature.objects.update_or_create(
-                project=project,
-                external_key=ext,
-                defaults=defaults,
-            )
-            if was_created:
-                created += 1
-            else:
-                updated += 1
+def request_geo_import(project: Project, upload, *, user=None, source_label: str = '', replace: bool = False) -> GeoImportJob:
+    """Guarda o arquivo num ``GeoImportJob`` e agenda a importação para depois do commit."""
+    job = GeoImportJob.objects.create(
+        project=project,
+        requested_by=user,
+        source=upload,
+        source_name=(upload.name or '')[:255],
+        source_label=source_label[:200],
+        replace=replace,
+        bytes_total=upload.size or 0,
+    )
+    job_id = job.pk
 
-        _update_project_center_from_features(project)
+    def _enqueue():
+        from .tasks import enqueue_geo_import_job
 
-    return {'created': created, 'updated': updated, 'total': created + updated}
+        enqueue_geo_import_job(job_id)
 
+    transaction.on_commit(_enqueue)
+    return job
 
-def _update_project_center_from_features(project: Project) -> None:
-    qs = GeoFeature.objects.filter(project=project, latitude__isnull=False, longitude__isnull=False)
-    if not qs.exists():
+
+def discard_geo_import_source(job: GeoImportJob) -> None:
+    """
+    Remove do storage o arquivo de um job encerrado (concluído ou com falha); nome original,
+    contadores e erro continuam no job.
+    """
+    if not job.source:
         return
-    lats = [f.latitude for f in qs if f.latitude is not None]
-    lons = [f.longitude for f in qs if f.longitude is not None]
-    if not lats:
+    job.source.delete(save=False)
+    GeoImportJob.objects.filter(pk=job.pk).update(source='')
+
+
+def geo_import_job_payload(job: GeoImportJob) -> dict[str, Any]:
+    """JSON de acompanhamento da importação (tela de progresso)."""
+    return {
+        'id': job.pk,
+        'status': job.status,
+        'status_label': job.get_status_display(),
+        'progress': job.percent,
+        'processed': job.processed,
+        'created': job.created_count,
+        'updated': job.updated_count,
+        'snapshots': job.snapshot_count,
+        'error': job.error if job.status == 'failed' else '',
+        'done': job.status in ('done', 'failed'),
+    }
+
+
+def _update_project_center_from_features(project: Project) -> None:
+    center = GeoFeature.objects.filter(
+        project=project, latitude__isnull=False, longitude__isnull=False
+    ).aggregate(lat=Avg('latitude'), lon=Avg('longitude'))
+    if center['lat'] is None or center['lon'] is None:
         return
     config, _ = GeoObraConfig.objects.get_or_create(project=project)
-    config.center_latitude = sum(lats) / len(lats)
-    config.center_longitude = sum(lons) / len(lons)
+    config.center_latitude = Decimal(center['lat']).quantize(Decimal('0.0000001'))
+    config.center_longitude = Decimal(center['lon']).quantize(Decimal('0.0000001'))
     config.save(update_fields=['center_latitude', 'center_longitude', 'updated_at'])
 
 
-def kml_to_geojson_features(kml_text: str) -> dict[str, Any]:
-    """Converte placemarks KML 2.2 em FeatureCollection GeoJSON."""
-    root = ET.fromstring(kml_text.encode('utf-8'))
-
-    def folder_path(folder_elem, path=''):
-        name_el = folder_elem.find('kml:name', KML_NS)
-        name = name_el.text.strip() if name_el is not None and name_el.text else ''
-        return f'{path} / {name}'.strip(' /') if path else name
-
-    def walk_folders(parent, path=''):
-        for folder in parent.findall('kml:Folder', KML_NS):
-            fpath = folder_path(folder, path)
-            for pm in folder.findall('kml:Placemark', KML_NS):
-                yield fpath, pm
-            yield from walk_folders(folder, fpath)
-
-    doc = root.find('kml:Document', KML_NS) or root
-    root_name_el = doc.find('kml:name', KML_NS)
-    root_name = root_name_el.text.strip() if root_name_el is not None and root_name_el.text else 'KML'
-
-    features: list[dict] = []
-
-    for pm in doc.findall('kml:Placemark', KML_NS):
-        yield_folder = root_name
-        name_el = pm.find('kml:name', KML_NS)
-        desc_el = pm.find('kml:description', KML_NS)
-        name = name_el.text.strip() if name_el is not None and name_el.text else ''
-        description = desc_el.text if desc_el is not None and desc_el.text else ''
-        geom, gtype = _parse_kml_geometry(pm)
-        if geom:
-            features.append(
-                {
-                    'type': 'Feature',
-                    'properties': {'name': name, 'folder': yield_folder, 'description': description},
-                    'geometry': geom,
-                }
-            )
+_KML_TAG = '{%s}' % KML_NS['kml']
+
+
+def iter_kml_features(source, meta: dict | None = None):
+    """
+    Lê KML 2.2 em streaming (``iterparse``) e gera Features GeoJSON na ordem do documento.
+    ``source`` é caminho ou arquivo binário; placemarks já convertidos são descartados da
+    árvore, então a memória não cresce com o número de elementos. ``meta['name']`` recebe o
+    nome do documento.
+    """
+    meta = meta if meta is not None else {}
+    meta.setdefault('name', 'KML')
+    stack: list = []
+    folders: list[str] = []
+    folder_paths: list[str] = []
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            if elem.tag == _KML_TAG + 'Folder':
+                folders.append('')
+                folder_paths.append(folder_paths[-1] if folder_paths else '')
+            continue
 
-    for fpath, pm in walk_folders(doc):
-        name_el = pm.find('kml:name', KML_NS)
-        desc_el = pm.find('kml:description', KML_NS)
-        name = name_el.text.strip() if name_el is not None and name_el.text else ''
-        description = desc_el.text if desc_el is not None and desc_el.text else ''
-        geom, gtype = _parse_kml_geometry(pm)
-        if geom:
-            features.append(
-                {
+        stack.pop()
+        parent = stack[-1] if stack else None
+        tag = elem.tag
+        if tag == _KML_TAG + 'name' and parent is not None:
+            text = elem.text.strip() if elem.text else ''
+            if parent.tag == _KML_TAG + 'Folder' and folders:
+                folders[-1] = text
+                base = folder_paths[-2] if len(folder_paths) > 1 else ''
+                folder_paths[-1] = f'{base} / {text}'.strip(' /') if base else text
+            elif parent.tag == _KML_TAG + 'Document':
+                meta['name'] = text or meta['name']
+        elif tag == _KML_TAG + 'Folder':
+            folders.pop()
+            folder_paths.pop()
+            if parent is not None:
+                parent.remove(elem)
+        elif tag == _KML_TAG + 'Placemark':
+            name_el = elem.find('kml:name', KML_NS)
+            desc_el = elem.find('kml:description', KML_NS)
+            geom, _gtype = _parse_kml_geometry(elem)
+            if geom:
+                yield {
                     'type': 'Feature',
-                    'properties': {'name': name, 'folder': fpath, 'description': description},
+                    'properties': {
+                        'name': name_el.text.strip() if name_el is not None and name_el.text else '',
+                        'folder': folder_paths[-1] if folder_paths else meta['name'],
+                        'description': desc_el.text if desc_el is not None and desc_el.text else '',
+                    },
                     'geometry': geom,
                 }
+            if parent is not None:
+                parent.remove(elem)
+
+
+def kml_to_geojson_features(kml_text: str) -> dict[str, Any]:
+    """Converte placemarks KML 2.2 em FeatureCollection GeoJSON (via ``iter_kml_features``)."""
+    meta: dict[str, Any] = {}
+    features = list(iter_kml_features(io.BytesIO(kml_text.encode('utf-8')), meta))
+    return {'type': 'FeatureCollection', 'name': meta['name'], 'features': features}
+
+
+_GEOJSON_READ_SIZE = 64 * 1024
+_GEOJSON_TYPE_ERROR = 'O arquivo deve ser um GeoJSON FeatureCollection.'
+
+
+def iter_geojson_features(fileobj, meta: dict | None = None):
+    """
+    Lê um GeoJSON FeatureCollection em streaming e gera as Features de ``features`` na ordem
+    do arquivo: o binário é lido em blocos e cada Feature é decodificada sozinha
+    (``JSONDecoder.raw_decode``), então a memória acompanha a maior Feature, não o arquivo.
+    ``meta`` recebe os demais membros do objeto raiz (``type``, ``name``...). ``type``
+    diferente de ``FeatureCollection`` gera ``ValueError`` assim que é lido (ou ao final, se
+    vier depois de ``features``).
+    """
+    meta = meta if meta is not None else {}
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    buf = ''
+    pos = 0
+    eof = False
+
+    def _fill() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        data = fileobj.read(_GEOJSON_READ_SIZE)
+        eof = not data
+        buf = buf[pos:] + text.decode(data, final=eof)
+        pos = 0
+        return not eof
+
+    def _peek() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n\ufeff':
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not _fill():
+                raise ValueError(_GEOJSON_TYPE_ERROR)
+
+    def _expect(chars: str) -> str:
+        nonlocal pos
+        char = _peek()
+        if char not in chars:
+            raise ValueError(_GEOJSON_TYPE_ERROR)
+        pos += 1
+        return char
+
+    def _value():
+        nonlocal pos
+        _peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if _fill():
+                    continue
+                raise
+            # Valor encostado no fim do bloco pode ser número/literal cortado: lê mais e refaz.
+            if end == len(buf) and _fill():
+                continue
+            pos = end
+            return value
+
+    _expect('{')
+    if _peek() == '}':
+        pos += 1
+    else:
+        while True:
+            key = _value()
+            _expect(':')
+            if key == 'features' and _peek() == '[':
+                pos += 1
+                if _peek() == ']':
+                    pos += 1
+                else:
+                    while True:
+                        yield _value()
+                        if _expect(',]') == ']':
+                            break
+            elif key == 'features':
+                yield from _value() or []
+            else:
+                meta[key] = _value()
+                if key == 'type' and meta['type'] != 'FeatureCollection':
+                    raise ValueError(_GEOJSON_TYPE_ERROR)
+            if _expect(',}') == '}':
+                break
+    if meta.get('type') != 'FeatureCollection':
+        raise ValueError(_GEOJSON_TYPE_ERROR)
+
+
+@contextmanager
+def open_geo_import_source(fileobj, filename: str):
+    """
+    Abre o arquivo de importação e entrega ``(features, position)``: iterável de Features
+    (KML/KMZ e GeoJSON em streaming) e uma função com os bytes já lidos do arquivo de origem,
+    para o progresso.
+    """
+    name_lower = (filename or '').lower()
+    fileobj.seek(0)
+    if name_lower.endswith('.kmz'):
+        with zipfile.ZipFile(fileobj) as zf:
+            names = zf.namelist()
+            kml_name = 'doc.kml' if 'doc.kml' in names else next(
+                (n for n in names if n.lower().endswith('.kml')),
+                None,
             )
+            if not kml_name:
+                raise ValueError('KMZ sem arquivo KML interno.')
+            with zf.open(kml_name) as kml:
+                yield iter_kml_features(kml), fileobj.tell
+        return
 
-    return {'type': 'FeatureCollection', 'name': root_name, 'features': features}
+    head = fileobj.read(512)
+    fileobj.seek(0)
+    if name_lower.endswith('.kml') or head.lstrip().startswith(b'<'):
+        yield iter_kml_features(fileobj), fileobj.tell
+        return
+
+    yield iter_geojson_features(fileobj), fileobj.tell
 
 
 def _parse_kml_coordinates(text: str) -> list[list[float]]:
@@ -307,12 +652,142 @@ def project_progress_at_date(project: Project, target: date) -> Decimal:
         return Decimal('0.00')
 
 
+class _ProgressSeries:
+    """Valores por data (ordenados) com consulta "último valor até a data" por bisect."""
+
+    __slots__ = ('dates', 'values')
+
+    def __init__(self):
+        self.dates: list[date] = []
+        self.values: list = []
+
+    def put(self, day: date, value) -> None:
+        i = bisect_left(self.dates, day)
+        if i < len(self.dates) and self.dates[i] == day:
+            self.values[i] = value
+        else:
+            self.dates.insert(i, day)
+            self.values.insert(i, value)
+
+    def at(self, target: date):
+        i = bisect_right(self.dates, target)
+        return self.values[i - 1] if i else None
+
+
+def _worklog_series(project: Project, activity_ids=None) -> dict[int | None, _ProgressSeries]:
+    """
+    Progresso acumulado por data, numa única consulta: chave ``None`` é o projeto (último
+    worklog de qualquer atividade, como ``project_progress_at_date``) e as demais são as
+    atividades (como ``activity_progress_at_date``). Com ``activity_ids`` lê só essas atividades.
+    """
+    qs = DailyWorkLog.objects.filter(diary__project=project, diary__status__in=DIARY_STATUSES_FOR_GEO_PROGRESS)
+    if activity_ids is not None:
+        qs = qs.filter(activity_id__in=activity_ids)
+    series: dict[int | None, _ProgressSeries] = {}
+    rows = qs.order_by('diary__date', 'created_at').values_list(
+        'activity_id', 'diary__date', 'accumulated_progress_snapshot'
+    )
+    for activity_id, day, progress in rows:
+        series.setdefault(None, _ProgressSeries()).put(day, progress)
+        series.setdefault(activity_id, _ProgressSeries()).put(day, progress)
+    return series
+
+
+def _write_snapshots(
+    project: Project,
+    targets: dict[date, list[GeoFeature]],
+    *,
+    line_index: dict[int, int],
+    line_total: int,
+    series: dict[int | None, _ProgressSeries],
+) -> int:
+    """
+    Calcula os snapshots de ``targets`` (data -> elementos) com as mesmas regras de
+    ``resolve_feature_progress_and_status``, mas em memória, e grava só as linhas que mudaram
+    com um ``bulk_create`` (upsert). Retorna quantas linhas foram gravadas.
+    """
+    if not targets:
+        return 0
+    feature_ids = {f.pk for feats in targets.values() for f in feats}
+    last_day = max(targets)
+    existing: dict[tuple[int, date], tuple] = {}
+    history: dict[int, _ProgressSeries] = {}
+    rows = GeoProgressSnapshot.objects.filter(
+        feature_id__in=feature_ids, snapshot_date__lte=last_day
+    ).values_list('feature_id', 'snapshot_date', 'progress_pct', 'status', 'source')
+    for feature_id, day, progress, status, source in rows:
+        existing[(feature_id, day)] = (progress, status, source)
+        history.setdefault(feature_id, _ProgressSeries()).put(day, (progress, status))
+
+    project_overall = None
+    changed: list[GeoProgressSnapshot] = []
+    for day in sorted(targets):
+        overall = None
+        for feat in targets[day]:
+            if feat.activity_id:
+                activity_series = series.get(feat.activity_id)
+                progress = (activity_series.at(day) if activity_series else None) or Decimal('0.00')
+                status = _status_from_progress(progress)
+            else:
+                previous = history[feat.pk].at(day) if feat.pk in history else None
+                if previous:
+                    progress, status = previous
+                elif feat.geometry_type == 'LineString' and feat.pk in line_index:
+                    if overall is None:
+                        overall = series[None].at(day) if None in series else None
+                        if overall is None:
+                            if project_overall is None:
+                                try:
+                                    project_overall = ProgressService.get_project_overall_progress(project.id)
+                                except Exception:
+                                    project_overall = Decimal('0.00')
+                            overall = project_overall
+                    threshold = (Decimal(line_index[feat.pk]) / Decimal(line_total)) * Decimal('100')
+                    progress = overall if overall >= threshold else Decimal('0')
+                    status = _status_from_progress(progress)
+                else:
+                    progress, status = feat.progress_pct, feat.status
+                history.setdefault(feat.pk, _ProgressSeries()).put(day, (progress, status))
+            progress = Decimal(progress).quantize(Decimal('0.01'))
+            source = 'eap' if feat.activity_id else 'diario'
+            if existing.get((feat.pk, day)) == (progress, status, source):
+                continue
+            changed.append(
+                GeoProgressSnapshot(
+                    feature=feat, snapshot_date=day, progress_pct=progress, status=status, source=source
+                )
+            )
+
+    if changed:
+        # MySQL resolve o conflito pela chave única sem aceitar ``unique_fields``.
+        unique_fields = (
+            ['feature', 'snapshot_date'] if connection.features.supports_update_conflicts_with_target else None
+        )
+        GeoProgressSnapshot.objects.bulk_create(
+            changed,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=['progress_pct', 'status', 'source', 'updated_at'],
+        )
+    return len(changed)
+
+
+def _line_positions(features: list[GeoFeature]) -> dict[int, int]:
+    """Posição (1..n) de cada linha na ordem do traçado, para o fallback proporcional."""
+    lines = [f for f in features if f.geometry_type == 'LineString']
+    return {f.pk: i for i, f in enumerate(lines, start=1)}
+
+
 def sync_snapshots_from_diario(project: Project) -> dict[str, int]:
     """
     Gera snapshots evolutivos por data de diário:
     - trechos com atividade EAP vinculada usam progresso real da atividade;
     - demais linhas usam fallback proporcional ao progresso global;
     - pontos usam progresso manual ou da atividade vinculada.
+
+    Recalcula todas as datas e elementos (botão "Sincronizar" e importação); após salvar um
+    RDO usa-se ``sync_snapshots_for_diary``, que só refaz o que o diário afeta.
     """
     features = list(GeoFeature.objects.filter(project=project, is_active=True))
     if not features:
@@ -327,52 +802,128 @@ def sync_snapshots_from_diario(project: Project) -> dict[str, int]:
     if not diary_dates:
         diary_dates = [timezone.localdate()]
 
-    lines = [f for f in features if f.geometry_type == 'LineString']
-    line_total = len(lines)
-    snapshots = 0
+    line_index = _line_positions(features)
+    with transaction.atomic():
+        _write_snapshots(
+            project,
+            {d: features for d in diary_dates},
+            line_index=line_index,
+            line_total=len(line_index),
+            series=_worklog_series(project),
+        )
+    refresh_map_summary(project)
+
+    return {'dates': len(diary_dates), 'snapshots': len(diary_dates) * len(features)}
+
+
+# Fontes dos snapshots calculados a partir dos RDOs (``_write_snapshots``); manuais/importados ficam.
+DERIVED_SNAPSHOT_SOURCES = ('eap', 'diario')
+
+
+def sync_snapshots_for_diary(diary_id: int, *, since: date | None = None) -> dict[str, int]:
+    """
+    Manutenção incremental dos snapshots após salvar/aprovar um RDO:
+    - snapshots calculados em datas que não têm mais RDO elegível (diário mudou de data ou
+      voltou de status) são retirados;
+    - elementos EAP são recalculados da menor entre a data do diário, ``since`` (data anterior
+      do diário que mudou de data, capturada em ``mapa_geo.signals``) e a mais antiga retirada em
+      diante — cobre worklogs incluídos, alterados, removidos e movidos, já que o acumulado
+      propaga; só as linhas que mudaram são gravadas;
+    - na data do diário, elementos ainda sem snapshot ganham o seu.
+
+    Demais linhas já fotografadas não dependem do diário (valem pelo snapshot anterior).
+    """
+    diary = ConstructionDiary.objects.select_related('project').filter(pk=diary_id).first()
+    if diary is None:
+        return {'dates': 0, 'snapshots': 0, 'retracted': 0}
+    project = diary.project
+    eligible_dates = set(
+        ConstructionDiary.objects.filter(project=project, status__in=DIARY_STATUSES_FOR_GEO_PROGRESS)
+        .values_list('date', flat=True)
+        .distinct()
+    )
+    orphans = GeoProgressSnapshot.objects.filter(
+        feature__project=project, source__in=DERIVED_SNAPSHOT_SOURCES
+    ).exclude(snapshot_date__in=eligible_dates)
+    retracted_dates = set(orphans.values_list('snapshot_date', flat=True).distinct())
+    retracted = 0
+    if retracted_dates:
+        with transaction.atomic():
+            retracted, _ = orphans.delete()
 
+    features = list(GeoFeature.objects.filter(project=project, is_active=True))
+    if not features:
+        return {'dates': 0, 'snapshots': 0, 'retracted': retracted}
+
+    start = min([diary.date, *retracted_dates, *([since] if since else [])])
+    eap_features = [f for f in features if f.activity_id]
+    targets: dict[date, list[GeoFeature]] = (
+        {d: list(eap_features) for d in sorted(eligible_dates) if d >= start} if eap_features else {}
+    )
+    if diary.status in DIARY_STATUSES_FOR_GEO_PROGRESS:
+        with_snapshot = set(
+            GeoProgressSnapshot.objects.filter(
+                feature__project=project, snapshot_date=diary.date
+            ).values_list('feature_id', flat=True)
+        )
+        missing = [f for f in features if f.pk not in with_snapshot and not f.activity_id]
+        if missing:
+            targets.setdefault(diary.date, []).extend(missing)
+    if not targets:
+        return {'dates': 0, 'snapshots': 0, 'retracted': retracted}
+
+    needs_overall = any(not f.activity_id for feats in targets.values() for f in feats)
+    activity_ids = {f.activity_id for f in eap_features}
+    series = _worklog_series(project, None if needs_overall else activity_ids)
+    line_index = _line_positions(features)
     with transaction.atomic():
-        for d in diary_dates:
-            overall = project_progress_at_date(project, d)
-            for feat in features:
-                line_index = None
-                if feat.geometry_type == 'LineString' and feat in lines:
-                    line_index = lines.index(feat) + 1
-                prog, status = resolve_feature_progress_and_status(
-                    feat,
-                    d,
-                    overall=overall,
-                    line_index=line_index,
-                    line_total=line_total,
-                )
-                source = 'eap' if feat.activity_id else 'diario'
-                GeoProgressSnapshot.objects.update_or_create(
-                    feature=feat,
-                    snapshot_date=d,
-                    defaults={
-                        'progress_pct': prog.quantize(Decimal('0.01')),
-                        'status': status,
-                        'source': source,
-                    },
-                )
-                snapshots += 1
+        written = _write_snapshots(
+            project, targets, line_index=line_index, line_total=len(line_index), series=series
+        )
+    return {'dates': len(targets), 'snapshots': written, 'retracted': retracted}
 
-    return {'dates': len(diary_dates), 'snapshots': snapshots}
 
+MAP_STALE_PROGRESS_DAYS = 30
 
-def get_map_summary(project: Project) -> dict[str, Any]:
-    """Indicadores do mapa integrados ao progresso e diários do Lplan."""
-    from django.db.models import Count
 
+def is_progress_stale(geometry_type: str, progress, ref: date | None, today: date | None = None) -> bool:
+    """Trecho incompleto sem avanço (último snapshot ou edição) há ``MAP_STALE_PROGRESS_DAYS`` dias."""
+    if geometry_type != 'LineString' or float(progress or 0) >= 100 or not ref:
+        return False
+    return ((today or timezone.localdate()) - ref).days >= MAP_STALE_PROGRESS_DAYS
+
+
+def compute_map_summary(project: Project) -> dict[str, Any]:
+    """Calcula os indicadores do mapa (contagens, progresso, alertas de elementos e centro)."""
+    today = timezone.localdate()
     qs = GeoFeature.objects.filter(project=project, is_active=True)
-    by_geom = {
-        row['geometry_type']: row['c']
-        for row in qs.values('geometry_type').annotate(c=Count('id'))
-    }
+    counts = qs.aggregate(
+        total=Count('id'),
+        segments=Count('id', filter=Q(geometry_type='LineString')),
+        points=Count('id', filter=Q(geometry_type='Point')),
+        areas=Count('id', filter=Q(geometry_type='Polygon')),
+        gps_markers=Count('id', filter=Q(diary__isnull=False)),
+        eap_linked=Count('id', filter=Q(activity__isnull=False)),
+        alerts_blocked=Count('id', filter=Q(status='blocked')),
+        alerts_no_eap=Count(
+            'id', filter=Q(geometry_type='LineString', activity__isnull=True, diary__isnull=True)
+        ),
+    )
+    stale_rows = (
+        qs.filter(geometry_type='LineString', progress_pct__lt=Decimal('100'))
+        .annotate(last_snap=Max('snapshots__snapshot_date'))
+        .values_list('progress_pct', 'last_snap', 'updated_at')
+    )
+    alerts_stale = sum(
+        1
+        for progress, last_snap, updated_at in stale_rows
+        if is_progress_stale('LineString', progress, last_snap or (updated_at.date() if updated_at else None), today)
+    )
+
     try:
-        overall = float(ProgressService.get_project_overall_progress(project.id))
+        overall = Decimal(ProgressService.get_project_overall_progress(project.id))
     except Exception:
-        overall = 0.0
+        overall = Decimal('0.00')
 
     diaries_with_gps = ConstructionDiary.objects.filter(
         project=project,
@@ -385,27 +936,109 @@ def get_map_summary(project: Project) -> dict[str, Any]:
         .first()
     )
     config = GeoObraConfig.objects.filter(project=project).first()
-    timeline_count = len(available_timeline_dates(project))
 
     return {
-        'total': qs.count(),
-        'segments': by_geom.get('LineString', 0),
-        'points': by_geom.get('Point', 0),
-        'areas': by_geom.get('Polygon', 0),
-        'gps_markers': qs.filter(diary__isnull=False).count(),
-        'eap_linked': qs.filter(activity__isnull=False).count(),
-        'overall_progress_pct': overall,
+        **counts,
+        'alerts_stale': alerts_stale,
+        'overall_progress_pct': overall.quantize(Decimal('0.01')),
         'diaries_with_gps': diaries_with_gps,
-        'last_diary_date': last_diary.isoformat() if last_diary else None,
-        'timeline_dates': timeline_count,
-        'import_label': (config.import_label if config else '') or '',
+        'last_diary_date': last_diary,
+        'timeline_dates': len(available_timeline_dates(project)),
+        'import_label': ((config.import_label if config else '') or '')[:200],
+        'center_latitude': config.center_latitude if config else None,
+        'center_longitude': config.center_longitude if config else None,
     }
 
 
+def refresh_map_summary(project: Project) -> GeoMapSummary:
+    """Regrava o resumo do dia do projeto (chamado ao fim das sincronizações e edições do mapa)."""
+    summary, _ = GeoMapSummary.objects.update_or_create(
+        project=project,
+        summary_date=timezone.localdate(),
+        defaults=compute_map_summary(project),
+    )
+    return summary
+
+
+def map_summary_as_dict(summary: GeoMapSummary) -> dict[str, Any]:
+    """Formato histórico de ``get_map_summary`` (JSON das APIs e contexto dos templates)."""
+    return {
+        'total': summary.total,
+        'segments': summary.segments,
+        'points': summary.points,
+        'areas': summary.areas,
+        'gps_markers': summary.gps_markers,
+        'eap_linked': summary.eap_linked,
+        'overall_progress_pct': float(summary.overall_progress_pct),
+        'diaries_with_gps': summary.diaries_with_gps,
+        'last_diary_date': summary.last_diary_date.isoformat() if summary.last_diary_date else None,
+        'timeline_dates': summary.timeline_dates,
+        'import_label': summary.import_label,
+        'alerts': {
+            'blocked': summary.alerts_blocked,
+            'no_eap': summary.alerts_no_eap,
+            'stale': summary.alerts_stale,
+        },
+        'center': (
+            [float(summary.center_latitude), float(summary.center_longitude)]
+            if summary.center_latitude and summary.center_longitude
+            else None
+        ),
+        'summary_date': summary.summary_date.isoformat(),
+    }
+
+
+def get_map_summary(project: Project) -> dict[str, Any]:
+    """Indicadores do mapa integrados ao progresso e diários do Lplan (resumo do dia)."""
+    summary = GeoMapSummary.objects.filter(project=project, summary_date=timezone.localdate()).first()
+    if summary is None:
+        summary = refresh_map_summary(project)
+    return map_summary_as_dict(summary)
+
+
+def latest_map_summaries(project_ids) -> dict[int, GeoMapSummary]:
+    """Resumo mais recente de cada projeto, numa consulta (panorama multi-obra)."""
+    latest = (
+        GeoMapSummary.objects.filter(project_id=OuterRef('project_id'))
+        .order_by('-summary_date')
+        .values('summary_date')[:1]
+    )
+    rows = GeoMapSummary.objects.filter(project_id__in=list(project_ids), summary_date=Subquery(latest))
+    return {row.project_id: row for row in rows}
+
+
+def _on_commit_once(key: tuple, func):
+    """
+    ``transaction.on_commit(func)`` uma vez por ``key`` na transação atual; devolve o callback
+    agendado (``func`` ou o que já estava pendente). A deduplicação olha
+    os callbacks pendentes da própria conexão: rollback (ou savepoint desfeito) os descarta junto,
+    então um novo agendamento depois dele não é engolido.
+    """
+    conn = transaction.get_connection()
+    if conn.in_atomic_block:
+        for _sids, callback, *_ in conn.run_on_commit:
+            if getattr(callback, 'mapa_geo_key', None) == key:
+                return callback
+    func.mapa_geo_key = key
+    transaction.on_commit(func)
+    return func
+
+
+def schedule_map_summary_refresh(project_id: int) -> None:
+    """Agenda ``refresh_map_summary`` após o commit, em background (uma vez por transação)."""
+    if not project_id:
+        return
+
+    def _enqueue():
+        from .tasks import enqueue_refresh_map_summary
+
+        enqueue_refresh_map_summary(project_id)
+
+    _on_commit_once(('summary', project_id), _enqueue)
+
+
 def _features_queryset_for_project(project: Project):
     """Elementos da obra, excluindo vínculos EAP/RDO de outro projeto (dados inconsistentes)."""
-    from django.db.models import Q
-
     return (
         GeoFeature.objects.filter(project=project, is_active=True)
         .select_related('activity', 'diary')
@@ -414,31 +1047,100 @@ def _features_queryset_for_project(project: Project):
     )
 
 
+def _features_with_geo_context(project: Project, target: date | None):
+    """
+    Elementos da obra com o que o mapa precisa anotado por subconsulta (uma única query):
+    progresso da atividade e último snapshot até ``target``, último diário da atividade,
+    primeira foto do RDO vinculado e data do último snapshot.
+    """
+    worklogs = DailyWorkLog.objects.filter(
+        activity_id=OuterRef('activity_id'),
+        diary__project_id=OuterRef('project_id'),
+        diary__status__in=DIARY_STATUSES_FOR_GEO_PROGRESS,
+    ).order_by('-diary__date', '-created_at')
+    annotations = {
+        'geo_last_diary_id': Subquery(worklogs.values('diary_id')[:1]),
+        'geo_diary_photo': Subquery(
+            DiaryImage.objects.filter(diary_id=OuterRef('diary_id'))
+            .exclude(image='')
+            .order_by('uploaded_at', 'id')
+            .values('image')[:1]
+        ),
+        'geo_last_snapshot_date': Subquery(
+            GeoProgressSnapshot.objects.filter(feature_id=OuterRef('pk'))
+            .order_by('-snapshot_date')
+            .values('snapshot_date')[:1]
+        ),
+    }
+    if target:
+        snaps = GeoProgressSnapshot.objects.filter(feature_id=OuterRef('pk'), snapshot_date__lte=target).order_by(
+            '-snapshot_date'
+        )
+        annotations['geo_activity_progress'] = Subquery(
+            worklogs.filter(diary__date__lte=target).values('accumulated_progress_snapshot')[:1]
+        )
+        annotations['geo_snapshot_progress'] = Subquery(snaps.values('progress_pct')[:1])
+        annotations['geo_snapshot_status'] = Subquery(snaps.values('status')[:1])
+    return _features_queryset_for_project(project).annotate(**annotations)
+
+
+def _resolve_annotated_progress(
+    feat: GeoFeature,
+    target: date | None,
+    *,
+    overall: Decimal,
+    line_index: int | None,
+    line_total: int,
+) -> tuple[Decimal, str]:
+    """``resolve_feature_progress_and_status`` lendo as anotações de ``_features_with_geo_context``."""
+    if feat.activity_id:
+        if target is None:
+            progress = feat.activity.progress
+        else:
+            progress = feat.geo_activity_progress
+            if progress is None:
+                progress = Decimal('0.00')
+        return progress, _status_from_progress(progress)
+
+    if target and feat.geo_snapshot_progress is not None:
+        return feat.geo_snapshot_progress, feat.geo_snapshot_status
+
+    if feat.geometry_type == 'LineString' and line_index is not None and line_total > 0:
+        threshold = (Decimal(line_index) / Decimal(line_total)) * Decimal('100')
+        progress = overall if overall >= threshold else Decimal('0')
+        return progress, _status_from_progress(progress)
+
+    return feat.progress_pct, feat.status
+
+
 def features_geojson_at_date(project: Project, target: date | None = None) -> dict[str, Any]:
-    """Monta FeatureCollection com progresso vigente em uma data."""
-    qs = _features_queryset_for_project(project)
-    features = []
+    """Monta FeatureCollection com progresso vigente em uma data (número fixo de consultas)."""
+    from .enrichment import enrich_feature_properties
+
     display_date = target or timezone.localdate()
     overall = project_progress_at_date(project, display_date)
-    lines = list(
-        GeoFeature.objects.filter(project=project, geometry_type='LineString', is_active=True).order_by(
-            'sort_order', 'id'
-        )
+    line_ids = GeoFeature.objects.filter(project=project, geometry_type='LineString', is_active=True).order_by(
+        'sort_order', 'id'
+    ).values_list('id', flat=True)
+    line_index = {pk: i for i, pk in enumerate(line_ids, start=1)}
+    line_total = len(line_index)
+
+    feats = list(_features_with_geo_context(project, target))
+    last_diaries = ConstructionDiary.objects.in_bulk(
+        {f.geo_last_diary_id for f in feats if f.geo_last_diary_id}
     )
-    line_total = len(lines)
-
-    for feat in qs:
-        line_index = lines.index(feat) + 1 if feat in lines else None
-        progress, status = resolve_feature_progress_and_status(
+    features = []
+    for feat in feats:
+        feat.geo_last_diary = last_diaries.get(feat.geo_last_diary_id)
+        progress, status = _resolve_annotated_progress(
             feat,
             target,
             overall=overall,
-            line_index=line_index,
+            line_index=line_index.get(feat.pk),
             line_total=line_total,
         )
         item = _feature_to_geojson_dict(feat, progress=progress, status=status)
         try:
-            from .enrichment import enrich_feature_properties
             item['properties'].update(enrich_feature_properties(feat, progress=progress, status=status))
         except Exception:
             pass
@@ -465,6 +1167,125 @@ def features_geojson_at_date(project: Project, target: date | None = None) -> di
     }
 
 
+def features_collection_version(project: Project, target: date | None = None) -> str:
+    """
+    Versão dos dados que compõem a coleção de ``features_geojson_at_date``: carimbos
+    (último ``updated_at`` e contagem) de elementos, snapshots, diários, worklogs, atividades,
+    fotos e configuração da obra, mais a data pedida e o dia corrente (alertas de estagnação).
+    Serve de chave do cache e de ETag.
+    """
+    sources = (
+        GeoFeature.objects.filter(project=project).aggregate(m=Max('updated_at'), n=Count('id')),
+        GeoProgressSnapshot.objects.filter(feature__project=project).aggregate(m=Max('updated_at'), n=Count('id')),
+        GeoObraConfig.objects.filter(project=project).aggregate(m=Max('updated_at'), n=Count('id')),
+        ConstructionDiary.objects.filter(project=project).aggregate(m=Max('updated_at'), n=Count('id')),
+        DailyWorkLog.objects.filter(diary__project=project).aggregate(m=Max('updated_at'), n=Count('id')),
+        Activity.objects.filter(project=project).aggregate(m=Max('updated_at'), n=Count('id')),
+        DiaryImage.objects.filter(diary__project=project).aggregate(m=Max('uploaded_at'), n=Count('id')),
+    )
+    raw = '|'.join(
+        [str(project.pk), target.isoformat() if target else '', timezone.localdate().isoformat()]
+        + [f"{row['m'].isoformat() if row['m'] else ''}:{row['n']}" for row in sources]
+    )
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+def _cached_features_collection(project: Project, target: date | None, version: str) -> dict[str, Any]:
+    key = f'mapa_geo:features-data:{project.pk}:{target.isoformat() if target else "atual"}:{version}'
+    collection = cache.get(key)
+    if collection is None:
+        collection = features_geojson_at_date(project, target)
+        cache.set(key, collection, FEATURES_CACHE_TTL_SECONDS)
+    return collection
+
+
+def features_geojson_json(project: Project, target: date | None = None, *, version: str | None = None) -> str:
+    """
+    ``features_geojson_at_date`` já serializado, em cache por projeto, data e versão dos dados
+    (``features_collection_version``); qualquer alteração muda a chave, sem invalidação manual.
+    """
+    version = version or features_collection_version(project, target)
+    key = f'mapa_geo:features:{project.pk}:{target.isoformat() if target else "atual"}:{version}'
+    body = cache.get(key)
+    if body is None:
+        body = json.dumps(_cached_features_collection(project, target, version), cls=DjangoJSONEncoder)
+        cache.set(key, body, FEATURES_CACHE_TTL_SECONDS)
+    return body
+
+
+def feature_tile_params(
+    zoom: int | None, bbox: tuple[float, float, float, float] | None
+) -> tuple[int | None, tuple[float, float, float, float] | None]:
+    """Nível de simplificação do zoom e ``bbox`` expandido até a grade de tiles (chave estável)."""
+    if bbox is not None:
+        bbox = snap_bbox_to_tiles(bbox, zoom) if zoom is not None else tuple(round(v, 6) for v in bbox)
+    return level_for_zoom(zoom), bbox
+
+
+def features_tile_version(version: str, zoom: int | None, bbox: tuple[float, float, float, float] | None) -> str:
+    """Versão (chave de cache e ETag) do recorte: versão dos dados + nível + área na grade de tiles."""
+    level, bbox = feature_tile_params(zoom, bbox)
+    area = ','.join(str(v) for v in bbox) if bbox else 'tudo'
+    return hashlib.sha256(f'{version}|{level or "full"}|{area}'.encode('utf-8')).hexdigest()[:32]
+
+
+def features_tile_json(
+    project: Project,
+    target: date | None = None,
+    *,
+    zoom: int | None = None,
+    bbox: tuple[float, float, float, float] | None = None,
+    version: str | None = None,
+) -> str:
+    """
+    Coleção do mapa recortada à área ``bbox`` (min_lon, min_lat, max_lon, max_lat) e com as
+    geometrias simplificadas do nível do ``zoom``. Propriedades/progresso vêm da coleção
+    completa em cache; o recorte e o nível saem de uma consulta pelas colunas ``bbox_*``.
+    """
+    version = version or features_collection_version(project, target)
+    tile_version = features_tile_version(version, zoom, bbox)
+    level, bbox = feature_tile_params(zoom, bbox)
+    key = f'mapa_geo:tile:{project.pk}:{target.isoformat() if target else "atual"}:{tile_version}'
+    body = cache.get(key)
+    if body is not None:
+        return body
+
+    collection = _cached_features_collection(project, target, version)
+    qs = GeoFeature.objects.filter(project=project, is_active=True)
+    if bbox:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        qs = qs.filter(
+            bbox_min_lon__lte=max_lon,
+            bbox_max_lon__gte=min_lon,
+            bbox_min_lat__lte=max_lat,
+            bbox_max_lat__gte=min_lat,
+        )
+    keys = levels_from(level)
+    rows = qs.annotate(**{f'lvl_{k}': KeyTransform(k, 'geometry_levels') for k in keys}).values(
+        'id', *(f'lvl_{k}' for k in keys)
+    )
+    simplified: dict[int, dict | None] = {}
+    for row in rows:
+        simplified[row['id']] = next((row[f'lvl_{k}'] for k in keys if row[f'lvl_{k}']), None)
+
+    features = []
+    for item in collection['features']:
+        if item['id'] not in simplified:
+            continue
+        geometry = simplified[item['id']]
+        features.append({**item, 'geometry': geometry} if geometry else item)
+    meta = {
+        **collection['meta'],
+        'zoom': zoom,
+        'simplify_level': level,
+        'bbox': list(bbox) if bbox else None,
+        'returned_count': len(features),
+    }
+    body = json.dumps({'type': 'FeatureCollection', 'meta': meta, 'features': features}, cls=DjangoJSONEncoder)
+    cache.set(key, body, FEATURES_CACHE_TTL_SECONDS)
+    return body
+
+
 def _feature_to_geojson_dict(feat: GeoFeature, *, progress=None, status=None) -> dict:
     progress = feat.progress_pct if progress is None else progress
     status = feat.status if status is None else status
@@ -619,6 +1440,7 @@ def create_geo_feature(project: Project, payload: dict[str, Any]) -> GeoFeature:
         except Activity.DoesNotExist:
             pass
     _update_project_center_from_features(project)
+    schedule_map_summary_refresh(project.pk)
     return feat
 
 
@@ -662,12 +1484,14 @@ def update_geo_feature(feature: GeoFeature, payload: dict[str, Any]) -> GeoFeatu
 
     feature.save()
     _update_project_center_from_features(feature.project)
+    schedule_map_summary_refresh(feature.project_id)
     return feature
 
 
 def delete_geo_feature(feature: GeoFeature) -> None:
     feature.is_active = False
     feature.save(update_fields=['is_active', 'updated_at'])
+    schedule_map_summary_refresh(feature.project_id)
 
 
 def _escape_kml(text: str) -> str:
@@ -823,13 +1647,38 @@ def sync_diary_geolocation_marker(diary: ConstructionDiary) -> GeoFeature | None
     return feat
 
 
-def on_diary_saved(diary: ConstructionDiary) -> None:
-    """Integração pós-salvamento do RDO com o mapa geográfico."""
-    if not diary or not diary.project_id:
+def refresh_diary_geo(diary_id: int, *, since: date | None = None) -> None:
+    """Marcador GPS e snapshots afetados por um RDO (executado em background)."""
+    diary = ConstructionDiary.objects.select_related('project', 'front', 'created_by').filter(pk=diary_id).first()
+    if diary is None:
         return
     if diary.geolocation_data:
         sync_diary_geolocation_marker(diary)
-    sync_snapshots_from_diario(diary.project)
+    sync_snapshots_for_diary(diary.pk, since=since)
+    refresh_map_summary(diary.project)
+
+
+def on_diary_saved(diary: ConstructionDiary) -> None:
+    """
+    Integração pós-salvamento do RDO com o mapa geográfico: agenda ``refresh_diary_geo``
+    para depois do commit (uma vez por diário e transação), fora da requisição. Se o diário
+    mudou de data (``mapa_geo.signals``), o recálculo parte da menor das duas datas.
+    """
+    if not diary or not diary.pk or not diary.project_id:
+        return
+    diary_id = diary.pk
+    previous = diary.__dict__.pop('_geo_previous_date', None)
+    since = min(previous, diary.date) if previous and previous != diary.date else None
+
+    def _enqueue():
+        from .tasks import enqueue_refresh_diary_geo
+
+        enqueue_refresh_diary_geo(diary_id, since=_enqueue.since)
+
+    _enqueue.since = since
+    scheduled = _on_commit_once(('diary', diary_id), _enqueue)
+    if scheduled is not _enqueue and since:
+        scheduled.since = min(d for d in (scheduled.since, since) if d)
 
 
 def list_project_activities(
@@ -839,8 +1688,6 @@ def list_project_activities(
     *,
     leaves_only: bool = True,
 ) -> list[dict]:
-    from django.db.models import Q
-
     qs = Activity.objects.filter(project=project).order_by('code')
     if query:
         qs = qs.filter(Q(name__icontains=query) | Q(code__icontains=query))
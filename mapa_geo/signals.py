@@ -0,0 +1,21 @@
+"""
+Sinais do mapa geográfico.
+- Guarda a data anterior do RDO antes de salvá-lo: diário movido de data tem os snapshots
+  recalculados a partir da menor das duas (``services.on_diary_saved``).
+"""
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from core.models import ConstructionDiary
+
+
+@receiver(pre_save, sender=ConstructionDiary, dispatch_uid='mapa_geo_diary_previous_date')
+def _guardar_data_anterior(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Vários saves antes do agendamento: vale a data do primeiro (a gravada antes da edição).
+    if raw or not instance.pk or (update_fields is not None and 'date' not in update_fields):
+        return
+    if '_geo_previous_date' in instance.__dict__:
+        return
+    instance._geo_previous_date = (
+        ConstructionDiary.objects.filter(pk=instance.pk).values_list('date', flat=True).first()
+    )
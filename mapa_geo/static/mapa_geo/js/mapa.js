@@ -158,6 +158,24 @@
 
   var SNAP_DISTANCE = 15;
 
+
+
+  // Fora da edição o mapa pede só a área visível (bbox) com a geometria simplificada do zoom;
+
+  // níveis iguais a mapa_geo.geometry.SIMPLIFY_LEVELS.
+
+  var SIMPLIFY_LEVELS = [10, 13, 15];
+
+  var viewReady = false;
+
+  var loadedArea = null;
+
+  var loadedLevel = null;
+
+  var loadSeq = 0;
+
+  var viewReloadTimer = null;
+
   var kindLabels = {
 
     segment: 'Trecho',
@@ -890,6 +908,8 @@
 
     editableLayer = new L.FeatureGroup();
 
+    map.on('moveend', scheduleViewReload);
+
     if (canEdit && map.pm) {
 
       map.pm.setLang('pt_br');
@@ -1212,11 +1232,43 @@
 
 
 
-  function loadFeatures(dateIso) {
+  function levelForZoom(zoom) {
+
+    for (var i = 0; i < SIMPLIFY_LEVELS.length; i++) {
+
+      if (zoom <= SIMPLIFY_LEVELS[i]) return SIMPLIFY_LEVELS[i];
+
+    }
+
+    return null;
+
+  }
+
+
+
+  function loadFeatures(dateIso, options) {
 
-    var url = apiFeatures;
+    // fit: false mantém a vista (recarga por pan/zoom ou após editar); só enquadra na carga inicial e ao trocar a data.
 
-    if (dateIso) url += '?date=' + encodeURIComponent(dateIso);
+    var fit = !(options && options.fit === false);
+
+    var params = [];
+
+    if (dateIso) params.push('date=' + encodeURIComponent(dateIso));
+
+    var tiled = !editMode && map;
+
+    if (tiled) {
+
+      params.push('zoom=' + map.getZoom());
+
+      if (viewReady) params.push('bbox=' + map.getBounds().pad(0.5).toBBoxString());
+
+    }
+
+    var url = apiFeatures + (params.length ? '?' + params.join('&') : '');
+
+    var seq = ++loadSeq;
 
     return fetch(url, { credentials: 'same-origin', headers: { Accept: 'application/json' } })
 
@@ -1230,8 +1282,18 @@
 
       .then(function (data) {
 
+        if (seq !== loadSeq) return data;
+
         var meta = data.meta || {};
 
+        loadedLevel = tiled ? (meta.simplify_level || null) : null;
+
+        loadedArea = tiled && meta.bbox
+
+          ? L.latLngBounds([meta.bbox[1], meta.bbox[0]], [meta.bbox[3], meta.bbox[2]])
+
+          : null;
+
         if (expectedProjectId && meta.project_id && String(meta.project_id) !== String(expectedProjectId)) {
 
           showToast('Os elementos carregados não correspondem à obra exibida. Troque de obra.', 'error');
@@ -1250,7 +1312,9 @@
 
         }
 
-        renderGeojson(data, { fit: !editMode && !focusHandled });
+        renderGeojson(data, { fit: fit && !editMode && !focusHandled });
+
+        viewReady = true;
 
         return data;
 
@@ -1260,6 +1324,34 @@
 
 
 
+  function reloadForView() {
+
+    // Recarrega só quando a vista sai da área já carregada ou muda o nível de simplificação.
+
+    if (editMode || !viewReady) return;
+
+    var inside = !loadedArea || loadedArea.contains(map.getBounds());
+
+    var level = levelForZoom(map.getZoom());
+
+    if (inside && (loadedLevel === null || (level !== null && level <= loadedLevel))) return;
+
+    loadFeatures(currentDateParam(), { fit: false });
+
+  }
+
+
+
+  function scheduleViewReload() {
+
+    if (viewReloadTimer) clearTimeout(viewReloadTimer);
+
+    viewReloadTimer = setTimeout(reloadForView, 300);
+
+  }
+
+
+
   function loadTimeline() {
 
     return fetch(apiTimeline, { credentials: 'same-origin' })
@@ -1462,7 +1554,7 @@
 
     setupGeoman();
 
-    loadFeatures(editMode ? null : currentDateParam());
+    loadFeatures(editMode ? null : currentDateParam(), { fit: false });
 
   }
 
@@ -1778,7 +1870,7 @@
 
         showToast(wasNew ? 'Elemento criado no mapa.' : 'Elemento atualizado.', 'success');
 
-        return loadFeatures(editMode ? null : currentDateParam());
+        return loadFeatures(editMode ? null : currentDateParam(), { fit: false });
 
       })
 
@@ -1810,7 +1902,7 @@
 
         showToast('Elemento removido do mapa.', 'success');
 
-        return loadFeatures(editMode ? null : currentDateParam());
+        return loadFeatures(editMode ? null : currentDateParam(), { fit: false });
 
       })
 
@@ -1928,7 +2020,7 @@
 
         showToast('Elemento removido.', 'success');
 
-        return loadFeatures(editMode ? null : currentDateParam());
+        return loadFeatures(editMode ? null : currentDateParam(), { fit: false });
 
       })
 
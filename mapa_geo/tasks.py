@@ -0,0 +1,148 @@
+"""
+Tarefas Celery do mapa geográfico: manutenção dos snapshots de progresso após salvar um RDO
+e do resumo diário por projeto (``GeoMapSummary``), inclusive o beat que abre o resumo do dia,
+e importação de arquivos em lote (``GeoImportJob``).
+
+Sem broker acessível roda numa thread daemon (``core.tasks._enqueue_or_thread``).
+"""
+from __future__ import annotations
+
+import logging
+from datetime import date
+
+from celery import shared_task
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+def run_refresh_diary_geo(diary_id: int, since: str | None = None) -> None:
+    """
+    Atualiza marcador GPS e snapshots afetados pelo diário (idempotente). ``since``: data
+    ISO anterior do diário, quando ele mudou de data.
+    """
+    from mapa_geo.services import refresh_diary_geo
+
+    close_old_connections()
+    try:
+        refresh_diary_geo(diary_id, since=date.fromisoformat(since) if since else None)
+    finally:
+        close_old_connections()
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=60, ignore_result=True)
+def refresh_diary_geo_task(self, diary_id: int, since: str | None = None):
+    """Fila Celery: snapshots do mapa após salvar/aprovar um RDO."""
+    try:
+        run_refresh_diary_geo(diary_id, since=since)
+    except Exception as exc:
+        raise self.retry(exc=exc)
+
+
+def enqueue_refresh_diary_geo(diary_id: int, since: date | None = None) -> None:
+    """Agenda a atualização do mapa para o diário (fila Celery ou thread)."""
+    from core.tasks import _enqueue_or_thread
+
+    _enqueue_or_thread(
+        refresh_diary_geo_task,
+        run_refresh_diary_geo,
+        diary_id,
+        'mapa-geo-diary',
+        kwargs={'since': since.isoformat()} if since else None,
+    )
+
+
+def run_refresh_map_summary(project_id: int) -> None:
+    """Regrava o resumo do dia do mapa do projeto."""
+    from core.models import Project
+    from mapa_geo.services import refresh_map_summary
+
+    close_old_connections()
+    try:
+        project = Project.objects.filter(pk=project_id).first()
+        if project is not None:
+            refresh_map_summary(project)
+    finally:
+        close_old_connections()
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=60, ignore_result=True)
+def refresh_map_summary_task(self, project_id: int):
+    """Fila Celery: resumo do mapa após edições de elementos."""
+    try:
+        run_refresh_map_summary(project_id)
+    except Exception as exc:
+        raise self.retry(exc=exc)
+
+
+def enqueue_refresh_map_summary(project_id: int) -> None:
+    """Agenda o resumo do mapa do projeto (fila Celery ou thread)."""
+    from core.tasks import _enqueue_or_thread
+
+    _enqueue_or_thread(refresh_map_summary_task, run_refresh_map_summary, project_id, 'mapa-geo-summary')
+
+
+@shared_task(ignore_result=True)
+def refresh_map_summaries_task():
+    """Beat diário: abre o resumo do dia de todo projeto com elementos no mapa."""
+    from core.models import Project
+    from mapa_geo.services import refresh_map_summary
+
+    close_old_connections()
+    refreshed = 0
+    try:
+        for project in Project.objects.filter(geo_features__is_active=True).distinct():
+            try:
+                refresh_map_summary(project)
+                refreshed += 1
+            except Exception:
+                logger.exception('refresh_map_summaries_task: falha no projeto id=%s', project.pk)
+    finally:
+        close_old_connections()
+    return refreshed
+
+
+def run_geo_import_job_by_id(job_id: int) -> None:
+    """Executa um GeoImportJob pendente; falhas ficam registradas no job. O arquivo é removido ao final."""
+    from django.utils import timezone
+
+    from mapa_geo.models import GeoImportJob
+    from mapa_geo.services import discard_geo_import_source, run_geo_import_job
+
+    close_old_connections()
+    try:
+        job = GeoImportJob.objects.select_related('project').filter(pk=job_id).first()
+        if job is None:
+            logger.warning('run_geo_import_job_by_id: job id=%s não encontrado.', job_id)
+            return
+        if job.status in ('running', 'done'):
+            return
+        try:
+            run_geo_import_job(job)
+        except Exception as exc:
+            logger.exception('run_geo_import_job_by_id: erro job_id=%s', job_id)
+            GeoImportJob.objects.filter(pk=job_id).update(
+                status='failed',
+                error=str(exc)[:4000],
+                finished_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+        try:
+            discard_geo_import_source(job)
+        except Exception:
+            logger.exception('run_geo_import_job_by_id: falha ao remover o arquivo do job_id=%s', job_id)
+    finally:
+        close_old_connections()
+
+
+@shared_task(ignore_result=True)
+def geo_import_job_task(job_id: int):
+    """Fila Celery: importação de GeoJSON/KML/KMZ (ver GeoImportJob)."""
+    run_geo_import_job_by_id(job_id)
+
+
+def enqueue_geo_import_job(job_id: int) -> None:
+    """Agenda a importação do mapa (fila Celery ou thread)."""
+    from core.tasks import _enqueue_or_thread
+
+    _enqueue_or_thread(geo_import_job_task, run_geo_import_job_by_id, job_id, 'mapa-geo-import')
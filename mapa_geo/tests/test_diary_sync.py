@@ -0,0 +1,213 @@
+"""
+Integração RDO → mapa: agendamento pós-commit (uma vez por transação) e snapshots incrementais.
+"""
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import TestCase
+
+from core.models import Activity, ConstructionDiary, DailyWorkLog, DiaryStatus, Project
+from mapa_geo import services
+from mapa_geo.models import GeoFeature, GeoProgressSnapshot
+from mapa_geo.services import (
+    on_diary_saved,
+    schedule_map_summary_refresh,
+    sync_snapshots_for_diary,
+    sync_snapshots_from_diario,
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class _MapaGeoDiaryBase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('geo_rdo', password='x')
+        cls.project = Project.objects.create(
+            name='Obra Mapa', code='GEO-1', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31), is_active=True
+        )
+        root = Activity.add_root(project=cls.project, name='Rede', code='1', weight=Decimal('0'))
+        cls.act_a = root.add_child(project=cls.project, name='Trecho A', code='1.1', weight=Decimal('1'))
+        cls.act_b = root.add_child(project=cls.project, name='Trecho B', code='1.2', weight=Decimal('1'))
+        cls.feat_a = cls._line('A', cls.act_a)
+        cls.feat_b = cls._line('B', cls.act_b)
+        cls.feat_free = cls._line('Livre', None)
+
+    @classmethod
+    def _line(cls, name, activity):
+        return GeoFeature.objects.create(
+            project=cls.project,
+            activity=activity,
+            name=name,
+            geometry_type='LineString',
+            geometry={'type': 'LineString', 'coordinates': [[-46.6, -23.5], [-46.61, -23.51]]},
+        )
+
+    def _diary(self, day, status=DiaryStatus.APROVADO):
+        return ConstructionDiary.objects.create(project=self.project, date=day, status=status, created_by=self.user)
+
+    def _log(self, diary, activity, accumulated):
+        return DailyWorkLog.objects.create(
+            diary=diary,
+            activity=activity,
+            percentage_executed_today=Decimal(accumulated),
+            accumulated_progress_snapshot=Decimal(accumulated),
+        )
+
+    def _snap(self, feature, day):
+        row = GeoProgressSnapshot.objects.filter(feature=feature, snapshot_date=day).first()
+        return row.progress_pct if row else None
+
+
+class OnCommitSchedulingTests(_MapaGeoDiaryBase):
+    def test_diary_refresh_scheduled_once_per_transaction(self):
+        diary = self._diary(date(2026, 3, 2))
+        with mock.patch('mapa_geo.tasks.enqueue_refresh_diary_geo') as enqueue:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                on_diary_saved(diary)
+                on_diary_saved(diary)
+        self.assertEqual(len(callbacks), 1)
+        enqueue.assert_called_once_with(diary.pk, since=None)
+
+    def test_merged_schedule_keeps_earliest_previous_date(self):
+        diary = self._diary(date(2026, 3, 9))
+        with mock.patch('mapa_geo.tasks.enqueue_refresh_diary_geo') as enqueue:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                diary.date = date(2026, 3, 12)
+                diary.save()
+                on_diary_saved(diary)
+                diary.date = date(2026, 3, 2)
+                diary.save()
+                on_diary_saved(diary)
+        self.assertEqual(len(callbacks), 1)
+        enqueue.assert_called_once_with(diary.pk, since=date(2026, 3, 2))
+
+    def test_diary_saved_after_rolled_back_savepoint_is_scheduled(self):
+        diary = self._diary(date(2026, 3, 2))
+        with mock.patch('mapa_geo.tasks.enqueue_refresh_diary_geo') as enqueue:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        on_diary_saved(diary)
+                        raise _Rollback
+                except _Rollback:
+                    pass
+                on_diary_saved(diary)
+        enqueue.assert_called_once_with(diary.pk, since=None)
+
+    def test_summary_refresh_after_rolled_back_transaction_is_scheduled(self):
+        with mock.patch('mapa_geo.tasks.enqueue_refresh_map_summary') as enqueue:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                try:
+                    with transaction.atomic():
+                        schedule_map_summary_refresh(self.project.pk)
+                        raise _Rollback
+                except _Rollback:
+                    pass
+                schedule_map_summary_refresh(self.project.pk)
+                schedule_map_summary_refresh(self.project.pk)
+        self.assertEqual(len(callbacks), 1)
+        enqueue.assert_called_once_with(self.project.pk)
+
+
+class IncrementalSnapshotTests(_MapaGeoDiaryBase):
+    def setUp(self):
+        self.d1 = self._diary(date(2026, 3, 2))
+        self._log(self.d1, self.act_a, '20')
+        self.d2 = self._diary(date(2026, 3, 9))
+        self.log_b = self._log(self.d2, self.act_b, '40')
+        self._log(self.d2, self.act_a, '50')
+        sync_snapshots_from_diario(self.project)
+
+    def _assert_matches_full_sync(self):
+        incremental = sorted(
+            GeoProgressSnapshot.objects.filter(feature__project=self.project).values_list(
+                'feature_id', 'snapshot_date', 'progress_pct', 'status'
+            )
+        )
+        GeoProgressSnapshot.objects.filter(feature__project=self.project).delete()
+        sync_snapshots_from_diario(self.project)
+        full = sorted(
+            GeoProgressSnapshot.objects.filter(feature__project=self.project).values_list(
+                'feature_id', 'snapshot_date', 'progress_pct', 'status'
+            )
+        )
+        self.assertEqual(incremental, full)
+
+    def test_new_worklog_updates_its_date_and_later_dates(self):
+        d3 = self._diary(date(2026, 3, 16))
+        self._log(self.d1, self.act_b, '10')
+        self._log(d3, self.act_b, '70')
+        sync_snapshots_for_diary(d3.pk)
+        sync_snapshots_for_diary(self.d1.pk)
+        self.assertEqual(self._snap(self.feat_b, self.d1.date), Decimal('10.00'))
+        self.assertEqual(self._snap(self.feat_b, d3.date), Decimal('70.00'))
+        self._assert_matches_full_sync()
+
+    def test_removed_worklog_is_retracted(self):
+        self.assertEqual(self._snap(self.feat_b, self.d2.date), Decimal('40.00'))
+        self.log_b.delete()
+        sync_snapshots_for_diary(self.d2.pk)
+        self.assertEqual(self._snap(self.feat_b, self.d2.date), Decimal('0.00'))
+        self._assert_matches_full_sync()
+
+    def test_status_downgrade_retracts_date_and_recomputes_later_ones(self):
+        d3 = self._diary(date(2026, 3, 16))
+        sync_snapshots_for_diary(d3.pk)
+        self.assertEqual(self._snap(self.feat_a, d3.date), Decimal('50.00'))
+
+        ConstructionDiary.objects.filter(pk=self.d2.pk).update(status=DiaryStatus.REVISAR)
+        result = sync_snapshots_for_diary(self.d2.pk)
+
+        self.assertGreater(result['retracted'], 0)
+        self.assertFalse(GeoProgressSnapshot.objects.filter(snapshot_date=self.d2.date).exists())
+        # O acumulado de A na data seguinte volta a ser o do primeiro RDO.
+        self.assertEqual(self._snap(self.feat_a, d3.date), Decimal('20.00'))
+        self._assert_matches_full_sync()
+
+    def test_date_change_moves_snapshots(self):
+        new_date = date(2026, 3, 5)
+        ConstructionDiary.objects.filter(pk=self.d2.pk).update(date=new_date)
+        sync_snapshots_for_diary(self.d2.pk)
+
+        self.assertFalse(GeoProgressSnapshot.objects.filter(snapshot_date=date(2026, 3, 9)).exists())
+        self.assertEqual(self._snap(self.feat_a, new_date), Decimal('50.00'))
+        self.assertIsNotNone(self._snap(self.feat_free, new_date))
+        self._assert_matches_full_sync()
+
+    def test_date_moved_later_recomputes_from_previous_date(self):
+        other = self._diary(date(2026, 3, 9))
+        self._log(other, self.act_b, '30')
+        sync_snapshots_for_diary(other.pk)
+        self.d2 = ConstructionDiary.objects.get(pk=self.d2.pk)
+        self.d2.date = date(2026, 3, 12)
+        self.d2.save()
+
+        with mock.patch('mapa_geo.tasks.enqueue_refresh_diary_geo') as enqueue:
+            with self.captureOnCommitCallbacks(execute=True):
+                on_diary_saved(self.d2)
+        enqueue.assert_called_once_with(self.d2.pk, since=date(2026, 3, 9))
+
+        sync_snapshots_for_diary(self.d2.pk, since=date(2026, 3, 9))
+        # O outro RDO segue na data antiga: A volta ao acumulado do primeiro RDO nela.
+        self.assertEqual(self._snap(self.feat_a, date(2026, 3, 9)), Decimal('20.00'))
+        self._assert_matches_full_sync()
+
+    def test_manual_snapshots_are_kept(self):
+        GeoProgressSnapshot.objects.create(
+            feature=self.feat_free, snapshot_date=date(2026, 2, 1), progress_pct=Decimal('5'), source='manual'
+        )
+        sync_snapshots_for_diary(self.d1.pk)
+        self.assertEqual(self._snap(self.feat_free, date(2026, 2, 1)), Decimal('5.00'))
+
+    def test_refresh_diary_geo_runs_sync_and_summary(self):
+        with mock.patch.object(services, 'refresh_map_summary') as refresh:
+            services.refresh_diary_geo(self.d2.pk)
+        refresh.assert_called_once()
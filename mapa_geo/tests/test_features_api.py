@@ -0,0 +1,127 @@
+"""
+API de elementos do mapa: coleção versionada com ETag (304 sem rebuild) e recorte por zoom/bbox
+com geometria simplificada do nível.
+"""
+from __future__ import annotations
+
+import json
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from mapa_geo.geometry import _tolerance
+from mapa_geo.models import GeoFeature
+
+from .test_diary_sync import _MapaGeoDiaryBase
+
+
+class FeaturesApiETagTests(_MapaGeoDiaryBase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('geo_admin', 'geo@example.com', 'x')
+        self.client.force_login(self.admin)
+        self.url = f"{reverse('mapa_geo:api_features')}?project={self.project.pk}"
+
+    def test_same_version_answers_304_with_same_etag(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+        self.assertTrue(etag)
+        self.assertEqual(len(json.loads(first.content)['features']), 3)
+
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['ETag'], etag)
+        self.assertEqual(again.content, b'')
+
+    def test_data_change_changes_etag_and_body(self):
+        etag = self.client.get(self.url)['ETag']
+        GeoFeature.objects.create(
+            project=self.project,
+            name='Novo ponto',
+            geometry_type='Point',
+            geometry={'type': 'Point', 'coordinates': [-46.6, -23.5]},
+        )
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        names = {f['properties']['name'] for f in json.loads(response.content)['features']}
+        self.assertIn('Novo ponto', names)
+
+    def test_etag_depends_on_requested_date(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(f'{self.url}&date=2026-03-02', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(json.loads(response.content)['meta']['date'], date(2026, 3, 2).isoformat())
+
+
+class FeaturesTileApiTests(_MapaGeoDiaryBase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('geo_tiles', 'tiles@example.com', 'x')
+        self.client.force_login(self.admin)
+        self.url = f"{reverse('mapa_geo:api_features')}?project={self.project.pk}"
+        # Vértice do meio abaixo da tolerância do z10 e acima da do z13.
+        deviation = (_tolerance(10) + _tolerance(13)) / 2
+        coords = [[-46.6, -23.5], [-46.59, -23.5 + deviation], [-46.58, -23.5]]
+        self.zigzag = GeoFeature.objects.create(
+            project=self.project,
+            name='Zigue-zague',
+            geometry_type='LineString',
+            geometry={'type': 'LineString', 'coordinates': coords},
+        )
+        self.far = GeoFeature.objects.create(
+            project=self.project,
+            name='Longe',
+            geometry_type='Point',
+            geometry={'type': 'Point', 'coordinates': [-43.2, -22.9]},
+        )
+
+    def _get(self, query, **headers):
+        return self.client.get(f'{self.url}&{query}', **headers)
+
+    def _features(self, response):
+        self.assertEqual(response.status_code, 200)
+        return {f['properties']['name']: f for f in json.loads(response.content)['features']}
+
+    def test_bbox_returns_only_intersecting_features(self):
+        near = self._features(self._get('zoom=14&bbox=-46.62,-23.52,-46.57,-23.49'))
+        self.assertIn('Zigue-zague', near)
+        self.assertIn('A', near)
+        self.assertNotIn('Longe', near)
+        far = self._features(self._get('zoom=14&bbox=-43.3,-23.0,-43.1,-22.8'))
+        self.assertEqual(set(far), {'Longe'})
+
+    def test_geometry_simplified_for_zoom_level(self):
+        coarse = self._get('zoom=9&bbox=-47,-24,-46,-23')
+        self.assertEqual(json.loads(coarse.content)['meta']['simplify_level'], 10)
+        self.assertEqual(len(self._features(coarse)['Zigue-zague']['geometry']['coordinates']), 2)
+        for zoom in (12, 18):
+            feature = self._features(self._get(f'zoom={zoom}&bbox=-47,-24,-46,-23'))['Zigue-zague']
+            self.assertEqual(len(feature['geometry']['coordinates']), 3)
+
+    def test_tile_etag_round_trip(self):
+        full_etag = self.client.get(self.url)['ETag']
+        first = self._get('zoom=14&bbox=-46.62,-23.52,-46.57,-23.49')
+        self.assertNotEqual(first['ETag'], full_etag)
+        # Vista vizinha no mesmo tile: mesma área na grade, mesmo ETag.
+        again = self._get('zoom=14&bbox=-46.619,-23.519,-46.571,-23.491', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_malformed_or_non_finite_bbox_is_rejected(self):
+        for bbox in ('nan,-24,-46,-23', '-47,-24,inf,-23', '-47,-24,-46', 'a,b,c,d'):
+            with self.subTest(bbox=bbox):
+                response = self._get(f'zoom=12&bbox={bbox}')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('bbox', json.loads(response.content)['error'])
+
+
+class FeaturesApiAccessTests(TestCase):
+    def test_anonymous_is_redirected(self):
+        response = self.client.get(reverse('mapa_geo:api_features'))
+        self.assertEqual(response.status_code, 302)
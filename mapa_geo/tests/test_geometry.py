@@ -0,0 +1,69 @@
+"""
+Níveis de simplificação por zoom, tolerância de ~1 pixel e grade de tiles do recorte por área.
+"""
+from __future__ import annotations
+
+from django.test import SimpleTestCase
+
+from mapa_geo.geometry import (
+    SIMPLIFY_LEVELS,
+    _tolerance,
+    geometry_index_fields,
+    level_for_zoom,
+    levels_from,
+    simplify_geometry,
+    snap_bbox_to_tiles,
+)
+
+
+def _zigzag(deviation):
+    return {'type': 'LineString', 'coordinates': [[-46.0, -23.0], [-45.99, -23.0 + deviation], [-45.98, -23.0]]}
+
+
+class SimplifyLevelTests(SimpleTestCase):
+    def test_zoom_maps_to_first_level_that_covers_it(self):
+        self.assertEqual(
+            [level_for_zoom(z) for z in (None, 0, 10, 11, 13, 14, 15, 16, 22)],
+            [None, 10, 10, 13, 13, 15, 15, None, None],
+        )
+        self.assertEqual(levels_from(13), ['z13', 'z15'])
+        self.assertEqual(levels_from(None), [])
+
+    def test_tolerance_is_about_one_pixel_and_halves_per_zoom(self):
+        self.assertAlmostEqual(_tolerance(10), 360.0 / 256 / 1024)
+        for coarse, fine in zip(SIMPLIFY_LEVELS, SIMPLIFY_LEVELS[1:]):
+            self.assertAlmostEqual(_tolerance(coarse) / _tolerance(fine), 2 ** (fine - coarse))
+
+    def test_vertex_dropped_only_where_deviation_is_below_tolerance(self):
+        # Desvio entre a tolerância de z13 e a de z10: some no z10, fica nos níveis mais finos.
+        deviation = (_tolerance(10) + _tolerance(13)) / 2
+        fields = geometry_index_fields(_zigzag(deviation))
+        self.assertEqual(set(fields['geometry_levels']), {'z10'})
+        self.assertEqual(len(fields['geometry_levels']['z10']['coordinates']), 2)
+        self.assertEqual(fields['bbox_min_lon'], -46.0)
+        self.assertEqual(fields['bbox_max_lat'], -23.0 + deviation)
+
+        # Já reduzida no z15: os níveis mais grosseiros não reduzem mais e caem no z15 (levels_from).
+        small = geometry_index_fields(_zigzag(_tolerance(15) / 2))
+        self.assertEqual(set(small['geometry_levels']), {'z15'})
+        self.assertIn('z15', levels_from(10))
+
+    def test_polygon_ring_never_collapses_below_four_positions(self):
+        ring = [[0.0, 0.0], [0.00001, 0.0], [0.00001, 0.00001], [0.0, 0.0]]
+        self.assertIsNone(simplify_geometry({'type': 'Polygon', 'coordinates': [ring]}, _tolerance(10)))
+
+    def test_point_has_bbox_and_no_levels(self):
+        fields = geometry_index_fields({'type': 'Point', 'coordinates': [-46.5, -23.5]})
+        self.assertEqual(fields['geometry_levels'], {})
+        self.assertEqual((fields['bbox_min_lon'], fields['bbox_max_lat']), (-46.5, -23.5))
+
+
+class TileGridTests(SimpleTestCase):
+    def test_snapped_bbox_contains_view_and_is_shared_by_nearby_views(self):
+        view = (-46.65, -23.56, -46.60, -23.52)
+        snapped = snap_bbox_to_tiles(view, 12)
+        self.assertLessEqual(snapped[0], view[0])
+        self.assertLessEqual(snapped[1], view[1])
+        self.assertGreaterEqual(snapped[2], view[2])
+        self.assertGreaterEqual(snapped[3], view[3])
+        self.assertEqual(snap_bbox_to_tiles((-46.649, -23.559, -46.601, -23.521), 12), snapped)
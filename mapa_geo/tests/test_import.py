@@ -0,0 +1,296 @@
+"""
+Importação do mapa: parser de KML/KMZ/GeoJSON em streaming, upsert em lotes, ``replace`` por
+marcação e varredura e o job em background (arquivo removido ao final).
+"""
+from __future__ import annotations
+
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from core.models import Project
+from mapa_geo.models import GeoFeature, GeoImportJob, GeoProgressSnapshot
+from mapa_geo.services import (
+    import_feature_stream,
+    iter_geojson_features,
+    iter_kml_features,
+    kml_to_geojson_features,
+    open_geo_import_source,
+)
+from mapa_geo.tasks import run_geo_import_job_by_id
+
+_MEDIA = tempfile.mkdtemp(prefix='mapa_geo_import_')
+
+KML = '''<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2">
+  <Document>
+    <name>Rede</name>
+    <Folder>
+      <name>Trechos</name>
+      <Folder>
+        <name>Norte</name>
+        <Placemark>
+          <name>T1</name>
+          <LineString><coordinates>-46.60,-23.50,0 -46.61,-23.51,0</coordinates></LineString>
+        </Placemark>
+      </Folder>
+      <Placemark>
+        <name>T2</name>
+        <description>Trecho dois</description>
+        <LineString><coordinates>-46.62,-23.52 -46.63,-23.53</coordinates></LineString>
+      </Placemark>
+    </Folder>
+    <Placemark>
+      <name>Poço</name>
+      <Point><coordinates>-46.64,-23.54,0</coordinates></Point>
+    </Placemark>
+    <Placemark>
+      <name>Sem geometria</name>
+    </Placemark>
+  </Document>
+</kml>
+'''.encode('utf-8')
+
+
+def _point(name, lon=-46.6, lat=-23.5, folder=''):
+    return {
+        'type': 'Feature',
+        'properties': {'name': name, 'folder': folder},
+        'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+    }
+
+
+class _Boom(Exception):
+    pass
+
+
+class _ImportBase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.objects.create(
+            name='Obra Importação', code='GEO-IMP', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31)
+        )
+
+
+class KmlParserTests(TestCase):
+    def test_streams_placemarks_with_folder_paths(self):
+        meta = {}
+        features = list(iter_kml_features(io.BytesIO(KML), meta))
+        self.assertEqual(meta['name'], 'Rede')
+        self.assertEqual([f['properties']['name'] for f in features], ['T1', 'T2', 'Poço'])
+        self.assertEqual(
+            [f['properties']['folder'] for f in features], ['Trechos / Norte', 'Trechos', 'Rede']
+        )
+        self.assertEqual(features[0]['geometry']['type'], 'LineString')
+        self.assertEqual([c[:2] for c in features[0]['geometry']['coordinates']], [[-46.60, -23.50], [-46.61, -23.51]])
+        self.assertEqual(features[1]['properties']['description'], 'Trecho dois')
+        self.assertEqual(features[2]['geometry']['type'], 'Point')
+        self.assertEqual(features[2]['geometry']['coordinates'][:2], [-46.64, -23.54])
+
+    def test_collection_wrapper_keeps_document_name(self):
+        collection = kml_to_geojson_features(KML.decode('utf-8'))
+        self.assertEqual(collection['type'], 'FeatureCollection')
+        self.assertEqual(collection['name'], 'Rede')
+        self.assertEqual(len(collection['features']), 3)
+
+
+class ImportSourceTests(TestCase):
+    def _names(self, data, filename):
+        with open_geo_import_source(io.BytesIO(data), filename) as (features, position):
+            names = [f['properties']['name'] for f in features]
+            self.assertGreater(position(), 0)
+        return names
+
+    def test_kmz_reads_inner_kml(self):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, 'w') as zf:
+            zf.writestr('doc.kml', KML)
+        self.assertEqual(self._names(buf.getvalue(), 'rede.kmz'), ['T1', 'T2', 'Poço'])
+
+    def test_kml_detected_by_content(self):
+        self.assertEqual(self._names(KML, 'sem_extensao'), ['T1', 'T2', 'Poço'])
+
+    def test_geojson_feature_collection(self):
+        data = json.dumps({'type': 'FeatureCollection', 'features': [_point('P1'), _point('P2')]}).encode()
+        self.assertEqual(self._names(data, 'pontos.geojson'), ['P1', 'P2'])
+
+    def test_invalid_geojson_and_empty_kmz_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self._names(json.dumps({'type': 'Feature'}).encode(), 'x.geojson')
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, 'w') as zf:
+            zf.writestr('leia.txt', 'nada')
+        with self.assertRaises(ValueError):
+            self._names(buf.getvalue(), 'x.kmz')
+
+
+class GeoJsonStreamTests(TestCase):
+    def test_features_are_read_across_small_blocks(self):
+        payload = {
+            'name': 'Rede São Paulo',
+            'features': [_point('P1', lon=-46.612345), _point('Poço 2'), _point('P3', lat=-23.5e0)],
+            'type': 'FeatureCollection',
+            'bbox': [-46.7, -23.6, -46.5, -23.4],
+        }
+        meta = {}
+        with mock.patch('mapa_geo.services._GEOJSON_READ_SIZE', 7):
+            features = list(iter_geojson_features(io.BytesIO(json.dumps(payload, indent=1).encode()), meta))
+        self.assertEqual(features, payload['features'])
+        self.assertEqual(meta, {'name': 'Rede São Paulo', 'type': 'FeatureCollection', 'bbox': payload['bbox']})
+
+    def test_features_are_yielded_before_the_file_ends(self):
+        data = json.dumps({'type': 'FeatureCollection', 'features': [_point(f'P{i}') for i in range(2000)]}).encode()
+        source = io.BytesIO(data)
+        first = next(iter_geojson_features(source))
+        self.assertEqual(first['properties']['name'], 'P0')
+        self.assertLess(source.tell(), len(data))
+
+    def test_wrong_type_stops_before_reading_features(self):
+        data = b'{"type": "Feature", "features": [' + b'{"x": 1},' * 10000 + b'{}]}'
+        source = io.BytesIO(data)
+        with self.assertRaises(ValueError):
+            list(iter_geojson_features(source))
+        self.assertLess(source.tell(), len(data))
+
+    def test_type_after_features_and_truncated_file_are_rejected(self):
+        with self.assertRaises(ValueError):
+            list(iter_geojson_features(io.BytesIO(b'{"features": [], "type": "Feature"}')))
+        with self.assertRaises(ValueError):
+            list(iter_geojson_features(io.BytesIO(b'{"type": "FeatureCollection", "features": [{"a"')))
+
+
+class ChunkedUpsertTests(_ImportBase):
+    def test_chunks_report_progress_and_reimport_updates_in_place(self):
+        progress = []
+        items = [_point(f'P{i}', lon=-46.6 - i / 100) for i in range(5)]
+        stats = import_feature_stream(
+            self.project, items, chunk_size=2, on_progress=lambda s: progress.append(dict(s))
+        )
+        self.assertEqual(stats, {'created': 5, 'updated': 0, 'total': 5, 'removed': 0})
+        self.assertEqual([p['total'] for p in progress], [2, 4, 5])
+        ids = dict(GeoFeature.objects.filter(project=self.project).values_list('name', 'pk'))
+
+        items[0]['geometry']['coordinates'] = [-47.0, -24.0]
+        stats = import_feature_stream(self.project, items + [_point('P9')], chunk_size=2)
+        self.assertEqual(stats, {'created': 1, 'updated': 5, 'total': 6, 'removed': 0})
+        self.assertEqual(GeoFeature.objects.filter(project=self.project).count(), 6)
+        moved = GeoFeature.objects.get(pk=ids['P0'])
+        self.assertEqual(moved.longitude, Decimal('-47'))
+        self.assertEqual(moved.bbox_min_lon, -47.0)
+
+    def test_repeated_key_in_stream_keeps_last_occurrence(self):
+        stats = import_feature_stream(
+            self.project, [_point('P1'), _point('P2'), _point('P1', lon=-45.0)], chunk_size=10
+        )
+        self.assertEqual(stats, {'created': 2, 'updated': 1, 'total': 3, 'removed': 0})
+        self.assertEqual(GeoFeature.objects.get(project=self.project, name='P1').longitude, Decimal('-45'))
+
+    def test_lines_get_file_order(self):
+        line = {
+            'type': 'Feature',
+            'properties': {'name': 'L'},
+            'geometry': {'type': 'LineString', 'coordinates': [[-46.6, -23.5], [-46.7, -23.6]]},
+        }
+        items = [dict(line, properties={'name': f'L{i}'}) for i in range(3)]
+        import_feature_stream(self.project, items, chunk_size=2)
+        self.assertEqual(
+            list(GeoFeature.objects.filter(project=self.project).order_by('sort_order').values_list('name', flat=True)),
+            ['L0', 'L1', 'L2'],
+        )
+
+
+class ReplaceImportTests(_ImportBase):
+    def setUp(self):
+        import_feature_stream(self.project, [_point('Fica'), _point('Sai')])
+        self.kept = GeoFeature.objects.get(project=self.project, name='Fica')
+        GeoProgressSnapshot.objects.create(
+            feature=self.kept, snapshot_date=date(2026, 3, 2), progress_pct=Decimal('40'), status='in_progress'
+        )
+        self.manual = GeoFeature.objects.create(
+            project=self.project,
+            name='Desenhado',
+            geometry_type='Point',
+            geometry={'type': 'Point', 'coordinates': [-46.0, -23.0]},
+        )
+
+    def test_unseen_features_are_removed_after_last_chunk(self):
+        stats = import_feature_stream(self.project, [_point('Fica'), _point('Nova')], replace=True, chunk_size=1)
+        self.assertEqual(stats['removed'], 2)
+        self.assertEqual(
+            sorted(GeoFeature.objects.filter(project=self.project).values_list('name', flat=True)), ['Fica', 'Nova']
+        )
+        # Elemento que continua no arquivo mantém id e histórico.
+        self.assertTrue(GeoProgressSnapshot.objects.filter(feature_id=self.kept.pk).exists())
+
+    def test_failure_mid_import_keeps_existing_features(self):
+        def items():
+            yield _point('Fica')
+            yield _point('Nova')
+            raise _Boom
+
+        with self.assertRaises(_Boom):
+            import_feature_stream(self.project, items(), replace=True, chunk_size=1)
+        self.assertEqual(
+            sorted(GeoFeature.objects.filter(project=self.project).values_list('name', flat=True)),
+            ['Desenhado', 'Fica', 'Nova', 'Sai'],
+        )
+
+    def test_file_without_valid_features_removes_nothing(self):
+        stats = import_feature_stream(self.project, [{'type': 'Feature', 'geometry': None}], replace=True)
+        self.assertEqual(stats['total'], 0)
+        self.assertEqual(GeoFeature.objects.filter(project=self.project).count(), 3)
+
+
+@override_settings(MEDIA_ROOT=_MEDIA)
+class GeoImportJobTests(_ImportBase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(_MEDIA, ignore_errors=True)
+
+    def _job(self, data, name, **extra):
+        return GeoImportJob.objects.create(
+            project=self.project, source=ContentFile(data, name=name), source_name=name, sync_diario=False, **extra
+        )
+
+    def test_job_imports_and_removes_source(self):
+        job = self._job(KML, 'rede.kml')
+        path = job.source.name
+        self.assertTrue(default_storage.exists(path))
+
+        run_geo_import_job_by_id(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual((job.processed, job.created_count, job.updated_count), (3, 3, 0))
+        self.assertEqual(job.bytes_read, job.bytes_total)
+        self.assertEqual(job.percent, 100)
+        self.assertFalse(job.source)
+        self.assertFalse(default_storage.exists(path))
+        self.assertEqual(GeoFeature.objects.filter(project=self.project).count(), 3)
+
+    def test_failed_job_records_error_and_removes_source(self):
+        job = self._job(b'{"type": "Feature"}', 'quebrado.geojson')
+        path = job.source.name
+
+        run_geo_import_job_by_id(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('FeatureCollection', job.error)
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(default_storage.exists(path))
+
+    def test_finished_job_is_not_run_again(self):
+        job = self._job(KML, 'rede.kml', status='done')
+        run_geo_import_job_by_id(job.pk)
+        self.assertFalse(GeoFeature.objects.filter(project=self.project).exists())
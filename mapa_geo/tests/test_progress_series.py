@@ -0,0 +1,93 @@
+"""
+Série colunar de progresso: mesmo resultado que a resolução por elemento
+(``resolve_feature_progress_and_status``) em qualquer data.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+
+from core.models import DiaryStatus
+from mapa_geo.enrichment import compare_features_at_dates
+from mapa_geo.models import GeoFeature, GeoProgressSnapshot
+from mapa_geo.progress_series import feature_progress_series, progress_at
+from mapa_geo.services import project_progress_at_date, resolve_feature_progress_and_status
+
+from .test_diary_sync import _MapaGeoDiaryBase
+
+
+class ColumnarSeriesTests(_MapaGeoDiaryBase):
+    def setUp(self):
+        cache.clear()
+        d1 = self._diary(date(2026, 3, 2))
+        self._log(d1, self.act_a, '20')
+        d2 = self._diary(date(2026, 3, 9))
+        self._log(d2, self.act_b, '40')
+        self._log(d2, self.act_a, '60')
+        d3 = self._diary(date(2026, 3, 16), status=DiaryStatus.REPROVADO_GESTOR)
+        self._log(d3, self.act_b, '90')
+        self.free_line = self._line('Livre 2', None)
+        self.snap_point = self._point('Com snapshots')
+        GeoProgressSnapshot.objects.create(
+            feature=self.snap_point, snapshot_date=date(2026, 3, 4), progress_pct=Decimal('30'), status='in_progress'
+        )
+        GeoProgressSnapshot.objects.create(
+            feature=self.snap_point, snapshot_date=date(2026, 3, 12), progress_pct=Decimal('100'), status='completed'
+        )
+        self.manual_point = self._point('Manual', progress_pct=Decimal('45'), status='blocked')
+
+    def _point(self, name, **extra):
+        return GeoFeature.objects.create(
+            project=self.project,
+            name=name,
+            geometry_type='Point',
+            geometry={'type': 'Point', 'coordinates': [-46.6, -23.5]},
+            **extra,
+        )
+
+    def _per_row(self, target):
+        line_ids = GeoFeature.objects.filter(
+            project=self.project, geometry_type='LineString', is_active=True
+        ).order_by('sort_order', 'id').values_list('id', flat=True)
+        line_index = {pk: i for i, pk in enumerate(line_ids, start=1)}
+        overall = project_progress_at_date(self.project, target)
+        out = {}
+        for feat in GeoFeature.objects.filter(project=self.project, is_active=True).select_related('activity'):
+            out[feat.pk] = resolve_feature_progress_and_status(
+                feat, target, overall=overall, line_index=line_index.get(feat.pk), line_total=len(line_index)
+            )
+        return out
+
+    def test_progress_at_matches_per_row_resolution(self):
+        series = feature_progress_series(self.project)
+        ids = [item['id'] for item in series['columns']['items']]
+        self.assertEqual(len(ids), 6)
+        day = date(2026, 2, 28)
+        while day <= date(2026, 3, 20):
+            with self.subTest(day=day):
+                expected = self._per_row(day)
+                got = dict(zip(ids, progress_at(series, day)))
+                self.assertEqual(
+                    {pk: (Decimal(p), s) for pk, (p, s) in got.items()},
+                    {pk: (Decimal(p), s) for pk, (p, s) in expected.items()},
+                )
+            day += timedelta(days=1)
+
+    def test_compare_uses_values_of_both_dates(self):
+        result = compare_features_at_dates(self.project, date(2026, 3, 9), date(2026, 3, 2))
+        by_id = {item['id']: item['properties'] for item in result['features']}
+        self.assertEqual(by_id[self.feat_a.pk]['progress_pct'], 60.0)
+        self.assertEqual(by_id[self.feat_a.pk]['compare']['change_type'], 'changed')
+        self.assertEqual(by_id[self.manual_point.pk]['compare']['change_type'], 'same')
+
+    def test_series_rebuilt_when_data_changes(self):
+        before = feature_progress_series(self.project)
+        GeoProgressSnapshot.objects.create(
+            feature=self.manual_point, snapshot_date=date(2026, 3, 5), progress_pct=Decimal('10'), status='in_progress'
+        )
+        after = feature_progress_series(self.project)
+        self.assertNotEqual(before['version'], after['version'])
+        index = [item['id'] for item in after['columns']['items']].index(self.manual_point.pk)
+        self.assertEqual(progress_at(after, date(2026, 3, 6))[index], (Decimal('10.00'), 'in_progress'))
@@ -8,6 +8,7 @@ urlpatterns = [
     path('selecionar-obra/', views.selecionar_obra_view, name='selecionar_obra'),
     path('', views.mapa_view, name='mapa'),
     path('importar/', views.importar_view, name='importar'),
+    path('importar/<int:job_id>/', views.importar_status_view, name='importar_status'),
     path('exportar/', views.exportar_view, name='exportar'),
     path('api/features/', views.api_features_view, name='api_features'),
     path('api/features/<int:pk>/', views.api_feature_detail_view, name='api_feature_detail'),
@@ -17,6 +18,7 @@ urlpatterns = [
     path('api/sync/', views.api_sync_view, name='api_sync'),
     path('api/folders/', views.api_folders_view, name='api_folders'),
     path('api/alerts/', views.api_alerts_view, name='api_alerts'),
+    path('api/importacoes/<int:job_id>/status/', views.api_importar_status_view, name='api_importar_status'),
     path('api/compare/', views.api_compare_view, name='api_compare'),
     path('relatorio/', views.relatorio_view, name='relatorio'),
     path('panorama/', views.panorama_view, name='panorama'),
@@ -1,12 +1,15 @@
 import csv
 import io
 import json
+import math
 import zipfile
 from datetime import datetime
 
 from django.contrib import messages
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from django.views.decorators.http import require_GET, require_http_methods
 
 from accounts.decorators import login_required
@@ -23,19 +26,23 @@ from .enrichment import (
     multi_obra_panorama,
 )
 
-from .models import GeoFeature, GeoObraConfig
+from .models import GeoFeature, GeoImportJob, GeoObraConfig
 from .services import (
     available_timeline_dates,
     create_geo_feature,
     delete_geo_feature,
     export_csv_geometrias_rows,
     export_csv_pontos_rows,
+    features_collection_version,
     features_geojson_at_date,
+    features_geojson_json,
+    features_tile_json,
+    features_tile_version,
     geojson_to_kml,
+    geo_import_job_payload,
     get_map_summary,
-    import_geojson_features,
-    kml_to_geojson_features,
     list_project_activities,
+    request_geo_import,
     sync_snapshots_from_diario,
     update_geo_feature,
 )
@@ -50,6 +57,35 @@ def _parse_date(value: str | None):
         return None
 
 
+def _parse_zoom(value: str | None) -> int | None:
+    try:
+        zoom = int(value)
+    except (TypeError, ValueError):
+        return None
+    return zoom if 0 <= zoom <= 22 else None
+
+
+def _parse_bbox(value: str | None) -> tuple[float, float, float, float] | None:
+    """
+    ``min_lon,min_lat,max_lon,max_lat`` (ordem do ``toBBoxString`` do Leaflet). Ausente ou fora
+    do mundo: ``None``; malformado ou com valor não finito (``nan``/``inf``): ``ValueError``.
+    """
+    if not value:
+        return None
+    try:
+        coords = [float(v) for v in value.split(',')]
+    except ValueError:
+        coords = []
+    if len(coords) != 4 or not all(math.isfinite(v) for v in coords):
+        raise ValueError('bbox inválido: use min_lon,min_lat,max_lon,max_lat.')
+    min_lon, min_lat, max_lon, max_lat = coords
+    min_lon, max_lon = max(min_lon, -180.0), min(max_lon, 180.0)
+    min_lat, max_lat = max(min_lat, -90.0), min(max_lat, 90.0)
+    if min_lon > max_lon or min_lat > max_lat:
+        return None
+    return min_lon, min_lat, max_lon, max_lat
+
+
 def _user_can_edit_geo(request) -> bool:
     user = request.user
     if user.is_staff or user.is_superuser:
@@ -153,9 +189,29 @@ def api_features_view(request):
     project = get_selected_project(request)
 
     if request.method == 'GET':
+        # Coleção serializada em cache por versão dos dados; a mesma versão é o ETag (304 sem rebuild).
+        # Com ``zoom``/``bbox``: só os elementos da área, com a geometria simplificada do zoom.
         target = _parse_date(request.GET.get('date'))
-        payload = features_geojson_at_date(project, target)
-        return JsonResponse(payload)
+        zoom = _parse_zoom(request.GET.get('zoom'))
+        try:
+            bbox = _parse_bbox(request.GET.get('bbox'))
+        except ValueError as exc:
+            return JsonResponse({'error': str(exc)}, status=400)
+        version = features_collection_version(project, target)
+        tiled = zoom is not None or bbox is not None
+        etag = quote_etag(features_tile_version(version, zoom, bbox) if tiled else version)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+        if tiled:
+            body = features_tile_json(project, target, zoom=zoom, bbox=bbox, version=version)
+        else:
+            body = features_geojson_json(project, target, version=version)
+        response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
 
     if not _user_can_edit_geo(request):
         return JsonResponse({'error': 'Sem permissão para editar o mapa.'}, status=403)
@@ -333,43 +389,36 @@ def importar_view(request):
 
     replace = request.POST.get('replace') == 'on'
     source_label = (request.POST.get('source_label') or upload.name or '').strip()[:200]
-    name_lower = (upload.name or '').lower()
+    job = request_geo_import(project, upload, user=request.user, source_label=source_label, replace=replace)
+    return redirect('mapa_geo:importar_status', job_id=job.pk)
 
-    try:
-        content = upload.read()
-        if name_lower.endswith('.kmz'):
-            with zipfile.ZipFile(io.BytesIO(content)) as zf:
-                kml_name = 'doc.kml' if 'doc.kml' in zf.namelist() else next(
-                    (n for n in zf.namelist() if n.lower().endswith('.kml')),
-                    None,
-                )
-                if not kml_name:
-                    raise ValueError('KMZ sem arquivo KML interno.')
-                raw = zf.read(kml_name).decode('utf-8', errors='replace')
-        else:
-            raw = content.decode('utf-8', errors='replace')
 
-        if name_lower.endswith('.kml') or raw.lstrip().startswith('<'):
-            payload = kml_to_geojson_features(raw)
-        else:
-            payload = json.loads(raw)
+def _import_job_for_request(request, job_id: int) -> GeoImportJob:
+    project = get_selected_project(request)
+    return get_object_or_404(GeoImportJob.objects.select_related('project'), pk=job_id, project=project)
 
-        stats = import_geojson_features(
-            project,
-            payload,
-            source_label=source_label,
-            replace=replace,
-        )
-        sync_stats = sync_snapshots_from_diario(project)
-        messages.success(
-            request,
-            f'Importação concluída: {stats["created"]} criados, {stats["updated"]} atualizados. '
-            f'Snapshots: {sync_stats["snapshots"]} em {sync_stats["dates"]} datas.',
-        )
-    except Exception as exc:
-        messages.error(request, f'Falha na importação: {exc}')
 
-    return redirect('mapa_geo:mapa')
+@login_required
+@mapa_geo_access_required
+@mapa_project_required
+@require_GET
+def importar_status_view(request, job_id: int):
+    """Acompanhamento da importação em segundo plano (a página consulta o status por polling)."""
+    job = _import_job_for_request(request, job_id)
+    return render(
+        request,
+        'mapa_geo/importar_status.html',
+        {'project': job.project, 'job': job, 'job_payload': geo_import_job_payload(job)},
+    )
+
+
+@login_required
+@mapa_geo_access_required
+@mapa_project_required
+@require_GET
+def api_importar_status_view(request, job_id: int):
+    job = _import_job_for_request(request, job_id)
+    return JsonResponse(geo_import_job_payload(job))
 
 
 @login_required
@@ -7,6 +7,7 @@ from .models import (
     AmbienteOperacional,
     AmbientePermissao,
     AmbienteVersao,
+    ImportacaoMatrizJob,
     SemanticaIndicador,
 )
 
@@ -67,3 +68,11 @@ class AmbienteCelulaAdmin(admin.ModelAdmin):
     list_filter = ("tipo",)
     search_fields = ("valor", "elemento__titulo")
 
+
+
+@admin.register(ImportacaoMatrizJob)
+class ImportacaoMatrizJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "ambiente", "nome_arquivo", "status", "linhas_lidas", "celulas_gravadas", "criado_em")
+    list_filter = ("status",)
+    search_fields = ("nome_arquivo", "ambiente__nome")
+    readonly_fields = ("criado_em", "atualizado_em", "iniciado_em", "concluido_em")
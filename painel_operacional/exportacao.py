@@ -0,0 +1,103 @@
+"""
+Exportação da matriz do ambiente para Excel, com cache do arquivo por ``AmbienteVersao``.
+
+O .xlsx é gerado com o writer write-only do openpyxl (linhas vão direto para o arquivo
+temporário) e guardado no storage com nome derivado da versão, de ``revisao`` (avança a cada
+gravação de elementos/células) e de ``updated_at`` (toda gravação do layout). Enquanto nada muda,
+exportações repetidas só leem o arquivo; na primeira exportação após uma alteração o arquivo
+anterior da versão é descartado. Duas primeiras exportações simultâneas geram o mesmo conteúdo:
+a que perde a corrida descarta a própria cópia e usa o arquivo da outra (nunca ficam nomes
+alternativos ``..._<sufixo>.xlsx`` no storage).
+"""
+import hashlib
+import logging
+import os
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+logger = logging.getLogger(__name__)
+
+EXPORTACOES_STORAGE_DIR = "painel_operacional/exportacoes"
+# Largura das colunas: estimada pelas primeiras linhas/colunas (como na exportação original).
+LARGURA_MAX_COLUNAS = 60
+LARGURA_MAX_LINHAS = 250
+
+
+def _carimbo(versao) -> str:
+    base = f"{versao.pk}:{versao.revisao}:{versao.updated_at.isoformat()}"
+    return hashlib.sha1(base.encode("utf-8")).hexdigest()[:16]
+
+
+def nome_cache_matriz(versao) -> str:
+    return f"{EXPORTACOES_STORAGE_DIR}/{versao.ambiente_id}/{versao.pk}_{_carimbo(versao)}.xlsx"
+
+
+def _larguras(rows: list[list[str]]) -> list[float]:
+    col_count = min(LARGURA_MAX_COLUNAS, len(rows[0]) if rows else 0)
+    larguras = []
+    for col_idx in range(col_count):
+        max_len = 0
+        for row in rows[:LARGURA_MAX_LINHAS]:
+            if col_idx < len(row):
+                max_len = max(max_len, len(str(row[col_idx] or "")))
+        larguras.append(min(28, max(8, max_len + 2)))
+    return larguras
+
+
+def escrever_matriz_excel(rows: list[list[str]], destino) -> None:
+    """Grava ``rows`` como planilha "Mapa de Controle" em ``destino`` (caminho ou arquivo)."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Mapa de Controle")
+    # No modo write-only as larguras precisam ser definidas antes da primeira linha.
+    for col_idx, largura in enumerate(_larguras(rows), start=1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = largura
+    for row in rows:
+        ws.append([str(cell or "") for cell in row])
+    wb.save(destino)
+
+
+def _descartar_anteriores(versao) -> None:
+    pasta = f"{EXPORTACOES_STORAGE_DIR}/{versao.ambiente_id}"
+    prefixo = f"{versao.pk}_"
+    atual = f"{prefixo}{_carimbo(versao)}"
+    try:
+        _dirs, arquivos = default_storage.listdir(pasta)
+    except (FileNotFoundError, OSError):
+        return
+    for nome in arquivos:
+        caminho = f"{pasta}/{nome}"
+        if nome.startswith(prefixo) and not nome.startswith(atual):
+            try:
+                default_storage.delete(caminho)
+            except OSError:
+                logger.warning("Exportação em cache não removida: %s", caminho)
+
+
+def arquivo_matriz_excel(versao, rows_da_versao) -> str:
+    """
+    Caminho no storage do .xlsx da matriz da versão; gera (``rows_da_versao()``) só se não houver
+    arquivo para o estado atual. ``rows_da_versao`` retornando vazio -> ``""``.
+    """
+    nome = nome_cache_matriz(versao)
+    if default_storage.exists(nome):
+        return nome
+    rows = rows_da_versao()
+    if not rows:
+        return ""
+    fd, tmp_path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        escrever_matriz_excel(rows, tmp_path)
+        with open(tmp_path, "rb") as fh:
+            salvo = default_storage.save(nome, File(fh))
+    finally:
+        os.unlink(tmp_path)
+    if salvo != nome:
+        # Outra requisição gravou o mesmo estado primeiro; o storage deu um nome alternativo.
+        default_storage.delete(salvo)
+    _descartar_anteriores(versao)
+    return nome
@@ -0,0 +1,239 @@
+"""
+Importação de planilha para a matriz de um ambiente em background (``ImportacaoMatrizJob``).
+
+A planilha é lida e interpretada em streaming (``planilha.abrir_planilha``/``interpretar_planilha``)
+fora de transação; depois rascunho (travado primeiro), elemento, células da matriz e histórico
+são gravados numa única transação — as células trocadas por diferença (``sincronizar_celulas``),
+então quem lê a matriz nunca vê células novas com layout antigo (ou a matriz vazia).
+O layout gerado é o mesmo que o shell montava no navegador (``buildImportedLayoutFromRows``).
+"""
+import copy
+import logging
+import unicodedata
+from uuid import uuid4
+
+from django.db import transaction
+from django.utils import timezone
+
+from suprimentos.views_controle import _normalize_ambiente_layout
+
+from .models import (
+    AmbienteElemento,
+    AmbienteHistorico,
+    AmbienteVersao,
+    ImportacaoMatrizJob,
+    VersaoEstado,
+)
+from .planilha import abrir_planilha, interpretar_planilha
+from .sincronizacao import _map_kind_to_element_type, sincronizar_celulas
+
+logger = logging.getLogger(__name__)
+
+
+def _norm_header(value) -> str:
+    txt = unicodedata.normalize("NFD", str(value or ""))
+    return "".join(ch for ch in txt if not unicodedata.combining(ch)).upper().strip()
+
+
+def _total_column_index(header: list, meta: dict) -> int | None:
+    total = meta.get("total_col_interpreted")
+    total = total if isinstance(total, int) and total >= 1 else -1
+    source = meta.get("total_col_source")
+    if isinstance(source, int) and source >= 1 and total < 0:
+        total = source
+    for idx in range(len(header) - 1, 0, -1):
+        token = _norm_header(header[idx])
+        if not token:
+            continue
+        if token.startswith("TOTAL"):
+            if total < 0:
+                total = idx
+            break
+    return total if total >= 1 else None
+
+
+def montar_layout_importado(layout_base: dict, rows: list[list[str]], meta: dict, secao_id: str = "") -> tuple[dict, dict]:
+    """
+    Layout do rascunho com ``rows`` na matriz: a seção ``secao_id`` (ou a primeira tabela/matriz;
+    sem nenhuma, cria "Matriz de Controle"). Retorna ``(layout, secao)``.
+    """
+    layout = copy.deepcopy(layout_base) if isinstance(layout_base, dict) else {}
+    sections = layout.get("sections") if isinstance(layout.get("sections"), list) else []
+    tabelas = [s for s in sections if isinstance(s, dict) and s.get("kind") in ("matrix_table", "table")]
+    matrix = next((s for s in tabelas if secao_id and s.get("id") == secao_id), None)
+    if matrix is None and tabelas:
+        matrix = tabelas[0]
+    if matrix is None:
+        matrix = {
+            "id": secao_id or f"sec_{uuid4().hex[:8]}",
+            "title": "Matriz de Controle",
+            "kind": "matrix_table",
+            "x": 80,
+            "y": 80,
+            "width": 680,
+            "height": 420,
+            "layer": {},
+            "data": {},
+        }
+        sections.insert(0, matrix)
+    if not isinstance(matrix.get("data"), dict):
+        matrix["data"] = {}
+    header = rows[0] if rows and isinstance(rows[0], list) else []
+    cols = max(1, max((len(r) for r in rows if isinstance(r, list)), default=0))
+    matrix["data"].update(
+        {
+            "rows": rows,
+            "mapaControleTemplate": True,
+            "totalColumnIndex": _total_column_index(header, meta),
+            "importMeta": copy.deepcopy(meta),
+            "headerBandCount": 1,
+            "totalsColumnAuto": False,
+            "totalsRowAuto": False,
+            "verticalHeaders": False,
+            "colWeights": None,
+            "rowWeights": None,
+        }
+    )
+    matrix["width"] = max(int(matrix.get("width") or 0), min(3000, 180 + cols * 28))
+    matrix["height"] = max(int(matrix.get("height") or 0), min(1500, 140 + max(1, len(rows)) * 26))
+    layout["sections"] = sections
+    return layout, matrix
+
+
+def _rascunho(ambiente) -> AmbienteVersao:
+    draft = ambiente.versoes.filter(estado=VersaoEstado.DRAFT).order_by("-numero").first()
+    if draft:
+        return draft
+    return AmbienteVersao.objects.create(
+        ambiente=ambiente,
+        numero=AmbienteVersao.proximo_numero(ambiente.id),
+        estado=VersaoEstado.DRAFT,
+        layout={},
+        metadados={},
+    )
+
+
+def executar_importacao_matriz(job: ImportacaoMatrizJob) -> None:
+    """Lê, interpreta e aplica a planilha do job na matriz do rascunho do ambiente."""
+    ImportacaoMatrizJob.objects.filter(pk=job.pk).update(
+        status=ImportacaoMatrizJob.STATUS_PROCESSANDO,
+        iniciado_em=timezone.now(),
+        atualizado_em=timezone.now(),
+    )
+
+    def _progresso(lidas: int) -> None:
+        ImportacaoMatrizJob.objects.filter(pk=job.pk).update(linhas_lidas=lidas, atualizado_em=timezone.now())
+
+    with job.arquivo.open("rb") as fh:
+        with abrir_planilha(fh, sheet_name=job.aba) as (linhas, aba_lida, read_diag):
+            resultado = interpretar_planilha(linhas, mode=job.modo, read_diag=read_diag, progresso=_progresso)
+    rows = resultado["rows"]
+    meta = resultado["meta"]
+    ImportacaoMatrizJob.objects.filter(pk=job.pk).update(
+        linhas_lidas=resultado["linhas_lidas"],
+        celulas_total=sum(len(r) for r in rows),
+        atualizado_em=timezone.now(),
+    )
+
+    ambiente = job.ambiente
+    draft = _rascunho(ambiente)
+    with transaction.atomic():
+        # Trava o rascunho antes de tudo: gravações do editor no mesmo rascunho esperam o fim.
+        draft = AmbienteVersao.objects.select_for_update().get(pk=draft.pk)
+        layout, secao = montar_layout_importado(draft.layout, rows, resultado["interpretation_meta"], job.secao_id)
+        revisao = draft.avancar_revisao()
+        draft.layout = _normalize_ambiente_layout(layout)
+        draft.metadados = {**(draft.metadados or {}), "source": "shell_create_import"}
+        draft.save(update_fields=["layout", "metadados", "updated_at"])
+
+        secao = next(s for s in draft.layout["sections"] if isinstance(s, dict) and s.get("id") == secao["id"])
+        tipo = _map_kind_to_element_type((secao.get("kind") or "").strip())
+        dados = dict(secao.get("data")) if isinstance(secao.get("data"), dict) else {}
+        dados["kind"] = secao.get("kind")
+        dados["semantica"] = (secao.get("semantica") or dados.get("semantica") or "").strip()
+        elemento = (
+            AmbienteElemento.objects.select_for_update()
+            .filter(ambiente=ambiente, chave_externa=secao["id"])
+            .first()
+        ) or AmbienteElemento(ambiente=ambiente, chave_externa=secao["id"])
+        elemento.versao = draft
+        elemento.titulo = (secao.get("title") or "").strip()
+        elemento.tipo = tipo
+        elemento.x = int(secao.get("x") or 0)
+        elemento.y = int(secao.get("y") or 0)
+        elemento.width = int(secao.get("width") or 320)
+        elemento.height = int(secao.get("height") or 180)
+        elemento.z_index = draft.layout["sections"].index(secao)
+        elemento.camada = secao.get("layer") if isinstance(secao.get("layer"), dict) else {}
+        elemento.dados = dados
+        elemento.ativo = True
+        elemento.origem_layout = True
+        elemento.revisao = revisao
+        elemento.save()
+        # Células iguais às linhas normalizadas do layout (como grava a sincronização do editor).
+        celulas = dados.get("rows") if tipo == "table" and isinstance(dados.get("rows"), list) else []
+        if tipo == "table":
+            sincronizar_celulas(elemento, celulas)
+
+        AmbienteHistorico.objects.create(
+            ambiente=ambiente,
+            versao=draft,
+            usuario=job.solicitado_por,
+            acao=AmbienteHistorico.ACAO_SALVAR,
+            detalhes={
+                "acao_editor": "importar_planilha",
+                "secao_id": secao["id"],
+                "importacao_id": job.pk,
+                "strategy": resultado["strategy"],
+            },
+        )
+        ImportacaoMatrizJob.objects.filter(pk=job.pk).update(
+            status=ImportacaoMatrizJob.STATUS_CONCLUIDO,
+            secao_id=secao["id"],
+            celulas_gravadas=sum(len(r) for r in celulas if isinstance(r, list)),
+            resultado={
+                "sheet": read_diag.get("selected_sheet") or aba_lida,
+                "strategy": resultado["strategy"],
+                "report": resultado["report"],
+                **meta,
+            },
+            concluido_em=timezone.now(),
+            atualizado_em=timezone.now(),
+        )
+
+
+def solicitar_importacao_matriz(ambiente, arquivo, *, usuario, aba: str = "", modo: str = "auto") -> ImportacaoMatrizJob:
+    """Registra a importação e a agenda após o commit (fila Celery ou thread)."""
+    from .tasks import agendar_importacao_matriz
+
+    job = ImportacaoMatrizJob.objects.create(
+        ambiente=ambiente,
+        solicitado_por=usuario,
+        arquivo=arquivo,
+        nome_arquivo=(getattr(arquivo, "name", "") or "")[:255],
+        aba=aba[:120],
+        modo=modo,
+    )
+    transaction.on_commit(lambda: agendar_importacao_matriz(job.pk))
+    return job
+
+
+def importacao_matriz_payload(job: ImportacaoMatrizJob) -> dict:
+    """Estado do job para o polling do shell."""
+    concluido = job.status == ImportacaoMatrizJob.STATUS_CONCLUIDO
+    resultado = job.resultado if isinstance(job.resultado, dict) else {}
+    return {
+        "id": job.pk,
+        "status": job.status,
+        "status_label": job.get_status_display(),
+        "progress": job.percentual,
+        "linhas_lidas": job.linhas_lidas,
+        "celulas_total": job.celulas_total,
+        "celulas_gravadas": job.celulas_gravadas,
+        "error": job.erro,
+        "done": concluido or job.status == ImportacaoMatrizJob.STATUS_FALHOU,
+        "rows": resultado.get("rows", 0) if concluido else 0,
+        "cols": resultado.get("cols", 0) if concluido else 0,
+        "sheet": resultado.get("sheet", "") if concluido else "",
+        "strategy": resultado.get("strategy", "") if concluido else "",
+    }
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('painel_operacional', '0005_remove_ambiente_elemento_conditional_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacaoMatrizJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('arquivo', models.FileField(upload_to='painel_operacional/importacoes/%Y/%m/')),
+                ('nome_arquivo', models.CharField(blank=True, default='', max_length=255)),
+                ('aba', models.CharField(blank=True, default='', max_length=120)),
+                ('modo', models.CharField(default='auto', max_length=10)),
+                ('secao_id', models.CharField(blank=True, default='', max_length=120)),
+                ('status', models.CharField(choices=[('pendente', 'Na fila'), ('processando', 'Processando'), ('concluido', 'Concluído'), ('falhou', 'Falhou')], db_index=True, default='pendente', max_length=20)),
+                ('linhas_lidas', models.PositiveIntegerField(default=0)),
+                ('celulas_total', models.PositiveIntegerField(default=0)),
+                ('celulas_gravadas', models.PositiveIntegerField(default=0)),
+                ('resultado', models.JSONField(blank=True, default=dict)),
+                ('erro', models.TextField(blank=True, default='')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('iniciado_em', models.DateTimeField(blank=True, null=True)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+                ('ambiente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='importacoes_matriz', to='painel_operacional.ambienteoperacional')),
+                ('solicitado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Importação de matriz',
+                'verbose_name_plural': 'Importações de matriz',
+                'ordering': ['-criado_em'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('painel_operacional', '0006_importacao_matriz_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ambienteelemento',
+            name='revisao',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='ambienteversao',
+            name='revisao',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
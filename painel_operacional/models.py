@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F
 from django.utils import timezone
 
 from mapa_obras.models import Obra
@@ -60,6 +61,8 @@ class AmbienteVersao(models.Model):
     estado = models.CharField(max_length=20, choices=VersaoEstado.choices, default=VersaoEstado.DRAFT)
     layout = models.JSONField(default=dict, blank=True)
     metadados = models.JSONField(default=dict, blank=True)
+    # Contador de gravações de elementos no rascunho (base da sincronização incremental do editor).
+    revisao = models.PositiveIntegerField(default=0)
     publicado_em = models.DateTimeField(null=True, blank=True)
     publicado_por = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -92,6 +95,15 @@ class AmbienteVersao(models.Model):
         )
         return (ultimo or 0) + 1
 
+    def avancar_revisao(self) -> int:
+        """
+        Incrementa ``revisao`` no banco e devolve o novo valor. Dentro de uma transação, o lock
+        da linha serializa as gravações concorrentes no mesmo rascunho.
+        """
+        AmbienteVersao.objects.filter(pk=self.pk).update(revisao=F("revisao") + 1)
+        self.revisao = AmbienteVersao.objects.filter(pk=self.pk).values_list("revisao", flat=True).get()
+        return self.revisao
+
 
 class AmbientePermissao(models.Model):
     PAPEL_VIEWER = "viewer"
@@ -230,6 +242,8 @@ class AmbienteElemento(models.Model):
     dados = models.JSONField(default=dict, blank=True)
     ativo = models.BooleanField(default=True)
     origem_layout = models.BooleanField(default=True)
+    # ``AmbienteVersao.revisao`` do rascunho na última gravação do elemento.
+    revisao = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -285,3 +299,62 @@ class AmbienteCelula(models.Model):
     def __str__(self):
         return f"{self.elemento_id} [{self.linha_idx},{self.coluna_idx}]"
 
+
+
+class ImportacaoMatrizJob(models.Model):
+    """
+    Importação de planilha para a matriz de um ambiente, processada em background
+    (``painel_operacional.importacao``): leitura em streaming e matriz aplicada numa transação.
+    """
+
+    STATUS_PENDENTE = "pendente"
+    STATUS_PROCESSANDO = "processando"
+    STATUS_CONCLUIDO = "concluido"
+    STATUS_FALHOU = "falhou"
+    STATUS_CHOICES = (
+        (STATUS_PENDENTE, "Na fila"),
+        (STATUS_PROCESSANDO, "Processando"),
+        (STATUS_CONCLUIDO, "Concluído"),
+        (STATUS_FALHOU, "Falhou"),
+    )
+
+    ambiente = models.ForeignKey(AmbienteOperacional, on_delete=models.CASCADE, related_name="importacoes_matriz")
+    solicitado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    arquivo = models.FileField(upload_to="painel_operacional/importacoes/%Y/%m/")
+    nome_arquivo = models.CharField(max_length=255, blank=True, default="")
+    aba = models.CharField(max_length=120, blank=True, default="")
+    modo = models.CharField(max_length=10, default="auto")
+    secao_id = models.CharField(max_length=120, blank=True, default="")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDENTE, db_index=True)
+    linhas_lidas = models.PositiveIntegerField(default=0)
+    celulas_total = models.PositiveIntegerField(default=0)
+    celulas_gravadas = models.PositiveIntegerField(default=0)
+    resultado = models.JSONField(default=dict, blank=True)
+    erro = models.TextField(blank=True, default="")
+    criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+    iniciado_em = models.DateTimeField(null=True, blank=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-criado_em"]
+        verbose_name = "Importação de matriz"
+        verbose_name_plural = "Importações de matriz"
+
+    def __str__(self):
+        return f"{self.ambiente.nome}: {self.nome_arquivo} ({self.status})"
+
+    @property
+    def percentual(self) -> int:
+        if self.status == self.STATUS_CONCLUIDO:
+            return 100
+        if not self.celulas_total:
+            return 0
+        # Leitura/interpretação conta como a primeira metade do trabalho.
+        return min(99, 50 + int(self.celulas_gravadas * 50 / self.celulas_total))
@@ -0,0 +1,1004 @@
+"""
+Leitura e interpretação de planilhas (Excel/CSV) importadas para matrizes do painel operacional.
+
+``abrir_planilha`` lê em streaming (openpyxl read-only) e escolhe a aba por amostra limitada;
+``interpretar_planilha`` estrutura as linhas em matriz sem carregar a planilha inteira quando
+o formato é de registros (uma linha por local x atividade, o caso das planilhas grandes).
+"""
+import csv
+import re
+import unicodedata
+import warnings
+from contextlib import contextmanager
+from datetime import date, datetime
+from itertools import chain, islice
+from typing import Callable, Iterable, Iterator
+
+from openpyxl import load_workbook
+
+PO_MAX_IMPORT_ROWS = 30000
+PO_MAX_IMPORT_COLS = 400
+PO_MAX_IMPORT_CELLS = 600_000
+# Amostra por aba na escolha automática e cabeça usada para decidir a estratégia
+# (cobre a busca de cabeçalho e a inferência da coluna de status).
+PO_AUTO_PICK_SAMPLE_ROWS = 700
+PO_AUTO_PICK_SAMPLE_COLS = 140
+PO_IMPORT_HEAD_ROWS = 1300
+
+
+def _excel_value_to_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value).strip()
+
+
+def _normalize_import_rows(rows: list[list[str]]) -> list[list[str]]:
+    compact = []
+    max_cols = 0
+    for row in rows:
+        out = [_excel_value_to_text(cell) for cell in row]
+        while out and not out[-1]:
+            out.pop()
+        if not out:
+            continue
+        compact.append(out)
+        max_cols = max(max_cols, len(out))
+    if not compact or max_cols <= 0:
+        return []
+    for row in compact:
+        if len(row) < max_cols:
+            row.extend([""] * (max_cols - len(row)))
+    return compact
+
+
+_EXCEL_AVISOS_IGNORADOS = (
+    r".*(Unknown extension|Conditional Formatting extension|Slicer List extension|Data Validation extension).*"
+)
+
+
+@contextmanager
+def _sem_avisos_excel():
+    # Planilhas reais frequentemente trazem extensões de Excel que o openpyxl ignora;
+    # não queremos poluir logs/terminal com esses avisos esperados.
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=UserWarning, message=_EXCEL_AVISOS_IGNORADOS)
+        yield
+
+
+def _iter_raw_ws(ws) -> Iterator[tuple]:
+    """Linhas cruas da aba (modo read-only), sem materializar a planilha."""
+    if not hasattr(ws, "iter_rows"):
+        return
+    rows = ws.iter_rows(values_only=True, max_row=PO_MAX_IMPORT_ROWS + 1)
+    while True:
+        with _sem_avisos_excel():
+            row = next(rows, None)
+        if row is None:
+            return
+        yield row
+
+
+def _linhas_texto(raw_rows: Iterable, max_cols: int = PO_MAX_IMPORT_COLS + 1) -> Iterator[list[str]]:
+    """Linhas em texto (sem vazias à direita), descartando as vazias; não completa colunas."""
+    for row in raw_rows:
+        out = [_excel_value_to_text(cell) for cell in list(row)[:max_cols]]
+        while out and not out[-1]:
+            out.pop()
+        if out:
+            yield out
+
+
+def _linhas_csv(data: bytes) -> tuple[Iterator[list[str]], dict]:
+    csv_encoding = "utf-8-sig"
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        # Fallback comum em exportações legadas do Excel no Windows.
+        text = data.decode("latin-1", errors="replace")
+        csv_encoding = "latin-1"
+    sample = text[:4096]
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=";,")
+        sep = dialect.delimiter
+    except csv.Error:
+        sep = ";" if sample.count(";") >= sample.count(",") else ","
+    reader = csv.reader(text.splitlines(), delimiter=sep)
+    linhas = _linhas_texto(islice(reader, PO_MAX_IMPORT_ROWS + 1))
+    return linhas, {"selected_sheet": "CSV", "sheet_mode": "csv", "encoding": csv_encoding}
+
+
+@contextmanager
+def abrir_planilha(arquivo, sheet_name: str = ""):
+    """
+    Abre Excel (.xlsx, read-only) ou CSV e entrega ``(linhas, aba, diagnostico)``: ``linhas``
+    é um iterador preguiçoso de linhas em texto da aba escolhida. Sem ``sheet_name`` a aba é
+    escolhida pontuando uma amostra limitada de cada aba; a amostra da vencedora é reaproveitada
+    como início da leitura.
+    """
+    suffix = (getattr(arquivo, "name", "") or "").lower().strip()
+    arquivo.seek(0)
+    if not arquivo.read(1):
+        yield iter(()), "", {}
+        return
+    arquivo.seek(0)
+
+    if suffix.endswith(".csv"):
+        linhas, diagnostics = _linhas_csv(arquivo.read())
+        yield linhas, "CSV", diagnostics
+        return
+
+    if suffix.endswith(".xls"):
+        raise ValueError("Formato .xls antigo não suportado diretamente. Salve como .xlsx e tente novamente.")
+
+    with _sem_avisos_excel():
+        wb = load_workbook(filename=arquivo, read_only=True, data_only=True)
+    melhor_raw = None
+    try:
+        sheets = list(wb.sheetnames)
+        explicit_sheet = sheet_name if sheet_name and sheet_name in sheets else ""
+        diagnostics = {"sheet_mode": "explicit" if explicit_sheet else "auto", "candidate_sheets": sheets[:20]}
+
+        if explicit_sheet:
+            ws = wb[explicit_sheet]
+            linhas = _linhas_texto(_iter_raw_ws(ws))
+            primeira = next(linhas, None)
+            if primeira is None:
+                raise ValueError("A aba selecionada não contém células tabulares para importação.")
+            diagnostics["selected_sheet"] = explicit_sheet
+            yield chain([primeira], linhas), str(ws.title or "Planilha"), diagnostics
+            return
+
+        best_name = None
+        best_score = -1.0
+        best_sample_rows = []
+        best_sample_raw = []
+        best_strategy = ""
+        best_confidence = 0.0
+        for name in sheets:
+            raw = _iter_raw_ws(wb[name])
+            sample_raw = list(islice(raw, PO_AUTO_PICK_SAMPLE_ROWS))
+            sample_rows = _normalize_import_rows([list(r)[:PO_AUTO_PICK_SAMPLE_COLS] for r in sample_raw])
+            score = _score_rows_for_auto_pick(sample_rows)
+            try:
+                _tmp_rows, strategy, report = _interpret_import_rows(sample_rows, mode="auto")
+                confidence = float(report.get("confidence") or 0.0)
+            except Exception:
+                strategy = ""
+                confidence = 0.0
+            score += confidence * 7.0
+            if strategy and strategy != "fallback_bruto":
+                score += 3.0
+            name_norm = _norm_token(name)
+            if name_norm in {"DADOS", "EXECUCAO", "SERVICOS", "SERVICO", "STATUS"}:
+                score += 1.8
+            if score > best_score:
+                if melhor_raw is not None:
+                    melhor_raw.close()
+                melhor_raw = raw
+                best_score = score
+                best_name = name
+                best_sample_rows = sample_rows
+                best_sample_raw = sample_raw
+                best_strategy = strategy
+                best_confidence = confidence
+            else:
+                raw.close()
+
+        if not best_name:
+            ws = wb.active
+            diagnostics["selected_sheet"] = str(ws.title or "Planilha")
+            yield _linhas_texto(_iter_raw_ws(ws)), str(ws.title or "Planilha"), diagnostics
+            return
+
+        ws = wb[best_name]
+        diagnostics["selected_sheet"] = best_name
+        diagnostics["auto_score"] = round(best_score, 3)
+        diagnostics["sample_rows"] = len(best_sample_rows)
+        if best_strategy:
+            diagnostics["auto_strategy"] = best_strategy
+            diagnostics["auto_confidence"] = round(best_confidence, 3)
+        yield _linhas_texto(chain(best_sample_raw, melhor_raw)), str(ws.title or "Planilha"), diagnostics
+    finally:
+        if melhor_raw is not None:
+            melhor_raw.close()
+        wb.close()
+
+
+def _norm_token(value: object) -> str:
+    text = _excel_value_to_text(value).upper()
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text).encode("ASCII", "ignore").decode("ASCII")
+    text = re.sub(r"[^A-Z0-9% ]+", " ", text)
+    return " ".join(text.split())
+
+
+def _parse_percent_value(text: str) -> float | None:
+    raw = _excel_value_to_text(text)
+    if not raw:
+        return None
+    t = raw.replace(" ", "").replace("\u00a0", "")
+    t = t.replace("%", "")
+    t = t.replace("R$", "").replace("r$", "")
+    if "," in t and "." in t:
+        # Suporta formatos BR (1.234,56) e EN (1,234.56) usando o último separador como decimal.
+        if t.rfind(".") > t.rfind(","):
+            t = t.replace(",", "")
+        else:
+            t = t.replace(".", "").replace(",", ".")
+    elif "," in t:
+        t = t.replace(",", ".")
+    try:
+        v = float(t)
+    except ValueError:
+        norm = _norm_token(raw)
+        if norm in {"OK", "CONCLUIDO", "CONCLUIDA", "SIM", "DONE"}:
+            return 100.0
+        if norm in {"N", "NAO", "NAO INICIADO", "PENDENTE"}:
+            return 0.0
+        return None
+    if 0 <= v <= 1:
+        v *= 100
+    return max(0.0, min(100.0, v))
+
+
+def _binary_ratio_rows(rows: list[list[str]], max_cells: int = 5000) -> float:
+    if not rows:
+        return 0.0
+    seen = 0
+    binary = 0
+    for row in rows:
+        if not isinstance(row, list):
+            continue
+        for cell in row:
+            txt = _excel_value_to_text(cell)
+            if not txt:
+                continue
+            seen += 1
+            t = txt.strip()
+            if t in {"0", "1"}:
+                binary += 1
+            if seen >= max_cells:
+                return binary / max(1, seen)
+    return binary / max(1, seen)
+
+
+def _score_rows_for_auto_pick(rows: list[list[str]]) -> float:
+    if not rows:
+        return -1.0
+    row_count = len(rows)
+    col_count = max((len(r) for r in rows), default=0)
+    if row_count < 2 or col_count < 2:
+        return -0.5
+
+    header_idx, col_map = _find_header_and_map(rows)
+    token_hits = 0
+    if header_idx is not None and col_map:
+        token_hits = len([k for k in col_map.keys() if not str(k).startswith("_")])
+    has_activity = col_map.get("atividade") is not None if isinstance(col_map, dict) else False
+
+    non_empty = 0
+    numeric_like = 0
+    scan_rows = rows[: min(180, row_count)]
+    for row in scan_rows:
+        for cell in row[: min(80, len(row))]:
+            txt = _excel_value_to_text(cell)
+            if not txt:
+                continue
+            non_empty += 1
+            if _parse_percent_value(txt) is not None:
+                numeric_like += 1
+    density = non_empty / max(1, len(scan_rows) * max(1, min(80, col_count)))
+    numeric_ratio = numeric_like / max(1, non_empty)
+    binary_ratio = _binary_ratio_rows(scan_rows, max_cells=3200)
+
+    semantic_bonus = 0.0
+    if isinstance(col_map, dict):
+        if col_map.get("atividade") is not None:
+            semantic_bonus += 9.0
+        if col_map.get("status") is not None:
+            semantic_bonus += 4.0
+        if col_map.get("_axis_cols"):
+            semantic_bonus += 5.0
+
+    score = (
+        token_hits * 5.0
+        + min(4.0, row_count / 120.0)
+        + min(4.0, col_count / 25.0)
+        + density * 6.0
+        + numeric_ratio * 2.0
+        + semantic_bonus
+    )
+    # Matrizes binárias densas tendem a ser resultados consolidados sem semântica de cabeçalho.
+    if binary_ratio > 0.72 and not has_activity:
+        score -= 8.5
+    return score
+
+
+def _find_header_and_map(rows: list[list[str]]) -> tuple[int | None, dict]:
+    if not rows:
+        return None, {}
+    aliases = {
+        "setor": {"SETOR", "AREA", "ZONA", "TORRE", "REGIAO"},
+        "bloco": {"BLOCO", "BL", "BLC"},
+        "pavimento": {"PAVIMENTO", "PAV", "ANDAR", "NIVEL"},
+        "unidade": {"APTO", "UNIDADE", "LOCAL", "AMBIENTE", "SALA", "APARTAMENTO", "APART", "UND", "UH", "UNID"},
+        "atividade": {"ATIVIDADE", "SERVICO", "SERVICOS", "ITEM", "ETAPA"},
+        "grupo_servicos": {"GRUPO DE SERVICO", "GRUPO DE SERVICOS", "GRUPO SERVICO", "GRUPO SERVICOS"},
+        "status": {"STATUS", "AVANCO", "PROGRESSO", "PERCENTUAL", "%", "MEDICAO"},
+        "custo": {"CUSTO", "VALOR", "PRECO"},
+        "observacao": {"OBS", "OBSERVACAO", "COMENTARIO", "NOTA"},
+        "data_termino": {"DATA DE TERMINO", "DATA TERMINO", "TERMINO", "DATA FINAL"},
+    }
+
+    def match_field(token: str) -> str | None:
+        if not token:
+            return None
+        if "GRUPO" in token and "SERVICO" in token:
+            return "grupo_servicos"
+        for field, terms in aliases.items():
+            for term in terms:
+                if token == term or token.startswith(f"{term} ") or f" {term} " in f" {token} ":
+                    return field
+        return None
+
+    best_row = None
+    best_score = -1
+    best_map = {}
+    scan_limit = min(len(rows), 60)
+    for idx in range(scan_limit):
+        row = rows[idx]
+        current = {}
+        for col_idx, raw in enumerate(row[:PO_MAX_IMPORT_COLS]):
+            field = match_field(_norm_token(raw))
+            if field and field not in current:
+                current[field] = col_idx
+        score = len(current)
+        if "atividade" in current:
+            score += 2
+        if "status" in current:
+            score += 1
+        if score > best_score:
+            best_score = score
+            best_row = idx
+            best_map = current
+
+    if best_row is None or best_score < 3 or "atividade" not in best_map:
+        return None, {}
+    row_src = rows[best_row] if best_row < len(rows) and isinstance(rows[best_row], list) else []
+    axis_terms = {
+        "SETOR",
+        "BLOCO",
+        "PAVIMENTO",
+        "ANDAR",
+        "NIVEL",
+        "APTO",
+        "APARTAMENTO",
+        "APART",
+        "UNIDADE",
+        "UNID",
+        "UND",
+        "UH",
+        "LOCAL",
+        "TORRE",
+        "ALA",
+        "VILA",
+        "QUADRA",
+        "LOTE",
+        "FASE",
+        "MODULO",
+        "NUCLEO",
+        "TIPOLOGIA",
+    }
+    ignore_fields = {"atividade", "status", "grupo_servicos", "custo", "observacao", "data_termino"}
+    axis_cols = []
+    for col_idx, raw in enumerate(row_src):
+        token = _norm_token(raw)
+        if not token:
+            continue
+        mapped_field = match_field(token)
+        if mapped_field and mapped_field not in ignore_fields:
+            axis_cols.append((col_idx, _excel_value_to_text(raw) or mapped_field.title()))
+            continue
+        if any(term == token or token.startswith(f"{term} ") or f" {term} " in f" {token} " for term in axis_terms):
+            axis_cols.append((col_idx, _excel_value_to_text(raw) or "Local"))
+    if axis_cols:
+        dedup = []
+        seen_cols = set()
+        for idx, label in axis_cols:
+            if idx in seen_cols:
+                continue
+            seen_cols.add(idx)
+            dedup.append((idx, label))
+        best_map["_axis_cols"] = dedup
+    return best_row, best_map
+
+
+def _find_minimal_activity_header(rows: list[list[str]]) -> tuple[int | None, dict]:
+    if not rows:
+        return None, {}
+    scan_limit = min(len(rows), 40)
+    for idx in range(scan_limit):
+        row = rows[idx] if isinstance(rows[idx], list) else []
+        for col_idx, raw in enumerate(row[:PO_MAX_IMPORT_COLS]):
+            token = _norm_token(raw)
+            if token in {"ATIVIDADE", "SERVICO", "SERVICOS", "ITEM", "ETAPA"}:
+                return idx, {"atividade": col_idx}
+    return None, {}
+
+
+def _infer_status_column(rows: list[list[str]], header_idx: int, col_map: dict) -> int | None:
+    mapped = col_map.get("status")
+    if mapped is not None:
+        return mapped
+    activity_col = col_map.get("atividade")
+    ignore = {activity_col}
+    for key in ("setor", "bloco", "pavimento", "unidade"):
+        if col_map.get(key) is not None:
+            ignore.add(col_map.get(key))
+    for idx, _ in col_map.get("_axis_cols") or []:
+        ignore.add(idx)
+
+    if not rows or header_idx >= len(rows) - 1:
+        return None
+
+    col_count = max((len(r) for r in rows), default=0)
+    best_idx = None
+    best_score = -1
+    data_rows = rows[header_idx + 1 : header_idx + 1 + 1200]
+    for c in range(col_count):
+        if c in ignore:
+            continue
+        hit = 0
+        non_empty = 0
+        for row in data_rows:
+            if c >= len(row):
+                continue
+            txt = _excel_value_to_text(row[c])
+            if not txt:
+                continue
+            non_empty += 1
+            if _parse_percent_value(txt) is not None:
+                hit += 1
+        if non_empty < 6:
+            continue
+        score = hit * 2 + non_empty
+        if score > best_score and (hit / max(1, non_empty)) >= 0.35:
+            best_score = score
+            best_idx = c
+    return best_idx
+
+
+def _build_matrix_from_records(rows: list[list[str]], header_idx: int, col_map: dict) -> list[list[str]]:
+    status_col = _infer_status_column(rows, header_idx, col_map)
+    return _pivot_records(rows[header_idx + 1 :], col_map, status_col)
+
+
+def _pivot_records(data_rows: Iterable[list[str]], col_map: dict, status_col: int | None) -> list[list[str]]:
+    """Pivot registro a registro (uma passada; aceita iterador de linhas)."""
+    activities = []
+    activities_seen = set()
+    locals_axis = []
+    locals_seen = set()
+    cell_data = {}
+
+    def add_activity(name: str) -> str:
+        key = _norm_token(name)
+        if not key:
+            return ""
+        if key not in activities_seen:
+            activities_seen.add(key)
+            activities.append((key, name[:120]))
+        return key
+
+    axis_cols = list(col_map.get("_axis_cols") or [])
+    if not axis_cols:
+        for k in ("setor", "bloco", "pavimento", "unidade"):
+            idx = col_map.get(k)
+            if idx is not None:
+                axis_cols.append((idx, k.title()))
+    axis_headers = [str(label).strip() or "Local" for _, label in axis_cols]
+    if not axis_headers:
+        axis_headers = ["Local"]
+
+    for row in data_rows:
+        if not isinstance(row, list):
+            continue
+        atividade = _excel_value_to_text(row[col_map["atividade"]] if col_map["atividade"] < len(row) else "")
+        if not atividade:
+            continue
+        atividade_key = add_activity(atividade)
+        if not atividade_key:
+            continue
+
+        axis_values = []
+        for col_idx, _label in axis_cols:
+            if col_idx is None or col_idx >= len(row):
+                axis_values.append("")
+                continue
+            axis_values.append(_excel_value_to_text(row[col_idx]))
+        if not axis_values:
+            axis_values = [_excel_value_to_text(row[0] if row else "")]
+        axis_key = tuple(_norm_token(v) for v in axis_values)
+        if not any(axis_key):
+            axis_values = ["Sem local"] + [""] * (len(axis_headers) - 1)
+            axis_key = tuple(_norm_token(v) for v in axis_values)
+        if axis_key not in locals_seen:
+            locals_seen.add(axis_key)
+            locals_axis.append((axis_key, axis_values))
+
+        status_raw = _excel_value_to_text(row[status_col] if status_col is not None and status_col < len(row) else "")
+        pct = _parse_percent_value(status_raw)
+        display = f"{round(pct)}%" if pct is not None else status_raw[:30]
+        key = (axis_key, atividade_key)
+        prev = cell_data.get(key)
+        if prev is None:
+            cell_data[key] = {"display": display, "pct": pct}
+        else:
+            prev_pct = prev.get("pct")
+            if pct is not None and (prev_pct is None or pct > prev_pct):
+                prev["pct"] = pct
+                prev["display"] = display
+            elif not prev.get("display") and display:
+                prev["display"] = display
+
+    if not activities or not locals_axis:
+        return []
+
+    header = axis_headers + [label for _, label in activities]
+    out = [header]
+    for axis_key, axis_values in locals_axis:
+        row = list(axis_values)
+        for act_key, _ in activities:
+            item = cell_data.get((axis_key, act_key))
+            val = item["display"] if item else ""
+            row.append(val)
+        out.append(row)
+
+    return _normalize_import_rows(out)
+
+
+def _build_matrix_from_activity_columns(rows: list[list[str]], header_idx: int, col_map: dict) -> list[list[str]]:
+    if not rows or header_idx >= len(rows):
+        return []
+    head = rows[header_idx]
+    activity_col = col_map.get("atividade")
+    if activity_col is None:
+        return []
+
+    ignore_cols = {activity_col}
+    for key in ("status", "setor", "bloco", "pavimento", "unidade"):
+        if col_map.get(key) is not None:
+            ignore_cols.add(col_map.get(key))
+
+    data_rows = rows[header_idx + 1 :]
+    col_count = max((len(r) for r in rows), default=0)
+    axis_cols = []
+    for c in range(col_count):
+        if c in ignore_cols:
+            continue
+        label = _excel_value_to_text(head[c] if c < len(head) else "")
+        if not label:
+            continue
+        token = _norm_token(label)
+        if token in {"GRUPO", "GRUPO DE SERVICO", "OBS", "OBSERVACAO"}:
+            continue
+        non_empty = 0
+        pct_hits = 0
+        for row in data_rows[:1200]:
+            if c >= len(row):
+                continue
+            val = _excel_value_to_text(row[c])
+            if not val:
+                continue
+            non_empty += 1
+            if _parse_percent_value(val) is not None:
+                pct_hits += 1
+        if non_empty >= 3 and pct_hits >= 2:
+            axis_cols.append((c, label[:120]))
+
+    if len(axis_cols) < 2:
+        return []
+
+    activities = []
+    act_seen = set()
+    data = {}
+    for row in data_rows:
+        if activity_col >= len(row):
+            continue
+        activity = _excel_value_to_text(row[activity_col])
+        if not activity:
+            continue
+        akey = _norm_token(activity)
+        if not akey:
+            continue
+        if akey not in act_seen:
+            act_seen.add(akey)
+            activities.append((akey, activity[:120]))
+        for c, axis_label in axis_cols:
+            raw = _excel_value_to_text(row[c] if c < len(row) else "")
+            if not raw:
+                continue
+            pct = _parse_percent_value(raw)
+            disp = f"{round(pct)}%" if pct is not None else raw[:30]
+            key = (_norm_token(axis_label), akey)
+            prev = data.get(key)
+            if prev is None:
+                data[key] = {"disp": disp, "pct": pct}
+            else:
+                prev_pct = prev.get("pct")
+                if pct is not None and (prev_pct is None or pct > prev_pct):
+                    prev["pct"] = pct
+                    prev["disp"] = disp
+
+    if not activities:
+        return []
+    out = [["Unidade / eixo"] + [lbl for _, lbl in activities]]
+    for c, axis_label in axis_cols:
+        row = [axis_label]
+        axis_key = _norm_token(axis_label)
+        for akey, _ in activities:
+            item = data.get((axis_key, akey))
+            row.append(item["disp"] if item else "")
+        out.append(row)
+    return _normalize_import_rows(out)
+
+
+def _is_already_matrix_shape(rows: list[list[str]]) -> bool:
+    if len(rows) < 2:
+        return False
+    head = [_norm_token(c) for c in rows[0][:12]]
+    tabular_markers = {"SETOR", "BLOCO", "PAVIMENTO", "APTO", "APARTAMENTO", "UNIDADE", "ATIVIDADE", "STATUS", "SERVICO"}
+    if any(token in tabular_markers for token in head):
+        return False
+    semantic_tokens = [
+        t for t in head if t and len(t) >= 3 and not t.isdigit() and t not in {"0", "1", "OK"}
+    ]
+    binary_ratio = _binary_ratio_rows(rows[:120], max_cells=2600)
+    if binary_ratio > 0.72 and len(semantic_tokens) < 4:
+        return False
+    has_axis = any("BLOCO" in c or "LOCAL" in c or "EIXO" in c for c in head)
+    wide = len(rows[0]) >= 5
+    return wide and (has_axis or len(semantic_tokens) >= 5)
+
+
+def _interpret_import_rows(rows: list[list[str]], mode: str = "auto") -> tuple[list[list[str]], str, dict]:
+    report = {
+        "mode": mode or "auto",
+        "header_idx": None,
+        "mapped_fields": [],
+        "confidence": 0.0,
+        "reason": "",
+        "strategy_scores": {},
+    }
+    if not rows:
+        return [], "vazio", report
+
+    mode_norm = str(mode or "auto").strip().lower()
+    if mode_norm == "raw":
+        report["confidence"] = 1.0
+        report["reason"] = "Modo bruto forçado pelo utilizador."
+        return rows, "forcado_bruto", report
+
+    candidates = []
+
+    if _is_already_matrix_shape(rows):
+        candidates.append(("matriz_detectada", rows, 0.82, "A planilha já possui formato de matriz."))
+
+    header_idx, col_map = _find_header_and_map(rows)
+    if header_idx is not None and col_map:
+        report["header_idx"] = header_idx
+        report["mapped_fields"] = sorted([k for k in col_map.keys() if not str(k).startswith("_")])
+        has_axis_field = bool(col_map.get("_axis_cols")) or any(
+            col_map.get(k) is not None for k in ("setor", "bloco", "pavimento", "unidade")
+        )
+        if has_axis_field:
+            matrix = _build_matrix_from_records(rows, header_idx, col_map)
+            if matrix:
+                reason = "Detectado formato tabular por registros com eixo local + atividade."
+                candidates.append(("pivot_registros", matrix, 0.90, reason))
+
+        matrix2 = _build_matrix_from_activity_columns(rows, header_idx, col_map)
+        if matrix2:
+            reason = "Detectado formato com atividades em linhas e progresso em colunas."
+            candidates.append(("pivot_atividade_colunas", matrix2, 0.76, reason))
+    else:
+        # Fallback inteligente: alguns modelos trazem apenas cabeçalho "ATIVIDADE" + colunas de unidades.
+        h2, m2 = _find_minimal_activity_header(rows)
+        if h2 is not None and m2:
+            report["header_idx"] = h2
+            report["mapped_fields"] = ["atividade"]
+            matrix3 = _build_matrix_from_activity_columns(rows, h2, m2)
+            if matrix3:
+                reason = "Detectado cabeçalho mínimo de atividade com colunas percentuais."
+                candidates.append(("pivot_atividade_colunas", matrix3, 0.68, reason))
+
+    for name, _data, conf, _reason in candidates:
+        report["strategy_scores"][name] = conf
+
+    if candidates:
+        chosen_name, chosen_rows, chosen_conf, chosen_reason = max(candidates, key=lambda it: it[2])
+        report["confidence"] = chosen_conf
+        report["reason"] = chosen_reason
+        return chosen_rows, chosen_name, report
+
+    if mode_norm == "pivot":
+        report["reason"] = "Modo pivot forçado, mas nenhuma estratégia alcançou confiança mínima."
+        return [], "pivot_sem_confianca", report
+    report["confidence"] = 0.35
+    report["reason"] = "Sem padrão confiável detectado; mantendo importação bruta."
+    return rows, "fallback_bruto", report
+
+
+def _detect_total_col_idx_from_header(header: list[str]) -> int | None:
+    if not isinstance(header, list):
+        return None
+    for idx in range(len(header) - 1, -1, -1):
+        token = _norm_token(header[idx])
+        if token == "TOTAL" or token == "TOTAL GERAL" or token.startswith("TOTAL"):
+            return idx
+    return None
+
+
+def _build_interpretation_metadata(
+    *,
+    raw_rows: list[list[str]],
+    interpreted_rows: list[list[str]],
+    strategy: str,
+    report: dict,
+    read_diag: dict,
+) -> dict:
+    meta: dict = {
+        "strategy": str(strategy or "").strip(),
+        "confidence": float((report or {}).get("confidence") or 0.0),
+        "sheet": str((read_diag or {}).get("selected_sheet") or ""),
+        "header_idx": (report or {}).get("header_idx"),
+        "status_col_source": None,
+        "service_group_col_source": None,
+        "total_col_source": None,
+        "axis_cols_source": [],
+        "axis_headers_source": [],
+        "activity_col_source": None,
+        "auxiliary_cols_source": [],
+        "activity_group_map": {},
+        "activity_cols_interpreted": [],
+        "activity_headers_interpreted": [],
+        "axis_cols_interpreted": [],
+        "axis_headers_interpreted": [],
+        "total_col_interpreted": None,
+        "ignored_auxiliary_cols_source": [],
+    }
+    if not raw_rows:
+        return meta
+
+    header_idx, col_map = _find_header_and_map(raw_rows)
+    if header_idx is not None and isinstance(col_map, dict):
+        src_header = raw_rows[header_idx] if header_idx < len(raw_rows) else []
+        axis_cols = list(col_map.get("_axis_cols") or [])
+        axis_cols_norm = []
+        axis_headers_norm = []
+        for col_idx, label in axis_cols:
+            if not isinstance(col_idx, int):
+                continue
+            axis_cols_norm.append(col_idx)
+            label_txt = str(label or "").strip()
+            if not label_txt and col_idx < len(src_header):
+                label_txt = _excel_value_to_text(src_header[col_idx]) or f"Eixo {col_idx + 1}"
+            axis_headers_norm.append(label_txt or f"Eixo {col_idx + 1}")
+        meta["axis_cols_source"] = axis_cols_norm
+        meta["axis_headers_source"] = axis_headers_norm
+        meta["activity_col_source"] = col_map.get("atividade")
+        meta["service_group_col_source"] = col_map.get("grupo_servicos")
+        meta["status_col_source"] = col_map.get("status")
+        meta["total_col_source"] = _detect_total_col_idx_from_header(src_header)
+        aux_cols = []
+        for key, reason in (
+            ("custo", "custo_auxiliar"),
+            ("observacao", "observacao_auxiliar"),
+            ("data_termino", "data_auxiliar"),
+        ):
+            col_idx = col_map.get(key)
+            if not isinstance(col_idx, int):
+                continue
+            head_txt = _excel_value_to_text(src_header[col_idx] if col_idx < len(src_header) else "")
+            aux_cols.append({"key": key, "col": col_idx, "header": head_txt, "reason": reason})
+        meta["auxiliary_cols_source"] = aux_cols
+
+        act_col = col_map.get("atividade")
+        grp_col = col_map.get("grupo_servicos")
+        if isinstance(act_col, int) and isinstance(grp_col, int):
+            act_group: dict[str, str] = {}
+            start = header_idx + 1 if isinstance(header_idx, int) else 1
+            for row in raw_rows[start:]:
+                if not isinstance(row, list):
+                    continue
+                atividade = _excel_value_to_text(row[act_col] if act_col < len(row) else "")
+                grupo = _excel_value_to_text(row[grp_col] if grp_col < len(row) else "")
+                if not atividade:
+                    continue
+                key = atividade.strip().upper()
+                if key and key not in act_group:
+                    act_group[key] = grupo
+            meta["activity_group_map"] = act_group
+
+        ignored = []
+        keep = set(axis_cols_norm)
+        if isinstance(col_map.get("atividade"), int):
+            keep.add(col_map["atividade"])
+        if isinstance(col_map.get("grupo_servicos"), int):
+            keep.add(col_map["grupo_servicos"])
+        if isinstance(col_map.get("status"), int):
+            keep.add(col_map["status"])
+        for key in ("custo", "observacao", "data_termino"):
+            if isinstance(col_map.get(key), int):
+                keep.add(col_map[key])
+        if isinstance(meta["total_col_source"], int):
+            keep.add(meta["total_col_source"])
+        for col_idx, raw in enumerate(src_header):
+            txt = _excel_value_to_text(raw)
+            if not txt:
+                continue
+            if col_idx in keep:
+                continue
+            ignored.append({"col": col_idx, "header": txt, "reason": "coluna_auxiliar_fora_do_eixo_principal"})
+        meta["ignored_auxiliary_cols_source"] = ignored
+
+    if interpreted_rows and isinstance(interpreted_rows[0], list):
+        ih = interpreted_rows[0]
+        total_interpreted = _detect_total_col_idx_from_header(ih)
+        meta["total_col_interpreted"] = total_interpreted
+        axis_cols_interpreted = []
+        axis_headers_interpreted = []
+        if strategy == "pivot_registros" and meta["axis_headers_source"]:
+            axis_count = min(len(meta["axis_headers_source"]), len(ih))
+            axis_cols_interpreted = list(range(axis_count))
+            axis_headers_interpreted = [str(ih[i] or "").strip() or f"Eixo {i + 1}" for i in axis_cols_interpreted]
+        meta["axis_cols_interpreted"] = axis_cols_interpreted
+        meta["axis_headers_interpreted"] = axis_headers_interpreted
+
+        activity_cols = []
+        activity_headers = []
+        for idx, raw in enumerate(ih):
+            if idx in axis_cols_interpreted:
+                continue
+            if total_interpreted is not None and idx == total_interpreted:
+                continue
+            activity_cols.append(idx)
+            activity_headers.append(str(raw or "").strip() or f"Atividade {len(activity_cols)}")
+        meta["activity_cols_interpreted"] = activity_cols
+        meta["activity_headers_interpreted"] = activity_headers
+
+    return meta
+
+
+class ImportacaoPlanilhaErro(ValueError):
+    """Planilha lida, mas sem dados importáveis; ``detalhes`` vai junto na resposta JSON."""
+
+    def __init__(self, message: str, **detalhes):
+        super().__init__(message)
+        self.detalhes = detalhes
+
+
+def _validar_interpretacao(rows: list[list[str]], strategy: str, report: dict, mode: str) -> dict:
+    if not rows:
+        raise ImportacaoPlanilhaErro(
+            "Não foi possível estruturar dados úteis da planilha com o modo escolhido.",
+            strategy=strategy,
+            report=report,
+        )
+    if mode == "auto" and strategy == "fallback_bruto":
+        binary_ratio = _binary_ratio_rows(rows, max_cells=5000)
+        if binary_ratio >= 0.75:
+            raise ImportacaoPlanilhaErro(
+                "A aba selecionada parece uma matriz binária (0/1) sem cabeçalhos descritivos. "
+                "Informe a aba de dados da planilha ou use modo avançado.",
+                strategy=strategy,
+                report=report,
+            )
+    total_rows = len(rows)
+    total_cols = max((len(r) for r in rows), default=0)
+    total_cells = total_rows * total_cols
+    if total_rows > PO_MAX_IMPORT_ROWS or total_cols > PO_MAX_IMPORT_COLS or total_cells > PO_MAX_IMPORT_CELLS:
+        raise ImportacaoPlanilhaErro(
+            f"Limites: até {PO_MAX_IMPORT_ROWS} linhas, {PO_MAX_IMPORT_COLS} colunas e "
+            f"{PO_MAX_IMPORT_CELLS} células."
+        )
+    return {"rows": total_rows, "cols": total_cols, "cells": total_cells}
+
+
+def interpretar_planilha(
+    linhas: Iterable[list[str]],
+    *,
+    mode: str = "auto",
+    read_diag: dict | None = None,
+    progresso: Callable[[int], None] | None = None,
+    progresso_a_cada: int = 2000,
+) -> dict:
+    """
+    Estrutura as linhas lidas por ``abrir_planilha`` em matriz (mesmo resultado de
+    ``_interpret_import_rows`` sobre a planilha inteira).
+
+    A estratégia é decidida pelas primeiras ``PO_IMPORT_HEAD_ROWS`` linhas (cabeçalho e coluna
+    de status só dependem delas). Quando vence ``pivot_registros`` o restante passa direto pelo
+    pivot, sem guardar as linhas de origem; nos demais formatos a matriz já é a própria planilha
+    e as linhas são materializadas como antes. ``progresso(linhas_lidas)`` é chamado durante a
+    leitura. Erros de dados sobem como ``ImportacaoPlanilhaErro``.
+    """
+    mode = str(mode or "auto").strip().lower()
+    read_diag = read_diag if isinstance(read_diag, dict) else {}
+    linhas = iter(linhas)
+    lidas = 0
+
+    def _contar(rows: Iterable[list[str]]) -> Iterator[list[str]]:
+        nonlocal lidas
+        for row in rows:
+            lidas += 1
+            if progresso is not None and lidas % progresso_a_cada == 0:
+                progresso(lidas)
+            yield row
+
+    linhas = _contar(linhas)
+    head = list(islice(linhas, PO_IMPORT_HEAD_ROWS))
+    proxima = next(linhas, None)
+    if not head:
+        raise ImportacaoPlanilhaErro("A planilha não possui dados utilizáveis.")
+
+    streaming = False
+    if proxima is not None and mode != "raw":
+        head_rows = _normalize_import_rows(head)
+        _rows, strategy, report = _interpret_import_rows(head_rows, mode=mode)
+        streaming = strategy == "pivot_registros"
+
+    if not streaming:
+        raw_rows = head if proxima is None else head + [proxima] + list(linhas)
+        raw_rows = _normalize_import_rows(raw_rows)
+        rows, strategy, report = _interpret_import_rows(raw_rows, mode=mode)
+        meta = _validar_interpretacao(rows, strategy, report, mode)
+        interpretation_meta = _build_interpretation_metadata(
+            raw_rows=raw_rows, interpreted_rows=rows, strategy=strategy, report=report, read_diag=read_diag
+        )
+        return {
+            "rows": rows,
+            "strategy": strategy,
+            "report": report,
+            "interpretation_meta": interpretation_meta,
+            "meta": meta,
+            "linhas_lidas": lidas,
+        }
+
+    header_idx, col_map = _find_header_and_map(head_rows)
+    status_col = _infer_status_column(head_rows, header_idx, col_map)
+    act_col = col_map.get("atividade")
+    grp_col = col_map.get("grupo_servicos")
+    act_group: dict[str, str] = {}
+    com_grupos = isinstance(act_col, int) and isinstance(grp_col, int)
+
+    def _dados() -> Iterator[list[str]]:
+        # Mesmo mapa atividade -> grupo de ``_build_interpretation_metadata``, montado na passada.
+        for row in chain(head_rows[header_idx + 1 :], [proxima], linhas):
+            if com_grupos:
+                atividade = _excel_value_to_text(row[act_col] if act_col < len(row) else "")
+                key = atividade.strip().upper()
+                if key and key not in act_group:
+                    act_group[key] = _excel_value_to_text(row[grp_col] if grp_col < len(row) else "")
+            yield row
+
+    rows = _pivot_records(_dados(), col_map, status_col)
+    meta = _validar_interpretacao(rows, strategy, report, mode)
+    interpretation_meta = _build_interpretation_metadata(
+        raw_rows=head_rows, interpreted_rows=rows, strategy=strategy, report=report, read_diag=read_diag
+    )
+    if com_grupos:
+        interpretation_meta["activity_group_map"] = act_group
+    return {
+        "rows": rows,
+        "strategy": strategy,
+        "report": report,
+        "interpretation_meta": interpretation_meta,
+        "meta": meta,
+        "linhas_lidas": lidas,
+    }
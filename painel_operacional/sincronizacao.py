@@ -0,0 +1,285 @@
+"""
+Sincronização dos elementos do rascunho (``AmbienteElemento``/``AmbienteCelula``) com o editor.
+
+Protocolo incremental: o editor envia só os elementos alterados desde a revisão que conhece
+(``base_revisao``). Cada gravação avança ``AmbienteVersao.revisao`` e marca com ela os elementos
+gravados. Elemento gravado por outra sessão depois da base é conflito: volta com a cópia do
+servidor e não é aplicado, a menos que o cliente o force. Elementos alterados por outras sessões
+e não enviados voltam na resposta para o editor mesclar. Nas matrizes só as células alteradas
+são gravadas.
+"""
+from django.utils import timezone
+
+from suprimentos.views_controle import _normalize_ambiente_layout
+
+from .models import AmbienteCelula, AmbienteElemento
+
+# Campos gravados por ``aplicar_item`` (bulk_update dos elementos existentes).
+CAMPOS_ITEM = (
+    "versao",
+    "chave_externa",
+    "titulo",
+    "tipo",
+    "x",
+    "y",
+    "width",
+    "height",
+    "camada",
+    "dados",
+    "ativo",
+    "origem_layout",
+    "revisao",
+    "updated_at",
+)
+
+
+def _map_kind_to_element_type(kind: str):
+    if kind == "matrix_table":
+        return "table"
+    if kind == "kpi_strip":
+        return "kpi"
+    if kind == "detail_panel":
+        return "area"
+    return "block"
+
+
+def chave_do_item(item: dict) -> str:
+    return str(item.get("chave_externa") or item.get("key") or "").strip()
+
+
+def aplicar_item(elemento: AmbienteElemento, item: dict, draft, *, normalizar: bool = False) -> dict:
+    """
+    Copia o item do editor para ``elemento`` (sem salvar nem tocar em ``z_index``) e devolve a
+    seção correspondente do layout. ``normalizar`` aplica os upgrades de schema da matriz.
+    """
+    titulo = str(item.get("titulo") or item.get("title") or "").strip()
+    kind = str(item.get("kind") or item.get("tipo") or "block").strip()
+    data = item.get("data")
+    element_data = data if isinstance(data, dict) else {}
+    semantica = str(item.get("semantica") or element_data.get("semantica") or "").strip()
+    layer = item.get("layer")
+
+    elemento.versao = draft
+    elemento.titulo = titulo
+    elemento.tipo = _map_kind_to_element_type(kind)
+    elemento.x = int(item.get("x") or 0)
+    elemento.y = int(item.get("y") or 0)
+    elemento.width = max(80, int(item.get("width") or 320))
+    elemento.height = max(60, int(item.get("height") or 180))
+    elemento.camada = layer if isinstance(layer, dict) else {}
+    elemento.ativo = True
+    elemento.origem_layout = True
+
+    section = {
+        "id": elemento.chave_externa,
+        "title": titulo,
+        "kind": kind,
+        "x": elemento.x,
+        "y": elemento.y,
+        "width": elemento.width,
+        "height": elemento.height,
+        "layer": elemento.camada,
+        "semantica": semantica,
+        "data": element_data,
+    }
+    if normalizar:
+        _normalize_ambiente_layout({"sections": [section]})
+        element_data = section["data"]
+    element_data["semantica"] = semantica
+    element_data["kind"] = kind
+    elemento.dados = element_data
+    return section
+
+
+def sincronizar_celulas(elemento: AmbienteElemento, rows) -> int:
+    """
+    Deixa as células do elemento iguais a ``rows`` gravando só as diferenças (valor alterado,
+    posição nova, posição removida). Retorna quantas células foram gravadas/removidas.
+    """
+    novas = {}
+    for r_idx, row in enumerate(rows if isinstance(rows, list) else []):
+        if not isinstance(row, list):
+            continue
+        for c_idx, value in enumerate(row):
+            novas[(r_idx, c_idx)] = str(value) if value is not None else ""
+
+    agora = timezone.now()
+    alterar = []
+    remover = []
+    for pk, linha, coluna, valor in elemento.celulas.values_list("id", "linha_idx", "coluna_idx", "valor"):
+        novo = novas.pop((linha, coluna), None)
+        if novo is None:
+            remover.append(pk)
+        elif novo != valor:
+            alterar.append(AmbienteCelula(id=pk, valor=novo, updated_at=agora))
+    criar = [
+        AmbienteCelula(elemento=elemento, linha_idx=r_idx, coluna_idx=c_idx, valor=valor, tipo="texto")
+        for (r_idx, c_idx), valor in novas.items()
+    ]
+
+    for inicio in range(0, len(remover), 500):
+        AmbienteCelula.objects.filter(id__in=remover[inicio : inicio + 500]).delete()
+    if alterar:
+        AmbienteCelula.objects.bulk_update(alterar, ["valor", "updated_at"], batch_size=500)
+    if criar:
+        AmbienteCelula.objects.bulk_create(criar, batch_size=500)
+    return len(alterar) + len(remover) + len(criar)
+
+
+def serializar_elemento(elemento: AmbienteElemento) -> dict:
+    """Mesmo formato de ``api_listar_elementos`` (aceito por ``normalizeElement`` no editor)."""
+    return {
+        "id": elemento.id,
+        "chave_externa": elemento.chave_externa,
+        "titulo": elemento.titulo,
+        "tipo": elemento.tipo,
+        "x": elemento.x,
+        "y": elemento.y,
+        "width": elemento.width,
+        "height": elemento.height,
+        "z_index": elemento.z_index,
+        "camada": elemento.camada,
+        "dados": elemento.dados,
+        "revisao": elemento.revisao,
+    }
+
+
+def _patch_layout(layout, secoes: dict, removidas: set, ordem: list | None) -> dict:
+    """Troca/acrescenta só as seções gravadas no layout do rascunho (e reordena se pedido)."""
+    layout = layout if isinstance(layout, dict) else {}
+    sections = layout.get("sections") if isinstance(layout.get("sections"), list) else []
+    out = []
+    for section in sections:
+        sid = section.get("id") if isinstance(section, dict) else None
+        if sid in removidas:
+            continue
+        out.append(secoes.pop(sid) if sid in secoes else section)
+    out.extend(secoes.values())
+    if ordem:
+        posicao = {key: idx for idx, key in enumerate(ordem)}
+        out.sort(key=lambda s: posicao.get(s.get("id") if isinstance(s, dict) else None, len(posicao)))
+    layout["sections"] = out
+    return layout
+
+
+def aplicar_delta(
+    ambiente,
+    draft,
+    *,
+    base_revisao: int,
+    alterados: list,
+    removidos: list | None = None,
+    ordem: list | None = None,
+    forcar: list | None = None,
+    metadados: dict | None = None,
+) -> dict:
+    """
+    Aplica um delta do editor no rascunho. Chamar dentro de ``transaction.atomic`` com o
+    rascunho já travado (``select_for_update``); os elementos lidos aqui também são travados.
+
+    ``alterados``: itens no formato do editor; ``removidos``: chaves; ``ordem``: chaves na ordem
+    de empilhamento (só quando mudou); ``forcar``: chaves que sobrescrevem mesmo em conflito.
+    """
+    removidos = [str(k).strip() for k in (removidos or []) if str(k or "").strip()]
+    forcar = set(forcar or [])
+    revisao = draft.avancar_revisao()
+
+    itens = [item for item in alterados if isinstance(item, dict) and chave_do_item(item)]
+    chaves = [chave_do_item(item) for item in itens] + removidos
+    existentes = {
+        el.chave_externa: el
+        for el in AmbienteElemento.objects.select_for_update().filter(ambiente=ambiente, chave_externa__in=chaves)
+    }
+
+    def _em_conflito(el, key) -> bool:
+        return el is not None and el.revisao > base_revisao and key not in forcar
+
+    conflitos = []
+    gravados = []
+    atualizar = []
+    secoes = {}
+    matrizes = []
+    proximo_z = None
+    for item in itens:
+        key = chave_do_item(item)
+        elemento = existentes.get(key)
+        if _em_conflito(elemento, key):
+            conflitos.append(serializar_elemento(elemento))
+            continue
+        novo = elemento is None
+        if novo:
+            elemento = AmbienteElemento(ambiente=ambiente, chave_externa=key)
+        rows_antes = (elemento.dados or {}).get("rows") if not novo and elemento.tipo == "table" else None
+        secoes[key] = aplicar_item(elemento, item, draft, normalizar=True)
+        elemento.revisao = revisao
+        if novo:
+            if proximo_z is None:
+                ultimo = AmbienteElemento.objects.filter(ambiente=ambiente).order_by("-z_index").first()
+                proximo_z = (ultimo.z_index + 1) if ultimo else 0
+            elemento.z_index = proximo_z
+            proximo_z += 1
+            elemento.save()
+        else:
+            elemento.updated_at = timezone.now()
+            atualizar.append(elemento)
+        gravados.append(elemento)
+        rows = elemento.dados.get("rows")
+        if elemento.tipo == "table" and (novo or rows != rows_antes):
+            matrizes.append((elemento, rows))
+
+    if atualizar:
+        AmbienteElemento.objects.bulk_update(atualizar, list(CAMPOS_ITEM), batch_size=200)
+    celulas = sum(sincronizar_celulas(elemento, rows) for elemento, rows in matrizes)
+
+    removidas = set()
+    for key in removidos:
+        elemento = existentes.get(key)
+        if elemento is None or not elemento.ativo:
+            continue
+        if _em_conflito(elemento, key):
+            conflitos.append(serializar_elemento(elemento))
+            continue
+        removidas.add(key)
+    if removidas:
+        AmbienteElemento.objects.filter(ambiente=ambiente, chave_externa__in=removidas).update(
+            ativo=False, revisao=revisao, updated_at=timezone.now()
+        )
+
+    if ordem:
+        posicao = {str(key): idx for idx, key in enumerate(ordem)}
+        reordenar = []
+        for elemento in AmbienteElemento.objects.select_for_update().filter(
+            ambiente=ambiente, chave_externa__in=list(posicao)
+        ):
+            if elemento.z_index != posicao[elemento.chave_externa]:
+                elemento.z_index = posicao[elemento.chave_externa]
+                elemento.revisao = revisao
+                reordenar.append(elemento)
+        if reordenar:
+            AmbienteElemento.objects.bulk_update(reordenar, ["z_index", "revisao"], batch_size=200)
+
+    draft.layout = _patch_layout(draft.layout, secoes, removidas, ordem)
+    if isinstance(metadados, dict):
+        draft.metadados = metadados
+    draft.save(update_fields=["layout", "metadados", "updated_at"])
+
+    alteracoes_remotas = AmbienteElemento.objects.filter(
+        ambiente=ambiente, revisao__gt=base_revisao, revisao__lt=revisao
+    ).exclude(chave_externa__in=[c["chave_externa"] for c in conflitos])
+    remotos = []
+    removidos_remotos = []
+    for elemento in alteracoes_remotas.order_by("z_index", "id"):
+        if elemento.ativo:
+            remotos.append(serializar_elemento(elemento))
+        else:
+            removidos_remotos.append(elemento.chave_externa)
+
+    return {
+        "revisao": revisao,
+        "itens": [serializar_elemento(elemento) for elemento in gravados],
+        "removidos": sorted(removidas),
+        "conflitos": conflitos,
+        "remotos": remotos,
+        "removidos_remotos": removidos_remotos,
+        "celulas_gravadas": celulas,
+    }
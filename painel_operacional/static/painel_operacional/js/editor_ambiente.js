@@ -166,6 +166,12 @@
     lastAppearanceAnchor: { x: 0, y: 0 },
     viewMode: "draft",
     draftKnownUpdatedAt: null,
+    /** Revisão do rascunho já sincronizada (base do delta enviado ao servidor). */
+    draftRevisao: 0,
+    /** chave -> JSON do item na última sincronização; ordem e metadados idem. */
+    syncedItems: new Map(),
+    syncedOrder: "",
+    syncedMetadados: "",
     conflictPollTimer: null,
     matrixEditUndoPushed: false,
     inspectorUndoSelId: null,
@@ -4690,7 +4696,7 @@
         const srv = (data.versao && data.versao.updated_at) || (data.draft && data.draft.updated_at);
         if (srv && srv !== state.draftKnownUpdatedAt) {
           showAlert(
-            "Os dados mudaram no servidor (outra aba ou outro utilizador). Use «Recarregar dados» para alinhar com a versão remota, ou «Salvar» para substituir o servidor pela sua cópia (será pedida confirmação).",
+            "Os dados mudaram no servidor (outra aba ou outro utilizador). «Salvar» mescla as alterações remotas com as suas (elementos alterados nos dois lados pedem confirmação); «Recarregar dados» descarta as suas.",
             "warning"
           );
           setSaveState("Conflito: versão remota mais nova", "text-bg-warning");
@@ -4711,31 +4717,6 @@
     if (!document.hidden) pollDraftConflictOnce();
   });
 
-  async function ensureDraftNotStaleOrConfirm(silent) {
-    if (!state.draftKnownUpdatedAt) return true;
-    try {
-      const data = await requestJson(ctx.endpoints.detail, { credentials: "same-origin" });
-      const srv = (data.versao && data.versao.updated_at) || (data.draft && data.draft.updated_at);
-      if (!srv || srv === state.draftKnownUpdatedAt) return true;
-      if (silent) {
-        setSaveState("Conflito: versão remota mais nova", "text-bg-warning");
-        if (!state.conflictSkipAlertShown) {
-          state.conflictSkipAlertShown = true;
-          showAlert(
-            "Há uma versão mais recente no servidor. O salvamento automático não foi guardado para não apagar essas alterações. Faça «Recarregar dados» para editar a versão remota, ou «Salvar» e confirme para substituir.",
-            "warning"
-          );
-        }
-        return false;
-      }
-      return window.confirm(
-        "Os dados no servidor foram alterados (outra sessão ou outro utilizador).\n\nDeseja substituir a versão remota pela sua cópia local?\n\nOK — Enviar e substituir no servidor.\nCancelar — Não guardar; use «Recarregar dados» para obter os dados remotos."
-      );
-    } catch {
-      return true;
-    }
-  }
-
   async function loadDetails() {
     const btnReload = document.getElementById("btnReloadDraft");
     hideAlert();
@@ -4773,6 +4754,8 @@
         ? data.elementos.map((it, idx) => normalizeElement(it, idx))
         : sectionsFallback.map((it, idx) => normalizeElement(it, idx));
       state.elementos = draftElementos;
+      state.draftRevisao = Number(state.draft.revisao) || 0;
+      rememberSyncedState();
       if (
         !state.selectedId ||
         !state.elementos.some((e) => e.key === state.selectedId)
@@ -4837,8 +4820,8 @@
     await addSection();
   }
 
-  function buildSyncPayload() {
-    return state.elementos.map((el) => ({
+  function buildSyncItem(el) {
+    return {
       id: el.id,
       chave_externa: el.key,
       title: el.title,
@@ -4850,7 +4833,112 @@
       height: snap(el.height),
       layer: el.layer || {},
       data: el.data || {},
-    }));
+    };
+  }
+
+  function syncItemJson(item) {
+    const { id, ...rest } = item;
+    return JSON.stringify(rest);
+  }
+
+  function rememberSyncedState() {
+    state.syncedItems = new Map(state.elementos.map((el) => [el.key, syncItemJson(buildSyncItem(el))]));
+    state.syncedOrder = state.elementos.map((el) => el.key).join("\n");
+    state.syncedMetadados = JSON.stringify(state.draft.metadados || {});
+  }
+
+  /** Só o que mudou desde a última sincronização (protocolo incremental do servidor). */
+  function buildSyncDelta() {
+    const sent = new Map();
+    const alterados = [];
+    state.elementos.forEach((el) => {
+      const item = buildSyncItem(el);
+      const json = syncItemJson(item);
+      sent.set(el.key, json);
+      if (state.syncedItems.get(el.key) !== json) alterados.push(item);
+    });
+    const removidos = Array.from(state.syncedItems.keys()).filter((key) => !sent.has(key));
+    const order = state.elementos.map((el) => el.key);
+    const metaJson = JSON.stringify(state.draft.metadados || {});
+    return {
+      alterados,
+      removidos,
+      ordem: order.join("\n") !== state.syncedOrder ? order : null,
+      metadados: metaJson !== state.syncedMetadados ? state.draft.metadados || {} : null,
+      sent,
+      metaJson,
+    };
+  }
+
+  function isEmptySyncDelta(delta) {
+    return !delta.alterados.length && !delta.removidos.length && !delta.ordem && !delta.metadados;
+  }
+
+  async function postSyncDelta(delta, forcar) {
+    return requestJson(ctx.endpoints.syncElements, {
+      method: "POST",
+      credentials: "same-origin",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify({
+        base_revisao: state.draftRevisao,
+        alterados: delta.alterados,
+        removidos: delta.removidos,
+        ordem: delta.ordem,
+        metadados: delta.metadados,
+        forcar: forcar || [],
+      }),
+    });
+  }
+
+  /** Marca o que o servidor gravou como sincronizado e mescla as alterações de outras sessões. */
+  function applySyncResult(res, delta) {
+    const conflictKeys = new Set((res.conflitos || []).map((it) => it.chave_externa));
+    const before = new Map(state.syncedItems);
+    delta.alterados.forEach((item) => {
+      if (!conflictKeys.has(item.chave_externa)) state.syncedItems.set(item.chave_externa, delta.sent.get(item.chave_externa));
+    });
+    delta.removidos.forEach((key) => {
+      if (!conflictKeys.has(key)) state.syncedItems.delete(key);
+    });
+    (res.itens || []).forEach((srv) => {
+      const el = state.elementos.find((e) => e.key === srv.chave_externa);
+      if (el && !el.id) el.id = srv.id;
+    });
+
+    let merged = false;
+    (res.remotos || []).forEach((srv) => {
+      const idx = state.elementos.findIndex((e) => e.key === srv.chave_externa);
+      // Editado aqui depois do envio: fica pendente (o servidor acusa o conflito no próximo salvamento).
+      if (idx >= 0 && syncItemJson(buildSyncItem(state.elementos[idx])) !== before.get(srv.chave_externa)) return;
+      const el = normalizeElement(srv, idx >= 0 ? idx : state.elementos.length);
+      if (idx >= 0) state.elementos[idx] = el;
+      else state.elementos.push(el);
+      state.syncedItems.set(el.key, syncItemJson(buildSyncItem(el)));
+      merged = true;
+    });
+    (res.removidos_remotos || []).forEach((key) => {
+      const el = state.elementos.find((e) => e.key === key);
+      if (el && syncItemJson(buildSyncItem(el)) !== before.get(key)) return;
+      state.elementos = state.elementos.filter((e) => e.key !== key);
+      state.syncedItems.delete(key);
+      merged = true;
+    });
+    if (delta.ordem || merged) state.syncedOrder = state.elementos.map((el) => el.key).join("\n");
+    if (delta.metadados) state.syncedMetadados = delta.metaJson;
+    state.draftRevisao = Number(res.revisao) || state.draftRevisao;
+    const versao = res.versao || res.rascunho;
+    if (versao && versao.updated_at) state.draftKnownUpdatedAt = versao.updated_at;
+    if (merged) {
+      if (!state.elementos.some((e) => e.key === state.selectedId)) {
+        state.selectedId = state.elementos[0] ? state.elementos[0].key : null;
+      }
+      refreshLayerCatalogUi();
+      updatePreview();
+      scheduleRender();
+    }
+    return conflictKeys;
   }
 
   async function saveDraft(options) {
@@ -4858,10 +4946,6 @@
     const opts = options || {};
     const silent = !!opts.silent;
     const btnSave = document.getElementById("btnSaveDraft");
-    if (!(await ensureDraftNotStaleOrConfirm(silent))) {
-      if (!silent) setSaveState("Gravação cancelada (conflito com o servidor)", "text-bg-warning");
-      return false;
-    }
     if (!silent) hideAlert();
     setSaveState("Salvando...", "text-bg-info");
     if (!silent) {
@@ -4869,27 +4953,36 @@
       if (btnSave) btnSave.removeAttribute("title");
     }
     try {
-      const payload = { items: buildSyncPayload() };
-      const resSync = await requestJson(ctx.endpoints.syncElements, {
-        method: "POST",
-        credentials: "same-origin",
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify(payload),
-      });
-      const syncVersao = resSync.versao || resSync.rascunho;
-      if (syncVersao && syncVersao.updated_at) state.draftKnownUpdatedAt = syncVersao.updated_at;
-      const resSave = await requestJson(ctx.endpoints.saveDraft, {
-        method: "POST",
-        credentials: "same-origin",
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify({ layout: state.draft.layout || {}, metadados: state.draft.metadados || {} }),
-      });
-      const saveVersao = resSave.versao || resSave.rascunho;
-      if (saveVersao && saveVersao.updated_at) state.draftKnownUpdatedAt = saveVersao.updated_at;
+      let delta = buildSyncDelta();
+      if (!isEmptySyncDelta(delta)) {
+        let conflictKeys = applySyncResult(await postSyncDelta(delta), delta);
+        if (conflictKeys.size) {
+          const overwrite =
+            !silent &&
+            window.confirm(
+              `${conflictKeys.size} elemento(s) foram alterados no servidor por outra sessão ou outro utilizador.\n\nOK — Substituir esses elementos pela sua cópia.\nCancelar — Manter a versão do servidor; use «Recarregar dados» para obtê-la.`
+            );
+          if (overwrite) {
+            delta = buildSyncDelta();
+            delta.alterados = delta.alterados.filter((item) => conflictKeys.has(item.chave_externa));
+            delta.removidos = delta.removidos.filter((key) => conflictKeys.has(key));
+            delta.ordem = null;
+            delta.metadados = null;
+            conflictKeys = applySyncResult(await postSyncDelta(delta, Array.from(conflictKeys)), delta);
+          }
+        }
+        if (conflictKeys.size) {
+          setSaveState("Conflito: versão remota mais nova", "text-bg-warning");
+          if (!state.conflictSkipAlertShown) {
+            state.conflictSkipAlertShown = true;
+            showAlert(
+              "Alguns elementos foram alterados no servidor e não foram substituídos. As demais alterações foram guardadas. Faça «Recarregar dados» para editar a versão remota, ou «Salvar» e confirme para substituir.",
+              "warning"
+            );
+          }
+          return false;
+        }
+      }
       state.dirty = false;
       state.conflictSkipAlertShown = false;
       if (state.autoSaveTimer) {
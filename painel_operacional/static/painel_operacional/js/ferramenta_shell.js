@@ -66,88 +66,18 @@
     if (!showImport && createImportSheet) createImportSheet.value = "";
   }
 
-  function buildImportedLayoutFromRows(baseLayout, rows, interpretationMeta) {
-    const norm = (v) =>
-      String(v || "")
-        .normalize("NFD")
-        .replace(/[\u0300-\u036f]/g, "")
-        .toUpperCase()
-        .trim();
-    const layout = baseLayout && typeof baseLayout === "object" ? JSON.parse(JSON.stringify(baseLayout)) : {};
-    const sections = Array.isArray(layout.sections) ? layout.sections : [];
-    const header = Array.isArray(rows && rows[0]) ? rows[0] : [];
-    const headerNorm = header.map((h) => norm(h));
-    const layerTokenSet = new Set(["SETOR", "BLOCO", "PAVIMENTO", "PAV", "ANDAR", "NIVEL", "APTO", "UNIDADE", "LOCAL"]);
-    const layerIdx = [];
-    headerNorm.forEach((h, idx) => {
-      if (!h) return;
-      if (layerTokenSet.has(h) || h.startsWith("SETOR") || h.startsWith("BLOCO") || h.startsWith("PAV") || h.startsWith("APTO") || h.startsWith("UNIDADE")) {
-        layerIdx.push(idx);
-      }
-    });
-    const importMeta =
-      interpretationMeta && typeof interpretationMeta === "object"
-        ? JSON.parse(JSON.stringify(interpretationMeta))
-        : {};
-    let totalColumnIndex =
-      Number.isInteger(importMeta.total_col_interpreted) && importMeta.total_col_interpreted >= 1
-        ? importMeta.total_col_interpreted
-        : -1;
-    if (Number.isInteger(importMeta.total_col_source) && importMeta.total_col_source >= 1 && totalColumnIndex < 0) {
-      totalColumnIndex = importMeta.total_col_source;
-    }
-    for (let i = headerNorm.length - 1; i >= 1; i -= 1) {
-      const h = String(headerNorm[i] || "").trim();
-      if (!h) continue;
-      if (h === "TOTAL" || h === "TOTAL GERAL" || h.startsWith("TOTAL")) {
-        if (totalColumnIndex < 0) totalColumnIndex = i;
-        break;
-      }
-    }
+  const IMPORT_POLL_MS = 1500;
 
-    // Matriz única: preserva fielmente o output do parser.
-    let matrix = sections.find((s) => s && (s.kind === "matrix_table" || s.kind === "table"));
-    if (!matrix) {
-      matrix = {
-        id: `sec_${Math.random().toString(16).slice(2, 10)}`,
-        title: "Matriz de Controle",
-        kind: "matrix_table",
-        x: 80,
-        y: 80,
-        width: 680,
-        height: 420,
-        layer: {},
-        data: {},
-      };
-      sections.unshift(matrix);
-    }
-    matrix.data = matrix.data && typeof matrix.data === "object" ? matrix.data : {};
-    const cols = Math.max(1, ...rows.map((r) => (Array.isArray(r) ? r.length : 0)));
-    const rowsN = Math.max(1, rows.length);
-    matrix.data.rows = rows;
-    matrix.data.mapaControleTemplate = true;
-    matrix.data.totalColumnIndex = totalColumnIndex >= 1 ? totalColumnIndex : null;
-    matrix.data.importMeta = importMeta;
-    matrix.data.headerBandCount = 1;
-    matrix.data.totalsColumnAuto = false;
-    matrix.data.totalsRowAuto = false;
-    matrix.data.verticalHeaders = false;
-    matrix.data.colWeights = null;
-    matrix.data.rowWeights = null;
-    matrix.width = Math.max(Number(matrix.width) || 0, Math.min(3000, 180 + cols * 28));
-    matrix.height = Math.max(Number(matrix.height) || 0, Math.min(1500, 140 + rowsN * 26));
-    layout.sections = sections;
-    return layout;
-  }
-
-  async function importPlanilhaParaAmbiente(ambienteId) {
+  function waitMs(ms) {
+    return new Promise((resolve) => setTimeout(resolve, ms));
+  }
+
+  async function importPlanilhaParaAmbiente(ambienteId, onProgress) {
     if (importacaoPlanilhaCriacaoDesabilitada) return null;
     if (!isMapaControleType(selectType && selectType.value)) return null;
     const file = createImportFile && createImportFile.files && createImportFile.files[0];
     if (!file) return null;
-    const importUrl = replaceAmbienteId(context.endpoints.importMatrixBase, ambienteId);
-    const detailUrl = replaceAmbienteId(context.endpoints.detailBase, ambienteId);
-    const saveUrl = replaceAmbienteId(context.endpoints.saveBase, ambienteId);
+    const importUrl = replaceAmbienteId(context.endpoints.importMatrixJobBase, ambienteId);
     if (String(importUrl).includes("/ambientes/0/")) {
       throw new Error("Falha ao montar URL de importação (ID do ambiente não aplicado).");
     }
@@ -157,37 +87,29 @@
     if (createImportSheet && createImportSheet.value.trim()) fd.append("sheet", createImportSheet.value.trim());
     fd.append("mode", "auto");
 
-    const importData = await requestJson(importUrl, {
+    // A matriz é lida e gravada no rascunho em background; aqui só acompanhamos o job.
+    const started = await requestJson(importUrl, {
       method: "POST",
       credentials: "same-origin",
       body: fd,
     });
-    const rows = Array.isArray(importData.rows) ? importData.rows : [];
-    if (!rows.length) throw new Error("A planilha não trouxe linhas válidas para importar.");
-
-    const detail = await requestJson(detailUrl, { credentials: "same-origin" });
-    const versao = detail.versao || detail.draft || {};
-    const interpretationMeta =
-      importData && importData.interpretation_meta && typeof importData.interpretation_meta === "object"
-        ? importData.interpretation_meta
-        : {};
-    const layoutNovo = buildImportedLayoutFromRows(versao.layout, rows, interpretationMeta);
-
-    await requestJson(saveUrl, {
-      method: "POST",
-      credentials: "same-origin",
-      headers: {
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify({ layout: layoutNovo, metadados: { source: "shell_create_import" } }),
-    });
+    let job = started.job || {};
+    while (!job.done) {
+      if (typeof onProgress === "function") onProgress(job);
+      await waitMs(IMPORT_POLL_MS);
+      const status = await requestJson(started.status_url, { credentials: "same-origin" });
+      job = status.job || {};
+    }
+    if (job.status !== "concluido") {
+      throw new Error(job.error || "Não foi possível importar a planilha.");
+    }
+    if (!job.rows) throw new Error("A planilha não trouxe linhas válidas para importar.");
 
-    const cols = Math.max(0, ...rows.map((r) => (Array.isArray(r) ? r.length : 0)));
     return {
-      rows: rows.length,
-      cols,
-      strategy: importData.strategy || "",
-      sheet: (importData.read && importData.read.selected_sheet) || importData.sheet || "",
+      rows: job.rows,
+      cols: job.cols || 0,
+      strategy: job.strategy || "",
+      sheet: job.sheet || "",
     };
   }
 
@@ -455,7 +377,9 @@
       let importInfo = null;
       if (!importacaoPlanilhaCriacaoDesabilitada && data && data.item && data.item.id) {
         setButtonLoading(btnCreate, true, "Importando...");
-        importInfo = await importPlanilhaParaAmbiente(Number(data.item.id));
+        importInfo = await importPlanilhaParaAmbiente(Number(data.item.id), (job) => {
+          setButtonLoading(btnCreate, true, `Importando... ${Number(job.progress) || 0}%`);
+        });
       }
       if (createModal) createModal.hide();
       if (data && data.item) {
@@ -0,0 +1,62 @@
+"""
+Tarefas Celery do painel operacional: importação de planilha para a matriz de um ambiente
+(``ImportacaoMatrizJob``).
+
+Sem broker acessível roda numa thread daemon (``core.tasks._enqueue_or_thread``).
+"""
+import logging
+
+from celery import shared_task
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+def executar_importacao_matriz_job(job_id: int) -> None:
+    """Executa uma importação pendente; falhas ficam registradas no job."""
+    from django.utils import timezone
+
+    from painel_operacional.importacao import executar_importacao_matriz
+    from painel_operacional.models import ImportacaoMatrizJob
+
+    close_old_connections()
+    try:
+        job = ImportacaoMatrizJob.objects.select_related("ambiente", "solicitado_por").filter(pk=job_id).first()
+        if job is None:
+            logger.warning("executar_importacao_matriz_job: job id=%s não encontrado.", job_id)
+            return
+        if job.status in (ImportacaoMatrizJob.STATUS_PROCESSANDO, ImportacaoMatrizJob.STATUS_CONCLUIDO):
+            return
+        try:
+            executar_importacao_matriz(job)
+        except ValueError as exc:
+            # Planilha ilegível ou sem dados importáveis: mensagem vai para o usuário.
+            ImportacaoMatrizJob.objects.filter(pk=job_id).update(
+                status=ImportacaoMatrizJob.STATUS_FALHOU,
+                erro=str(exc)[:4000],
+                concluido_em=timezone.now(),
+                atualizado_em=timezone.now(),
+            )
+        except Exception:
+            logger.exception("executar_importacao_matriz_job: erro job_id=%s", job_id)
+            ImportacaoMatrizJob.objects.filter(pk=job_id).update(
+                status=ImportacaoMatrizJob.STATUS_FALHOU,
+                erro="Não foi possível ler a planilha. Verifique o formato do arquivo.",
+                concluido_em=timezone.now(),
+                atualizado_em=timezone.now(),
+            )
+    finally:
+        close_old_connections()
+
+
+@shared_task(ignore_result=True)
+def importacao_matriz_task(job_id: int):
+    """Fila Celery: importação de planilha para a matriz (ver ImportacaoMatrizJob)."""
+    executar_importacao_matriz_job(job_id)
+
+
+def agendar_importacao_matriz(job_id: int) -> None:
+    """Agenda a importação (fila Celery ou thread)."""
+    from core.tasks import _enqueue_or_thread
+
+    _enqueue_or_thread(importacao_matriz_task, executar_importacao_matriz_job, job_id, "po-importacao-matriz")
@@ -0,0 +1,155 @@
+"""
+Exportação da matriz para Excel: arquivo em cache por estado da versão, invalidação por
+``revisao``/``updated_at``, conteúdo e larguras do writer write-only e corrida na primeira exportação.
+"""
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from openpyxl import load_workbook
+
+from core.models import Project
+from mapa_obras.models import Obra
+from painel_operacional import exportacao
+from painel_operacional.exportacao import EXPORTACOES_STORAGE_DIR, arquivo_matriz_excel, nome_cache_matriz
+from painel_operacional.models import AmbienteOperacional, AmbienteVersao, VersaoEstado
+
+_MEDIA = tempfile.mkdtemp(prefix="po_exportacao_")
+
+ROWS = [
+    ["Local", "Alvenaria", "Reboco externo com descrição bem longa para passar do limite"],
+    ["Bloco A", "10%", None],
+    ["Bloco B"],
+]
+
+
+@override_settings(MEDIA_ROOT=_MEDIA)
+class _ExportacaoBase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser("po_export", "export@example.com", "x")
+        cls.obra = Obra.objects.create(codigo_sienge="PO-EXP", nome="Obra Exportação")
+        cls.ambiente = AmbienteOperacional.objects.create(obra=cls.obra, nome="Quadro Geral", criado_por=cls.user)
+        layout = {"sections": [{"id": "m", "kind": "matrix_table", "data": {"rows": ROWS}}]}
+        cls.versao = AmbienteVersao.objects.create(
+            ambiente=cls.ambiente, numero=1, estado=VersaoEstado.DRAFT, layout=layout, metadados={}
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(_MEDIA, ignore_errors=True)
+
+    def setUp(self):
+        self.versao.refresh_from_db()
+        self.chamadas = 0
+
+    def tearDown(self):
+        shutil.rmtree(f"{_MEDIA}/{EXPORTACOES_STORAGE_DIR}", ignore_errors=True)
+
+    def _rows(self):
+        self.chamadas += 1
+        return [list(r) for r in ROWS]
+
+    def _arquivos(self) -> list[str]:
+        try:
+            return sorted(default_storage.listdir(f"{EXPORTACOES_STORAGE_DIR}/{self.ambiente.pk}")[1])
+        except FileNotFoundError:
+            return []
+
+
+class ArquivoMatrizExcelTests(_ExportacaoBase):
+    def test_exportacao_repetida_le_o_arquivo_em_cache(self):
+        nome = arquivo_matriz_excel(self.versao, self._rows)
+        self.assertEqual(nome, nome_cache_matriz(self.versao))
+        self.assertEqual(arquivo_matriz_excel(self.versao, self._rows), nome)
+        self.assertEqual(self.chamadas, 1)
+        self.assertEqual(len(self._arquivos()), 1)
+
+    def test_nova_revisao_gera_outro_arquivo_e_descarta_o_anterior(self):
+        anterior = arquivo_matriz_excel(self.versao, self._rows)
+        self.versao.avancar_revisao()
+        atual = arquivo_matriz_excel(self.versao, self._rows)
+        self.assertNotEqual(atual, anterior)
+        self.assertEqual(self.chamadas, 2)
+        self.assertFalse(default_storage.exists(anterior))
+        self.assertEqual(self._arquivos(), [atual.rsplit("/", 1)[1]])
+
+    def test_gravacao_do_layout_invalida_pelo_updated_at(self):
+        anterior = arquivo_matriz_excel(self.versao, self._rows)
+        AmbienteVersao.objects.filter(pk=self.versao.pk).update(updated_at=self.versao.updated_at + timedelta(seconds=1))
+        self.versao.refresh_from_db()
+        atual = arquivo_matriz_excel(self.versao, self._rows)
+        self.assertNotEqual(atual, anterior)
+        self.assertEqual(self.chamadas, 2)
+        self.assertFalse(default_storage.exists(anterior))
+
+    def test_arquivo_de_outra_versao_nao_e_descartado(self):
+        outra = AmbienteVersao.objects.create(
+            ambiente=self.ambiente, numero=2, estado=VersaoEstado.DRAFT, layout={}, metadados={}
+        )
+        da_outra = arquivo_matriz_excel(outra, self._rows)
+        self.versao.avancar_revisao()
+        arquivo_matriz_excel(self.versao, self._rows)
+        self.assertTrue(default_storage.exists(da_outra))
+
+    def test_sem_linhas_nao_grava_arquivo(self):
+        self.assertEqual(arquivo_matriz_excel(self.versao, lambda: None), "")
+        self.assertEqual(self._arquivos(), [])
+
+    def test_primeiras_exportacoes_simultaneas_ficam_num_unico_arquivo(self):
+        nome = arquivo_matriz_excel(self.versao, self._rows)
+        # A segunda requisição consultou o storage antes da primeira terminar de gravar.
+        # Só a primeira consulta (a de arquivo_matriz_excel) vê o storage sem o arquivo.
+        exists = default_storage.exists
+        consultas = []
+
+        def exists_atrasado(caminho):
+            consultas.append(caminho)
+            return len(consultas) > 1 and exists(caminho)
+
+        with mock.patch.object(exportacao.default_storage, "exists", side_effect=exists_atrasado):
+            segundo = arquivo_matriz_excel(self.versao, self._rows)
+        self.assertEqual(segundo, nome)
+        self.assertEqual(self.chamadas, 2)
+        self.assertEqual(self._arquivos(), [nome.rsplit("/", 1)[1]])
+
+
+class ConteudoPlanilhaTests(_ExportacaoBase):
+    def test_conteudo_e_larguras_das_colunas(self):
+        nome = arquivo_matriz_excel(self.versao, self._rows)
+        with default_storage.open(nome, "rb") as fh:
+            wb = load_workbook(fh)
+        ws = wb["Mapa de Controle"]
+        self.assertEqual(wb.sheetnames, ["Mapa de Controle"])
+        self.assertEqual(
+            [[c or "" for c in row] for row in ws.iter_rows(values_only=True)],
+            [ROWS[0], ["Bloco A", "10%", ""], ["Bloco B", "", ""]],
+        )
+        # Texto + 2, entre 8 e 28.
+        self.assertEqual(
+            [ws.column_dimensions[letra].width for letra in "ABC"], [9, 11, 28]
+        )
+
+
+class ExportarMatrizViewTests(_ExportacaoBase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Project.objects.create(name="Obra Exportação", code="PO-EXP", start_date="2026-01-01", end_date="2026-12-31")
+
+    def test_download_usa_o_arquivo_em_cache(self):
+        self.client.force_login(self.user)
+        url = f"/api/internal/ferramenta/ambientes/{self.ambiente.pk}/exportar-matriz-excel/?obra={self.obra.pk}"
+        with mock.patch.object(exportacao, "escrever_matriz_excel", wraps=exportacao.escrever_matriz_excel) as escrever:
+            for _ in range(2):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("quadro-geral_mapa_controle_", response["Content-Disposition"])
+                b"".join(response.streaming_content)
+                response.close()
+        self.assertEqual(escrever.call_count, 1)
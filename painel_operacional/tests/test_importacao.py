@@ -0,0 +1,264 @@
+"""
+Importação de planilha para a matriz: ``interpretar_planilha`` (streaming) igual à interpretação
+da planilha inteira (``_interpret_import_rows``) e ciclo de vida do ``ImportacaoMatrizJob``.
+"""
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from openpyxl import Workbook
+
+from mapa_obras.models import Obra
+from painel_operacional import planilha
+from painel_operacional.importacao import importacao_matriz_payload, solicitar_importacao_matriz
+from painel_operacional.models import (
+    AmbienteCelula,
+    AmbienteElemento,
+    AmbienteHistorico,
+    AmbienteOperacional,
+    AmbienteVersao,
+    ImportacaoMatrizJob,
+    VersaoEstado,
+)
+from painel_operacional.planilha import (
+    PO_IMPORT_HEAD_ROWS,
+    _build_interpretation_metadata,
+    _interpret_import_rows,
+    _normalize_import_rows,
+    abrir_planilha,
+    interpretar_planilha,
+)
+from painel_operacional.tasks import executar_importacao_matriz_job
+
+_MEDIA = tempfile.mkdtemp(prefix="po_importacao_")
+
+ATIVIDADES = [
+    ("Alvenaria", "Estrutura"),
+    ("Reboco", "Acabamento"),
+    ("Pintura", "Acabamento"),
+    ("Piso", "Acabamento"),
+    ("Forro", "Acabamento"),
+]
+
+
+def _planilha_registros(total: int) -> list[list]:
+    """Um registro por local × atividade (com título, linhas vazias e repetições)."""
+    rows = [
+        ["Acompanhamento de serviços"],
+        [],
+        ["Bloco", "Pavimento", "Apto", "Atividade", "Grupo de Serviços", "Status", "Obs"],
+    ]
+    for i in range(total):
+        atividade, grupo = ATIVIDADES[i % len(ATIVIDADES)]
+        if i > PO_IMPORT_HEAD_ROWS + 200 and i % 7 == 0:
+            # Atividade que só aparece depois das linhas usadas para decidir a estratégia.
+            atividade, grupo = "Impermeabilização", "Cobertura"
+        bloco = "ABCD"[i % 4]
+        pav = str((i // 4) % 5 + 1)
+        apto = f"{pav}0{(i // 20) % 4 + 1}"
+        status = f"{(i * 7) % 101}%" if i % 11 else "concluído"
+        obs = "verificar" if i % 13 == 0 else None
+        rows.append([bloco, pav, apto, atividade, grupo, status, obs])
+        if i % 250 == 0:
+            rows.append([None, None, None, None])
+    return rows
+
+
+def _planilha_matriz(total: int) -> list[list]:
+    rows = [["Local", "Alvenaria", "Reboco", "Pintura", "Piso", "Forro", "Total"]]
+    for i in range(total):
+        rows.append([f"Bloco {'AB'[i % 2]} - Apto {i}"] + [f"{(i * k) % 101}%" for k in range(1, 6)] + [""])
+    return rows
+
+
+def _referencia(raw: list[list], mode: str, read_diag: dict) -> dict:
+    """Interpretação da planilha inteira em memória, como a importação síncrona fazia."""
+    rows_raw = _normalize_import_rows(raw)
+    rows, strategy, report = _interpret_import_rows(rows_raw, mode=mode)
+    meta = _build_interpretation_metadata(
+        raw_rows=rows_raw, interpreted_rows=rows, strategy=strategy, report=report, read_diag=read_diag
+    )
+    return {"rows": rows, "strategy": strategy, "report": report, "interpretation_meta": meta}
+
+
+def _xlsx(rows: list[list]) -> io.BytesIO:
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Dados"
+    for row in rows:
+        ws.append(row)
+    buf = io.BytesIO()
+    wb.save(buf)
+    buf.seek(0)
+    buf.name = "planilha.xlsx"
+    return buf
+
+
+class InterpretarPlanilhaTests(SimpleTestCase):
+    def _assert_igual_referencia(self, resultado: dict, esperado: dict):
+        for chave in ("strategy", "report", "rows", "interpretation_meta"):
+            with self.subTest(chave=chave):
+                self.assertEqual(resultado[chave], esperado[chave])
+
+    def test_pivot_de_registros_xlsx_em_streaming(self):
+        raw = _planilha_registros(PO_IMPORT_HEAD_ROWS + 900)
+        pivot = mock.Mock(wraps=planilha._pivot_records)
+        progresso = []
+        with mock.patch.object(planilha, "_pivot_records", pivot):
+            with abrir_planilha(_xlsx(raw)) as (linhas, aba, read_diag):
+                resultado = interpretar_planilha(
+                    linhas, mode="auto", read_diag=read_diag, progresso=progresso.append, progresso_a_cada=500
+                )
+        self.assertEqual(aba, "Dados")
+        self.assertEqual(resultado["strategy"], "pivot_registros")
+        # Passou pelo caminho de streaming: o pivot recebeu um iterador, não a lista de linhas.
+        self.assertNotIsInstance(pivot.call_args_list[-1].args[0], list)
+        self.assertIn("IMPERMEABILIZAÇÃO", resultado["interpretation_meta"]["activity_group_map"])
+        self.assertIn("Impermeabilização", resultado["rows"][0])
+        linhas_nao_vazias = len(_normalize_import_rows(raw))
+        self.assertEqual(resultado["linhas_lidas"], linhas_nao_vazias)
+        self.assertEqual(progresso, list(range(500, linhas_nao_vazias + 1, 500)))
+        self._assert_igual_referencia(resultado, _referencia(raw, "auto", read_diag))
+        self.assertEqual(resultado["meta"]["rows"], len(resultado["rows"]))
+
+    def test_pivot_forcado_igual_a_referencia(self):
+        raw = _planilha_registros(PO_IMPORT_HEAD_ROWS + 50)
+        resultado = interpretar_planilha(iter(raw), mode="pivot")
+        self._assert_igual_referencia(resultado, _referencia(raw, "pivot", {}))
+
+    def test_planilha_que_ja_e_matriz(self):
+        raw = _planilha_matriz(PO_IMPORT_HEAD_ROWS + 200)
+        resultado = interpretar_planilha(iter(raw), mode="auto")
+        self.assertEqual(resultado["strategy"], "matriz_detectada")
+        self._assert_igual_referencia(resultado, _referencia(raw, "auto", {}))
+        self.assertEqual(len(resultado["rows"]), PO_IMPORT_HEAD_ROWS + 201)
+
+    def test_modo_bruto_nao_interpreta(self):
+        raw = _planilha_registros(PO_IMPORT_HEAD_ROWS + 100)
+        resultado = interpretar_planilha(iter(raw), mode="raw")
+        self.assertEqual(resultado["strategy"], "forcado_bruto")
+        self._assert_igual_referencia(resultado, _referencia(raw, "raw", {}))
+
+    def test_planilha_curta_sem_padrao(self):
+        raw = [["a", "b"], ["texto livre", "outra coisa"], ["mais", "linhas"]]
+        resultado = interpretar_planilha(iter(raw), mode="auto")
+        self.assertEqual(resultado["strategy"], "fallback_bruto")
+        self._assert_igual_referencia(resultado, _referencia(raw, "auto", {}))
+
+    def test_planilha_vazia(self):
+        with self.assertRaises(planilha.ImportacaoPlanilhaErro):
+            interpretar_planilha(iter([]))
+
+
+def _csv(texto: str, nome: str = "matriz.csv") -> ContentFile:
+    return ContentFile(texto.encode("utf-8"), name=nome)
+
+
+MATRIZ_CSV = "Local;Alvenaria;Reboco;Pintura;Piso;Forro\nBloco A;10%;20%;30%;40%;50%\nBloco B;15%;25%;35%;45%;55%\n"
+MATRIZ_MENOR_CSV = "Local;Alvenaria;Reboco;Pintura;Piso;Forro\nBloco A;100%;20%;30%;40%;50%\n"
+
+
+@override_settings(MEDIA_ROOT=_MEDIA)
+class ImportacaoMatrizJobTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(_MEDIA, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("po_import", password="x")
+        obra = Obra.objects.create(codigo_sienge="PO-1", nome="Obra Painel")
+        cls.ambiente = AmbienteOperacional.objects.create(obra=obra, nome="Mapa", criado_por=cls.user)
+
+    def _importar(self, texto: str, **kwargs) -> ImportacaoMatrizJob:
+        with mock.patch("painel_operacional.tasks.agendar_importacao_matriz") as agendar:
+            with self.captureOnCommitCallbacks(execute=True):
+                job = solicitar_importacao_matriz(self.ambiente, _csv(texto), usuario=self.user, **kwargs)
+        agendar.assert_called_once_with(job.pk)
+        self.assertEqual(job.status, ImportacaoMatrizJob.STATUS_PENDENTE)
+        executar_importacao_matriz_job(job.pk)
+        job.refresh_from_db()
+        return job
+
+    def _job(self, texto: str, **campos) -> ImportacaoMatrizJob:
+        return ImportacaoMatrizJob.objects.create(
+            ambiente=self.ambiente, solicitado_por=self.user, arquivo=_csv(texto), **campos
+        )
+
+    def _celulas(self, elemento) -> list[list[str]]:
+        rows: dict[int, dict[int, str]] = {}
+        for linha, coluna, valor in elemento.celulas.values_list("linha_idx", "coluna_idx", "valor"):
+            rows.setdefault(linha, {})[coluna] = valor
+        return [[rows[r][c] for c in sorted(rows[r])] for r in sorted(rows)]
+
+    def test_job_aplica_matriz_no_rascunho(self):
+        job = self._importar(MATRIZ_CSV)
+        self.assertEqual(job.status, ImportacaoMatrizJob.STATUS_CONCLUIDO)
+        payload = importacao_matriz_payload(job)
+        self.assertTrue(payload["done"])
+        self.assertEqual(payload["progress"], 100)
+        self.assertEqual((payload["rows"], payload["cols"], payload["sheet"]), (3, 6, "CSV"))
+        self.assertEqual(payload["strategy"], "matriz_detectada")
+
+        draft = AmbienteVersao.objects.get(ambiente=self.ambiente, estado=VersaoEstado.DRAFT)
+        secao = next(s for s in draft.layout["sections"] if s["id"] == job.secao_id)
+        elemento = AmbienteElemento.objects.get(ambiente=self.ambiente, chave_externa=job.secao_id)
+        self.assertEqual(elemento.tipo, "table")
+        self.assertEqual(elemento.revisao, draft.revisao)
+        self.assertEqual(self._celulas(elemento), secao["data"]["rows"])
+        self.assertEqual(secao["data"]["rows"][1][:2], ["Bloco A", "10%"])
+        self.assertEqual(job.celulas_gravadas, 18)
+        self.assertTrue(
+            AmbienteHistorico.objects.filter(ambiente=self.ambiente, detalhes__importacao_id=job.pk).exists()
+        )
+
+    def test_reimportacao_troca_so_as_diferencas(self):
+        primeiro = self._importar(MATRIZ_CSV)
+        elemento = AmbienteElemento.objects.get(ambiente=self.ambiente, chave_externa=primeiro.secao_id)
+        inalterada = elemento.celulas.get(linha_idx=1, coluna_idx=2)
+
+        job = self._job(MATRIZ_MENOR_CSV, secao_id=primeiro.secao_id)
+        executar_importacao_matriz_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportacaoMatrizJob.STATUS_CONCLUIDO)
+        self.assertEqual(AmbienteElemento.objects.filter(ambiente=self.ambiente).count(), 1)
+        self.assertEqual(
+            self._celulas(elemento),
+            [["Local", "Alvenaria", "Reboco", "Pintura", "Piso", "Forro"], ["Bloco A", "100%", "20%", "30%", "40%", "50%"]],
+        )
+        # Célula com o mesmo valor não é regravada.
+        self.assertTrue(AmbienteCelula.objects.filter(pk=inalterada.pk, valor="20%").exists())
+
+    def test_falha_ao_aplicar_nao_deixa_matriz_pela_metade(self):
+        primeiro = self._importar(MATRIZ_CSV)
+        draft = AmbienteVersao.objects.get(ambiente=self.ambiente, estado=VersaoEstado.DRAFT)
+        elemento = AmbienteElemento.objects.get(ambiente=self.ambiente, chave_externa=primeiro.secao_id)
+        antes = (draft.revisao, draft.layout, self._celulas(elemento), AmbienteHistorico.objects.count())
+
+        job = self._job(MATRIZ_MENOR_CSV, secao_id=primeiro.secao_id)
+        with mock.patch("painel_operacional.importacao.sincronizar_celulas", side_effect=RuntimeError("queda")):
+            executar_importacao_matriz_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportacaoMatrizJob.STATUS_FALHOU)
+        self.assertIn("Não foi possível ler a planilha", job.erro)
+        draft.refresh_from_db()
+        depois = (draft.revisao, draft.layout, self._celulas(elemento), AmbienteHistorico.objects.count())
+        self.assertEqual(depois, antes)
+
+    def test_planilha_sem_dados_falha_com_mensagem(self):
+        job = self._importar("")
+        self.assertEqual(job.status, ImportacaoMatrizJob.STATUS_FALHOU)
+        self.assertIn("não possui dados", job.erro)
+        self.assertTrue(importacao_matriz_payload(job)["done"])
+        self.assertFalse(AmbienteElemento.objects.filter(ambiente=self.ambiente).exists())
+
+    def test_job_concluido_nao_roda_de_novo(self):
+        job = self._job(MATRIZ_CSV, status=ImportacaoMatrizJob.STATUS_CONCLUIDO)
+        executar_importacao_matriz_job(job.pk)
+        self.assertFalse(AmbienteElemento.objects.filter(ambiente=self.ambiente).exists())
@@ -0,0 +1,178 @@
+"""
+Sincronização incremental dos elementos do rascunho (``aplicar_delta``): conflitos, ``forcar``,
+alterações remotas devolvidas ao editor e gravação só das células alteradas.
+"""
+import json
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import TestCase
+
+from core.models import Project
+from mapa_obras.models import Obra
+from painel_operacional.models import (
+    AmbienteCelula,
+    AmbienteElemento,
+    AmbienteHistorico,
+    AmbienteOperacional,
+    AmbienteVersao,
+    VersaoEstado,
+)
+from painel_operacional.sincronizacao import aplicar_delta
+
+
+def _bloco(chave: str, titulo: str = "", **extra) -> dict:
+    return {"chave_externa": chave, "title": titulo or chave, "kind": "text_block", "data": {}, **extra}
+
+
+def _matriz(chave: str, rows: list[list[str]]) -> dict:
+    return {"chave_externa": chave, "title": "Matriz", "kind": "matrix_table", "data": {"rows": rows}}
+
+
+class _SincronizacaoBase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser("po_sync", "sync@example.com", "x")
+        cls.obra = Obra.objects.create(codigo_sienge="PO-SYNC", nome="Obra Sync")
+        cls.ambiente = AmbienteOperacional.objects.create(obra=cls.obra, nome="Quadro", criado_por=cls.user)
+        cls.draft = AmbienteVersao.objects.create(
+            ambiente=cls.ambiente, numero=1, estado=VersaoEstado.DRAFT, layout={}, metadados={}
+        )
+
+    def _delta(self, base_revisao: int, alterados=(), **kwargs) -> dict:
+        with transaction.atomic():
+            draft = AmbienteVersao.objects.select_for_update().get(pk=self.draft.pk)
+            return aplicar_delta(self.ambiente, draft, base_revisao=base_revisao, alterados=list(alterados), **kwargs)
+
+    def _elemento(self, chave: str) -> AmbienteElemento:
+        return AmbienteElemento.objects.get(ambiente=self.ambiente, chave_externa=chave)
+
+
+class AplicarDeltaTests(_SincronizacaoBase):
+    def setUp(self):
+        self.inicial = self._delta(0, [_bloco("a"), _bloco("b"), _bloco("c")])
+
+    def test_cria_elementos_e_avanca_revisao(self):
+        self.assertEqual(self.inicial["revisao"], 1)
+        self.assertEqual([i["chave_externa"] for i in self.inicial["itens"]], ["a", "b", "c"])
+        self.assertEqual([self._elemento(k).z_index for k in "abc"], [0, 1, 2])
+        self.draft.refresh_from_db()
+        self.assertEqual([s["id"] for s in self.draft.layout["sections"]], ["a", "b", "c"])
+        self.assertEqual(self.inicial["conflitos"], [])
+
+    def test_elemento_gravado_por_outra_sessao_volta_como_conflito(self):
+        self._delta(1, [_bloco("a", "Sessão 1")])
+        resultado = self._delta(1, [_bloco("a", "Sessão 2"), _bloco("b", "B novo")])
+        self.assertEqual([c["chave_externa"] for c in resultado["conflitos"]], ["a"])
+        self.assertEqual(resultado["conflitos"][0]["titulo"], "Sessão 1")
+        self.assertEqual([i["chave_externa"] for i in resultado["itens"]], ["b"])
+        self.assertEqual(self._elemento("a").titulo, "Sessão 1")
+        self.assertEqual(self._elemento("b").titulo, "B novo")
+        # O elemento em conflito não aparece de novo como alteração remota.
+        self.assertEqual(resultado["remotos"], [])
+
+    def test_forcar_sobrescreve_conflito(self):
+        self._delta(1, [_bloco("a", "Sessão 1")])
+        resultado = self._delta(1, [_bloco("a", "Sessão 2")], forcar=["a"])
+        self.assertEqual(resultado["conflitos"], [])
+        self.assertEqual(self._elemento("a").titulo, "Sessão 2")
+        self.assertEqual(self._elemento("a").revisao, resultado["revisao"])
+
+    def test_remocao_de_elemento_alterado_por_outra_sessao_e_conflito(self):
+        self._delta(1, [_bloco("a", "Sessão 1")])
+        resultado = self._delta(1, removidos=["a", "b"])
+        self.assertEqual([c["chave_externa"] for c in resultado["conflitos"]], ["a"])
+        self.assertEqual(resultado["removidos"], ["b"])
+        self.assertTrue(self._elemento("a").ativo)
+        self.assertFalse(self._elemento("b").ativo)
+        self.draft.refresh_from_db()
+        self.assertEqual([s["id"] for s in self.draft.layout["sections"]], ["a", "c"])
+
+    def test_alteracoes_de_outras_sessoes_voltam_para_mesclar(self):
+        self._delta(1, [_bloco("b", "B remoto")], removidos=["c"])
+        resultado = self._delta(1, [_bloco("a", "Local")])
+        self.assertEqual([r["chave_externa"] for r in resultado["remotos"]], ["b"])
+        self.assertEqual(resultado["remotos"][0]["titulo"], "B remoto")
+        self.assertEqual(resultado["removidos_remotos"], ["c"])
+        self.assertEqual(resultado["conflitos"], [])
+
+        # Já na revisão atual: nada remoto a mesclar.
+        seguinte = self._delta(resultado["revisao"], [_bloco("a", "Local 2")])
+        self.assertEqual((seguinte["remotos"], seguinte["removidos_remotos"]), ([], []))
+
+    def test_ordem_reordena_elementos_e_layout(self):
+        resultado = self._delta(1, ordem=["c", "a", "b"])
+        self.assertEqual([self._elemento(k).z_index for k in "cab"], [0, 1, 2])
+        self.assertEqual(self._elemento("c").revisao, resultado["revisao"])
+        self.draft.refresh_from_db()
+        self.assertEqual([s["id"] for s in self.draft.layout["sections"]], ["c", "a", "b"])
+
+
+class CelulasDeltaTests(_SincronizacaoBase):
+    ROWS = [["Local", "Alvenaria", "Reboco"], ["Bloco A", "10%", "20%"], ["Bloco B", "30%", "40%"]]
+
+    def setUp(self):
+        self.inicial = self._delta(0, [_matriz("m", self.ROWS)])
+        self.elemento = self._elemento("m")
+
+    def _celulas(self):
+        return {(l, c): v for l, c, v in self.elemento.celulas.values_list("linha_idx", "coluna_idx", "valor")}
+
+    def test_matriz_nova_grava_todas_as_celulas(self):
+        self.assertEqual(self.inicial["celulas_gravadas"], 9)
+        self.assertEqual(self._celulas()[(2, 2)], "40%")
+
+    def test_so_as_celulas_alteradas_sao_gravadas(self):
+        inalterada = self.elemento.celulas.get(linha_idx=1, coluna_idx=1)
+        rows = [list(r) for r in self.ROWS]
+        rows[2][2] = "45%"
+        resultado = self._delta(1, [_matriz("m", rows)])
+        self.assertEqual(resultado["celulas_gravadas"], 1)
+        self.assertEqual(self._celulas()[(2, 2)], "45%")
+        self.assertTrue(AmbienteCelula.objects.filter(pk=inalterada.pk, valor="10%").exists())
+
+    def test_linhas_novas_e_removidas(self):
+        rows = [self.ROWS[0], self.ROWS[1], ["Bloco C", "50%"]]
+        resultado = self._delta(1, [_matriz("m", rows)])
+        # (2,0) e (2,1) mudam; (2,2) some.
+        self.assertEqual(resultado["celulas_gravadas"], 3)
+        celulas = self._celulas()
+        self.assertEqual(celulas[(2, 0)], "Bloco C")
+        self.assertNotIn((2, 2), celulas)
+
+    def test_matriz_sem_mudanca_nas_linhas_nao_toca_celulas(self):
+        item = _matriz("m", [list(r) for r in self.ROWS])
+        item["x"] = 300
+        resultado = self._delta(1, [item])
+        self.assertEqual(resultado["celulas_gravadas"], 0)
+        self.assertEqual(self._elemento("m").x, 300)
+
+
+class SyncDeltaViewTests(_SincronizacaoBase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Project.objects.create(name="Obra Sync", code="PO-SYNC", start_date="2026-01-01", end_date="2026-12-31")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = f"/api/internal/ferramenta/ambientes/{self.ambiente.pk}/elementos/sync/?obra={self.obra.pk}"
+
+    def _post(self, payload: dict):
+        return self.client.post(self.url, data=json.dumps(payload), content_type="application/json")
+
+    def test_delta_grava_e_registra_historico(self):
+        response = self._post({"base_revisao": 0, "alterados": [_bloco("a")]})
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        self.assertTrue(body["success"])
+        self.assertEqual(body["revisao"], 1)
+        self.assertTrue(
+            AmbienteHistorico.objects.filter(
+                ambiente=self.ambiente, detalhes__acao_editor="sync_elementos_delta", detalhes__revisao=1
+            ).exists()
+        )
+
+    def test_payload_invalido(self):
+        response = self._post({"base_revisao": 0, "alterados": {"a": 1}})
+        self.assertEqual(response.status_code, 400)
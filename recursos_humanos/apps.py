@@ -5,3 +5,6 @@ class RecursosHumanosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recursos_humanos'
     verbose_name = 'DP / Recursos Humanos'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -2,12 +2,14 @@ from django.core.management.base import BaseCommand
 
 from recursos_humanos.services.alertas_email import enviar_emails_alertas_diarios
 from recursos_humanos.services.alerts import gerar_alertas
+from recursos_humanos.services.lista_colaboradores import atualizar_resumos_lista
 
 
 class Command(BaseCommand):
     help = (
         'Envia o resumo diário de alertas RH (documentos e prazos de contrato). '
         'Período de experiência CLT usa o comando notificar_vencimentos_experiencia. '
+        'Também recalcula as pendências da lista de colaboradores para o dia. '
         'Agende no cron, por exemplo às 7h:\n'
         '  0 7 * * * cd /home/lplan/sistema && python manage.py enviar_alertas_rh_diarios'
     )
@@ -15,7 +17,9 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         alertas = gerar_alertas()
         enviados = enviar_emails_alertas_diarios(alertas)
+        resumos = atualizar_resumos_lista(apenas_desatualizados=True)
         self.stdout.write(
             f'Alertas analisados: {len(alertas)}\n'
-            f'E-mails enviados: {enviados}'
+            f'E-mails enviados: {enviados}\n'
+            f'Resumos da lista recalculados: {resumos}'
         )
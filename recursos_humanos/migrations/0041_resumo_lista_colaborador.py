@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:17
+# Resumo persistido da lista de colaboradores (services.lista_colaboradores) + carga inicial.
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_resumos(apps, schema_editor):
+    """
+    Grava o resumo de todos os colaboradores. O cálculo (pendências, documentos, contrato) é o
+    do serviço, sobre os modelos atuais: reproduzi-lo com os modelos históricos duplicaria
+    as regras de alerta. Base sem colaboradores (ex.: testes) não consulta os modelos atuais.
+    """
+    if not apps.get_model('recursos_humanos', 'Colaborador').objects.exists():
+        return
+    from recursos_humanos.services.lista_colaboradores import atualizar_resumos_lista
+
+    atualizar_resumos_lista()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recursos_humanos', '0040_empresaresponsavel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoListaColaborador',
+            fields=[
+                ('colaborador', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumo_lista', serialize=False, to='recursos_humanos.colaborador')),
+                ('calculado_para', models.DateField(blank=True, null=True, verbose_name='Data de referência')),
+                ('pendencias', models.JSONField(blank=True, default=list, verbose_name='Pendências')),
+                ('pendencias_total', models.PositiveSmallIntegerField(default=0)),
+                ('pendencia_urgencia', models.CharField(blank=True, help_text='red, yellow ou neutral; vazio sem pendências.', max_length=10, verbose_name='Maior urgência')),
+                ('pendencia_ordem', models.IntegerField(blank=True, null=True, verbose_name='Ordem da pendência mais urgente')),
+                ('docs_recebidos', models.PositiveSmallIntegerField(default=0)),
+                ('docs_total', models.PositiveSmallIntegerField(default=0)),
+                ('docs_pendentes', models.PositiveSmallIntegerField(default=0)),
+                ('docs_completo', models.BooleanField(default=False)),
+                ('resumo_contrato', models.JSONField(blank=True, null=True)),
+                ('proximo_vencimento', models.DateField(blank=True, null=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumo da lista de colaboradores',
+                'verbose_name_plural': 'Resumos da lista de colaboradores',
+                'indexes': [models.Index(fields=['pendencia_urgencia', 'pendencia_ordem'], name='recursos_hu_pendenc_bc53e1_idx'), models.Index(fields=['calculado_para'], name='recursos_hu_calcula_979074_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_resumos, migrations.RunPython.noop),
+    ]
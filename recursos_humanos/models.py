@@ -409,6 +409,55 @@ class DocumentoColaborador(models.Model):
         return f'{self.colaborador.nome} — {self.tipo.nome}'
 
 
+class ResumoListaColaborador(models.Model):
+    """
+    Pendências e resumos da lista de colaboradores, pré-calculados por colaborador.
+
+    Atualizado após o commit de mudanças em documentos, prazos de contrato e etapas de
+    admissão (``recursos_humanos.signals``) e diariamente, pois as pendências dependem
+    da data (``calculado_para``).
+    """
+
+    colaborador = models.OneToOneField(
+        Colaborador,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='resumo_lista',
+    )
+    calculado_para = models.DateField('Data de referência', null=True, blank=True)
+    pendencias = models.JSONField('Pendências', default=list, blank=True)
+    pendencias_total = models.PositiveSmallIntegerField(default=0)
+    pendencia_urgencia = models.CharField(
+        'Maior urgência',
+        max_length=10,
+        blank=True,
+        help_text='red, yellow ou neutral; vazio sem pendências.',
+    )
+    pendencia_ordem = models.IntegerField(
+        'Ordem da pendência mais urgente',
+        null=True,
+        blank=True,
+    )
+    docs_recebidos = models.PositiveSmallIntegerField(default=0)
+    docs_total = models.PositiveSmallIntegerField(default=0)
+    docs_pendentes = models.PositiveSmallIntegerField(default=0)
+    docs_completo = models.BooleanField(default=False)
+    resumo_contrato = models.JSONField(null=True, blank=True)
+    proximo_vencimento = models.DateField(null=True, blank=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Resumo da lista de colaboradores'
+        verbose_name_plural = 'Resumos da lista de colaboradores'
+        indexes = [
+            models.Index(fields=['pendencia_urgencia', 'pendencia_ordem']),
+            models.Index(fields=['calculado_para']),
+        ]
+
+    def __str__(self):
+        return f'{self.colaborador_id} — {self.pendencias_total} pendência(s)'
+
+
 class AdmissaoHistorico(models.Model):
     colaborador = models.ForeignKey(
         Colaborador,
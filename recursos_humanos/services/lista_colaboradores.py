@@ -1,10 +1,13 @@
 """Dados operacionais para a lista de colaboradores (pendências e resumo de docs)."""
 from __future__ import annotations
 
+import logging
 import re
+import threading
 
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 
+from django.db import transaction
 from django.urls import reverse
 from django.utils import timezone
 
@@ -18,8 +21,16 @@ from recursos_humanos.services.documentos import (
 from recursos_humanos.services.papeis_fluxo import ETAPAS_FLUXO_LABELS
 from recursos_humanos.services.prazo_contrato import NOME_EXPERIENCIA_CLT
 
+logger = logging.getLogger(__name__)
+
 _MAX_PENDENCIAS_VISIVEIS = 2
 
+# Colaboradores com recálculo do resumo pendente de commit, por thread (deduplica sinais em lote).
+_agendamento = threading.local()
+
+# Trava no banco (``core.locks.db_lock``) do recálculo em background: um por vez entre processos.
+_RECALCULO_LOCK = 'rh_resumos_lista'
+
 _ETAPA_LABEL = dict(ETAPAS_FLUXO_LABELS)
 
 _PRAZO_CURTO = {
@@ -417,10 +428,26 @@ def enriquecer_lista_colaborador(
         total=total,
     )
 
+    _aplicar_campos_lista(
+        colaborador,
+        pendencias=pendencias,
+        resumo_docs=resumo_docs,
+        resumo_contrato=obter_resumo_contrato_lista(colaborador),
+    )
+    return colaborador
+
+
+def _aplicar_campos_lista(
+    colaborador: Colaborador,
+    *,
+    pendencias: list[PendenciaListaItem],
+    resumo_docs: ResumoDocumentosLista,
+    resumo_contrato: ResumoContratoLista | None,
+) -> None:
     colaborador.pendencias_lista = pendencias
     colaborador.pendencias_visiveis = pendencias[:_MAX_PENDENCIAS_VISIVEIS]
     colaborador.pendencias_extra = max(0, len(pendencias) - _MAX_PENDENCIAS_VISIVEIS)
-    colaborador.resumo_contrato = obter_resumo_contrato_lista(colaborador)
+    colaborador.resumo_contrato = resumo_contrato
     colaborador.resumo_docs = resumo_docs
 
     etapa = colaborador.etapa_admissao or 1
@@ -444,4 +471,182 @@ def enriquecer_lista_colaborador(
             'recursos_humanos:colaboradores_list',
         ) + f'?abrir_colaborador={colaborador.pk}&abrir_colaborador_tab=documentos'
 
+
+# --- Resumo persistido (ResumoListaColaborador) -------------------------------------------
+
+
+def calcular_resumo_lista(
+    colaborador: Colaborador,
+    *,
+    docs: list[DocumentoColaborador] | None = None,
+    config=None,
+) -> dict:
+    """Campos de ``ResumoListaColaborador`` calculados para hoje."""
+    doc_list = docs if docs is not None else list(colaborador.documentos.select_related('tipo'))
+    pendencias = listar_pendencias_colaborador(colaborador, docs=doc_list, config=config)
+    resumo_docs = resumo_documentos_lista(colaborador, docs=doc_list)
+    contrato = obter_resumo_contrato_lista(colaborador)
+    vencimentos = [doc.vencimento for doc in doc_list if doc.vencimento]
+    urgencia = ''
+    for nivel in ('red', 'yellow', 'neutral'):
+        if any(p.urgencia == nivel for p in pendencias):
+            urgencia = nivel
+            break
+    return {
+        'calculado_para': timezone.localdate(),
+        'pendencias': [
+            {'label': p.label, 'hint': p.hint, 'urgencia': p.urgencia, 'ordem': p.ordem}
+            for p in pendencias
+        ],
+        'pendencias_total': len(pendencias),
+        'pendencia_urgencia': urgencia,
+        'pendencia_ordem': min((p.ordem for p in pendencias), default=None),
+        'docs_recebidos': resumo_docs.recebidos,
+        'docs_total': resumo_docs.total,
+        'docs_pendentes': resumo_docs.pendentes_count,
+        'docs_completo': resumo_docs.completo,
+        'resumo_contrato': asdict(contrato) if contrato else None,
+        'proximo_vencimento': min(vencimentos, default=None),
+    }
+
+
+def atualizar_resumos_lista(colaborador_ids=None, *, apenas_desatualizados: bool = False) -> int:
+    """
+    Recalcula e grava o resumo dos colaboradores (todos quando ``colaborador_ids`` é None).
+    Com ``apenas_desatualizados`` só os sem resumo ou calculados antes de hoje.
+    Retorna quantos resumos foram gravados.
+    """
+    from django.db.models import Prefetch
+
+    from recursos_humanos.models import ResumoListaColaborador
+
+    qs = Colaborador.objects.all()
+    if colaborador_ids is not None:
+        qs = qs.filter(pk__in=list(colaborador_ids))
+    if apenas_desatualizados:
+        qs = qs.filter(_resumos_desatualizados_q())
+    qs = qs.prefetch_related(
+        Prefetch('documentos', queryset=DocumentoColaborador.objects.select_related('tipo')),
+        'prazos_contrato',
+    ).order_by('pk')
+
+    config = obter_configuracao_alertas()
+    gravados = 0
+    for colaborador in qs.iterator(chunk_size=200):
+        campos = calcular_resumo_lista(
+            colaborador,
+            docs=list(colaborador.documentos.all()),
+            config=config,
+        )
+        ResumoListaColaborador.objects.update_or_create(colaborador=colaborador, defaults=campos)
+        gravados += 1
+    return gravados
+
+
+def agendar_atualizacao_resumo(colaborador_id) -> None:
+    """Recalcula o resumo do colaborador após o commit (uma vez por transação)."""
+    if not colaborador_id:
+        return
+    agendados = getattr(_agendamento, 'ids', None)
+    if agendados is None:
+        agendados = _agendamento.ids = set()
+    agendados.add(colaborador_id)
+
+    def _executar():
+        if colaborador_id not in agendados:
+            return
+        agendados.discard(colaborador_id)
+        try:
+            atualizar_resumos_lista([colaborador_id])
+        except Exception:
+            logger.exception('Falha ao atualizar resumo da lista do colaborador %s', colaborador_id)
+
+    transaction.on_commit(_executar)
+
+
+def _resumos_desatualizados_q():
+    """Colaboradores sem resumo, com resumo invalidado ou calculado antes de hoje."""
+    from django.db.models import Q
+
+    hoje = timezone.localdate()
+    return (
+        Q(resumo_lista__isnull=True)
+        | Q(resumo_lista__calculado_para__isnull=True)
+        | Q(resumo_lista__calculado_para__lt=hoje)
+    )
+
+
+def recalcular_resumos_desatualizados() -> int:
+    """
+    Cria os resumos que faltam e recalcula os desatualizados, com a trava do banco.
+    Retorna quantos foram gravados (0 quando outro recálculo detém a trava).
+    """
+    from core.locks import db_lock
+
+    with db_lock(_RECALCULO_LOCK) as travado:
+        if not travado:
+            return 0
+        return atualizar_resumos_lista(apenas_desatualizados=True)
+
+
+def agendar_recalculo_resumos_desatualizados() -> bool:
+    """
+    Agenda (Celery ou thread) o recálculo dos resumos faltantes, de dias anteriores ou invalidados.
+
+    A lista serve sempre os resumos persistidos; o recálculo do dia é do comando
+    ``enviar_alertas_rh_diarios`` e isto só cobre o intervalo até ele rodar (colaborador sem
+    resumo ou invalidação pela configuração de alertas). Retorna se um recálculo foi agendado.
+    """
+    from core.tasks import _enqueue_or_thread
+    from recursos_humanos.tasks import executar_recalculo_resumos_lista, recalcular_resumos_lista_task
+
+    if not Colaborador.objects.filter(_resumos_desatualizados_q()).exists():
+        return False
+    _enqueue_or_thread(recalcular_resumos_lista_task, executar_recalculo_resumos_lista, 0, 'rh-resumos-lista')
+    return True
+
+
+def invalidar_resumos_lista() -> None:
+    """Marca todos os resumos para recálculo (ex.: mudou a configuração de alertas)."""
+    from recursos_humanos.models import ResumoListaColaborador
+
+    ResumoListaColaborador.objects.update(calculado_para=None)
+
+
+def enriquecer_lista_colaborador_resumo(colaborador: Colaborador) -> Colaborador:
+    """
+    Versão de ``enriquecer_lista_colaborador`` que lê o resumo persistido
+    (``select_related('resumo_lista')``), sem carregar documentos nem prazos.
+    """
+    from recursos_humanos.services.status_colaborador import aplicar_status_exibicao
+
+    resumo = getattr(colaborador, 'resumo_lista', None)
+    if resumo is None:
+        atualizar_resumos_lista([colaborador.pk])
+        from recursos_humanos.models import ResumoListaColaborador
+
+        resumo = ResumoListaColaborador.objects.get(colaborador=colaborador)
+    colaborador.docs_recebidos = resumo.docs_recebidos
+    colaborador.docs_total = resumo.docs_total
+    aplicar_status_exibicao(
+        colaborador,
+        docs_recebidos=resumo.docs_recebidos,
+        docs_total=resumo.docs_total,
+    )
+    _aplicar_campos_lista(
+        colaborador,
+        pendencias=[PendenciaListaItem(**item) for item in resumo.pendencias or []],
+        resumo_docs=ResumoDocumentosLista(
+            recebidos=resumo.docs_recebidos,
+            total=resumo.docs_total,
+            pendentes_count=resumo.docs_pendentes,
+            completo=resumo.docs_completo,
+            fracao=(
+                f'{resumo.docs_recebidos}/{resumo.docs_total}' if resumo.docs_total else '0/0'
+            ),
+        ),
+        resumo_contrato=(
+            ResumoContratoLista(**resumo.resumo_contrato) if resumo.resumo_contrato else None
+        ),
+    )
     return colaborador
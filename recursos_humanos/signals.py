@@ -0,0 +1,36 @@
+"""Mantém ``ResumoListaColaborador`` em dia com documentos, prazos e etapas de admissão."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recursos_humanos.models import (
+    Colaborador,
+    ConfiguracaoAlertasRH,
+    DocumentoColaborador,
+    PrazoContrato,
+)
+from recursos_humanos.services.lista_colaboradores import (
+    agendar_atualizacao_resumo,
+    invalidar_resumos_lista,
+)
+
+
+@receiver(post_save, sender=Colaborador)
+def _colaborador_salvo(sender, instance, raw=False, **kwargs):
+    if not raw:
+        agendar_atualizacao_resumo(instance.pk)
+
+
+@receiver(post_save, sender=DocumentoColaborador)
+@receiver(post_delete, sender=DocumentoColaborador)
+@receiver(post_save, sender=PrazoContrato)
+@receiver(post_delete, sender=PrazoContrato)
+def _dependencia_resumo_alterada(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    agendar_atualizacao_resumo(instance.colaborador_id)
+
+
+@receiver(post_save, sender=ConfiguracaoAlertasRH)
+def _config_alertas_salva(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidar_resumos_lista()
@@ -0,0 +1,25 @@
+"""
+Tarefas Celery do RH: recálculo dos resumos da lista de colaboradores
+(``ResumoListaColaborador``). Sem broker acessível roda numa thread (``core.tasks._enqueue_or_thread``).
+"""
+from __future__ import annotations
+
+from celery import shared_task
+from django.db import close_old_connections
+
+
+def executar_recalculo_resumos_lista(_object_id: int = 0) -> int:
+    """Recalcula os resumos faltantes ou desatualizados (worker Celery ou thread)."""
+    from recursos_humanos.services.lista_colaboradores import recalcular_resumos_desatualizados
+
+    close_old_connections()
+    try:
+        return recalcular_resumos_desatualizados()
+    finally:
+        close_old_connections()
+
+
+@shared_task(ignore_result=True)
+def recalcular_resumos_lista_task(_object_id: int = 0):
+    """Fila Celery: ver ``executar_recalculo_resumos_lista``."""
+    return executar_recalculo_resumos_lista(_object_id)
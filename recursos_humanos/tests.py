@@ -296,6 +296,93 @@ class ColaboradoresListTests(TestCase):
         self.assertContains(resp, 'Alpha')
         self.assertNotContains(resp, 'Beta')
 
+    def test_filtro_pendencias_usa_resumo_persistido(self):
+        from recursos_humanos.models import ResumoListaColaborador
+
+        alpha = Colaborador.objects.get(nome='Alpha')
+        tipo = TipoDocumento.objects.create(nome='ASO', ordem=1, tem_validade=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            doc = DocumentoColaborador.objects.create(
+                colaborador=alpha,
+                tipo=tipo,
+                status=DocumentoColaborador.Status.RECEBIDO,
+                vencimento=timezone.localdate() - timedelta(days=1),
+            )
+        resumo = ResumoListaColaborador.objects.get(colaborador=alpha)
+        self.assertEqual(resumo.pendencia_urgencia, 'red')
+        self.assertEqual(resumo.calculado_para, timezone.localdate())
+
+        self.client.force_login(self.user)
+        url = reverse('recursos_humanos:colaboradores')
+        resp = self.client.get(url, {'pendencias': 'urgentes'})
+        self.assertContains(resp, 'Alpha')
+        self.assertContains(resp, 'ASO · vencido')
+        self.assertNotContains(resp, 'Beta')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            doc.vencimento = timezone.localdate() + timedelta(days=400)
+            doc.save()
+        resp = self.client.get(url, {'pendencias': 'urgentes'})
+        self.assertNotContains(resp, 'Alpha')
+
+
+    def test_lista_serve_resumo_persistido_e_recalcula_em_background(self):
+        from unittest import mock
+
+        from recursos_humanos.models import ResumoListaColaborador
+
+        alpha = Colaborador.objects.get(nome='Alpha')
+        beta = Colaborador.objects.get(nome='Beta')
+        ontem = timezone.localdate() - timedelta(days=1)
+        ResumoListaColaborador.objects.update_or_create(colaborador=alpha, defaults={'calculado_para': ontem})
+
+        self.client.force_login(self.user)
+        url = reverse('recursos_humanos:colaboradores')
+        with mock.patch('core.tasks._enqueue_or_thread') as enqueue:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, 'Alpha')
+        # Nada recalculado na requisição; o recálculo vai para a fila (ou thread).
+        self.assertEqual(
+            ResumoListaColaborador.objects.get(colaborador=alpha).calculado_para, ontem
+        )
+        enqueue.assert_called_once()
+        runner = enqueue.call_args.args[1]
+
+        ResumoListaColaborador.objects.filter(colaborador=beta).delete()
+        with mock.patch('recursos_humanos.tasks.close_old_connections'):
+            self.assertGreaterEqual(runner(0), 2)
+        # Atualiza o desatualizado e cria o que faltava.
+        self.assertEqual(
+            ResumoListaColaborador.objects.get(colaborador=alpha).calculado_para, timezone.localdate()
+        )
+        self.assertEqual(
+            ResumoListaColaborador.objects.get(colaborador=beta).calculado_para, timezone.localdate()
+        )
+
+        with mock.patch('core.tasks._enqueue_or_thread') as enqueue:
+            self.client.get(url)
+        enqueue.assert_not_called()
+
+    def test_recalculo_com_trava_ocupada_nao_grava(self):
+        from contextlib import contextmanager
+        from unittest import mock
+
+        from recursos_humanos.models import ResumoListaColaborador
+        from recursos_humanos.services import lista_colaboradores
+
+        @contextmanager
+        def trava_ocupada(nome):
+            yield False
+
+        ResumoListaColaborador.objects.all().delete()
+        with mock.patch('core.locks.db_lock', trava_ocupada):
+            self.assertEqual(lista_colaboradores.recalcular_resumos_desatualizados(), 0)
+        self.assertFalse(ResumoListaColaborador.objects.exists())
+        self.assertEqual(
+            lista_colaboradores.recalcular_resumos_desatualizados(), Colaborador.objects.count()
+        )
+
 
 class AdmissaoServiceTests(TestCase):
     def setUp(self):
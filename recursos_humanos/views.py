@@ -1,7 +1,7 @@
 from django.contrib import messages
 from django.conf import settings
 from django.core.paginator import Paginator
-from django.db.models import Case, IntegerField, Min, Prefetch, Q, Value, When
+from django.db.models import Case, F, IntegerField, Prefetch, Q, Value, When
 from django.http import HttpResponseRedirect, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
@@ -315,21 +315,34 @@ def colaboradores_list_view(request):
     from recursos_humanos.services.prazo_contrato import garantir_prazos_teste_clt_ativos
 
     garantir_prazos_teste_clt_ativos()
-    qs = (
-        Colaborador.objects.prefetch_related(
-            'obras',
-            'documentos__tipo',
-            'prazos_contrato',
-        )
-        .annotate(
-            status_order=_STATUS_ORDER,
-            proximo_prazo_sort=Min('documentos__vencimento'),
-        )
-        .order_by('status_order', 'proximo_prazo_sort', 'nome')
+    from recursos_humanos.services.lista_colaboradores import (
+        agendar_recalculo_resumos_desatualizados,
+        enriquecer_lista_colaborador_resumo,
     )
+
+    # Serve os resumos persistidos; os de dias anteriores são recalculados em background.
+    agendar_recalculo_resumos_desatualizados()
     busca = (request.GET.get('q') or '').strip()
     status_filtro = request.GET.get('status') or 'todos'
     obra_filtro = request.GET.get('obra') or ''
+    pendencias_filtro = request.GET.get('pendencias') or ''
+    ordenar = request.GET.get('ordenar') or ''
+
+    ordem = ['status_order', 'resumo_lista__proximo_vencimento', 'nome']
+    if ordenar == 'urgencia':
+        ordem = [
+            F('resumo_lista__pendencia_ordem').asc(nulls_last=True),
+            'status_order',
+            'nome',
+        ]
+    elif ordenar == 'nome':
+        ordem = ['nome']
+    qs = (
+        Colaborador.objects.select_related('resumo_lista')
+        .prefetch_related('obras')
+        .annotate(status_order=_STATUS_ORDER)
+        .order_by(*ordem)
+    )
 
     if busca:
         qs = qs.filter(
@@ -344,13 +357,20 @@ def colaboradores_list_view(request):
     elif status_filtro == 'desligado':
         qs = qs.filter(status=Colaborador.Status.DESLIGADO)
 
+    if pendencias_filtro == 'com':
+        qs = qs.filter(resumo_lista__pendencias_total__gt=0)
+    elif pendencias_filtro == 'urgentes':
+        qs = qs.filter(resumo_lista__pendencia_urgencia='red')
+    elif pendencias_filtro == 'docs':
+        qs = qs.filter(resumo_lista__docs_completo=False)
+
     if obra_filtro:
         qs = qs.filter(obras__pk=obra_filtro).distinct()
 
     paginator = Paginator(qs, 20)
     page_obj = paginator.get_page(request.GET.get('page', 1))
     for c in page_obj:
-        _enriquecer_colaborador(c)
+        enriquecer_lista_colaborador_resumo(c)
 
     em_andamento = [c for c in page_obj if c.status == Colaborador.Status.EM_ADMISSAO]
     quadro = [c for c in page_obj if c.status != Colaborador.Status.EM_ADMISSAO]
@@ -366,6 +386,8 @@ def colaboradores_list_view(request):
         'busca': busca,
         'status_filtro': status_filtro,
         'obra_filtro': obra_filtro,
+        'pendencias_filtro': pendencias_filtro,
+        'ordenar': ordenar,
         'contagens': {
             'ativo': Colaborador.objects.filter(status=Colaborador.Status.ATIVO).count(),
             'em_admissao': Colaborador.objects.filter(status=Colaborador.Status.EM_ADMISSAO).count(),
@@ -6,6 +6,7 @@ from .models import (
     AlocacaoRecebimento,
     RecebimentoObra,
     ImportacaoSienge,
+    SiengeWebhookEvento,
 )
 
 
@@ -145,3 +146,11 @@ class ImportacaoSiengeAdmin(admin.ModelAdmin):
     list_filter = ['created_at']
     search_fields = ['nome_arquivo', 'sha256_arquivo']
     readonly_fields = ['created_at', 'sha256_arquivo', 'insumos_criados_ids']
+
+
+@admin.register(SiengeWebhookEvento)
+class SiengeWebhookEventoAdmin(admin.ModelAdmin):
+    list_display = ['id', 'evento', 'status', 'tentativas', 'recebido_em', 'processado_em']
+    list_filter = ['status', 'evento']
+    search_fields = ['chave_idempotencia']
+    readonly_fields = ['chave_idempotencia', 'payload', 'resultado', 'erro', 'recebido_em', 'processado_em']
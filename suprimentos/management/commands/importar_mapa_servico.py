@@ -11,6 +11,7 @@ from django.utils import timezone
 
 from mapa_obras.models import Obra
 from suprimentos.models import ImportacaoMapaServico, ItemMapaServico, ItemMapaServicoStatusRef
+from suprimentos.services.mapa_controle_snapshot import invalidar_mapa_servico
 
 
 def _normalize_col(name: object) -> str:
@@ -345,6 +346,8 @@ class Command(BaseCommand):
             if refs:
                 ItemMapaServicoStatusRef.objects.bulk_create(refs, batch_size=1000)
                 status_importados = len(refs)
+                # bulk_create não dispara post_save.
+                invalidar_mapa_servico(obra.id)
 
         processed = imported + updated
         if processed:
@@ -0,0 +1,28 @@
+"""
+Aplica os eventos pendentes do webhook do Sienge (SiengeWebhookEvento), em ordem de chegada.
+
+Para ambientes sem Celery beat, agende no cron (ex.: a cada minuto):
+
+    python manage.py processar_webhooks_sienge
+    python manage.py processar_webhooks_sienge --limite 500
+"""
+from django.core.management.base import BaseCommand
+
+from suprimentos.services.sienge_webhook_eventos import processar_eventos_pendentes
+
+
+class Command(BaseCommand):
+    help = 'Aplica os eventos pendentes do webhook do Sienge em ordem de chegada.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limite', type=int, default=None, help='Para após N eventos.')
+
+    def handle(self, *args, **options):
+        stats = processar_eventos_pendentes(limite=options['limite'])
+        if stats.get('status') == 'skipped_running':
+            self.stdout.write(self.style.WARNING('Outro processamento já está em andamento.'))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Processados: {stats['processados']} | Ignorados: {stats['ignorados']} | "
+            f"Falhos: {stats['falhos']} | Pendentes: {stats['pendentes']}"
+        ))
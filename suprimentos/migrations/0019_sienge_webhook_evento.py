@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suprimentos', '0018_biobrakpisnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiengeWebhookEvento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave_idempotencia', models.CharField(max_length=128, unique=True)),
+                ('evento', models.CharField(db_index=True, max_length=50)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('processado', 'Processado'), ('ignorado', 'Ignorado'), ('falhou', 'Falhou')], default='pendente', max_length=20)),
+                ('tentativas', models.PositiveSmallIntegerField(default=0)),
+                ('erro', models.TextField(blank=True)),
+                ('resultado', models.JSONField(blank=True, default=dict)),
+                ('recebido_em', models.DateTimeField(auto_now_add=True)),
+                ('processado_em', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Evento de Webhook Sienge',
+                'verbose_name_plural': 'Eventos de Webhook Sienge',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'id'], name='suprimentos_status_dfa77c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suprimentos', '0019_sienge_webhook_evento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MapaControleVersao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('escopo', models.PositiveIntegerField(unique=True)),
+                ('versao_suprimentos', models.PositiveBigIntegerField(default=0)),
+                ('versao_servico', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Versão do Mapa de Controle',
+                'verbose_name_plural': 'Versões do Mapa de Controle',
+            },
+        ),
+    ]
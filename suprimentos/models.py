@@ -1450,3 +1450,65 @@ class BiObraKpiSnapshot(models.Model):
 
     def __str__(self):
         return f"BI snapshot {self.obra_id} @ {self.data}"
+
+
+class SiengeWebhookEvento(models.Model):
+    """
+    Evento recebido pelo webhook do Sienge, persistido antes do processamento.
+
+    A view só valida a assinatura e grava o evento (deduplicado por ``chave_idempotencia``);
+    o worker aplica os eventos em ordem de chegada (``id``).
+    """
+
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('processado', 'Processado'),
+        ('ignorado', 'Ignorado'),
+        ('falhou', 'Falhou'),
+    ]
+
+    chave_idempotencia = models.CharField(max_length=128, unique=True)
+    evento = models.CharField(max_length=50, db_index=True)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pendente')
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    erro = models.TextField(blank=True)
+    resultado = models.JSONField(default=dict, blank=True)
+    recebido_em = models.DateTimeField(auto_now_add=True)
+    processado_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+        verbose_name = 'Evento de Webhook Sienge'
+        verbose_name_plural = 'Eventos de Webhook Sienge'
+
+    def __str__(self):
+        return f'{self.evento} #{self.pk} ({self.status})'
+
+
+class MapaControleVersao(models.Model):
+    """
+    Contadores de versão dos dados do Mapa de Controle por obra (chave dos caches calculados).
+
+    ``versao_suprimentos`` avança com ``ItemMapa``/recebimentos/alocações/locais da obra (``escopo``
+    = pk da obra; ``escopo`` 0 para ``Insumo``, compartilhado entre obras) e ``versao_servico``
+    com o mapa de serviço importado. O avanço é um UPDATE na mesma transação da gravação: vale
+    entre processos e só fica visível no commit.
+    """
+
+    ESCOPO_GLOBAL = 0
+
+    escopo = models.PositiveIntegerField(unique=True)
+    versao_suprimentos = models.PositiveBigIntegerField(default=0)
+    versao_servico = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Versão do Mapa de Controle'
+        verbose_name_plural = 'Versões do Mapa de Controle'
+
+    def __str__(self):
+        return f'Mapa de Controle {self.escopo}: {self.versao_suprimentos}/{self.versao_servico}'
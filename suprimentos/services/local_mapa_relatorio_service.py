@@ -11,17 +11,9 @@ from dataclasses import dataclass
 from difflib import SequenceMatcher
 from typing import Any
 
-from django.db.models import Sum
-
 from mapa_obras.models import LocalObra, Obra
-from suprimentos.models import ItemMapa
 from suprimentos.services.mapa_controle_service import MapaControleService
-
-
-def _to_float(value) -> float:
-    if value is None:
-        return 0.0
-    return float(value)
+from suprimentos.services.mapa_controle_snapshot import snapshot_mapa_controle
 
 
 @dataclass
@@ -44,30 +36,26 @@ class LocalMapaSnapshot:
 
 
 class LocalMapaRelatorioService:
-    """Métricas de ItemMapa por local + benchmark na obra."""
+    """Métricas de ItemMapa por local + benchmark na obra (linhas do snapshot da obra)."""
 
     def __init__(self, obra: Obra):
         self.obra = obra
 
-    def _items_annotated(self):
-        return (
-            ItemMapa.objects.filter(obra=self.obra, nao_aplica=False)
-            .select_related("insumo", "local_aplicacao")
-            .annotate(quantidade_alocada_annotated=Sum("alocacoes__quantidade_alocada"))
-        )
+    def _items_snapshot(self) -> list[dict[str, Any]]:
+        return snapshot_mapa_controle(self.obra)["linhas"]
 
     @staticmethod
-    def _counts_for_items(items: list[ItemMapa]) -> dict[str, int]:
+    def _counts_for_items(items: list[dict[str, Any]]) -> dict[str, int]:
         m = MapaControleService
         total = len(items)
-        entregues = sum(1 for i in items if i.status_etapa == "ENTREGUE")
+        entregues = sum(1 for i in items if i["status_etapa"] == "ENTREGUE")
         sem_sc = sum(1 for i in items if m._matches_status(i, "sem_sc"))
         sem_pc = sum(1 for i in items if m._matches_status(i, "sem_pc"))
         sem_entrega = sum(1 for i in items if m._matches_status(i, "sem_entrega"))
         sem_alocacao = sum(1 for i in items if m._matches_status(i, "sem_alocacao"))
         atrasados = sum(1 for i in items if m._matches_status(i, "atrasado"))
         parciais = sum(1 for i in items if m._matches_status(i, "parcial"))
-        pendentes = sum(1 for i in items if (i.status_etapa or "") != "ENTREGUE")
+        pendentes = sum(1 for i in items if (i["status_etapa"] or "") != "ENTREGUE")
         return {
             "total": total,
             "entregues": entregues,
@@ -100,21 +88,20 @@ class LocalMapaRelatorioService:
         return max(0.0, min(100.0, base - pen))
 
     def build_snapshots_por_local(self) -> dict[int, LocalMapaSnapshot]:
-        by_local: dict[int, list[ItemMapa]] = {}
-        for item in self._items_annotated():
-            lid = item.local_aplicacao_id
+        by_local: dict[int, list[dict[str, Any]]] = {}
+        for item in self._items_snapshot():
+            lid = item["local_id"]
             if not lid:
                 continue
             by_local.setdefault(lid, []).append(item)
 
         snapshots: dict[int, LocalMapaSnapshot] = {}
         for lid, items in by_local.items():
-            loc = items[0].local_aplicacao
-            nome = loc.nome if loc else f"#{lid}"
-            tipo = (loc.tipo if loc else "OUTRO") or "OUTRO"
+            nome = items[0]["local_nome"]
+            tipo = items[0]["local_tipo"] or "OUTRO"
             c = self._counts_for_items(items)
             pct_medio = (
-                round(sum(_to_float(i.percentual_alocado_porcentagem) for i in items) / c["total"], 2)
+                round(sum(i["percentual_alocado"] for i in items) / c["total"], 2)
                 if c["total"]
                 else 0.0
             )
@@ -146,10 +133,10 @@ class LocalMapaRelatorioService:
 
     def build_facts_for_local(self, local: LocalObra) -> dict[str, Any]:
         all_snap = self.build_snapshots_por_local()
-        items = [i for i in self._items_annotated() if i.local_aplicacao_id == local.id]
+        items = [i for i in self._items_snapshot() if i["local_id"] == local.id]
         c = self._counts_for_items(items)
         pct_medio = (
-            round(sum(_to_float(i.percentual_alocado_porcentagem) for i in items) / c["total"], 2)
+            round(sum(i["percentual_alocado"] for i in items) / c["total"], 2)
             if c["total"]
             else 0.0
         )
@@ -195,14 +182,14 @@ class LocalMapaRelatorioService:
 
         distrib = {}
         for i in items:
-            st = i.status_etapa or "INDEFINIDO"
+            st = i["status_etapa"] or "INDEFINIDO"
             distrib[st] = distrib.get(st, 0) + 1
 
         top_cats: dict[str, int] = {}
         for i in items:
-            if (i.status_etapa or "") == "ENTREGUE":
+            if (i["status_etapa"] or "") == "ENTREGUE":
                 continue
-            cat = i.categoria or "A CLASSIFICAR"
+            cat = i["categoria"] or "A CLASSIFICAR"
             top_cats[cat] = top_cats.get(cat, 0) + 1
         top_pend_categorias = sorted(top_cats.items(), key=lambda x: x[1], reverse=True)[:5]
 
@@ -1,13 +1,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from decimal import Decimal
 from typing import Any
 
-from django.db.models import Q, Sum
-
 from mapa_obras.models import LocalObra, Obra
-from suprimentos.models import ItemMapa, RecebimentoObra
+from suprimentos.models import ItemMapa
+from suprimentos.services.mapa_controle_snapshot import snapshot_mapa_controle
 
 
 @dataclass
@@ -36,6 +34,9 @@ class MapaControleService:
     - items: lista detalhada de pendências/itens filtrados
     - total: total da lista antes de truncar
     - limit: limite aplicado
+
+    Os itens vêm do snapshot calculado da obra (``mapa_controle_snapshot``); filtros e
+    agregações rodam sobre as linhas, sem recalcular o pipeline a cada chamada.
     """
 
     STATUS_CHOICES = [
@@ -53,107 +54,90 @@ class MapaControleService:
         self.obra = obra
         self.filters = filters
 
-    def _base_queryset(self):
-        queryset = (
-            ItemMapa.objects.filter(obra=self.obra, nao_aplica=False)
-            .select_related("obra", "insumo", "local_aplicacao")
-            .annotate(quantidade_alocada_annotated=Sum("alocacoes__quantidade_alocada"))
-        )
-
-        if self.filters.categoria:
-            queryset = queryset.filter(categoria=self.filters.categoria)
-        if self.filters.local_id:
-            queryset = queryset.filter(local_aplicacao_id=self.filters.local_id)
-        if self.filters.prioridade:
-            queryset = queryset.filter(prioridade=self.filters.prioridade)
-        if self.filters.search:
-            s = self.filters.search.strip()
-            queryset = queryset.filter(
-                Q(insumo__descricao__icontains=s)
-                | Q(insumo__codigo_sienge__icontains=s)
-                | Q(descricao_override__icontains=s)
-                | Q(numero_sc__icontains=s)
-                | Q(numero_pc__icontains=s)
-                | Q(empresa_fornecedora__icontains=s)
-                | Q(responsavel__icontains=s)
-                | Q(local_aplicacao__nome__icontains=s)
+    def _matches_filters(self, row: dict[str, Any]) -> bool:
+        if self.filters.categoria and row["categoria"] != self.filters.categoria:
+            return False
+        if self.filters.local_id and str(row["local_id"] or "") != str(self.filters.local_id):
+            return False
+        if self.filters.prioridade and row["prioridade"] != self.filters.prioridade:
+            return False
+        s = self.filters.search.strip().casefold()
+        if s:
+            campos = (
+                row["insumo_descricao"],
+                row["insumo_codigo"],
+                row["descricao_override"],
+                row["numero_sc"],
+                row["numero_pc"],
+                row["fornecedor"],
+                row["responsavel"],
+                row["local_nome"],
             )
-        return queryset.order_by("categoria", "insumo__descricao")
+            if not any(s in (campo or "").casefold() for campo in campos):
+                return False
+        return True
 
     @staticmethod
-    def _matches_status(item: ItemMapa, status: str) -> bool:
+    def _matches_status(row: dict[str, Any], status: str) -> bool:
+        """``row``: linha do snapshot (``mapa_controle_snapshot``)."""
         if not status:
             return True
         if status == "sem_sc":
-            return not (item.numero_sc or "").strip()
+            return not row["numero_sc"].strip()
         if status == "sem_pc":
-            return bool((item.numero_sc or "").strip()) and not (item.numero_pc or "").strip()
+            return bool(row["numero_sc"].strip()) and not row["numero_pc"].strip()
         if status == "sem_entrega":
-            return bool((item.numero_pc or "").strip()) and item.quantidade_recebida_obra <= 0
+            return bool(row["numero_pc"].strip()) and row["qtd_recebida_obra"] <= 0
         if status == "sem_alocacao":
-            return item.quantidade_recebida_obra > 0 and item.quantidade_alocada_local <= 0
+            return row["qtd_recebida_obra"] > 0 and row["qtd_alocada_local"] <= 0
         if status == "atrasado":
-            return item.is_atrasado
+            return row["atrasado"]
         if status == "parcial":
-            return item.status_etapa == "5) ALOCAÇÃO PARCIAL"
+            return row["status_etapa"] == "5) ALOCAÇÃO PARCIAL"
         if status == "entregue":
-            return item.status_etapa == "ENTREGUE"
+            return row["status_etapa"] == "ENTREGUE"
         return True
 
-    def _attach_recebimentos_obra_cache(self, items: list[ItemMapa]) -> None:
-        """Uma query por lista — evita N× RecebimentoObra.filter(obra=...) em recebimento_vinculado."""
-        if not items:
-            return
-        recs = list(
-            RecebimentoObra.objects.filter(obra=self.obra)
-            .select_related("insumo")
-            .prefetch_related("alocacoes")
-        )
-        for item in items:
-            item._recebimentos_obra_cache = recs
+    def _snapshot_rows(self) -> list[dict[str, Any]]:
+        return snapshot_mapa_controle(self.obra)["linhas"]
 
-    def _filtered_items(self) -> list[ItemMapa]:
-        items = list(self._base_queryset())
-        self._attach_recebimentos_obra_cache(items)
-        if self.filters.status:
-            items = [i for i in items if self._matches_status(i, self.filters.status)]
-        return items
-
-    @staticmethod
-    def _to_float(value: Decimal | float | int | None) -> float:
-        if value is None:
-            return 0.0
-        return float(value)
+    def _filtered_items(self) -> list[dict[str, Any]]:
+        """Linhas do snapshot da obra que passam nos filtros (ordem do mapa)."""
+        return [
+            row
+            for row in self._snapshot_rows()
+            if self._matches_filters(row) and self._matches_status(row, self.filters.status)
+        ]
 
     def build_summary_payload(self) -> dict[str, Any]:
         from suprimentos.models import mapa_suprimentos_manual
 
         items = self._filtered_items()
         total = len(items)
-        atrasados = sum(1 for i in items if i.is_atrasado)
+        atrasados = sum(1 for i in items if i["atrasado"])
         if mapa_suprimentos_manual():
-            levantamento = sum(1 for i in items if i.quantidade_alocada_local <= 0)
+            levantamento = sum(1 for i in items if i["qtd_alocada_local"] <= 0)
             parciais = sum(
                 1 for i in items
-                if i.quantidade_alocada_local > 0
-                and i.quantidade_planejada > 0
-                and i.quantidade_alocada_local < i.quantidade_planejada
+                if i["qtd_alocada_local"] > 0
+                and i["qtd_planejada"] > 0
+                and i["qtd_alocada_local"] < i["qtd_planejada"]
             )
             entregues = sum(
                 1 for i in items
-                if i.quantidade_planejada > 0
-                and i.quantidade_alocada_local >= i.quantidade_planejada
+                if i["qtd_planejada"] > 0
+                and i["qtd_alocada_local"] >= i["qtd_planejada"]
             )
             sem_sc = sem_pc = sem_entrega = 0
             sem_alocacao = levantamento
         else:
-            sem_sc = sum(1 for i in items if not (i.numero_sc or "").strip())
-            sem_pc = sum(1 for i in items if (i.numero_sc or "").strip() and not (i.numero_pc or "").strip())
-            sem_entrega = sum(1 for i in items if (i.numero_pc or "").strip() and i.quantidade_recebida_obra <= 0)
-            sem_alocacao = sum(1 for i in items if i.quantidade_recebida_obra > 0 and i.quantidade_alocada_local <= 0)
+            sem_sc = sum(1 for i in items if self._matches_status(i, "sem_sc"))
+            sem_pc = sum(1 for i in items if self._matches_status(i, "sem_pc"))
+            sem_entrega = sum(1 for i in items if self._matches_status(i, "sem_entrega"))
+            sem_alocacao = sum(1 for i in items if self._matches_status(i, "sem_alocacao"))
             levantamento = parciais = entregues = 0
         percentual_medio_alocacao = round(
-            (sum(self._to_float(i.percentual_alocado_porcentagem) for i in items) / total) if total else 0.0, 2
+            (sum(i["percentual_alocado"] for i in items) / total) if total else 0.0, 2
         )
 
         ranking_local: dict[str, int] = {}
@@ -163,11 +147,11 @@ class MapaControleService:
         quem_cobrar: dict[str, int] = {}
 
         for item in items:
-            local_nome = item.local_aplicacao.nome if item.local_aplicacao else "Sem local"
-            categoria = item.categoria or "A CLASSIFICAR"
-            fornecedor = item.empresa_fornecedora or "Sem fornecedor"
-            status = item.status_etapa or "INDEFINIDO"
-            owner = item.quem_cobrar or "SEM AÇÃO"
+            local_nome = item["local_nome"] if item["local_id"] else "Sem local"
+            categoria = item["categoria"] or "A CLASSIFICAR"
+            fornecedor = item["fornecedor"] or "Sem fornecedor"
+            status = item["status_etapa"] or "INDEFINIDO"
+            owner = item["quem_cobrar"] or "SEM AÇÃO"
 
             pendente = status != "ENTREGUE"
             if pendente:
@@ -178,12 +162,7 @@ class MapaControleService:
             distribuicao_status[status] = distribuicao_status.get(status, 0) + 1
             quem_cobrar[owner] = quem_cobrar.get(owner, 0) + 1
 
-        categorias = list(
-            ItemMapa.objects.filter(obra=self.obra, nao_aplica=False)
-            .values_list("categoria", flat=True)
-            .distinct()
-            .order_by("categoria")
-        )
+        categorias = sorted({row["categoria"] for row in self._snapshot_rows()})
         locais = list(LocalObra.objects.filter(obra=self.obra).order_by("tipo", "nome").values("id", "nome"))
 
         return {
@@ -237,24 +216,24 @@ class MapaControleService:
         for item in items[:limit]:
             rows.append(
                 {
-                    "id": item.id,
-                    "insumo_codigo": item.insumo.codigo_sienge,
-                    "insumo_descricao": item.descricao_override or item.insumo.descricao,
-                    "categoria": item.categoria,
-                    "local": item.local_aplicacao.nome if item.local_aplicacao else "Sem local",
-                    "responsavel": item.responsavel or "-",
-                    "numero_sc": item.numero_sc or "-",
-                    "numero_pc": item.numero_pc or "-",
-                    "fornecedor": item.empresa_fornecedora or "-",
-                    "status_etapa": item.status_etapa,
-                    "status_css": item.status_css,
-                    "quem_cobrar": item.quem_cobrar or "SEM AÇÃO",
-                    "atrasado": bool(item.is_atrasado),
-                    "qtd_planejada": self._to_float(item.quantidade_planejada),
-                    "qtd_recebida_obra": self._to_float(item.quantidade_recebida_obra),
-                    "qtd_alocada_local": self._to_float(item.quantidade_alocada_local),
-                    "saldo_pendente_alocacao": self._to_float(item.saldo_pendente_alocacao),
-                    "percentual_alocado": round(self._to_float(item.percentual_alocado_porcentagem), 2),
+                    "id": item["id"],
+                    "insumo_codigo": item["insumo_codigo"],
+                    "insumo_descricao": item["descricao_override"] or item["insumo_descricao"],
+                    "categoria": item["categoria"],
+                    "local": item["local_nome"] if item["local_id"] else "Sem local",
+                    "responsavel": item["responsavel"] or "-",
+                    "numero_sc": item["numero_sc"] or "-",
+                    "numero_pc": item["numero_pc"] or "-",
+                    "fornecedor": item["fornecedor"] or "-",
+                    "status_etapa": item["status_etapa"],
+                    "status_css": item["status_css"],
+                    "quem_cobrar": item["quem_cobrar"] or "SEM AÇÃO",
+                    "atrasado": item["atrasado"],
+                    "qtd_planejada": item["qtd_planejada"],
+                    "qtd_recebida_obra": item["qtd_recebida_obra"],
+                    "qtd_alocada_local": item["qtd_alocada_local"],
+                    "saldo_pendente_alocacao": item["saldo_pendente_alocacao"],
+                    "percentual_alocado": round(item["percentual_alocado"], 2),
                 }
             )
         return {"items": rows, "total": total, "limit": limit}
@@ -0,0 +1,158 @@
+"""
+Snapshot calculado do Mapa de Controle de suprimentos por obra (item × etapa do pipeline).
+
+Status da etapa, atraso, quem cobrar e quantidades de cada ``ItemMapa`` dependem do
+``RecebimentoObra`` vinculado e das ``AlocacaoRecebimento``; calculá-los custa a leitura de
+todos os recebimentos da obra. O snapshot guarda essas linhas já calculadas no cache, com chave
+pela versão dos dados da obra: contadores em ``MapaControleVersao`` (banco, compartilhado entre
+processos), avançados na mesma transação pelos sinais de ``ItemMapa``, ``RecebimentoObra``,
+``AlocacaoRecebimento``, ``LocalObra`` e ``Obra`` (``suprimentos.signals``) e pelos updates em
+lote do webhook do Sienge. ``Insumo`` avança o contador global. A versão inclui também o dia
+corrente (atraso) e o modo manual do mapa.
+
+As matrizes da tela do Mapa de Controle (``AmbienteProvider``/``LegacyObraProvider``) usam
+``matriz_em_cache``: a do mapa de serviço tem chave pela ``versao_servico`` da obra (sinais de
+``ItemMapaServico``, ``ItemMapaServicoStatusRef`` e ``ImportacaoMapaServico``); a do ambiente,
+pela revisão/``updated_at`` da versão do layout.
+
+Consumidores: ``MapaControleService`` (summary/items da tela, BI da análise de obra, assistente
+e WhatsApp) e ``LocalMapaRelatorioService`` — filtros e agregações rodam sobre as linhas.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Callable
+
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from suprimentos.models import ItemMapa, MapaControleVersao, RecebimentoObra, mapa_suprimentos_manual
+
+SNAPSHOT_CACHE_TTL_SECONDS = 30 * 60
+
+
+def _avancar(campo: str, escopo: int) -> None:
+    if MapaControleVersao.objects.filter(escopo=escopo).update(**{campo: F(campo) + 1}):
+        return
+    # Primeira gravação da obra: cria o contador (leitores sem linha usaram a versão 0).
+    _, criado = MapaControleVersao.objects.get_or_create(escopo=escopo, defaults={campo: 1})
+    if not criado:
+        MapaControleVersao.objects.filter(escopo=escopo).update(**{campo: F(campo) + 1})
+
+
+def _versoes(campo: str, escopos: list[int]) -> list[int]:
+    valores = dict(MapaControleVersao.objects.filter(escopo__in=escopos).values_list("escopo", campo))
+    return [valores.get(escopo, 0) for escopo in escopos]
+
+
+def invalidar_mapa_controle(obra_id: int | None = None) -> None:
+    """
+    Avança a versão dos dados de suprimentos da obra (``None``: de todas as obras). Chamar na
+    transação da gravação: outras requisições só veem a versão nova junto com os dados novos.
+    """
+    _avancar("versao_suprimentos", obra_id or MapaControleVersao.ESCOPO_GLOBAL)
+
+
+def invalidar_mapa_servico(obra_id: int) -> None:
+    """Avança a versão do mapa de serviço da obra (matriz do ``LegacyObraProvider``)."""
+    _avancar("versao_servico", obra_id)
+
+
+def versao_dados_mapa_controle(obra_id: int) -> str:
+    """Versão dos dados do snapshot da obra (chave do cache)."""
+    valores = _versoes("versao_suprimentos", [MapaControleVersao.ESCOPO_GLOBAL, obra_id])
+    raw = "|".join(
+        [str(v) for v in valores]
+        + [timezone.now().date().isoformat(), "manual" if mapa_suprimentos_manual() else "sienge"]
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def versao_mapa_servico(obra_id: int) -> str:
+    """Versão do mapa de serviço importado da obra."""
+    return str(_versoes("versao_servico", [obra_id])[0])
+
+
+def matriz_em_cache(escopo: str, versao: str, parametros: dict, montar: Callable[[], Any]):
+    """
+    Resultado de ``montar()`` em cache por ``escopo`` (ex.: ``"servico:<obra>"``), versão dos
+    dados e parâmetros da tela (filtros/modo). ``None`` não é guardado.
+    """
+    chave_parametros = hashlib.sha1(
+        json.dumps(parametros, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:16]
+    key = f"suprimentos:mapa_controle:matriz:{escopo}:{versao}:{chave_parametros}"
+    data = cache.get(key)
+    if data is None:
+        data = montar()
+        if data is not None:
+            cache.set(key, data, SNAPSHOT_CACHE_TTL_SECONDS)
+    return data
+
+
+def _to_float(value) -> float:
+    if value is None:
+        return 0.0
+    return float(value)
+
+
+def _linha(item: ItemMapa) -> dict[str, Any]:
+    insumo = item.insumo
+    local = item.local_aplicacao
+    return {
+        "id": item.id,
+        "insumo_codigo": insumo.codigo_sienge if insumo else "",
+        "insumo_descricao": insumo.descricao if insumo else "",
+        "descricao_override": item.descricao_override or "",
+        "categoria": item.categoria or "",
+        "prioridade": item.prioridade or "",
+        "local_id": item.local_aplicacao_id,
+        "local_nome": local.nome if local else "",
+        "local_tipo": local.tipo if local else "",
+        "responsavel": item.responsavel or "",
+        "numero_sc": item.numero_sc or "",
+        "numero_pc": item.numero_pc or "",
+        "fornecedor": item.empresa_fornecedora or "",
+        "status_etapa": item.status_etapa,
+        "status_css": item.status_css,
+        "quem_cobrar": item.quem_cobrar,
+        "atrasado": bool(item.is_atrasado),
+        "qtd_planejada": _to_float(item.quantidade_planejada),
+        "qtd_recebida_obra": _to_float(item.quantidade_recebida_obra),
+        "qtd_alocada_local": _to_float(item.quantidade_alocada_local),
+        "saldo_pendente_alocacao": _to_float(item.saldo_pendente_alocacao),
+        "percentual_alocado": _to_float(item.percentual_alocado_porcentagem),
+    }
+
+
+def _montar_linhas(obra) -> list[dict[str, Any]]:
+    items = list(
+        ItemMapa.objects.filter(obra=obra, nao_aplica=False)
+        .select_related("obra", "insumo", "local_aplicacao")
+        .annotate(quantidade_alocada_annotated=Sum("alocacoes__quantidade_alocada"))
+        .order_by("categoria", "insumo__descricao")
+    )
+    if items:
+        # Uma query para a obra — evita N× RecebimentoObra.filter(obra=...) em recebimento_vinculado.
+        recs = list(
+            RecebimentoObra.objects.filter(obra=obra).select_related("insumo").prefetch_related("alocacoes")
+        )
+        for item in items:
+            item._recebimentos_obra_cache = recs
+    return [_linha(item) for item in items]
+
+
+def snapshot_mapa_controle(obra) -> dict[str, Any]:
+    """
+    ``{"versao", "linhas"}`` da obra: uma linha calculada por ``ItemMapa`` aplicável, na ordem
+    do mapa (categoria, descrição do insumo). Reconstruído só quando a versão dos dados muda.
+    """
+    versao = versao_dados_mapa_controle(obra.pk)
+    key = f"suprimentos:mapa_controle:snapshot:{obra.pk}:{versao}"
+    data = cache.get(key)
+    if data is None:
+        data = {"versao": versao, "linhas": _montar_linhas(obra)}
+        cache.set(key, data, SNAPSHOT_CACHE_TTL_SECONDS)
+    return data
@@ -5,6 +5,7 @@ from urllib.parse import urlencode
 from django.db.models import Q
 
 from suprimentos.models import ImportacaoMapaServico, ItemMapaServico, ItemMapaServicoStatusRef
+from suprimentos.services.mapa_controle_snapshot import matriz_em_cache, versao_mapa_servico
 
 
 def _norm_token(value: object) -> str:
@@ -1117,6 +1118,17 @@ class AmbienteProvider:
         versao = ambiente.versoes.filter(estado=VersaoEstado.DRAFT).order_by("-numero").first()
         if not versao:
             versao = ambiente.versoes.filter(estado=VersaoEstado.PUBLISHED).order_by("-numero").first()
+        if not versao:
+            return self._montar(obra=obra, ambiente=ambiente, versao=None, selected=selected)
+        # Matriz calculada em cache pelo estado da versão do layout (revisão + última gravação).
+        return matriz_em_cache(
+            f"ambiente:{ambiente.id}",
+            f"{versao.pk}:{versao.revisao}:{versao.updated_at.isoformat()}",
+            {"selected": selected, "ambiente": ambiente.nome, "obra": [obra.codigo_sienge, obra.nome]},
+            lambda: self._montar(obra=obra, ambiente=ambiente, versao=versao, selected=selected),
+        )
+
+    def _montar(self, *, obra, ambiente, versao, selected: dict):
         extracted = self._extract_first_matrix_rows_from_layout(versao.layout if versao else {})
         if isinstance(extracted, tuple) and len(extracted) == 2:
             rows_layout, matrix_meta = extracted
@@ -1857,6 +1869,23 @@ class LegacyObraProvider:
         self._macro_pulse = macro_pulse
 
     def build(self, *, request, obra, selected: dict, grid_pct_clicado):
+        if not obra:
+            return self._montar(request=request, obra=obra, selected=selected, grid_pct_clicado=grid_pct_clicado)
+        # Matriz calculada em cache pela versão do mapa de serviço da obra e pelos filtros da tela.
+        parametros = {
+            "selected": selected,
+            "matrix_mode": request.GET.get("matrix_mode") or "",
+            "grid_pct": grid_pct_clicado,
+            "obra": [obra.codigo_sienge, obra.nome],
+        }
+        return matriz_em_cache(
+            f"servico:{obra.id}",
+            versao_mapa_servico(obra.id),
+            parametros,
+            lambda: self._montar(request=request, obra=obra, selected=selected, grid_pct_clicado=grid_pct_clicado),
+        )
+
+    def _montar(self, *, request, obra, selected: dict, grid_pct_clicado):
         is_area_comum = False
         status_filter = selected["status"]
         layers = {"setores": [], "blocos": [], "pavimentos": [], "aptos": []}
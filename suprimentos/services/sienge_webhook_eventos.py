@@ -0,0 +1,257 @@
+"""
+Fila de eventos do webhook do Sienge.
+
+A view ``webhook_sienge`` só valida a assinatura, grava um ``SiengeWebhookEvento``
+(deduplicado pela chave de idempotência) e responde 202. ``processar_eventos_pendentes()``
+aplica os eventos em ordem de chegada, cada um na sua transação e com updates em lote
+(``QuerySet.update``), sem ``save()`` item a item.
+
+- Obra/insumo inexistente: o evento fica ``ignorado`` (reenviar não resolve) e a fila segue.
+- Erro inesperado: ``tentativas`` += 1 e o processamento para ali, para não aplicar um evento
+  posterior antes do anterior; após ``SIENGE_WEBHOOK_MAX_TENTATIVAS`` o evento fica ``falhou``.
+- Um worker por vez: cada evento é lido e aplicado com a trava ``sienge_webhook`` no banco
+  (``core.locks.db_lock``), então workers Celery, a thread de fallback e o comando nunca
+  aplicam o mesmo evento duas vezes nem um evento antes de outro mais antigo.
+
+Worker: task Celery ``suprimentos.tasks.processar_webhooks_sienge_task`` (também no beat),
+thread local quando o broker está fora e ``python manage.py processar_webhooks_sienge``.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+from decimal import Decimal
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core.locks import db_lock
+from mapa_obras.models import Obra
+from suprimentos.models import Insumo, ItemMapa, NotaFiscalEntrada, SiengeWebhookEvento
+from suprimentos.services.mapa_controle_snapshot import invalidar_mapa_controle
+
+logger = logging.getLogger(__name__)
+
+EVENTOS_SUPORTADOS = (
+    'insumo.criado',
+    'insumo.atualizado',
+    'sc.criada',
+    'sc.atualizada',
+    'pc.criado',
+    'pc.atualizado',
+    'nf.entrada',
+)
+
+_LOCK_NAME = 'sienge_webhook'
+
+
+class EventoIgnorado(Exception):
+    """Evento válido que não se aplica a esta base (obra/insumo não cadastrado)."""
+
+
+def chave_idempotencia(request_headers, data: dict, corpo: bytes) -> str:
+    """
+    Chave do evento: header ``X-Sienge-Event-Id``/``Idempotency-Key``, senão ``id`` do corpo,
+    senão SHA-256 do corpo (reenvio idêntico = mesmo evento).
+    """
+    chave = (
+        request_headers.get('X-Sienge-Event-Id')
+        or request_headers.get('Idempotency-Key')
+        or data.get('id')
+        or data.get('event_id')
+    )
+    if chave:
+        return str(chave).strip()[:128]
+    return 'sha256:' + hashlib.sha256(corpo).hexdigest()
+
+
+def registrar_evento(chave: str, evento: str, payload: dict) -> tuple[SiengeWebhookEvento, bool]:
+    """Grava o evento (ou devolve o já existente) e agenda o worker após o commit."""
+    obj, criado = SiengeWebhookEvento.objects.get_or_create(
+        chave_idempotencia=chave,
+        defaults={'evento': evento, 'payload': payload or {}},
+    )
+    if criado:
+        transaction.on_commit(_agendar_worker)
+    return obj, criado
+
+
+def _agendar_worker():
+    try:
+        from suprimentos.tasks import agendar_processamento_webhooks
+
+        agendar_processamento_webhooks()
+    except Exception:
+        logger.exception('sienge_webhook: não foi possível agendar o worker.')
+
+
+def _data(valor):
+    if not valor:
+        return None
+    if hasattr(valor, 'year'):
+        return valor
+    return parse_date(str(valor)[:10])
+
+
+def _decimal(valor) -> Decimal:
+    return Decimal(str(valor or 0))
+
+
+def _obra(payload: dict) -> Obra:
+    codigo = payload.get('codigo_obra')
+    obra = Obra.objects.filter(codigo_sienge=codigo).first()
+    if obra is None:
+        raise EventoIgnorado(f'Obra {codigo} não encontrada')
+    return obra
+
+
+def _aplicar_insumo(payload: dict) -> dict:
+    insumo, criado = Insumo.objects.update_or_create(
+        codigo_sienge=payload.get('codigo_insumo'),
+        defaults={
+            'descricao': payload.get('descricao', ''),
+            'unidade': payload.get('unidade', 'UND'),
+            'categoria': payload.get('categoria', ''),
+            'tipo_insumo': payload.get('tipo_insumo', ''),
+            'especificacao_tecnica': payload.get('especificacao_tecnica', ''),
+            'fornecedor_padrao': payload.get('fornecedor_padrao', ''),
+            'preco_unitario': _decimal(payload.get('preco_unitario')),
+            'moeda': payload.get('moeda', 'BRL'),
+            'ativo': payload.get('ativo', True),
+        },
+    )
+    return {'insumo_id': insumo.id, 'criado': criado}
+
+
+def _aplicar_sc(payload: dict) -> dict:
+    obra = _obra(payload)
+    atualizados = ItemMapa.objects.filter(obra=obra, numero_sc=payload.get('numero_sc')).update(
+        data_sc=_data(payload.get('data_sc')),
+        atualizado_em=timezone.now(),
+    )
+    invalidar_mapa_controle(obra.id)
+    return {'itens_atualizados': atualizados}
+
+
+def _aplicar_pc(payload: dict) -> dict:
+    obra = _obra(payload)
+    numero_pc = payload.get('numero_pc')
+    numero_sc = payload.get('numero_sc')
+    if numero_sc:
+        itens = ItemMapa.objects.filter(obra=obra, numero_sc=numero_sc)
+    else:
+        itens = ItemMapa.objects.filter(obra=obra, numero_pc=numero_pc)
+    atualizados = itens.update(
+        numero_pc=numero_pc or '',
+        data_pc=_data(payload.get('data_pc')),
+        empresa_fornecedora=payload.get('empresa_fornecedora', '') or '',
+        prazo_recebimento=_data(payload.get('prazo_recebimento')),
+        atualizado_em=timezone.now(),
+    )
+    invalidar_mapa_controle(obra.id)
+    return {'itens_atualizados': atualizados}
+
+
+def _aplicar_nf(payload: dict) -> dict:
+    obra = _obra(payload)
+    codigo_insumo = payload.get('codigo_insumo')
+    insumo = Insumo.objects.filter(codigo_sienge=codigo_insumo).first()
+    if insumo is None:
+        raise EventoIgnorado(f'Insumo {codigo_insumo} não encontrado')
+    nf, criado = NotaFiscalEntrada.objects.update_or_create(
+        obra=obra,
+        insumo=insumo,
+        numero_nf=payload.get('numero_nf'),
+        defaults={
+            'numero_pc': payload.get('numero_pc', ''),
+            'quantidade': _decimal(payload.get('quantidade')),
+            'data_entrada': _data(payload.get('data_entrada')),
+        },
+    )
+    total_recebido = NotaFiscalEntrada.objects.filter(obra=obra, insumo=insumo).aggregate(
+        total=Sum('quantidade')
+    )['total'] or Decimal('0.00')
+    atualizados = ItemMapa.objects.filter(obra=obra, insumo=insumo).update(
+        quantidade_recebida=total_recebido,
+        atualizado_em=timezone.now(),
+    )
+    invalidar_mapa_controle(obra.id)
+    return {'nf_id': nf.id, 'criada': criado, 'itens_atualizados': atualizados}
+
+
+_HANDLERS = {
+    'insumo.criado': _aplicar_insumo,
+    'insumo.atualizado': _aplicar_insumo,
+    'sc.criada': _aplicar_sc,
+    'sc.atualizada': _aplicar_sc,
+    'pc.criado': _aplicar_pc,
+    'pc.atualizado': _aplicar_pc,
+    'nf.entrada': _aplicar_nf,
+}
+
+
+def aplicar_evento(evento: SiengeWebhookEvento) -> bool:
+    """
+    Aplica um evento e grava o desfecho. Retorna False quando houve erro transitório
+    (o evento continua pendente e a fila deve parar nele).
+    """
+    handler = _HANDLERS.get(evento.evento)
+    evento.tentativas += 1
+    try:
+        if handler is None:
+            raise EventoIgnorado(f'Evento desconhecido: {evento.evento}')
+        with transaction.atomic():
+            evento.resultado = handler(evento.payload or {})
+        evento.status = 'processado'
+        evento.erro = ''
+    except EventoIgnorado as exc:
+        evento.status = 'ignorado'
+        evento.erro = str(exc)
+    except Exception as exc:
+        max_tentativas = int(getattr(settings, 'SIENGE_WEBHOOK_MAX_TENTATIVAS', 5))
+        evento.erro = str(exc)[:4000]
+        evento.status = 'falhou' if evento.tentativas >= max_tentativas else 'pendente'
+        logger.warning(
+            'sienge_webhook: evento %s (%s) falhou na tentativa %d: %s',
+            evento.pk, evento.evento, evento.tentativas, exc,
+        )
+    if evento.status != 'pendente':
+        evento.processado_em = timezone.now()
+    evento.save(update_fields=['status', 'tentativas', 'erro', 'resultado', 'processado_em'])
+    return evento.status != 'pendente'
+
+
+def processar_eventos_pendentes(*, limite: Optional[int] = None) -> dict:
+    """
+    Aplica os eventos pendentes em ordem de ``id``, um por transação, cada um lido e aplicado
+    com a trava do banco. Retorna contagens por desfecho; ``{'status': 'skipped_running'}``
+    se outro worker detém a trava.
+    """
+    stats = {'processados': 0, 'ignorados': 0, 'falhos': 0, 'pendentes': 0}
+    while limite is None or sum(stats.values()) < limite:
+        with db_lock(_LOCK_NAME) as travado:
+            if not travado:
+                if not any(stats.values()):
+                    return {'status': 'skipped_running'}
+                break
+            evento = (
+                SiengeWebhookEvento.objects.select_for_update()
+                .filter(status='pendente')
+                .order_by('id')
+                .first()
+            )
+            if evento is None:
+                break
+            aplicado = aplicar_evento(evento)
+        if not aplicado:
+            stats['pendentes'] += 1
+            break
+        chave = {'processado': 'processados', 'ignorado': 'ignorados', 'falhou': 'falhos'}[evento.status]
+        stats[chave] += 1
+    if any(stats.values()):
+        logger.info('sienge_webhook: %s', stats)
+    return stats
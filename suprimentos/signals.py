@@ -0,0 +1,60 @@
+"""
+Sinais do app suprimentos.
+
+- Invalida o snapshot do Mapa de Controle (``services.mapa_controle_snapshot``) quando mudam os
+  dados de que ele depende. Updates em lote (``QuerySet.update``/``bulk_create``) não disparam
+  sinais: quem os usa chama ``invalidar_mapa_controle``/``invalidar_mapa_servico`` (ver
+  ``services.sienge_webhook_eventos`` e o comando ``importar_mapa_servico``).
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from mapa_obras.models import LocalObra, Obra
+
+from .models import (
+    AlocacaoRecebimento,
+    ImportacaoMapaServico,
+    Insumo,
+    ItemMapa,
+    ItemMapaServico,
+    ItemMapaServicoStatusRef,
+    RecebimentoObra,
+)
+from .services.mapa_controle_snapshot import invalidar_mapa_controle, invalidar_mapa_servico
+
+
+@receiver(post_save, sender=ItemMapa)
+@receiver(post_delete, sender=ItemMapa)
+@receiver(post_save, sender=RecebimentoObra)
+@receiver(post_delete, sender=RecebimentoObra)
+@receiver(post_save, sender=AlocacaoRecebimento)
+@receiver(post_delete, sender=AlocacaoRecebimento)
+@receiver(post_save, sender=LocalObra)
+@receiver(post_delete, sender=LocalObra)
+def invalidar_snapshot_da_obra(sender, instance, **kwargs):
+    if instance.obra_id:
+        invalidar_mapa_controle(instance.obra_id)
+
+
+@receiver(post_save, sender=Obra)
+@receiver(post_delete, sender=Obra)
+def invalidar_snapshot_obra(sender, instance, **kwargs):
+    invalidar_mapa_controle(instance.pk)
+
+
+@receiver(post_save, sender=Insumo)
+@receiver(post_delete, sender=Insumo)
+def invalidar_snapshots_insumo(sender, instance, **kwargs):
+    # Insumo é compartilhado entre obras (código/descrição entram nas linhas de todas).
+    invalidar_mapa_controle()
+
+
+@receiver(post_save, sender=ItemMapaServico)
+@receiver(post_delete, sender=ItemMapaServico)
+@receiver(post_save, sender=ItemMapaServicoStatusRef)
+@receiver(post_delete, sender=ItemMapaServicoStatusRef)
+@receiver(post_save, sender=ImportacaoMapaServico)
+@receiver(post_delete, sender=ImportacaoMapaServico)
+def invalidar_matriz_mapa_servico(sender, instance, **kwargs):
+    if instance.obra_id:
+        invalidar_mapa_servico(instance.obra_id)
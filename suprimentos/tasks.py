@@ -0,0 +1,52 @@
+"""
+Tarefas Celery de suprimentos: worker da fila de eventos do webhook do Sienge.
+
+Sem broker acessível os eventos são aplicados numa thread local (o lock no cache
+garante um único processamento por vez).
+"""
+from __future__ import annotations
+
+import logging
+import threading
+
+from celery import shared_task
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def processar_webhooks_sienge_task():
+    """Aplica os eventos pendentes do webhook do Sienge (também agendada pelo beat)."""
+    from suprimentos.services.sienge_webhook_eventos import processar_eventos_pendentes
+
+    close_old_connections()
+    try:
+        return processar_eventos_pendentes()
+    finally:
+        close_old_connections()
+
+
+def _processar_local() -> None:
+    from suprimentos.services.sienge_webhook_eventos import processar_eventos_pendentes
+
+    try:
+        close_old_connections()
+        processar_eventos_pendentes()
+    except Exception:
+        logger.exception('processar_eventos_pendentes (thread local) falhou')
+    finally:
+        close_old_connections()
+
+
+def agendar_processamento_webhooks() -> None:
+    """Dispara o worker: fila Celery quando o broker responde, senão thread local."""
+    from core.tasks import _celery_broker_reachable
+
+    if _celery_broker_reachable():
+        try:
+            processar_webhooks_sienge_task.apply_async(ignore_result=True)
+            return
+        except Exception:
+            logger.exception('processar_webhooks_sienge_task: apply_async() falhou, usando thread.')
+    threading.Thread(target=_processar_local, name='sienge-webhook', daemon=True).start()
@@ -0,0 +1,287 @@
+"""
+Snapshot do Mapa de Controle: versão no banco avançada pelos sinais, linhas calculadas usadas
+pelos serviços e cache das matrizes da tela (mapa de serviço e ambiente).
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Project
+from mapa_obras.models import LocalObra, Obra
+from painel_operacional.models import AmbienteOperacional, AmbienteTipo, AmbienteVersao, VersaoEstado
+from suprimentos import views_controle
+from suprimentos.models import (
+    AlocacaoRecebimento,
+    ImportacaoMapaServico,
+    Insumo,
+    ItemMapa,
+    ItemMapaServico,
+    ItemMapaServicoStatusRef,
+    MapaControleVersao,
+    RecebimentoObra,
+)
+from suprimentos.services.local_mapa_relatorio_service import LocalMapaRelatorioService
+from suprimentos.services.mapa_controle_service import MapaControleFilters, MapaControleService
+from suprimentos.services.mapa_controle_snapshot import (
+    invalidar_mapa_controle,
+    snapshot_mapa_controle,
+    versao_dados_mapa_controle,
+    versao_mapa_servico,
+)
+
+
+class _MapaControleBase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.obra = Obra.objects.create(codigo_sienge='MC-1', nome='Obra Controle')
+        self.outra = Obra.objects.create(codigo_sienge='MC-2', nome='Outra Obra')
+        self.local = LocalObra.objects.create(obra=self.obra, nome='Bloco A', tipo='BLOCO')
+        self.insumo = Insumo.objects.create(codigo_sienge='3001', descricao='Cimento CP-II', unidade='SC')
+        self.user = User.objects.create_superuser('mc_admin', 'mc@example.com', 'x')
+
+    def _item(self, obra=None, insumo=None, **campos):
+        return ItemMapa.objects.create(
+            obra=obra or self.obra,
+            insumo=insumo or self.insumo,
+            quantidade_planejada=Decimal('10'),
+            **campos,
+        )
+
+
+class VersaoDadosTests(_MapaControleBase):
+    def _muda(self, acao, obra=None):
+        obra = obra or self.obra
+        antes = versao_dados_mapa_controle(obra.pk)
+        acao()
+        return antes != versao_dados_mapa_controle(obra.pk)
+
+    def test_sinais_dos_dados_da_obra_avancam_a_versao(self):
+        item = self._item()
+        recebimento = RecebimentoObra.objects.create(obra=self.obra, insumo=self.insumo, numero_sc='77')
+        casos = {
+            'ItemMapa save': lambda: item.save(),
+            'RecebimentoObra save': lambda: recebimento.save(),
+            'AlocacaoRecebimento create': lambda: AlocacaoRecebimento.objects.create(
+                obra=self.obra,
+                insumo=self.insumo,
+                local_aplicacao=self.local,
+                item_mapa=item,
+                quantidade_alocada=Decimal('2'),
+                criado_por=self.user,
+            ),
+            'LocalObra create': lambda: LocalObra.objects.create(obra=self.obra, nome='Bloco B', tipo='BLOCO'),
+            'Obra save': lambda: self.obra.save(),
+            'RecebimentoObra delete': lambda: recebimento.delete(),
+        }
+        for nome, acao in casos.items():
+            with self.subTest(nome):
+                self.assertTrue(self._muda(acao))
+
+    def test_alteracao_de_uma_obra_nao_invalida_outra(self):
+        self.assertFalse(self._muda(lambda: self._item(), obra=self.outra))
+
+    def test_insumo_avanca_a_versao_de_todas_as_obras(self):
+        self._item()
+        outra_antes = versao_dados_mapa_controle(self.outra.pk)
+        self.assertTrue(self._muda(lambda: self.insumo.save()))
+        self.assertNotEqual(versao_dados_mapa_controle(self.outra.pk), outra_antes)
+
+    def test_versao_fica_no_banco_e_acompanha_a_transacao(self):
+        self._item()
+        versao = versao_dados_mapa_controle(self.obra.pk)
+        contador = MapaControleVersao.objects.get(escopo=self.obra.pk).versao_suprimentos
+        cache.clear()
+        self.assertEqual(versao_dados_mapa_controle(self.obra.pk), versao)
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            invalidar_mapa_controle(self.obra.pk)
+            raise RuntimeError
+        self.assertEqual(MapaControleVersao.objects.get(escopo=self.obra.pk).versao_suprimentos, contador)
+        self.assertEqual(versao_dados_mapa_controle(self.obra.pk), versao)
+
+    def test_troca_de_dia_muda_a_versao(self):
+        hoje = versao_dados_mapa_controle(self.obra.pk)
+        amanha = timezone.now() + timedelta(days=1)
+        with mock.patch('suprimentos.services.mapa_controle_snapshot.timezone.now', return_value=amanha):
+            self.assertNotEqual(versao_dados_mapa_controle(self.obra.pk), hoje)
+
+    def test_snapshot_reaproveitado_ate_a_versao_mudar(self):
+        item = self._item()
+        primeiro = snapshot_mapa_controle(self.obra)
+        with self.assertNumQueries(1):
+            self.assertEqual(snapshot_mapa_controle(self.obra), primeiro)
+
+        item.responsavel = 'Eng. Ana'
+        item.save()
+        novo = snapshot_mapa_controle(self.obra)
+        self.assertNotEqual(novo['versao'], primeiro['versao'])
+        self.assertEqual(novo['linhas'][0]['responsavel'], 'Eng. Ana')
+
+
+@override_settings(MAPA_SUPRIMENTOS_MANUAL=False)
+class ServicosSobreLinhasTests(_MapaControleBase):
+    def setUp(self):
+        super().setUp()
+        tubo = Insumo.objects.create(codigo_sienge='3002', descricao='Tubo Straße', unidade='UN')
+        self.cimento = self._item(categoria='ESTRUTURA', local_aplicacao=self.local, numero_sc='10')
+        self.tubo = self._item(insumo=tubo, categoria='', local_aplicacao=self.local)
+        self.areia = self._item(
+            insumo=Insumo.objects.create(codigo_sienge='3003', descricao='Areia', unidade='M3'),
+            categoria='ACABAMENTO',
+        )
+        self._item(insumo=tubo, categoria='FUNDAÇÃO', nao_aplica=True)
+
+    def _service(self, **filtros):
+        return MapaControleService(self.obra, MapaControleFilters(**filtros))
+
+    def test_summary_usa_as_linhas_do_snapshot(self):
+        payload = self._service().build_summary_payload()
+        self.assertEqual(payload['kpis']['total_itens'], 3)
+        self.assertEqual(payload['kpis']['sem_sc'], 2)
+        # Categorias ordenadas; a vazia não vira opção.
+        self.assertEqual(payload['filtros']['options']['categorias'], ['ACABAMENTO', 'ESTRUTURA'])
+        self.assertIn(('A CLASSIFICAR', 1), payload['ranking']['categorias'])
+
+    def test_items_filtros_status_e_categoria_vazia(self):
+        items = self._service().build_items_payload()['items']
+        self.assertEqual({i['id']: i['categoria'] for i in items}[self.tubo.pk], '')
+        sem_local = {i['id']: i['local'] for i in items}[self.areia.pk]
+        self.assertEqual(sem_local, 'Sem local')
+        com_sc = self._service(status='sem_pc').build_items_payload()
+        self.assertEqual([i['id'] for i in com_sc['items']], [self.cimento.pk])
+        self.assertEqual(
+            [i['id'] for i in self._service(local_id=str(self.local.pk)).build_items_payload()['items']],
+            [self.tubo.pk, self.cimento.pk],
+        )
+
+    def test_busca_ignora_caixa_com_casefold(self):
+        for termo in ('STRASSE', 'straße', 'tubo'):
+            with self.subTest(termo=termo):
+                items = self._service(search=termo).build_items_payload()['items']
+                self.assertEqual([i['id'] for i in items], [self.tubo.pk])
+
+    def test_relatorio_por_local_sobre_as_linhas(self):
+        fatos = LocalMapaRelatorioService(self.obra).build_facts_for_local(self.local)
+        self.assertEqual(fatos['kpis']['total_itens'], 2)
+        self.assertEqual(fatos['kpis']['sem_sc'], 1)
+        self.assertEqual(fatos['comparativo_obra']['total_locais_com_itens'], 1)
+        self.assertEqual(
+            {c['categoria'] for c in fatos['categorias_mais_pendentes']}, {'ESTRUTURA', 'A CLASSIFICAR'}
+        )
+
+
+class _TelaMapaControleBase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.obra = Obra.objects.create(codigo_sienge='MC-T', nome='Obra Tela')
+        Project.objects.create(name='Obra Tela', code='MC-T', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31))
+        self.user = User.objects.create_superuser('mc_tela', 'tela@example.com', 'x')
+        self.client.force_login(self.user)
+        self.url = f"{reverse('engenharia:mapa_controle')}?obra={self.obra.pk}"
+
+
+class MatrizMapaServicoCacheTests(_TelaMapaControleBase):
+    def setUp(self):
+        super().setUp()
+        self.importacao = ImportacaoMapaServico.objects.create(obra=self.obra, nome_arquivo='mapa.xlsx')
+        self.item = ItemMapaServico.objects.create(
+            obra=self.obra,
+            importacao=self.importacao,
+            bloco='A',
+            pavimento='1',
+            apto='101',
+            atividade='Alvenaria',
+            status_percentual=Decimal('0.500'),
+            chave_uid='a-1-101-alvenaria',
+        )
+
+    def _get(self, query=''):
+        with mock.patch.object(
+            views_controle, '_build_matrix_grid', wraps=views_controle._build_matrix_grid
+        ) as grade:
+            response = self.client.get(self.url + query)
+        self.assertEqual(response.status_code, 200)
+        return response, grade.call_count
+
+    def test_matriz_reaproveitada_ate_o_mapa_de_servico_mudar(self):
+        primeira, montagens = self._get()
+        self.assertEqual(montagens, 1)
+        _, montagens = self._get()
+        self.assertEqual(montagens, 0)
+        self.assertEqual(primeira.context['matrix']['atividades'], ['Alvenaria'])
+
+        self.item.status_percentual = Decimal('1.000')
+        self.item.save()
+        _, montagens = self._get()
+        self.assertEqual(montagens, 1)
+
+    def test_filtros_da_tela_entram_na_chave(self):
+        self._get()
+        _, montagens = self._get('&bloco=A')
+        self.assertEqual(montagens, 1)
+
+    def test_sinais_do_mapa_de_servico_avancam_a_versao(self):
+        casos = {
+            'ItemMapaServico': lambda: self.item.save(),
+            'ItemMapaServicoStatusRef': lambda: ItemMapaServicoStatusRef.objects.create(
+                obra=self.obra, atividade='Alvenaria', atividade_chave='alvenaria'
+            ),
+            'ImportacaoMapaServico': lambda: self.importacao.save(),
+            'ItemMapaServico delete': lambda: self.item.delete(),
+        }
+        for nome, acao in casos.items():
+            with self.subTest(nome):
+                antes = versao_mapa_servico(self.obra.pk)
+                acao()
+                self.assertNotEqual(versao_mapa_servico(self.obra.pk), antes)
+
+
+class MatrizAmbienteCacheTests(_TelaMapaControleBase):
+    def setUp(self):
+        super().setUp()
+        self.ambiente = AmbienteOperacional.objects.create(
+            obra=self.obra, nome='Quadro', tipo=AmbienteTipo.MAPA_CONTROLE, criado_por=self.user
+        )
+        rows = [['BLOCO', 'Alvenaria', 'Reboco'], ['A', '50%', '10%'], ['B', '100%', '']]
+        self.versao = AmbienteVersao.objects.create(
+            ambiente=self.ambiente,
+            numero=1,
+            estado=VersaoEstado.DRAFT,
+            layout={'sections': [{'id': 'm', 'kind': 'matrix_table', 'data': {'rows': rows}}]},
+            metadados={},
+        )
+        self.url = f'{self.url}&ambiente_id={self.ambiente.pk}'
+
+    def _get(self):
+        with mock.patch.object(
+            views_controle,
+            '_extract_first_matrix_rows_from_layout',
+            wraps=views_controle._extract_first_matrix_rows_from_layout,
+        ) as extrair:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response, extrair.call_count
+
+    def test_matriz_reaproveitada_ate_a_versao_do_layout_mudar(self):
+        primeira, montagens = self._get()
+        self.assertEqual(montagens, 1)
+        segunda, montagens = self._get()
+        self.assertEqual(montagens, 0)
+        self.assertEqual(segunda.context['matrix'], primeira.context['matrix'])
+
+        self.versao.avancar_revisao()
+        _, montagens = self._get()
+        self.assertEqual(montagens, 1)
+
+        AmbienteVersao.objects.filter(pk=self.versao.pk).update(
+            updated_at=timezone.make_aware(datetime(2030, 1, 1))
+        )
+        _, montagens = self._get()
+        self.assertEqual(montagens, 1)
@@ -0,0 +1,128 @@
+"""Webhook do Sienge: grava o evento com idempotência e o worker aplica em ordem."""
+import hashlib
+import hmac
+import json
+from datetime import date
+from decimal import Decimal
+from contextlib import contextmanager
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from mapa_obras.models import LocalObra, Obra
+from suprimentos.models import Insumo, ItemMapa, SiengeWebhookEvento
+from suprimentos.services.sienge_webhook_eventos import _HANDLERS, processar_eventos_pendentes
+
+SEGREDO = 'segredo-teste'
+
+
+@override_settings(SIENGE_WEBHOOK_SECRET=SEGREDO, SIENGE_WEBHOOK_MAX_TENTATIVAS=2)
+class WebhookSiengeTests(TestCase):
+    url = '/api/webhook/sienge/'
+
+    def setUp(self):
+        cache.clear()
+        self.obra = Obra.objects.create(codigo_sienge='OBR-WH', nome='Obra Webhook', ativa=True)
+        local = LocalObra.objects.create(obra=self.obra, nome='Bloco A', tipo='BLOCO')
+        self.insumo = Insumo.objects.create(codigo_sienge='3001', descricao='Areia', unidade='M3')
+        self.itens = [
+            ItemMapa.objects.create(
+                obra=self.obra,
+                insumo=self.insumo,
+                local_aplicacao=local,
+                numero_sc='77',
+                quantidade_planejada=Decimal('5'),
+            )
+            for _ in range(3)
+        ]
+        agendar = patch('suprimentos.services.sienge_webhook_eventos._agendar_worker')
+        self.agendar = agendar.start()
+        self.addCleanup(agendar.stop)
+
+    def _post(self, data, **headers):
+        corpo = json.dumps(data).encode()
+        assinatura = hmac.new(SEGREDO.encode(), corpo, hashlib.sha256).hexdigest()
+        return self.client.post(
+            self.url, corpo, content_type='application/json',
+            HTTP_X_SIENGE_SIGNATURE=assinatura, **headers,
+        )
+
+    def test_assinatura_invalida_nao_grava_evento(self):
+        resp = self.client.post(
+            self.url, b'{"evento": "sc.criada"}', content_type='application/json',
+            HTTP_X_SIENGE_SIGNATURE='x',
+        )
+        self.assertEqual(resp.status_code, 401)
+        self.assertFalse(SiengeWebhookEvento.objects.exists())
+
+    def test_evento_e_enfileirado_e_reenvio_e_deduplicado(self):
+        data = {'evento': 'sc.atualizada', 'dados': {'codigo_obra': 'OBR-WH', 'numero_sc': '77', 'data_sc': '2026-03-02'}}
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self._post(data, HTTP_X_SIENGE_EVENT_ID='evt-1')
+        self.assertEqual(resp.status_code, 202)
+        self.assertFalse(resp.json()['duplicado'])
+        self.assertEqual(self.agendar.call_count, 1)
+        # Nada é aplicado dentro da requisição.
+        self.assertFalse(ItemMapa.objects.filter(data_sc__isnull=False).exists())
+
+        resp = self._post(data, HTTP_X_SIENGE_EVENT_ID='evt-1')
+        self.assertTrue(resp.json()['duplicado'])
+        self.assertEqual(SiengeWebhookEvento.objects.count(), 1)
+
+        self.assertEqual(processar_eventos_pendentes()['processados'], 1)
+        self.assertEqual(
+            set(ItemMapa.objects.values_list('data_sc', flat=True)), {date(2026, 3, 2)},
+        )
+        evento = SiengeWebhookEvento.objects.get()
+        self.assertEqual((evento.status, evento.resultado), ('processado', {'itens_atualizados': 3}))
+
+    def test_worker_aplica_em_ordem_e_ignora_obra_inexistente(self):
+        self._post({'evento': 'pc.criado', 'dados': {
+            'codigo_obra': 'OBR-WH', 'numero_sc': '77', 'numero_pc': 'PC-1', 'data_pc': '2026-03-05',
+        }})
+        self._post({'evento': 'sc.criada', 'dados': {'codigo_obra': 'NAO-EXISTE', 'numero_sc': '1'}})
+        self._post({'evento': 'pc.atualizado', 'dados': {
+            'codigo_obra': 'OBR-WH', 'numero_pc': 'PC-1', 'empresa_fornecedora': 'Fornecedor X',
+        }})
+        self._post({'evento': 'nf.entrada', 'dados': {
+            'codigo_obra': 'OBR-WH', 'codigo_insumo': '3001', 'numero_nf': 'NF-9',
+            'quantidade': '4.5', 'data_entrada': '2026-03-10',
+        }})
+
+        stats = processar_eventos_pendentes()
+        self.assertEqual(stats, {'processados': 3, 'ignorados': 1, 'falhos': 0, 'pendentes': 0})
+        item = ItemMapa.objects.get(pk=self.itens[0].pk)
+        self.assertEqual(
+            (item.numero_pc, item.data_pc, item.empresa_fornecedora, item.quantidade_recebida),
+            ('PC-1', None, 'Fornecedor X', Decimal('4.5')),
+        )
+
+    def test_erro_transitorio_segura_a_fila_ate_o_limite(self):
+        self._post({'evento': 'sc.criada', 'dados': {'codigo_obra': 'OBR-WH', 'numero_sc': '77', 'data_sc': '2026-01-01'}})
+        self._post({'evento': 'sc.atualizada', 'dados': {'codigo_obra': 'OBR-WH', 'numero_sc': '77', 'data_sc': '2026-02-01'}})
+        falha = Mock(side_effect=RuntimeError('deadlock'))
+        with patch.dict(_HANDLERS, {'sc.criada': falha}):
+            self.assertEqual(processar_eventos_pendentes()['pendentes'], 1)
+            self.assertEqual(
+                SiengeWebhookEvento.objects.filter(status='pendente').count(), 2,
+            )
+            stats = processar_eventos_pendentes(limite=1)
+        self.assertEqual(stats['falhos'], 1)
+
+        processar_eventos_pendentes()
+        self.assertEqual(
+            set(ItemMapa.objects.values_list('data_sc', flat=True)), {date(2026, 2, 1)},
+        )
+
+    def test_trava_ocupada_nao_aplica_nada(self):
+        self._post({'evento': 'sc.criada', 'dados': {'codigo_obra': 'OBR-WH', 'numero_sc': '77', 'data_sc': '2026-01-01'}})
+
+        @contextmanager
+        def trava_ocupada(nome):
+            yield False
+
+        with patch('suprimentos.services.sienge_webhook_eventos.db_lock', trava_ocupada):
+            self.assertEqual(processar_eventos_pendentes(), {'status': 'skipped_running'})
+        self.assertEqual(SiengeWebhookEvento.objects.get().status, 'pendente')
+        self.assertEqual(processar_eventos_pendentes()['processados'], 1)
@@ -62,6 +62,16 @@ urlpatterns = [
         views_painel_operacional.api_importar_matriz_excel,
         name='po_api_importar_matriz_excel',
     ),
+    path(
+        'ferramenta/ambientes/<int:ambiente_id>/importar-matriz-excel/job/',
+        views_painel_operacional.api_importar_matriz_job,
+        name='po_api_importar_matriz_job',
+    ),
+    path(
+        'ferramenta/importacoes-matriz/<int:job_id>/status/',
+        views_painel_operacional.api_importacao_matriz_status,
+        name='po_api_importacao_matriz_status',
+    ),
     path(
         'ferramenta/ambientes/<int:ambiente_id>/exportar-matriz-excel/',
         views_painel_operacional.api_exportar_matriz_excel,
@@ -10,6 +10,7 @@ from workflow_aprovacao.models import (
     ApprovalStepParticipant,
     ExternalParticipantSignupRequest,
     ProcessCategory,
+    SignatureReceiptArtifact,
     SiengeCentralSyncState,
 )
 
@@ -87,6 +88,14 @@ class SiengeCentralSyncStateAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(SignatureReceiptArtifact)
+class SignatureReceiptArtifactAdmin(admin.ModelAdmin):
+    list_display = ('id', 'process', 'include_geolocation', 'rendered_at')
+    list_filter = ('include_geolocation',)
+    raw_id_fields = ('process', 'event')
+    readonly_fields = ('source_fingerprint', 'rendered_at')
+
+
 @admin.register(ExternalParticipantSignupRequest)
 class ExternalParticipantSignupRequestAdmin(admin.ModelAdmin):
     list_display = (
@@ -5,3 +5,6 @@ class WorkflowAprovacaoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'workflow_aprovacao'
     verbose_name = 'Central de Aprovações (workflow)'
+
+    def ready(self):
+        import workflow_aprovacao.signals  # noqa: F401 - invalida o cache da fila
@@ -0,0 +1,42 @@
+"""
+Renderiza e armazena os comprovantes de assinatura dos processos concluídos.
+
+Novos processos já recebem o comprovante em background na decisão final; este comando
+preenche os antigos (ou refaz os que mudaram). Comprovantes atualizados não são refeitos.
+
+Exemplos:
+  python manage.py render_signature_receipts
+  python manage.py render_signature_receipts --process 123 --process 456
+"""
+from django.core.management.base import BaseCommand
+
+from workflow_aprovacao.models import ApprovalProcess, ProcessStatus
+from workflow_aprovacao.services.signing import render_process_signature_receipts
+
+
+class Command(BaseCommand):
+    help = 'Gera os comprovantes de assinatura (PDF) dos processos aprovados/reprovados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--process',
+            action='append',
+            type=int,
+            dest='process_ids',
+            help='ID do processo (repetível). Sem o parâmetro, todos os concluídos.',
+        )
+
+    def handle(self, *args, **options):
+        ids = options.get('process_ids')
+        if not ids:
+            ids = list(
+                ApprovalProcess.objects.filter(
+                    status__in=(ProcessStatus.APPROVED, ProcessStatus.REJECTED),
+                )
+                .order_by('pk')
+                .values_list('pk', flat=True)
+            )
+        total = 0
+        for process_id in ids:
+            total += render_process_signature_receipts(process_id)
+        self.stdout.write(self.style.SUCCESS(f'{len(ids)} processo(s); {total} comprovante(s) disponível(is).'))
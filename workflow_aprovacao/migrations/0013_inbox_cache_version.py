@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow_aprovacao', '0012_externalparticipantsignuprequest_central_signup_request'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InboxCacheVersion',
+            fields=[
+                ('id', models.IntegerField(default=1, editable=False, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Versão do cache da fila',
+                'verbose_name_plural': 'Versão do cache da fila',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow_aprovacao', '0013_inbox_cache_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SignatureReceiptArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('include_geolocation', models.BooleanField(default=False)),
+                ('source_fingerprint', models.CharField(max_length=64)),
+                ('file', models.FileField(upload_to='workflow_aprovacao/comprovantes/%Y/%m/')),
+                ('rendered_at', models.DateTimeField()),
+                ('event', models.ForeignKey(blank=True, help_text='Evento de decisão final assinado.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='workflow_aprovacao.approvalhistoryentry')),
+                ('process', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='signature_receipts', to='workflow_aprovacao.approvalprocess')),
+            ],
+            options={
+                'verbose_name': 'Comprovante de assinatura (PDF)',
+                'verbose_name_plural': 'Comprovantes de assinatura (PDF)',
+                'constraints': [models.UniqueConstraint(fields=('process', 'include_geolocation'), name='wf_receipt_process_variant_uniq')],
+            },
+        ),
+    ]
@@ -590,6 +590,27 @@ class SiengeCentralSyncState(models.Model):
         return obj
 
 
+class InboxCacheVersion(models.Model):
+    """
+    Registo único (pk=1) com a versão do cache da fila (``services.inbox``).
+
+    Entra na chave dos snapshots de totais e opções de filtro; ``invalidate_inbox_cache()``
+    avança a versão na transação da transição, então vale entre processos e só fica visível
+    no commit.
+    """
+
+    id = models.IntegerField(primary_key=True, default=1, editable=False)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Versão do cache da fila'
+        verbose_name_plural = 'Versão do cache da fila'
+
+    def __str__(self):
+        return f'Fila v{self.version}'
+
+
 class ApprovalIntegrationOutbox(models.Model):
     """Fila de saída para integração (ex.: Sienge), desacoplada do HTTP."""
 
@@ -733,3 +754,45 @@ class ApprovalProcessAttachment(models.Model):
 
     def __str__(self):
         return self.original_name or (self.file.name if self.file else f'Anexo #{self.pk}')
+
+
+class SignatureReceiptArtifact(models.Model):
+    """
+    Comprovante de assinatura (PDF) já renderizado de um processo concluído.
+
+    Gerado em background quando o processo chega à decisão final e servido direto no download.
+    ``source_fingerprint`` resume o histórico e os dados impressos; se mudar, o PDF é refeito.
+    Uma linha por variante (com/sem geolocalização).
+    """
+
+    process = models.ForeignKey(
+        ApprovalProcess,
+        on_delete=models.CASCADE,
+        related_name='signature_receipts',
+    )
+    include_geolocation = models.BooleanField(default=False)
+    event = models.ForeignKey(
+        ApprovalHistoryEntry,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text='Evento de decisão final assinado.',
+    )
+    source_fingerprint = models.CharField(max_length=64)
+    file = models.FileField(upload_to='workflow_aprovacao/comprovantes/%Y/%m/')
+    rendered_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Comprovante de assinatura (PDF)'
+        verbose_name_plural = 'Comprovantes de assinatura (PDF)'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['process', 'include_geolocation'],
+                name='wf_receipt_process_variant_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        variant = 'com geo' if self.include_geolocation else 'sem geo'
+        return f'Comprovante P{self.process_id} ({variant})'
@@ -8,13 +8,13 @@ from workflow_aprovacao.services.inbox import (
     TAB_APROVADO,
     TAB_PENDENTE,
     TAB_REPROVADO,
-    inbox_tab_counts,
+    cached_inbox_tab_counts,
     user_involved_filter_q,
 )
 
 
 def dashboard_context_for_user(user) -> dict:
-    counts = inbox_tab_counts(user)
+    counts = cached_inbox_tab_counts(user)
     show_monitoring = user_can_see_central_monitoring_queue(user)
     pending_preview = list(processes_pending_for_user(user)[:12])
     recent = _recent_processes(user, show_monitoring=show_monitoring, limit=12)
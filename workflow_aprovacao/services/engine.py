@@ -30,6 +30,7 @@ from workflow_aprovacao.models import (
     SubjectKind,
     SyncStatus,
 )
+from workflow_aprovacao.services.inbox import invalidate_inbox_cache
 
 User = get_user_model()
 
@@ -149,6 +150,7 @@ class ApprovalEngine:
             from workflow_aprovacao.services.backlog import mark_backlog_resolved_for_process
 
             mark_backlog_resolved_for_process(process)
+        invalidate_inbox_cache()
         return process
 
     @classmethod
@@ -202,7 +204,9 @@ class ApprovalEngine:
 
         if process.status == ProcessStatus.APPROVED:
             cls._enqueue_final_sync_if_needed(process)
+            cls._schedule_signature_receipts(process)
 
+        invalidate_inbox_cache()
         return process
 
     @classmethod
@@ -244,8 +248,18 @@ class ApprovalEngine:
         )
 
         cls._enqueue_final_sync_if_needed(process)
+        cls._schedule_signature_receipts(process)
+        invalidate_inbox_cache()
         return process
 
+    @classmethod
+    def _schedule_signature_receipts(cls, process: ApprovalProcess) -> None:
+        """Após o commit da decisão final, renderiza os comprovantes em background."""
+        from workflow_aprovacao.tasks import enqueue_signature_receipts
+
+        process_id = process.pk
+        transaction.on_commit(lambda: enqueue_signature_receipts(process_id))
+
     @classmethod
     def _enqueue_final_sync_if_needed(cls, process: ApprovalProcess) -> None:
         """
@@ -1,13 +1,30 @@
-"""Fila da Central de Aprovações — abas, filtros e consultas."""
+"""
+Fila da Central de Aprovações — abas, filtros e consultas.
+
+Os totais das abas saem de uma única consulta com agregação condicional
+(``inbox_tab_counts``). Cabeçalho da fila, painel e badge do menu leem o snapshot em cache
+(``cached_inbox_tab_counts``); as opções de filtro também ficam em cache por utilizador.
+Ambos são invalidados por ``invalidate_inbox_cache()`` nas transições de processo (início,
+aprovação, reprovação, encerramento pela sincronização), pelos sinais de fluxo, alçada,
+participante, categoria e grupos do utilizador (``workflow_aprovacao.signals``) e expiram em
+``WORKFLOW_INBOX_CACHE_SECONDS``. A versão que entra na chave fica no banco
+(``InboxCacheVersion``), então a invalidação vale para todos os processos e workers.
+"""
 from __future__ import annotations
 
 from typing import Any
 
-from django.db.models import Q, QuerySet
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Exists, F, OuterRef, Q, QuerySet
 
 from workflow_aprovacao.access import user_can_see_central_monitoring_queue, user_is_external_workflow_profile
 from workflow_aprovacao.models import (
+    ApprovalHistoryEntry,
     ApprovalProcess,
+    ApprovalProcessParticipant,
+    ApprovalStepParticipant,
+    InboxCacheVersion,
     ParticipantRole,
     ProcessCategory,
     ProcessStatus,
@@ -19,6 +36,7 @@ from workflow_aprovacao.querysets import (
     processes_list_base_qs,
     processes_pending_for_user,
 )
+from workflow_aprovacao.services.step_access import pending_processes_filter_q
 
 TAB_PENDENTE = 'pendente'
 TAB_APROVADO = 'aprovado'
@@ -29,39 +47,41 @@ INBOX_DISPLAY_LIMIT = 150
 
 
 def user_involved_filter_q(user) -> Q:
-    """Processos em que o utilizador iniciou, atuou no histórico ou é participante do fluxo."""
+    """
+    Processos em que o utilizador iniciou, atuou no histórico ou é participante do fluxo.
+
+    Usa subconsultas ``EXISTS`` (sem JOIN nas relações múltiplas), então não duplica linhas
+    e pode ser usado em agregações condicionais.
+    """
     if not user or not user.is_authenticated:
         return Q(pk__in=[])
     roles = (ParticipantRole.APPROVER, ParticipantRole.OWNER, ParticipantRole.VIEWER)
-    q = Q(history_entries__actor=user) | Q(initiated_by=user)
-    participant = Q(
-        flow_definition__steps__participants__subject_kind=SubjectKind.USER,
-        flow_definition__steps__participants__user=user,
-        flow_definition__steps__participants__role__in=roles,
-    )
-    participant |= Q(
-        process_participants__subject_kind=SubjectKind.USER,
-        process_participants__user=user,
-        process_participants__role__in=roles,
-    )
+    subject = Q(subject_kind=SubjectKind.USER, user_id=user.pk)
     group_ids = list(user.groups.values_list('pk', flat=True))
     if group_ids:
-        participant |= Q(
-            flow_definition__steps__participants__subject_kind=SubjectKind.DJANGO_GROUP,
-            flow_definition__steps__participants__django_group_id__in=group_ids,
-            flow_definition__steps__participants__role__in=roles,
-        )
-        participant |= Q(
-            process_participants__subject_kind=SubjectKind.DJANGO_GROUP,
-            process_participants__django_group_id__in=group_ids,
-            process_participants__role__in=roles,
-        )
-    return q | participant
+        subject |= Q(subject_kind=SubjectKind.DJANGO_GROUP, django_group_id__in=group_ids)
+    acted = ApprovalHistoryEntry.objects.filter(process_id=OuterRef('pk'), actor_id=user.pk)
+    flow_participant = ApprovalStepParticipant.objects.filter(
+        subject,
+        step__flow_id=OuterRef('flow_definition_id'),
+        role__in=roles,
+    )
+    process_participant = ApprovalProcessParticipant.objects.filter(
+        subject,
+        process_id=OuterRef('pk'),
+        role__in=roles,
+    )
+    return (
+        Q(initiated_by_id=user.pk)
+        | Q(Exists(acted))
+        | Q(Exists(flow_participant))
+        | Q(Exists(process_participant))
+    )
 
 
 def available_inbox_tabs(user) -> list[dict[str, Any]]:
+    counts = cached_inbox_tab_counts(user)
     if user_is_external_workflow_profile(user):
-        counts = inbox_tab_counts(user)
         return [
             {
                 'key': TAB_PENDENTE,
@@ -69,7 +89,6 @@ def available_inbox_tabs(user) -> list[dict[str, Any]]:
                 'count': counts.get(TAB_PENDENTE, 0),
             }
         ]
-    counts = inbox_tab_counts(user)
     tabs = [
         {'key': TAB_PENDENTE, 'label': 'Minhas pendências'},
         {'key': TAB_APROVADO, 'label': 'Aprovados'},
@@ -142,11 +161,11 @@ def build_inbox_queryset(
     elif tab == TAB_APROVADO:
         qs = processes_list_base_qs().filter(status=ProcessStatus.APPROVED)
         if not show_admin:
-            qs = qs.filter(user_involved_filter_q(user)).distinct()
+            qs = qs.filter(user_involved_filter_q(user))
     elif tab == TAB_REPROVADO:
         qs = processes_list_base_qs().filter(status=ProcessStatus.REJECTED)
         if not show_admin:
-            qs = qs.filter(user_involved_filter_q(user)).distinct()
+            qs = qs.filter(user_involved_filter_q(user))
     else:
         qs = processes_pending_for_user(user)
 
@@ -160,32 +179,85 @@ def build_inbox_queryset(
 
 
 def inbox_tab_counts(user) -> dict[str, int]:
+    """Totais de todas as abas numa única consulta (agregação condicional, sem cache)."""
     show_admin = user_can_see_central_monitoring_queue(user)
-    counts = {
-        TAB_PENDENTE: processes_pending_for_user(user).count(),
-        TAB_APROVADO: build_inbox_queryset(user, tab=TAB_APROVADO).count(),
-        TAB_REPROVADO: build_inbox_queryset(user, tab=TAB_REPROVADO).count(),
+    if not user or not user.is_authenticated:
+        counts = {TAB_PENDENTE: 0, TAB_APROVADO: 0, TAB_REPROVADO: 0}
+        if show_admin:
+            counts[TAB_AGUARDANDO] = 0
+        return counts
+    involved = Q() if show_admin else user_involved_filter_q(user)
+    aggregates = {
+        TAB_PENDENTE: Count('pk', filter=pending_processes_filter_q(user)),
+        TAB_APROVADO: Count('pk', filter=Q(status=ProcessStatus.APPROVED) & involved),
+        TAB_REPROVADO: Count('pk', filter=Q(status=ProcessStatus.REJECTED) & involved),
     }
     if show_admin:
-        counts[TAB_AGUARDANDO] = processes_awaiting_in_central().count()
+        aggregates[TAB_AGUARDANDO] = Count('pk', filter=Q(status=ProcessStatus.AWAITING_STEP))
+    return ApprovalProcess.objects.order_by().aggregate(**aggregates)
+
+
+def _inbox_cache_timeout() -> int:
+    return int(getattr(settings, 'WORKFLOW_INBOX_CACHE_SECONDS', 120))
+
+
+def _inbox_cache_key(kind: str, user) -> str:
+    version = InboxCacheVersion.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+    return f'workflow_aprovacao:inbox:{kind}:{version}:{user.pk}'
+
+
+def invalidate_inbox_cache() -> None:
+    """
+    Descarta os snapshots da fila de todos os utilizadores. Chamar na transação da transição:
+    a versão nova só fica visível junto com os dados novos.
+    """
+    if InboxCacheVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        return
+    _, created = InboxCacheVersion.objects.get_or_create(pk=1, defaults={'version': 1})
+    if not created:
+        InboxCacheVersion.objects.filter(pk=1).update(version=F('version') + 1)
+
+
+def cached_inbox_tab_counts(user) -> dict[str, int]:
+    """Snapshot dos totais das abas (cabeçalho, painel e badge do menu)."""
+    if not user or not user.is_authenticated:
+        return inbox_tab_counts(user)
+    key = _inbox_cache_key('counts', user)
+    counts = cache.get(key)
+    if counts is None:
+        counts = inbox_tab_counts(user)
+        cache.set(key, counts, _inbox_cache_timeout())
     return counts
 
 
 def inbox_filter_options(user) -> dict[str, Any]:
     from core.models import Project
 
+    if user and user.is_authenticated:
+        key = _inbox_cache_key('filters', user)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
     if user_can_see_central_monitoring_queue(user):
         visible = processes_list_base_qs()
     else:
-        visible = processes_list_base_qs().filter(user_involved_filter_q(user)).distinct()
+        visible = processes_list_base_qs().filter(user_involved_filter_q(user))
 
-    project_ids = visible.values_list('project_id', flat=True).distinct()
-    projects = Project.objects.filter(pk__in=project_ids, is_active=True).order_by('code')
-    category_ids = visible.values_list('category_id', flat=True).distinct()
-    categories = ProcessCategory.objects.filter(pk__in=category_ids, is_active=True).order_by(
-        'sort_order', 'name'
+    visible = visible.order_by()
+    projects = list(
+        Project.objects.filter(
+            pk__in=visible.values('project_id'), is_active=True
+        ).order_by('code')
     )
-    return {'projects': projects, 'categories': categories}
+    categories = list(
+        ProcessCategory.objects.filter(
+            pk__in=visible.values('category_id'), is_active=True
+        ).order_by('sort_order', 'name')
+    )
+    options = {'projects': projects, 'categories': categories}
+    if user and user.is_authenticated:
+        cache.set(key, options, _inbox_cache_timeout())
+    return options
 
 
 def fetch_inbox_page(
@@ -209,7 +281,13 @@ def fetch_inbox_page(
         q=q,
         origin=origin,
     )
-    total = qs.count()
+    if project_id or category_id or (q or '').strip() or (origin or '').strip().lower() in ('gestao', 'sienge'):
+        total = qs.count()
+    else:
+        # Sem filtros o total da aba é o do snapshot do cabeçalho.
+        total = cached_inbox_tab_counts(user).get(tab)
+        if total is None:
+            total = qs.count()
     if tab == TAB_AGUARDANDO:
         slice_qs = qs[:limit]
         rows, _ = annotate_pending_assigned_to_user(slice_qs, user)
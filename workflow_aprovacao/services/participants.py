@@ -14,6 +14,7 @@ from workflow_aprovacao.models import (
     ParticipantRole,
     SubjectKind,
 )
+from workflow_aprovacao.services.inbox import invalidate_inbox_cache
 
 User = get_user_model()
 
@@ -126,6 +127,7 @@ def bind_external_user_to_process_step(
         step=step,
         role=ParticipantRole.APPROVER,
     ).delete()
+    invalidate_inbox_cache()
     return ApprovalProcessParticipant.objects.create(
         process=process,
         step=step,
@@ -11,6 +11,7 @@ from django.db import transaction
 from django.utils import timezone
 
 from workflow_aprovacao.models import ApprovalHistoryEntry, ApprovalProcess, HistoryAction, ProcessStatus, SyncStatus
+from workflow_aprovacao.services.inbox import invalidate_inbox_cache
 
 
 def _snapshot(row: dict) -> dict:
@@ -96,6 +97,7 @@ def reconcile_existing_sienge_process_row(
             'external_id': process.external_id or '',
         },
     )
+    invalidate_inbox_cache()
     return 'closed'
 
 
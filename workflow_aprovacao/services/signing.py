@@ -5,17 +5,20 @@ import json
 import os
 import re
 from io import BytesIO
-from pathlib import Path
 from typing import Any
 
-from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 
+from core.utils.pdf_assets import pdf_assets
 from workflow_aprovacao.models import (
     ApprovalHistoryEntry,
     ApprovalProcess,
     HistoryAction,
     ProcessStatus,
+    SignatureReceiptArtifact,
 )
 
 try:
@@ -40,32 +43,14 @@ _COLOR_BORDER = (208 / 255, 217 / 255, 227 / 255)  # #D0D9E3
 
 def logo_path_for_receipt_pdf() -> str | None:
     """Mesma resolução de logo dos PDFs do Diário / GestControll."""
-    try:
-        from core.utils.pdf_generator import _get_logo_absolute_path
-
-        path = _get_logo_absolute_path()
-        if path and os.path.exists(path):
-            return path
-    except Exception:
-        pass
-    logo_dir = Path(settings.BASE_DIR) / 'core' / 'static' / 'core' / 'images'
-    for name in (
-        'lpla-logo-pdf-transparent.png',
-        'lpla-logo-pdf.png',
-        'lplan-logo2.png',
-        'lplan_logo.png',
-        'lplan_logo.jpg',
-        'lplan_logo.jpeg',
-    ):
-        candidate = logo_dir / name
-        if candidate.exists():
-            return str(candidate)
-    return None
+    return pdf_assets.logo_path
 
 
 def _scaled_logo_size(logo_path: str) -> tuple[float, float]:
     max_logo_w = 4.8 * cm
     max_logo_h = 1.15 * cm
+    if logo_path == pdf_assets.logo_path:
+        return pdf_assets.scaled_logo_size(max_logo_w, max_logo_h, min_w=1.0 * cm, min_h=0.4 * cm)
     logo_w, logo_h = max_logo_w, max_logo_h
     try:
         src_w, src_h = ImageReader(logo_path).getSize()
@@ -466,8 +451,9 @@ class _ReceiptLayout:
 
         if self.logo_path and logo_h:
             logo_y = box_bottom + (box_top - box_bottom - logo_h) / 2
+            logo_src = pdf_assets.logo_reader() if self.logo_path == pdf_assets.logo_path else None
             self.c.drawImage(
-                self.logo_path,
+                logo_src or self.logo_path,
                 _MARGIN_X,
                 logo_y,
                 width=logo_w,
@@ -658,6 +644,7 @@ def render_signature_receipt_pdf(
     process: ApprovalProcess,
     event: ApprovalHistoryEntry,
     include_geolocation: bool = False,
+    history: list[ApprovalHistoryEntry] | None = None,
 ) -> bytes:
     if not REPORTLAB_AVAILABLE:
         raise RuntimeError('ReportLab não disponível para gerar comprovante PDF.')
@@ -667,7 +654,8 @@ def render_signature_receipt_pdf(
     hash_value = evidence.get('signature_hash_sha256', '')
     snap = evidence.get('signed_snapshot') or {}
 
-    history = process_history_for_receipt(process)
+    if history is None:
+        history = process_history_for_receipt(process)
     if not history:
         history = [event]
 
@@ -750,3 +738,122 @@ def render_signature_receipt_pdf(
     c.save()
     buffer.seek(0)
     return buffer.getvalue()
+
+
+# ---------------------------------------------------------------------------
+# Comprovante armazenado (SignatureReceiptArtifact)
+# ---------------------------------------------------------------------------
+
+# Incrementar ao mudar o layout do comprovante: invalida os PDFs já armazenados.
+RECEIPT_LAYOUT_VERSION = 1
+
+
+def receipt_source_fingerprint(
+    process: ApprovalProcess,
+    event: ApprovalHistoryEntry,
+    history: list[ApprovalHistoryEntry],
+    *,
+    include_geolocation: bool,
+) -> str:
+    """Hash de tudo o que o comprovante imprime: processo, histórico e evento final."""
+    def _entry(e: ApprovalHistoryEntry) -> list:
+        return [
+            e.pk,
+            e.action,
+            e.created_at.isoformat(),
+            e.comment,
+            e.new_status,
+            e.step_sequence_snapshot,
+            _history_step_label(e),
+            _actor_label(e),
+            e.payload or {},
+        ]
+
+    data = {
+        'layout': RECEIPT_LAYOUT_VERSION,
+        'geo': include_geolocation,
+        'process': [
+            process.pk,
+            process.status,
+            process.title,
+            process.category.name,
+            process.project.code,
+            process.project.name,
+        ],
+        'event': _entry(event),
+        'history': [_entry(e) for e in history],
+    }
+    canonical = json.dumps(data, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def ensure_signature_receipt(
+    process: ApprovalProcess,
+    *,
+    include_geolocation: bool,
+    event: ApprovalHistoryEntry | None = None,
+) -> SignatureReceiptArtifact | None:
+    """
+    Devolve o comprovante armazenado da variante pedida, renderizando só quando ainda não
+    existe ou quando o histórico mudou desde a última renderização. None sem decisão final.
+    """
+    event = event or latest_final_signature_event(process)
+    if event is None:
+        return None
+    history = process_history_for_receipt(process)
+    fingerprint = receipt_source_fingerprint(process, event, history, include_geolocation=include_geolocation)
+    artifact = SignatureReceiptArtifact.objects.filter(
+        process=process,
+        include_geolocation=include_geolocation,
+    ).first()
+    if (
+        artifact is not None
+        and artifact.source_fingerprint == fingerprint
+        and artifact.file
+        and default_storage.exists(artifact.file.name)
+    ):
+        return artifact
+
+    pdf = render_signature_receipt_pdf(
+        process=process,
+        event=event,
+        include_geolocation=include_geolocation,
+        history=history,
+    )
+    if artifact is None:
+        artifact = SignatureReceiptArtifact(process=process, include_geolocation=include_geolocation)
+    old_name = artifact.file.name if artifact.file else ''
+    suffix = '_geo' if include_geolocation else ''
+    artifact.file.save(f'comprovante_processo_{process.pk}{suffix}.pdf', ContentFile(pdf), save=False)
+    artifact.event = event
+    artifact.source_fingerprint = fingerprint
+    artifact.rendered_at = timezone.now()
+    try:
+        with transaction.atomic():
+            artifact.save()
+    except IntegrityError:
+        # Outro worker gravou a mesma variante ao mesmo tempo: fica a dele.
+        default_storage.delete(artifact.file.name)
+        return SignatureReceiptArtifact.objects.get(process=process, include_geolocation=include_geolocation)
+    if old_name and old_name != artifact.file.name:
+        default_storage.delete(old_name)
+    return artifact
+
+
+def render_process_signature_receipts(process_id: int) -> int:
+    """Garante as duas variantes do comprovante de um processo concluído; retorna quantas existem."""
+    process = (
+        ApprovalProcess.objects.select_related('project', 'category')
+        .filter(pk=process_id, status__in=(ProcessStatus.APPROVED, ProcessStatus.REJECTED))
+        .first()
+    )
+    if process is None:
+        return 0
+    event = latest_final_signature_event(process)
+    if event is None:
+        return 0
+    return sum(
+        1
+        for include_geolocation in (False, True)
+        if ensure_signature_receipt(process, include_geolocation=include_geolocation, event=event)
+    )
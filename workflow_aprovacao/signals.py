@@ -0,0 +1,41 @@
+"""
+Sinais da Central de Aprovações.
+
+- Invalida o cache da fila (``services.inbox``: totais das abas e opções de filtro) quando mudam
+  fluxos, alçadas, participantes, categorias ou os grupos de um utilizador — dados que decidem
+  quem vê cada processo. As transições de processo invalidam explicitamente no motor.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from workflow_aprovacao.models import (
+    ApprovalFlowDefinition,
+    ApprovalProcessParticipant,
+    ApprovalStep,
+    ApprovalStepParticipant,
+    ProcessCategory,
+)
+from workflow_aprovacao.services.inbox import invalidate_inbox_cache
+
+
+@receiver(post_save, sender=ApprovalFlowDefinition)
+@receiver(post_delete, sender=ApprovalFlowDefinition)
+@receiver(post_save, sender=ApprovalStep)
+@receiver(post_delete, sender=ApprovalStep)
+@receiver(post_save, sender=ApprovalStepParticipant)
+@receiver(post_delete, sender=ApprovalStepParticipant)
+@receiver(post_save, sender=ApprovalProcessParticipant)
+@receiver(post_delete, sender=ApprovalProcessParticipant)
+@receiver(post_save, sender=ProcessCategory)
+@receiver(post_delete, sender=ProcessCategory)
+@receiver(post_delete, sender=Group)
+def invalidar_fila_configuracao(sender, **kwargs):
+    invalidate_inbox_cache()
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+def invalidar_fila_grupos(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_inbox_cache()
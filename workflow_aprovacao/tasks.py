@@ -1,7 +1,9 @@
 """
-Tarefas Celery: ingestão periódica Sienge → Central de Aprovações.
+Tarefas Celery da Central de Aprovações.
 
-Ative com SIENGE_CENTRAL_BEAT_ENABLED=true e processe com: celery -A lplan_central beat / worker.
+- Ingestão periódica Sienge → Central. Ative com SIENGE_CENTRAL_BEAT_ENABLED=true e processe
+  com: celery -A lplan_central beat / worker.
+- Comprovantes de assinatura (PDF) renderizados quando o processo chega à decisão final.
 """
 from __future__ import annotations
 
@@ -49,3 +51,37 @@ def sync_sienge_central_periodic(self) -> None:
         state.last_stats = {}
         state.last_error = str(exc)[:4000]
         state.save(update_fields=['last_run_at', 'last_ok', 'last_stats', 'last_error'])
+
+
+def run_render_signature_receipts(process_id: int) -> None:
+    """Renderiza e armazena os comprovantes do processo (idempotente: só refaz se o histórico mudou)."""
+    from django.db import close_old_connections
+
+    from workflow_aprovacao.services.signing import render_process_signature_receipts
+
+    close_old_connections()
+    try:
+        render_process_signature_receipts(process_id)
+    finally:
+        close_old_connections()
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=60, ignore_result=True)
+def render_signature_receipts_task(self, process_id: int):
+    """Fila Celery: comprovantes de assinatura do processo concluído."""
+    try:
+        run_render_signature_receipts(process_id)
+    except Exception as exc:
+        raise self.retry(exc=exc)
+
+
+def enqueue_signature_receipts(process_id: int) -> None:
+    """Agenda a renderização dos comprovantes (fila Celery ou thread)."""
+    from core.tasks import _enqueue_or_thread
+
+    _enqueue_or_thread(
+        render_signature_receipts_task,
+        run_render_signature_receipts,
+        process_id,
+        'wf-signature-receipt',
+    )
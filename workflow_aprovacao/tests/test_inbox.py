@@ -0,0 +1,135 @@
+"""
+Fila da Central: totais das abas numa consulta, snapshot em cache e invalidação.
+"""
+from __future__ import annotations
+
+from datetime import date
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Project
+from workflow_aprovacao.models import (
+    ApprovalFlowDefinition,
+    ApprovalProcess,
+    ApprovalStep,
+    ApprovalStepParticipant,
+    InboxCacheVersion,
+    ParticipantRole,
+    ProcessCategory,
+    ProcessStatus,
+    SubjectKind,
+)
+from workflow_aprovacao.services.inbox import (
+    TAB_APROVADO,
+    TAB_PENDENTE,
+    TAB_REPROVADO,
+    build_inbox_queryset,
+    cached_inbox_tab_counts,
+    inbox_filter_options,
+    inbox_tab_counts,
+)
+
+
+class InboxCountsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='aprovador_fila', password='x')
+        cls.other = User.objects.create_user(username='outro_fila', password='x')
+        cls.group = Group.objects.create(name='Aprovadores fila teste')
+        cls.project = Project.objects.create(
+            name='Obra Fila', code='FILA-1', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31), is_active=True
+        )
+        cls.category = ProcessCategory.objects.create(code='contrato-fila', name='Contrato')
+        cls.flow = ApprovalFlowDefinition.objects.create(project=cls.project, category=cls.category)
+        cls.step = ApprovalStep.objects.create(flow=cls.flow, sequence=1, name='Engenharia')
+        cls.step2 = ApprovalStep.objects.create(flow=cls.flow, sequence=2, name='Diretoria')
+        ApprovalStepParticipant.objects.create(
+            step=cls.step, role=ParticipantRole.APPROVER, subject_kind=SubjectKind.USER, user=cls.user
+        )
+        ApprovalStepParticipant.objects.create(
+            step=cls.step2, role=ParticipantRole.APPROVER, subject_kind=SubjectKind.DJANGO_GROUP, django_group=cls.group
+        )
+
+        def process(status, step=None, initiated_by=None, title=''):
+            return ApprovalProcess.objects.create(
+                flow_definition=cls.flow,
+                project=cls.project,
+                category=cls.category,
+                status=status,
+                current_step=step,
+                initiated_by=initiated_by,
+                title=title,
+            )
+
+        for i in range(3):
+            process(ProcessStatus.AWAITING_STEP, cls.step, title=f'Pendente {i}')
+        cls.group_pending = process(ProcessStatus.AWAITING_STEP, cls.step2, title='Pendente grupo')
+        for i in range(2):
+            process(ProcessStatus.APPROVED, initiated_by=cls.other, title=f'Aprovado {i}')
+        process(ProcessStatus.REJECTED, initiated_by=cls.other, title='Reprovado')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counts_match_tab_querysets_in_one_aggregate(self):
+        with CaptureQueriesContext(connection) as ctx:
+            counts = inbox_tab_counts(self.user)
+        table = 'FROM ' + connection.ops.quote_name(ApprovalProcess._meta.db_table)
+        process_queries = [q for q in ctx.captured_queries if table in q['sql']]
+        self.assertEqual(len(process_queries), 1)
+        for tab in (TAB_PENDENTE, TAB_APROVADO, TAB_REPROVADO):
+            self.assertEqual(counts[tab], build_inbox_queryset(self.user, tab=tab).count(), tab)
+        # Participa da 1ª alçada: aprovados/reprovados envolvem-no pelo fluxo.
+        self.assertEqual(counts, {TAB_PENDENTE: 3, TAB_APROVADO: 2, TAB_REPROVADO: 1})
+
+    def test_cached_counts_skip_queries_until_invalidated_by_participant_write(self):
+        self.assertEqual(cached_inbox_tab_counts(self.other)[TAB_PENDENTE], 0)
+        # Só a leitura da versão (``InboxCacheVersion``).
+        with self.assertNumQueries(1):
+            cached_inbox_tab_counts(self.other)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ApprovalStepParticipant.objects.create(
+                step=self.step, role=ParticipantRole.APPROVER, subject_kind=SubjectKind.USER, user=self.other
+            )
+
+        self.assertEqual(cached_inbox_tab_counts(self.other)[TAB_PENDENTE], 3)
+
+    def test_group_membership_change_invalidates_counts(self):
+        self.assertEqual(cached_inbox_tab_counts(self.other)[TAB_PENDENTE], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.groups.add(self.group)
+        self.assertEqual(cached_inbox_tab_counts(self.other)[TAB_PENDENTE], 1)
+
+    def test_flow_write_invalidates_cached_filter_options(self):
+        options = inbox_filter_options(self.user)
+        self.assertEqual([p.pk for p in options['projects']], [self.project.pk])
+        self.assertEqual([c.pk for c in options['categories']], [self.category.pk])
+        with self.assertNumQueries(1):
+            inbox_filter_options(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProcessCategory.objects.filter(pk=self.category.pk).update(is_active=False)
+            self.flow.save()
+
+        self.assertEqual(inbox_filter_options(self.user)['categories'], [])
+
+    def test_rolled_back_write_keeps_snapshot(self):
+        cached_inbox_tab_counts(self.other)
+        with transaction.atomic():
+            self.other.groups.add(self.group)
+            transaction.set_rollback(True)
+        # A versão avança na transação da gravação: sem commit o snapshot anterior continua valendo.
+        self.assertEqual(cached_inbox_tab_counts(self.other)[TAB_PENDENTE], 0)
+
+    def test_version_lives_in_database(self):
+        cached_inbox_tab_counts(self.other)
+        ApprovalStepParticipant.objects.create(
+            step=self.step, role=ParticipantRole.APPROVER, subject_kind=SubjectKind.USER, user=self.other
+        )
+        self.assertGreaterEqual(InboxCacheVersion.objects.get().version, 1)
+        self.assertEqual(cached_inbox_tab_counts(self.other)[TAB_PENDENTE], 3)
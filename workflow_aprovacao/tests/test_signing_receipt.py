@@ -0,0 +1,119 @@
+"""
+Comprovante de assinatura armazenado: reaproveitado sem mudança, refeito quando o histórico muda.
+"""
+from __future__ import annotations
+
+import shutil
+import tempfile
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from core.models import Project
+from workflow_aprovacao.models import (
+    ApprovalFlowDefinition,
+    ApprovalHistoryEntry,
+    ApprovalProcess,
+    ApprovalStep,
+    HistoryAction,
+    ProcessCategory,
+    ProcessStatus,
+    SignatureReceiptArtifact,
+)
+from workflow_aprovacao.services import signing
+from workflow_aprovacao.services.signing import ensure_signature_receipt, render_process_signature_receipts
+
+_MEDIA = tempfile.mkdtemp(prefix='comprovante_test_')
+
+
+@override_settings(MEDIA_ROOT=_MEDIA)
+class SignatureReceiptArtifactTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(_MEDIA, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('assinante', password='x', first_name='Ana', last_name='Souza')
+        project = Project.objects.create(
+            name='Obra Comprovante', code='CMP-1', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31)
+        )
+        category = ProcessCategory.objects.create(code='contrato-cmp', name='Contrato')
+        flow = ApprovalFlowDefinition.objects.create(project=project, category=category)
+        cls.step = ApprovalStep.objects.create(flow=flow, sequence=1, name='Diretoria')
+        cls.process = ApprovalProcess.objects.create(
+            flow_definition=flow,
+            project=project,
+            category=category,
+            status=ProcessStatus.APPROVED,
+            title='Contrato 123',
+            initiated_by=cls.user,
+        )
+        ApprovalHistoryEntry.objects.create(
+            process=cls.process, actor=cls.user, action=HistoryAction.SUBMITTED, new_status=ProcessStatus.AWAITING_STEP
+        )
+        cls.final = ApprovalHistoryEntry.objects.create(
+            process=cls.process,
+            step=cls.step,
+            step_sequence_snapshot=1,
+            actor=cls.user,
+            action=HistoryAction.APPROVED_STEP,
+            previous_status=ProcessStatus.AWAITING_STEP,
+            new_status=ProcessStatus.APPROVED,
+            comment='De acordo.',
+        )
+
+    def _ensure(self, include_geolocation=False):
+        with mock.patch.object(
+            signing, 'render_signature_receipt_pdf', wraps=signing.render_signature_receipt_pdf
+        ) as render:
+            artifact = ensure_signature_receipt(self.process, include_geolocation=include_geolocation)
+        return artifact, render.call_count
+
+    def test_unchanged_history_reuses_stored_pdf(self):
+        first, renders = self._ensure()
+        self.assertEqual(renders, 1)
+        self.assertEqual(first.event_id, self.final.pk)
+        with first.file.open('rb') as fh:
+            self.assertTrue(fh.read().startswith(b'%PDF'))
+
+        second, renders = self._ensure()
+        self.assertEqual(renders, 0)
+        self.assertEqual((second.pk, second.file.name), (first.pk, first.file.name))
+
+        # Cada variante tem sua linha e seu arquivo.
+        geo, renders = self._ensure(include_geolocation=True)
+        self.assertEqual(renders, 1)
+        self.assertNotEqual(geo.pk, first.pk)
+        self.assertEqual(SignatureReceiptArtifact.objects.filter(process=self.process).count(), 2)
+
+    def test_changed_history_renders_again_and_drops_old_file(self):
+        first, _ = self._ensure()
+        old_name, old_fingerprint = first.file.name, first.source_fingerprint
+
+        ApprovalHistoryEntry.objects.filter(pk=self.final.pk).update(comment='De acordo, com ressalvas.')
+        second, renders = self._ensure()
+
+        self.assertEqual(renders, 1)
+        self.assertEqual(second.pk, first.pk)
+        self.assertNotEqual(second.source_fingerprint, old_fingerprint)
+        self.assertNotEqual(second.file.name, old_name)
+        self.assertFalse(default_storage.exists(old_name))
+        self.assertTrue(default_storage.exists(second.file.name))
+
+    def test_missing_file_renders_again(self):
+        first, _ = self._ensure()
+        default_storage.delete(first.file.name)
+        second, renders = self._ensure()
+        self.assertEqual(renders, 1)
+        self.assertTrue(default_storage.exists(second.file.name))
+
+    def test_render_process_signature_receipts_builds_both_variants(self):
+        self.assertEqual(render_process_signature_receipts(self.process.pk), 2)
+        with mock.patch.object(signing, 'render_signature_receipt_pdf') as render:
+            self.assertEqual(render_process_signature_receipts(self.process.pk), 2)
+        render.assert_not_called()
@@ -10,7 +10,7 @@ from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.db.models import Count
-from django.http import FileResponse, Http404, HttpResponseForbidden, HttpResponse, JsonResponse
+from django.http import FileResponse, Http404, HttpResponseForbidden, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, NoReverseMatch
 from django.utils.http import url_has_allowed_host_and_scheme
@@ -54,7 +54,6 @@ from workflow_aprovacao.models import (
     ProcessStatus,
     SyncStatus,
 )
-from workflow_aprovacao.querysets import processes_pending_for_user
 from workflow_aprovacao.services.backlog import dismiss_backlog, reopen_backlog, try_start_from_backlog
 from workflow_aprovacao.services.engine import ApprovalEngine
 from workflow_aprovacao.services.flow_config import (
@@ -68,7 +67,7 @@ from workflow_aprovacao.services.signing import (
     build_signature_evidence,
     build_final_signature_audit,
     latest_final_signature_event,
-    render_signature_receipt_pdf,
+    ensure_signature_receipt,
 )
 from workflow_aprovacao.services.share import build_process_share_payload
 from workflow_aprovacao.services.sienge_display import beautify_stored_summary_for_display, sienge_payload_display_rows
@@ -211,7 +210,9 @@ def _workflow_context(request, extra=None):
     pending_nav_count = 0
     external_signup_pending_count = 0
     if request.user.is_authenticated:
-        pending_nav_count = processes_pending_for_user(request.user).count()
+        from workflow_aprovacao.services.inbox import TAB_PENDENTE, cached_inbox_tab_counts
+
+        pending_nav_count = cached_inbox_tab_counts(request.user).get(TAB_PENDENTE, 0)
         if user_can_configure_workflow(request.user):
             external_signup_pending_count = ExternalParticipantSignupRequest.objects.filter(
                 status=ExternalSignupStatus.PENDING,
@@ -634,13 +635,17 @@ def process_signature_receipt_pdf(request, pk):
     event = latest_final_signature_event(process)
     if not event:
         raise Http404('Sem evento final de assinatura neste processo.')
-    pdf = render_signature_receipt_pdf(
-        process=process,
-        event=event,
+    artifact = ensure_signature_receipt(
+        process,
         include_geolocation=user_can_view_workflow_geolocation(request.user),
+        event=event,
+    )
+    response = FileResponse(
+        artifact.file.open('rb'),
+        content_type='application/pdf',
+        as_attachment=True,
+        filename=f'comprovante_processo_{process.pk}.pdf',
     )
-    response = HttpResponse(pdf, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="comprovante_processo_{process.pk}.pdf"'
     response['Cache-Control'] = 'private, no-store'
     return response
 